@@ -0,0 +1,92 @@
+"""Compares sync (thread pool) and async AbuseIPDB lookup throughput offline.
+
+Both paths hit a local fake AbuseIPDB server with a fixed per-request latency
+and the reputation cache disabled, so every lookup is an upstream round trip.
+The sync path is capped by `--workers` threads, mirroring the Python worker's
+thread count; the async path multiplexes `--concurrency` lookups on one loop.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from fake_abuseipdb import FakeAbuseIPDB  # noqa: E402
+
+from functions import abuseipdb_client, reputation_cache  # noqa: E402
+from functions.abuseipdb import check_ip, check_ip_async  # noqa: E402
+
+
+def _ips(count: int) -> list[str]:
+    return [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(count)]
+
+
+def bench_sync(ips: list[str], workers: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(check_ip, ips))
+    return time.perf_counter() - start
+
+
+def bench_async(ips: list[str], concurrency: int) -> float:
+    async def run() -> None:
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(ip: str) -> None:
+            async with limit:
+                await check_ip_async(ip)
+
+        try:
+            await asyncio.gather(*(one(ip) for ip in ips))
+        finally:
+            await abuseipdb_client.aclose()
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    return time.perf_counter() - start
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8, help="Sync worker threads")
+    parser.add_argument("--concurrency", type=int, default=64, help="Async in-flight")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Fake server latency"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    os.environ.setdefault("ABUSEIPDB_API_KEY", "benchmark")
+    reputation_cache.configure(reputation_cache.ReputationCache(max_entries=0))
+    ips = _ips(args.requests)
+
+    with FakeAbuseIPDB(latency=args.latency) as fake:
+        settings = abuseipdb_client.ClientSettings(
+            base_url=fake.base_url, pool_maxsize=max(args.workers, args.concurrency)
+        )
+        abuseipdb_client.configure(settings)
+
+        results = {
+            f"sync ({args.workers} threads)": bench_sync(ips, args.workers),
+            f"async ({args.concurrency} in flight)": bench_async(ips, args.concurrency),
+        }
+
+    print(f"{args.requests} lookups, {args.latency * 1000:.0f} ms upstream latency")
+    for name, elapsed in results.items():
+        print(f"  {name:<28} {elapsed:7.2f} s  {args.requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Measures the AbuseIPDB check tools' reply size and serialization cost per profile.
+
+For each upstream payload (a plain `check` result, and verbose ones for a
+few ``maxAgeInDays`` windows) and each output profile, prints the reply
+bytes the tool sends over MCP and the per-call cost of producing them:
+"legacy" is the old ``json.dumps`` of the whole result, "stdlib" and
+"orjson" are `Projection.apply` followed by `tool_args.dumps` with each
+encoder. The ``upstream`` column is the size of the AbuseIPDB response
+itself, which only ``verbose`` and ``maxAgeInDays`` change.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from fake_abuseipdb import fake_check_data  # noqa: E402
+
+from functions import abuseipdb_fields, tool_args  # noqa: E402
+
+_PROFILES = [*abuseipdb_fields.PROFILES, "fields=reports"]
+
+
+def _payloads() -> dict[str, dict[str, Any]]:
+    ip = "203.0.113.7"
+    payloads = {"plain": {"data": fake_check_data(ip)}}
+    for days in (7, 30, 90):
+        payloads[f"verbose/{days}d"] = {"data": fake_check_data(ip, days, True)}
+    return payloads
+
+
+def _projection(profile: str) -> abuseipdb_fields.Projection:
+    if profile.startswith("fields="):
+        return abuseipdb_fields.resolve(None, profile.partition("=")[2])
+    return abuseipdb_fields.resolve(profile, None)
+
+
+def _reply(projection: abuseipdb_fields.Projection, result: dict[str, Any]) -> str:
+    return tool_args.dumps(projection.apply(result))
+
+
+def _per_call_us(call: Callable[[], Any], number: int) -> float:
+    best = min(timeit.repeat(call, number=number, repeat=5))
+    return best / number * 1e6
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000, help="Calls per timing")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    fast = tool_args.orjson
+    print(
+        f"{'payload':<12} {'upstream':>9} {'profile':<15} {'bytes':>7} "
+        f"{'legacy us':>10} {'stdlib us':>10} {'orjson us':>10}"
+    )
+    for name, result in _payloads().items():
+        upstream = len(json.dumps(result).encode())
+        legacy_us = _per_call_us(partial(json.dumps, result), args.number)
+        for profile in _PROFILES:
+            reply = partial(_reply, _projection(profile), result)
+            size = len(reply().encode())
+            tool_args.orjson = None  # type: ignore[assignment]
+            stdlib_us = _per_call_us(reply, args.number)
+            tool_args.orjson = fast
+            orjson_us = _per_call_us(reply, args.number) if fast is not None else None
+            print(
+                f"{name:<12} {upstream:>9} {profile:<15} {size:>7} "
+                f"{legacy_us:>10.2f} {stdlib_us:>10.2f} "
+                + (f"{orjson_us:>10.2f}" if orjson_us is not None else f"{'n/a':>10}")
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Simulates scaled-out instances to measure the reputation cache's tiers.
+
+Each simulated instance has its own in-process `ReputationCache` (L1). With
+``--l2`` they share one `ReputationStore` (L2) on a `LocalBackend`, or on the
+configured Azure Storage account / Azurite with ``--azure``. Lookups follow
+a Zipf-like popularity curve over ``--ips`` addresses, are spread over the
+instances at random and go "upstream" (a sleep of ``--latency`` seconds) only
+on a miss in every tier. Prints hit ratios per tier, upstream calls and the
+write-behind counters, so runs with and without ``--l2`` can be compared.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from functions.blob_backend import AzureBlobBackend, LocalBackend  # noqa: E402
+from functions.reputation_cache import ReputationCache  # noqa: E402
+from functions.reputation_store import ReputationStore  # noqa: E402
+
+
+def _traffic(ips: int, lookups: int, skew: float, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(ips)]
+    population = [f"198.51.{rank // 256}.{rank % 256}" for rank in range(ips)]
+    return rng.choices(population, weights, k=lookups)
+
+
+def run(args: argparse.Namespace, root: str) -> dict[str, Any]:
+    store = None
+    if args.l2:
+        backend = AzureBlobBackend() if args.azure else LocalBackend(root)
+        store = ReputationStore(backend, flush_interval=0.05)
+    caches = [ReputationCache(l2=store) for _ in range(args.instances)]
+    upstream = 0
+
+    def load() -> dict[str, Any]:
+        nonlocal upstream
+        upstream += 1
+        time.sleep(args.latency)
+        return {"data": {"abuseConfidenceScore": upstream % 101}}
+
+    rng = random.Random(args.seed + 1)
+    start = time.perf_counter()
+    for ip in _traffic(args.ips, args.lookups, args.skew, args.seed):
+        rng.choice(caches).get_or_load((ip, 90, False), load)
+    elapsed = time.perf_counter() - start
+
+    totals: dict[str, float] = {}
+    for cache in caches:
+        for name, value in cache.stats().items():
+            totals[name] = totals.get(name, 0) + value
+    l1_hits = totals["hits"] + totals["stale_hits"]
+    l2_reads = totals["l2_hits"] + totals["l2_misses"] + totals["l2_errors"]
+    result = {
+        "l1 hit ratio": l1_hits / args.lookups,
+        "l2 hit ratio": totals["l2_hits"] / l2_reads if l2_reads else 0.0,
+        "upstream calls": upstream,
+        "ms per lookup": elapsed / args.lookups * 1000,
+    }
+    if store is not None:
+        store.shutdown()
+        result.update(store.stats())
+    return result
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--instances", type=int, default=20)
+    parser.add_argument("--ips", type=int, default=2000, help="Distinct addresses")
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument("--latency", type=float, default=0.0, help="Upstream seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--l2", action="store_true", help="Share an L2 store")
+    parser.add_argument(
+        "--azure",
+        action="store_true",
+        help="Put L2 in AzureWebJobsStorage (e.g. Azurite) instead of a temp dir",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as root:
+        result = run(args, root)
+    for name, value in result.items():
+        print(
+            f"{name:<16} {value:>10.3f}"
+            if isinstance(value, float)
+            else f"{name:<16} {value:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
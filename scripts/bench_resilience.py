@@ -0,0 +1,130 @@
+"""Measures the AbuseIPDB resilience layer against a misbehaving fake API.
+
+Runs ``--calls`` uncached `check_ip` lookups on ``--concurrency`` threads,
+each under a budget of ``--budget`` seconds, in two scenarios:
+
+* tail: ``--slow-rate`` of requests take ``--slow-latency`` seconds. Run
+  without and then with hedging at ``--percentile``; prints p50/p99 latency,
+  the hedge rate and the requests the API saw.
+* outage: every request takes ``--slow-latency`` seconds and then fails.
+  Run with the breaker effectively off and then on; prints latency, failed
+  lookups and the requests that still reached the API.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from bench_tools import ip_address, percentile  # noqa: E402
+from fake_abuseipdb import FakeAbuseIPDB  # noqa: E402
+
+from functions import (  # noqa: E402
+    abuseipdb_client,
+    rate_limiter,
+    reputation_cache,
+    resilience,
+)
+from functions.abuseipdb import check_ip  # noqa: E402
+
+
+def run(
+    args: argparse.Namespace, fake: FakeAbuseIPDB, hedger: resilience.Hedger
+) -> dict[str, Any]:
+    reputation_cache.configure(reputation_cache.ReputationCache(max_entries=0))
+    served = fake.requests_served
+    errors = 0
+
+    def lookup(i: int) -> float:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            with resilience.budget(args.budget):
+                check_ip(ip_address(i))
+        except Exception:
+            errors += 1
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = sorted(pool.map(lookup, range(args.calls)))
+    return {
+        "p50 ms": percentile(latencies, 50) * 1000,
+        "p99 ms": percentile(latencies, 99) * 1000,
+        "errors": errors,
+        "requests": fake.requests_served - served,
+        "hedge rate": hedger.rate(),
+    }
+
+
+def scenario(
+    args: argparse.Namespace, label: str, fake: FakeAbuseIPDB, **settings: Any
+) -> None:
+    abuseipdb_client.configure(
+        abuseipdb_client.ClientSettings(base_url=fake.base_url, max_retries=0)
+    )
+    for name, (breaker, hedger) in settings.items():
+        resilience.configure(breaker, hedger)
+        result = run(args, fake, hedger)
+        cells = "  ".join(
+            f"{key} {value:>8.2f}" if isinstance(value, float) else f"{key} {value:>5}"
+            for key, value in result.items()
+        )
+        print(f"{label:<7} {name:<12} {cells}")
+    abuseipdb_client.configure()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="Usual seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    parser.add_argument("--slow-latency", type=float, default=0.5)
+    parser.add_argument("--percentile", type=float, default=95)
+    parser.add_argument("--budget", type=float, default=2.0, help="Seconds per call")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    os.environ.setdefault("ABUSEIPDB_API_KEY", "benchmark")
+    # The real limiter would hold the run to AbuseIPDB's quota.
+    rate_limiter.configure(rate_limiter.RateLimiter(rate=1e9, burst=1_000_000_000))
+
+    def hedger(percentile: float = 0.0) -> resilience.Hedger:
+        return resilience.Hedger(percentile=percentile, min_delay=0.005)
+
+    with FakeAbuseIPDB(
+        latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency
+    ) as fake:
+        scenario(
+            args,
+            "tail",
+            fake,
+            unhedged=(resilience.CircuitBreaker(), hedger()),
+            hedged=(resilience.CircuitBreaker(), hedger(args.percentile)),
+        )
+    with FakeAbuseIPDB(error_rate=1.0, latency=args.slow_latency) as fake:
+        scenario(
+            args,
+            "outage",
+            fake,
+            no_breaker=(resilience.CircuitBreaker(min_calls=10**9), hedger()),
+            breaker=(resilience.CircuitBreaker(), hedger()),
+        )
+    rate_limiter.configure()
+    resilience.configure()
+    reputation_cache.configure()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Reports stored bytes and read latency for snippet compression codecs.
+
+Each corpus is saved through `snippet_store.write_snippet` with every codec
+into a `blob_backend.LocalBackend` in a temporary directory, then read back
+through the real read path (download chunks -> decompress -> incremental UTF-8
+decode) with the snippet cache disabled. Network time is excluded: the read
+numbers are the CPU cost per read, while the stored-bytes column is what
+transfer time scales with.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from functions import (  # noqa: E402
+    blob_backend,
+    snippet_cache,
+    snippet_codec,
+    snippet_store,
+)
+
+
+def _python_source(size: int) -> str:
+    parts: list[str] = []
+    total = 0
+    for path in sorted(Path(json.__file__).parent.parent.glob("*.py")):
+        text = path.read_text(encoding="utf-8", errors="replace")
+        parts.append(text)
+        total += len(text)
+        if total >= size:
+            break
+    return "".join(parts)[:size]
+
+
+def _logs(size: int) -> str:
+    rng = random.Random(1)
+    levels = ["INFO", "INFO", "INFO", "WARNING", "ERROR"]
+    lines: list[str] = []
+    total = 0
+    while total < size:
+        line = (
+            f"2026-10-18T12:{rng.randrange(60):02d}:{rng.randrange(60):02d}Z "
+            f"{rng.choice(levels)} worker-{rng.randrange(8)} "
+            f"request_id={rng.getrandbits(64):016x} path=/api/v2/check "
+            f"ip=203.0.113.{rng.randrange(256)} status={rng.choice([200, 200, 429])} "
+            f"duration_ms={rng.randrange(5, 400)}\n"
+        )
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)[:size]
+
+
+def _json_records(size: int) -> str:
+    rng = random.Random(2)
+    records: list[dict[str, object]] = []
+    total = 0
+    while total < size:
+        record: dict[str, object] = {
+            "ipAddress": f"198.51.100.{rng.randrange(256)}",
+            "abuseConfidenceScore": rng.randrange(101),
+            "countryCode": rng.choice(["US", "DE", "NL", "SG"]),
+            "isp": "Example Hosting LLC",
+            "totalReports": rng.randrange(500),
+        }
+        records.append(record)
+        total += len(json.dumps(record, indent=2)) + 4
+    return json.dumps(records, indent=2)[:size]
+
+
+def _random_text(size: int) -> str:
+    return os.urandom(size // 2).hex()[:size]
+
+
+CORPORA = {
+    "python source": _python_source,
+    "service logs": _logs,
+    "json records": _json_records,
+    "random hex": _random_text,
+}
+
+
+def bench(content: str, codec: str, reads: int, root: Path) -> tuple[int, float, float]:
+    os.environ["SNIPPET_COMPRESSION"] = codec
+    backend = blob_backend.LocalBackend(root / codec)
+    blob_backend.configure(backend)
+
+    start = time.perf_counter()
+    snippet_store.write_snippet("bench", content)
+    write_ms = (time.perf_counter() - start) * 1000
+    digest = snippet_store.content_hash(content.encode("utf-8"))
+    stored = backend.head("snippet-objects", snippet_store.object_name(digest)).size
+
+    timings = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        assert snippet_store.read_snippet("bench") == content
+        timings.append((time.perf_counter() - start) * 1000)
+    return stored, write_ms, statistics.median(timings)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=lambda v: [int(s) for s in v.split(",")],
+        default=[16 * 1024, 256 * 1024, 2 * 1024 * 1024],
+        help="Comma-separated corpus sizes in bytes",
+    )
+    parser.add_argument("--reads", type=int, default=20)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    os.environ["SNIPPET_MAX_RESPONSE_BYTES"] = str(max(args.sizes) * 2)
+    os.environ["SNIPPET_COMPRESSION_MIN_BYTES"] = "0"
+    snippet_cache.configure(snippet_cache.SnippetCache(max_bytes=0))
+    codecs = [snippet_codec.IDENTITY, snippet_codec.GZIP]
+    if snippet_codec.zstandard is not None:
+        codecs.append(snippet_codec.ZSTD)
+
+    header = f"{'corpus':<14} {'size':>9} {'codec':<9} {'stored':>9} {'ratio':>6}"
+    print(header + f" {'write ms':>9} {'read ms':>8}")
+    with tempfile.TemporaryDirectory() as root:
+        for name, make in CORPORA.items():
+            for size in args.sizes:
+                content = make(size)
+                for codec in codecs:
+                    stored, write_ms, read_ms = bench(
+                        content, codec, args.reads, Path(root)
+                    )
+                    print(
+                        f"{name:<14} {len(content):>9} {codec:<9} {stored:>9} "
+                        f"{len(content) / stored:>6.1f} {write_ms:>9.2f} "
+                        f"{read_ms:>8.2f}"
+                    )
+    blob_backend.configure()
+
+
+if __name__ == "__main__":
+    main()
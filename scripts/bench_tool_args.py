@@ -0,0 +1,134 @@
+"""Measures per-call MCP context parsing cost before and after `tool_args`.
+
+"legacy" is the hand-written preamble every tool used to run: `json.loads`,
+type checks, then `arguments.get` and per-field checks. "stdlib" and "orjson"
+are `ToolSchema.parse` with each JSON parser. Each payload mirrors a real
+tool call; `save_snippets` also decodes its JSON-encoded ``snippets``
+argument, as the tool does.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import function_app  # noqa: E402
+from functions import tool_args  # noqa: E402
+
+
+def _legacy(context: Any) -> dict[str, Any] | str:
+    if isinstance(context, str):
+        try:
+            content = json.loads(context)
+        except json.JSONDecodeError:
+            return "Invalid request payload"
+    elif isinstance(context, dict):
+        content = context
+    else:
+        return "Invalid request payload"
+    arguments = content.get("arguments")
+    if not isinstance(arguments, dict):
+        return "Invalid arguments"
+    return arguments
+
+
+def _legacy_get_snippet(context: str) -> Any:
+    arguments = _legacy(context)
+    assert isinstance(arguments, dict)
+    offset = arguments.get("offset")
+    return arguments.get("snippetname"), None if offset is None else int(offset)
+
+
+def _legacy_save_snippet(context: str) -> Any:
+    arguments = _legacy(context)
+    assert isinstance(arguments, dict)
+    return arguments.get("snippetname"), arguments.get("snippet")
+
+
+def _legacy_save_snippets(context: str) -> Any:
+    arguments = _legacy(context)
+    assert isinstance(arguments, dict)
+    return json.loads(arguments["snippets"])
+
+
+def _compiled(properties: list[Any]) -> Callable[[str], Any]:
+    schema = tool_args.compile_schema(properties)
+
+    def parse(context: str) -> Any:
+        arguments = schema.parse(context)
+        snippets = arguments.string("snippets")
+        if snippets is not None:
+            return tool_args.loads(snippets)
+        return arguments.values, arguments.integer("offset")
+
+    return parse
+
+
+def _payloads(snippet_bytes: int) -> dict[str, tuple[str, Callable[[str], Any], Any]]:
+    text = ("def handler(event):\n    return event['id']\n" * snippet_bytes)[
+        :snippet_bytes
+    ]
+    batch = [{"snippetname": f"s{i}", "snippet": text[:1024]} for i in range(50)]
+    return {
+        "get_snippet": (
+            json.dumps({"arguments": {"snippetname": "handler", "offset": "128"}}),
+            _legacy_get_snippet,
+            function_app.tool_properties_get_snippets_object,
+        ),
+        "save_snippet": (
+            json.dumps({"arguments": {"snippetname": "handler", "snippet": text}}),
+            _legacy_save_snippet,
+            function_app.tool_properties_save_snippets_object,
+        ),
+        "save_snippets": (
+            json.dumps({"arguments": {"snippets": json.dumps(batch)}}),
+            _legacy_save_snippets,
+            function_app.tool_properties_save_snippets_batch_object,
+        ),
+    }
+
+
+def _per_call_us(parse: Callable[[str], Any], context: str, number: int) -> float:
+    best = min(timeit.repeat(lambda: parse(context), number=number, repeat=5))
+    return best / number * 1e6
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000, help="Calls per timing")
+    parser.add_argument(
+        "--snippet-bytes", type=int, default=64 * 1024, help="save_snippet size"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    fast = tool_args.orjson
+    print(f"{'payload':<14} {'bytes':>8} {'legacy us':>10} {'stdlib us':>10} ", end="")
+    print(f"{'orjson us':>10}")
+    for name, (context, legacy, properties) in _payloads(args.snippet_bytes).items():
+        compiled = _compiled(properties)
+        legacy_us = _per_call_us(legacy, context, args.number)
+        tool_args.orjson = None  # type: ignore[assignment]
+        stdlib_us = _per_call_us(compiled, context, args.number)
+        tool_args.orjson = fast
+        orjson_us = (
+            _per_call_us(compiled, context, args.number) if fast is not None else None
+        )
+        print(
+            f"{name:<14} {len(context):>8} {legacy_us:>10.2f} {stdlib_us:>10.2f} "
+            + (f"{orjson_us:>10.2f}" if orjson_us is not None else f"{'n/a':>10}")
+        )
+
+
+if __name__ == "__main__":
+    main()
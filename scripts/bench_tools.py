@@ -0,0 +1,522 @@
+"""Offline benchmark suite for the MCP tool handlers.
+
+Each case drives a decorated handler, exactly as the trigger would call it,
+with a realistic JSON context. Local stand-ins replace Azure and AbuseIPDB:
+
+- snippet tools use `blob_backend.LocalBackend` rooted on ``/dev/shm``
+  (RAM-backed) when it exists, or in a temporary directory otherwise;
+- AbuseIPDB tools call `fake_abuseipdb.FakeAbuseIPDB`, whose per-request
+  ``--latency`` and ``--error-rate`` are configurable.
+
+Sync handlers run on ``--concurrency`` threads, as the Python worker runs
+them. Async handlers run ``--concurrency`` calls at a time on one event loop.
+For each case the suite reports throughput, p50/p95/p99 latency, and the
+dependency calls (blob, AbuseIPDB) per invocation as seen by `tool_metrics`.
+Every run is written to a JSON file (``artifacts/bench`` by default). Pass an
+earlier file to ``--compare`` to print the change per case::
+
+    python scripts/bench_tools.py --calls 500 --compare artifacts/bench/<old>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from fake_abuseipdb import FakeAbuseIPDB  # noqa: E402
+
+from functions import (  # noqa: E402
+    abuseipdb_client,
+    blob_backend,
+    block_cache,
+    rate_limiter,
+    report_pipeline,
+    reputation_cache,
+    snippet_cache,
+    snippet_index,
+    snippet_store,
+    tool_metrics,
+)
+from functions.abuseipdb import (  # noqa: E402
+    abuseipdb_check_block,
+    abuseipdb_check_ip,
+    abuseipdb_check_ips,
+    abuseipdb_report_ip,
+    abuseipdb_report_status,
+    check_block,
+)
+from functions.get_snippet import get_snippet  # noqa: E402
+from functions.get_snippets import get_snippets  # noqa: E402
+from functions.hello_mcp import hello_mcp  # noqa: E402
+from functions.list_snippets import list_snippets  # noqa: E402
+from functions.save_snippet import save_snippet  # noqa: E402
+from functions.save_snippets import save_snippets  # noqa: E402
+from functions.search_snippets import search_snippets  # noqa: E402
+
+# Replies the handlers return instead of raising when a call fails.
+ERROR_PREFIXES = ("Error", "Invalid", "No ", "Too many", "Deadline")
+SEEDED_SNIPPETS = 200
+
+
+@dataclass
+class Case:
+    name: str
+    call: Callable[[int], Any]
+    setup: Callable[[], None] = lambda: None
+
+
+@dataclass
+class CaseResult:
+    name: str
+    calls: int
+    errors: int
+    seconds: float
+    throughput: float
+    latency_ms: dict[str, float] = field(default_factory=dict)
+    # Per invocation, from `tool_metrics`: dependency calls, time and operations.
+    dependencies: dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[
+        max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    ]
+
+
+def summarize(
+    name: str, latencies: list[float], errors: int, seconds: float
+) -> CaseResult:
+    """Throughput and latency percentiles (ms) for one case."""
+    ordered = sorted(latencies)
+    return CaseResult(
+        name,
+        len(ordered),
+        errors,
+        seconds,
+        len(ordered) / seconds if seconds else 0.0,
+        {
+            "mean": 1000 * sum(ordered) / len(ordered) if ordered else 0.0,
+            "p50": 1000 * percentile(ordered, 50),
+            "p95": 1000 * percentile(ordered, 95),
+            "p99": 1000 * percentile(ordered, 99),
+            "max": 1000 * (ordered[-1] if ordered else 0.0),
+        },
+    )
+
+
+def dependency_profile(exporter: tool_metrics.MemoryExporter) -> dict[str, Any]:
+    """Average dependency calls made per tool invocation since the last clear."""
+    tool_metrics.flush()
+    invocations = exporter.tools()
+    count = len(invocations) or 1
+    operations = Counter(
+        f"{call.dependency} {call.operation}" for call in exporter.dependencies()
+    )
+    return {
+        "calls": sum(s.dependency_calls for s in invocations) / count,
+        "ms": 1000 * sum(s.dependency_seconds for s in invocations) / count,
+        "operations": {op: n / count for op, n in sorted(operations.items())},
+    }
+
+
+def is_error(result: Any) -> bool:
+    return isinstance(result, str) and result.startswith(ERROR_PREFIXES)
+
+
+def run_sync(case: Case, calls: int, concurrency: int) -> CaseResult:
+    def one(i: int) -> tuple[float, bool]:
+        start = time.perf_counter()
+        try:
+            failed = is_error(case.call(i))
+        except Exception:
+            failed = True
+        return time.perf_counter() - start, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(calls)))
+    elapsed = time.perf_counter() - start
+    return summarize(
+        case.name, [t for t, _ in outcomes], sum(f for _, f in outcomes), elapsed
+    )
+
+
+def run_async(case: Case, calls: int, concurrency: int) -> CaseResult:
+    async def run() -> tuple[list[tuple[float, bool]], float]:
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(i: int) -> tuple[float, bool]:
+            async with limit:
+                start = time.perf_counter()
+                try:
+                    failed = is_error(await case.call(i))
+                except Exception:
+                    failed = True
+                return time.perf_counter() - start, failed
+
+        start = time.perf_counter()
+        try:
+            outcomes = await asyncio.gather(*(one(i) for i in range(calls)))
+        finally:
+            await abuseipdb_client.aclose()
+        return outcomes, time.perf_counter() - start
+
+    outcomes, elapsed = asyncio.run(run())
+    return summarize(
+        case.name, [t for t, _ in outcomes], sum(f for _, f in outcomes), elapsed
+    )
+
+
+class _Out:
+    """Stand-in for the `func.Out` queue binding of `abuseipdb_report_ip`."""
+
+    def set(self, value: str) -> None:
+        pass
+
+
+def _ctx(**arguments: Any) -> str:
+    return json.dumps({"arguments": arguments})
+
+
+def snippet_text(size: int, salt: int) -> str:
+    line = f"def handler_{salt}(event, context):\n    return event['id']\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def ip_address(i: int) -> str:
+    return f"185.220.{i // 256 % 256}.{i % 256}"
+
+
+def _no_cache() -> None:
+    snippet_cache.configure(snippet_cache.SnippetCache(max_bytes=0))
+
+
+def _no_reputation_cache() -> None:
+    reputation_cache.configure(reputation_cache.ReputationCache(max_entries=0))
+
+
+def _no_block_cache() -> None:
+    block_cache.configure(block_cache.BlockCache(max_entries=0))
+
+
+def _checked_block() -> None:
+    # Every ip_address(i % 256) falls inside this block.
+    _no_reputation_cache()
+    block_cache.configure()
+    check_block("185.220.0.0/24")
+
+
+def build_cases(snippet_bytes: int, batch: int) -> list[Case]:
+    def names(i: int) -> list[str]:
+        return [f"bench/{(i + k) % SEEDED_SNIPPETS:04d}" for k in range(batch)]
+
+    seeded_report = report_pipeline.QueuedReport.create("198.51.100.1", "18", "bench")
+
+    def seed_report() -> None:
+        report_pipeline.record_status(
+            report_pipeline.get_store(), seeded_report, "queued"
+        )
+
+    return [
+        Case("hello_mcp", lambda i: hello_mcp("{}")),
+        Case(
+            "save_snippet",
+            lambda i: save_snippet(
+                _ctx(snippetname=f"new/{i:06d}", snippet=snippet_text(snippet_bytes, i))
+            ),
+        ),
+        Case(
+            "get_snippet (cached)",
+            lambda i: get_snippet(_ctx(snippetname=names(i % 16)[0])),
+            snippet_cache.configure,
+        ),
+        Case(
+            "get_snippet (no cache)",
+            lambda i: get_snippet(_ctx(snippetname=names(i)[0])),
+            _no_cache,
+        ),
+        Case(
+            "get_snippet (page)",
+            lambda i: get_snippet(_ctx(snippetname=names(i)[0], offset=64, length=512)),
+            _no_cache,
+        ),
+        Case(
+            "get_snippets",
+            lambda i: get_snippets(_ctx(snippetnames=names(i))),
+            _no_cache,
+        ),
+        Case(
+            "save_snippets",
+            lambda i: save_snippets(
+                _ctx(
+                    snippets=json.dumps(
+                        [
+                            {
+                                "snippetname": n,
+                                "snippet": snippet_text(snippet_bytes, i),
+                            }
+                            for n in names(i)
+                        ]
+                    )
+                )
+            ),
+        ),
+        Case("list_snippets", lambda i: list_snippets(_ctx(prefix="bench/", limit=50))),
+        Case(
+            "search_snippets",
+            lambda i: search_snippets(_ctx(query=f"handler_{i % 50}")),
+        ),
+        Case(
+            "abuseipdb_check_ip",
+            lambda i: abuseipdb_check_ip(_ctx(ip=ip_address(i))),
+            _no_reputation_cache,
+        ),
+        Case(
+            "abuseipdb_check_ip (cached)",
+            lambda i: abuseipdb_check_ip(_ctx(ip=ip_address(i % 16))),
+            reputation_cache.configure,
+        ),
+        Case(
+            "abuseipdb_check_ip (in block)",
+            lambda i: abuseipdb_check_ip(_ctx(ip=ip_address(i % 256))),
+            _checked_block,
+        ),
+        Case(
+            "abuseipdb_check_ip (local)",
+            lambda i: abuseipdb_check_ip(_ctx(ip=f"10.{i // 256 % 256}.{i % 256}.1")),
+            _no_reputation_cache,
+        ),
+        Case(
+            "abuseipdb_check_block",
+            lambda i: abuseipdb_check_block(_ctx(network=f"{ip_address(i * 256)}/24")),
+            _no_block_cache,
+        ),
+        Case(
+            "abuseipdb_check_ips",
+            lambda i: abuseipdb_check_ips(
+                _ctx(ips=",".join(ip_address(i * batch + k) for k in range(batch)))
+            ),
+            _no_reputation_cache,
+        ),
+        Case(
+            "abuseipdb_report_ip",
+            lambda i: abuseipdb_report_ip(
+                _ctx(ip=ip_address(i), categories="18,22", comment="SSH brute force"),
+                _Out(),
+            ),
+        ),
+        Case(
+            "abuseipdb_report_status",
+            lambda i: abuseipdb_report_status(_ctx(reportId=seeded_report.reportId)),
+            seed_report,
+        ),
+    ]
+
+
+def seed_snippets(snippet_bytes: int) -> None:
+    snippet_store.write_many(
+        {
+            f"bench/{i:04d}": snippet_text(snippet_bytes, i % 50)
+            for i in range(SEEDED_SNIPPETS)
+        }
+    )
+
+
+def _commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def write_results(
+    path: Path, suite: str, parameters: dict[str, Any], results: Iterable[CaseResult]
+) -> None:
+    """Store a run as JSON, with enough context to compare it with later runs."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "suite": suite,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": [asdict(result) for result in results],
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+
+
+def report(results: Iterable[CaseResult], baseline: dict[str, Any] | None) -> str:
+    previous = {r["name"]: r for r in (baseline or {}).get("results", [])}
+    header = (
+        f"{'case':<30} {'calls':>6} {'errors':>6} {'req/s':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'deps':>5} {'dep ms':>7}"
+    )
+    if previous:
+        header += f" {'req/s Δ':>9} {'p95 Δ':>8}"
+    lines = [header]
+    for result in results:
+        latency = result.latency_ms
+        line = (
+            f"{result.name:<30} {result.calls:>6} {result.errors:>6} "
+            f"{result.throughput:>9.1f} {latency['p50']:>8.2f} "
+            f"{latency['p95']:>8.2f} {latency['p99']:>8.2f} "
+            f"{result.dependencies.get('calls', 0):>5.1f} "
+            f"{result.dependencies.get('ms', 0):>7.2f}"
+        )
+        old = previous.get(result.name)
+        if old and old["throughput"] and old["latency_ms"]["p95"]:
+            line += (
+                f" {100 * (result.throughput / old['throughput'] - 1):>+8.1f}%"
+                f" {100 * (latency['p95'] / old['latency_ms']['p95'] - 1):>+7.1f}%"
+            )
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200, help="Calls per case")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--cases", help="Comma-separated case names to run (default: all)"
+    )
+    parser.add_argument("--snippet-bytes", type=int, default=4096)
+    parser.add_argument("--batch", type=int, default=10, help="Batch tool size")
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="Fake AbuseIPDB latency (s)"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=ROOT / "artifacts" / "bench",
+        help="Results file, or a directory to write a timestamped file into",
+    )
+    parser.add_argument("--compare", type=Path, help="Earlier results to diff")
+    return parser.parse_args()
+
+
+@contextmanager
+def offline_services(
+    latency: float, error_rate: float, pool_maxsize: int, snippet_bytes: int
+) -> Iterator[FakeAbuseIPDB]:
+    """Point the tools at local stand-ins for Azure and AbuseIPDB.
+
+    Snippets live in a `LocalBackend` temp directory (on ``/dev/shm`` when it
+    exists) seeded with `SEEDED_SNIPPETS` snippets, and AbuseIPDB calls go to
+    a `FakeAbuseIPDB`. Shared clients are reset on exit.
+    """
+    os.environ.setdefault("ABUSEIPDB_API_KEY", "benchmark")
+    os.environ["ABUSEIPDB_REPORT_STATUS_STORE"] = "memory"
+    # The real limiter would hold the run to AbuseIPDB's quota.
+    rate_limiter.configure(rate_limiter.RateLimiter(rate=1e9, burst=1_000_000_000))
+    report_pipeline.configure()
+
+    shm = Path("/dev/shm")
+    with (
+        tempfile.TemporaryDirectory(dir=shm if shm.is_dir() else None) as root,
+        FakeAbuseIPDB(latency=latency, error_rate=error_rate) as fake,
+    ):
+        blob_backend.configure(blob_backend.LocalBackend(Path(root)))
+        snippet_index.configure()
+        abuseipdb_client.configure(
+            abuseipdb_client.ClientSettings(
+                base_url=fake.base_url, pool_maxsize=pool_maxsize
+            )
+        )
+        seed_snippets(snippet_bytes)
+        try:
+            yield fake
+        finally:
+            abuseipdb_client.configure()
+            blob_backend.configure()
+            rate_limiter.configure()
+            report_pipeline.configure()
+
+
+def main() -> None:
+    args = parse_args()
+    os.environ["ABUSEIPDB_REPORT_QUEUE"] = "false"
+
+    cases = build_cases(args.snippet_bytes, args.batch)
+    if args.cases:
+        wanted = {name.strip() for name in args.cases.split(",")}
+        cases = [case for case in cases if case.name in wanted]
+
+    results: list[CaseResult] = []
+    # abuseipdb_check_ips fans each call out over its own threads.
+    pool_maxsize = args.concurrency * max(args.batch, 2)
+    metrics = tool_metrics.MemoryExporter()
+    tool_metrics.configure(metrics, interval=3600, max_pending=10_000_000)
+    with offline_services(
+        args.latency, args.error_rate, pool_maxsize, args.snippet_bytes
+    ):
+        for case in cases:
+            case.setup()
+            warmup = case.call(0)  # also tells sync from async handlers
+            if asyncio.iscoroutine(warmup):
+                asyncio.run(_drain(warmup))
+            tool_metrics.flush()
+            metrics.clear()
+            if asyncio.iscoroutine(warmup):
+                results.append(run_async(case, args.calls, args.concurrency))
+            else:
+                results.append(run_sync(case, args.calls, args.concurrency))
+            results[-1].dependencies = dependency_profile(metrics)
+    tool_metrics.configure()
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(report(results, baseline))
+    output = args.output
+    if output.suffix != ".json":
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = output / f"tools-{stamp}.json"
+    parameters = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("output", "compare")
+    }
+    write_results(output, "tools", parameters, results)
+    print("Results written to", output)
+
+
+async def _drain(result: Awaitable[Any]) -> None:
+    try:
+        await result
+    finally:
+        await abuseipdb_client.aclose()
+
+
+if __name__ == "__main__":
+    main()
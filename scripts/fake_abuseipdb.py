@@ -0,0 +1,250 @@
+"""Local fake AbuseIPDB API for benchmarks and load tests.
+
+Serves the `check`, `check-block`, `report`, `bulk-report` and `blacklist`
+endpoints with
+canned payloads, an injectable per-request latency and an optional error
+rate, so the tools can be exercised offline by pointing `ABUSEIPDB_BASE_URL`
+at it. A ``slow_rate`` share of requests can take ``slow_latency`` instead,
+to give the latency distribution a tail.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import itertools
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from urllib.parse import parse_qs, urlparse
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once; the default backlog of 5
+    # would turn the listener itself into the bottleneck.
+    request_queue_size = 1024
+
+    latency: float
+    error_rate: float
+    slow_rate: float
+    slow_latency: float
+    requests_served: int
+    lock: threading.Lock
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive is what the pooled clients are meant to exploit.
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY, Nagle
+    # plus delayed ACKs add ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    server: _Server
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+    def _reply(self, status: int, body: object) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-RateLimit-Limit", "1000")
+        self.send_header("X-RateLimit-Remaining", "999")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _serve(self, params: dict[str, list[str]]) -> None:
+        server = self.server
+        with server.lock:
+            server.requests_served += 1
+        if server.slow_rate and random.random() < server.slow_rate:
+            time.sleep(server.slow_latency)
+        elif server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            self._reply(503, {"errors": [{"detail": "Injected failure"}]})
+            return
+
+        path = urlparse(self.path).path.rstrip("/")
+        if path.endswith("/bulk-report"):
+            self._reply(200, {"data": {"invalidReports": []}})
+        elif path.endswith("/check-block"):
+            network = params.get("network", ["192.0.2.0/24"])[0]
+            self._reply(200, {"data": fake_block_data(network)})
+        elif path.endswith("/check"):
+            ip = params.get("ipAddress", ["0.0.0.0"])[0]
+            max_age = int(params.get("maxAgeInDays", ["30"])[0])
+            self._reply(
+                200, {"data": fake_check_data(ip, max_age, "verbose" in params)}
+            )
+        elif path.endswith("/report"):
+            ip = params.get("ip", ["0.0.0.0"])[0]
+            self._reply(200, {"data": {"ipAddress": ip, "abuseConfidenceScore": 52}})
+        elif path.endswith("/blacklist"):
+            self._reply(200, {"data": [fake_check_data("203.0.113.7")]})
+        else:
+            self._reply(404, {"errors": [{"detail": "Unknown endpoint"}]})
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._serve(parse_qs(urlparse(self.path).query, keep_blank_values=True))
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        self._serve(parse_qs(self.rfile.read(length).decode(), keep_blank_values=True))
+
+
+_LAST_REPORTED_AT = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+
+def fake_report(day: int) -> dict[str, object]:
+    """One entry of a verbose `check` payload's ``reports``, ``day`` days old."""
+    return {
+        "reportedAt": (_LAST_REPORTED_AT - timedelta(days=day)).isoformat(),
+        "comment": "SSH brute force attempts against port 22 from this address",
+        "categories": [18, 22],
+        "reporterId": 1000 + day,
+        "reporterCountryCode": "DE",
+        "reporterCountryName": "Germany",
+    }
+
+
+def fake_check_data(
+    ip: str, max_age_in_days: int = 30, verbose: bool = False
+) -> dict[str, object]:
+    """Return a realistic `check` payload for ``ip``.
+
+    Verbose payloads carry one report every third day of the window, like a
+    persistently reported address.
+    """
+    data: dict[str, object] = {
+        "ipAddress": ip,
+        "isPublic": True,
+        "ipVersion": 6 if ":" in ip else 4,
+        "isWhitelisted": False,
+        "abuseConfidenceScore": sum(ip.encode()) % 101,
+        "countryCode": "US",
+        "usageType": "Data Center/Web Hosting/Transit",
+        "isp": "Example Hosting LLC",
+        "domain": "example.net",
+        "hostnames": [],
+        "isTor": False,
+        "totalReports": 17,
+        "numDistinctUsers": 9,
+        "lastReportedAt": _LAST_REPORTED_AT.isoformat(),
+    }
+    if verbose:
+        data["countryName"] = "United States of America"
+        data["reports"] = [fake_report(day) for day in range(0, max_age_in_days, 3)]
+    return data
+
+
+def fake_block_data(network: str) -> dict[str, object]:
+    """Return a `check-block` payload reporting every 16th address of ``network``."""
+    block = ipaddress.ip_network(network, strict=False)
+    hosts = itertools.islice(block, 0, 256, 16)
+    return {
+        "networkAddress": str(block.network_address),
+        "netmask": str(block.netmask),
+        "minAddress": str(block.network_address),
+        "maxAddress": str(block.broadcast_address),
+        "numPossibleHosts": block.num_addresses,
+        "addressSpaceDesc": "Internet",
+        "reportedAddress": [
+            {
+                "ipAddress": str(host),
+                "numReports": 3,
+                "mostRecentReport": _LAST_REPORTED_AT.isoformat(),
+                "abuseConfidenceScore": sum(str(host).encode()) % 101,
+                "countryCode": "US",
+            }
+            for host in hosts
+        ],
+    }
+
+
+class FakeAbuseIPDB:
+    """Run the fake API on a background thread (usable as a context manager)."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 1.0,
+    ) -> None:
+        self._server = _Server((host, port), _Handler)
+        self._server.latency = latency
+        self._server.error_rate = error_rate
+        self._server.slow_rate = slow_rate
+        self._server.slow_latency = slow_latency
+        self._server.requests_served = 0
+        self._server.lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-abuseipdb", daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}/api/v2"
+
+    @property
+    def requests_served(self) -> int:
+        return self._server.requests_served
+
+    def start(self) -> "FakeAbuseIPDB":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeAbuseIPDB":
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Seconds per request"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake = FakeAbuseIPDB(
+        args.host,
+        args.port,
+        args.latency,
+        args.error_rate,
+        args.slow_rate,
+        args.slow_latency,
+    )
+    print("Serving fake AbuseIPDB at", fake.base_url)
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
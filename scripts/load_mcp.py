@@ -0,0 +1,392 @@
+"""Concurrent load generator for the MCP tools, run through `mcp_host.McpHost`.
+
+Traffic is either a synthetic mix of tool calls (``--mix``, weighted, with
+generated arguments) or recorded calls replayed in order (``--traffic``: a
+JSONL file of ``call_tool`` payloads, ``{"toolName": ..., "arguments": ...}``).
+It runs offline against the same stand-ins as `bench_tools.py`, with queued
+AbuseIPDB reports delivered to the report worker.
+
+Load is stepped up until the tools saturate:
+
+- ``--rate 25,50,100`` is open-loop: calls arrive on schedule whether or not
+  earlier ones finished, and latency is measured from the scheduled arrival,
+  so queueing delay counts. A step saturates when achieved throughput falls
+  below 90% of the offered rate, or arrivals are dropped because
+  ``--max-in-flight`` calls are already running;
+- ``--concurrency 1,2,4,8`` is closed-loop: N callers issue calls back to
+  back. A step saturates when throughput grows less than 10% over the
+  previous step.
+
+Either way a step whose p95 exceeds ``--slo-p95-ms`` is saturated too.
+Results are written as JSON next to the benchmark results::
+
+    python scripts/load_mcp.py --rate 50,100,200,400 --duration 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from bench_tools import (
+    ROOT,
+    SEEDED_SNIPPETS,
+    CaseResult,
+    ip_address,
+    offline_services,
+    snippet_text,
+    summarize,
+    write_results,
+)
+from mcp_host import McpHost
+
+# Read-heavy, as MCP clients mostly look things up.
+DEFAULT_MIX = (
+    "get_snippet=30,abuseipdb_check_ip=30,search_snippets=10,save_snippet=10,"
+    "list_snippets=5,get_snippets=5,abuseipdb_check_ips=5,abuseipdb_report_ip=5"
+)
+# Throughput below this share of the offered rate means the step saturated.
+RATE_SHORTFALL = 0.9
+# A closed-loop step that adds less throughput than this has hit the knee.
+CONCURRENCY_GAIN = 1.1
+
+
+@dataclass
+class CallSpec:
+    tool: str
+    arguments: dict[str, Any]
+
+
+@dataclass
+class StepResult(CaseResult):
+    load: float = 0.0
+    dropped: int = 0
+    saturated: bool = False
+    tools: list[CaseResult] = field(default_factory=list)
+
+
+Outcome = tuple[str, float, bool]
+
+
+def argument_generators(
+    snippet_bytes: int, batch: int
+) -> dict[str, Callable[[int], dict[str, Any]]]:
+    """Arguments for the ``i``-th synthetic call, per tool."""
+
+    def name(i: int) -> str:
+        return f"bench/{i % SEEDED_SNIPPETS:04d}"
+
+    return {
+        "hello_mcp": lambda i: {},
+        "get_snippet": lambda i: {"snippetname": name(i)},
+        "get_snippets": lambda i: {
+            "snippetnames": ",".join(name(i + k) for k in range(batch))
+        },
+        "save_snippet": lambda i: {
+            "snippetname": f"load/{i:06d}",
+            "snippet": snippet_text(snippet_bytes, i),
+        },
+        "list_snippets": lambda i: {"prefix": "bench/", "limit": 50},
+        "search_snippets": lambda i: {"query": f"handler_{i % 50}"},
+        "abuseipdb_check_ip": lambda i: {"ip": ip_address(i)},
+        "abuseipdb_check_block": lambda i: {"network": f"{ip_address(i)}/24"},
+        "abuseipdb_check_ips": lambda i: {
+            "ips": ",".join(ip_address(i * batch + k) for k in range(batch))
+        },
+        "abuseipdb_report_ip": lambda i: {
+            "ip": ip_address(i),
+            "categories": "18,22",
+            "comment": "SSH brute force",
+        },
+    }
+
+
+def synthetic_traffic(
+    mix: str, snippet_bytes: int, batch: int, seed: int
+) -> Callable[[int], CallSpec]:
+    """Pick tools at random in the ``tool=weight`` proportions of ``mix``."""
+    generators = argument_generators(snippet_bytes, batch)
+    weights: dict[str, float] = {}
+    for item in mix.split(","):
+        tool, _, weight = item.partition("=")
+        if tool.strip() not in generators:
+            raise SystemExit(
+                f"No argument generator for {tool.strip()!r}; "
+                f"choose from {sorted(generators)}"
+            )
+        weights[tool.strip()] = float(weight or 1)
+    rng = random.Random(seed)
+    tools, cumulative = list(weights), list(itertools.accumulate(weights.values()))
+
+    def next_call(i: int) -> CallSpec:
+        tool = rng.choices(tools, cum_weights=cumulative)[0]
+        return CallSpec(tool, generators[tool](i))
+
+    return next_call
+
+
+def recorded_traffic(path: Path) -> Callable[[int], CallSpec]:
+    """Replay ``call_tool`` payloads from a JSONL file, cycling at the end."""
+    calls = []
+    for line in path.read_text().splitlines():
+        if not line.strip():
+            continue
+        message = json.loads(line)
+        if message.get("messageType", "call_tool") == "call_tool":
+            calls.append(CallSpec(message["toolName"], message.get("arguments") or {}))
+    if not calls:
+        raise SystemExit(f"No call_tool payloads in {path}")
+    return lambda i: calls[i % len(calls)]
+
+
+async def closed_loop(
+    host: McpHost,
+    next_call: Callable[[int], CallSpec],
+    concurrency: int,
+    duration: float,
+) -> tuple[list[Outcome], float, int]:
+    loop = asyncio.get_running_loop()
+    counter = itertools.count()
+    outcomes: list[Outcome] = []
+    start = loop.time()
+    deadline = start + duration
+
+    async def caller() -> None:
+        while loop.time() < deadline:
+            spec = next_call(next(counter))
+            began = loop.time()
+            call = await host.call_tool(spec.tool, spec.arguments)
+            outcomes.append((spec.tool, loop.time() - began, call.is_error))
+
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return outcomes, loop.time() - start, 0
+
+
+async def open_loop(
+    host: McpHost,
+    next_call: Callable[[int], CallSpec],
+    rate: float,
+    duration: float,
+    max_in_flight: int,
+    poisson: bool,
+    rng: random.Random,
+) -> tuple[list[Outcome], float, int]:
+    loop = asyncio.get_running_loop()
+    outcomes: list[Outcome] = []
+    in_flight: set[asyncio.Task[None]] = set()
+    dropped = 0
+
+    async def one(spec: CallSpec, scheduled: float) -> None:
+        call = await host.call_tool(spec.tool, spec.arguments)
+        # From the scheduled arrival: time spent waiting to start counts.
+        outcomes.append((spec.tool, loop.time() - scheduled, call.is_error))
+
+    start = arrival = loop.time()
+    for i in itertools.count():
+        if arrival >= start + duration:
+            break
+        delay = arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            dropped += 1
+        else:
+            task = loop.create_task(one(next_call(i), arrival))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        arrival += rng.expovariate(rate) if poisson else 1 / rate
+    await asyncio.gather(*in_flight)
+    return outcomes, loop.time() - start, dropped
+
+
+def summarize_step(
+    label: str, load: float, outcomes: list[Outcome], seconds: float, dropped: int
+) -> StepResult:
+    overall = summarize(
+        label, [t for _, t, _ in outcomes], sum(e for _, _, e in outcomes), seconds
+    )
+    by_tool: defaultdict[str, list[Outcome]] = defaultdict(list)
+    for outcome in outcomes:
+        by_tool[outcome[0]].append(outcome)
+    return StepResult(
+        **vars(overall),
+        load=load,
+        dropped=dropped,
+        tools=[
+            summarize(
+                tool, [t for _, t, _ in calls], sum(e for _, _, e in calls), seconds
+            )
+            for tool, calls in sorted(by_tool.items())
+        ],
+    )
+
+
+def mark_saturation(
+    steps: Sequence[StepResult], open_loop: bool, slo_p95_ms: float | None
+) -> StepResult | None:
+    """Flag saturated steps and return the first one, if any."""
+    first = None
+    for previous, step in zip([None, *steps], steps):
+        if open_loop:
+            step.saturated = (
+                step.throughput < RATE_SHORTFALL * step.load or step.dropped > 0
+            )
+        elif previous is not None:
+            step.saturated = step.throughput < CONCURRENCY_GAIN * previous.throughput
+        if slo_p95_ms is not None and step.latency_ms["p95"] > slo_p95_ms:
+            step.saturated = True
+        if step.saturated and first is None:
+            first = step
+    return first
+
+
+def report(steps: Iterable[StepResult], saturation: StepResult | None) -> str:
+    lines = [
+        f"{'step':<18} {'calls':>6} {'errors':>6} {'dropped':>7} {'req/s':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>9}"
+    ]
+    steps = list(steps)
+    for step in steps:
+        latency = step.latency_ms
+        lines.append(
+            f"{step.name:<18} {step.calls:>6} {step.errors:>6} {step.dropped:>7} "
+            f"{step.throughput:>9.1f} {latency['p50']:>8.2f} {latency['p95']:>8.2f} "
+            f"{latency['p99']:>9.2f}" + ("  saturated" if step.saturated else "")
+        )
+    sustained = [s for s in steps if not s.saturated]
+    lines.append("")
+    if saturation is None:
+        lines.append("No saturation within the tested load.")
+    else:
+        lines.append(
+            f"Saturates at {saturation.name}: {saturation.throughput:.1f} req/s, "
+            f"p95 {saturation.latency_ms['p95']:.1f} ms"
+        )
+    if sustained:
+        best = max(sustained, key=lambda s: s.throughput)
+        lines.append(f"Best sustained step: {best.name} at {best.throughput:.1f} req/s")
+    return "\n".join(lines)
+
+
+def parse_levels(value: str) -> list[float]:
+    return [float(level) for level in value.split(",") if level.strip()]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rate", type=parse_levels, help="Open-loop calls/s per step")
+    load.add_argument(
+        "--concurrency",
+        type=parse_levels,
+        help="Closed-loop callers per step (default 1,2,4,8,16,32)",
+    )
+    traffic = parser.add_mutually_exclusive_group()
+    traffic.add_argument("--mix", default=DEFAULT_MIX, help="tool=weight,...")
+    traffic.add_argument("--traffic", type=Path, help="JSONL of call_tool payloads")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per step")
+    parser.add_argument(
+        "--poisson", action="store_true", help="Random (Poisson) open-loop arrivals"
+    )
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--slo-p95-ms", type=float, help="p95 that counts as saturated")
+    parser.add_argument("--threads", type=int, help="Thread pool size for sync tools")
+    parser.add_argument("--snippet-bytes", type=int, default=4096)
+    parser.add_argument("--batch", type=int, default=10, help="Batch tool size")
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="Fake AbuseIPDB latency (s)"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=ROOT / "artifacts" / "bench",
+        help="Results file, or a directory to write a timestamped file into",
+    )
+    return parser.parse_args()
+
+
+async def run(
+    args: argparse.Namespace, next_call: Callable[[int], CallSpec]
+) -> tuple[list[StepResult], dict[str, int]]:
+    rng = random.Random(args.seed)
+    steps = []
+    async with McpHost(threads=args.threads) as host:
+        # One call per tool first, so imports and clients are warm.
+        for spec in {next_call(i).tool: next_call(i) for i in range(50)}.values():
+            await host.call_tool(spec.tool, spec.arguments)
+        for level in args.rate or args.concurrency:
+            if args.rate:
+                label = f"rate={level:g}/s"
+                outcomes, seconds, dropped = await open_loop(
+                    host,
+                    next_call,
+                    level,
+                    args.duration,
+                    args.max_in_flight,
+                    args.poisson,
+                    rng,
+                )
+            else:
+                label = f"concurrency={level:g}"
+                outcomes, seconds, dropped = await closed_loop(
+                    host, next_call, int(level), args.duration
+                )
+            steps.append(summarize_step(label, level, outcomes, seconds, dropped))
+            print(f"{label}: {steps[-1].throughput:.1f} req/s", flush=True)
+        await host.drain()
+        deliveries = dict(host.deliveries)
+    return steps, deliveries
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.rate and not args.concurrency:
+        args.concurrency = [1, 2, 4, 8, 16, 32]
+    os.environ["ABUSEIPDB_REPORT_QUEUE"] = "true"
+    os.environ.setdefault("ABUSEIPDB_BULK_REPORT_MAX_DELAY", "1")
+
+    if args.traffic:
+        next_call = recorded_traffic(args.traffic)
+    else:
+        next_call = synthetic_traffic(
+            args.mix, args.snippet_bytes, args.batch, args.seed
+        )
+    peak = int(max(args.rate or args.concurrency))
+    pool_maxsize = min(peak, args.max_in_flight) * max(args.batch, 2)
+    with offline_services(
+        args.latency, args.error_rate, pool_maxsize, args.snippet_bytes
+    ):
+        steps, deliveries = asyncio.run(run(args, next_call))
+
+    saturation = mark_saturation(steps, bool(args.rate), args.slo_p95_ms)
+    print()
+    print(report(steps, saturation))
+    print("Queued deliveries:", deliveries)
+
+    output = args.output
+    if output.suffix != ".json":
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = output / f"load-{stamp}.json"
+    parameters = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+        if key != "output"
+    }
+    write_results(output, "load", parameters, steps)
+    print("Results written to", output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""In-process stand-in for the MCP extension host.
+
+Discovers the MCP tools from ``app.get_functions()`` (as
+`pack_and_validate.py` does) and dispatches ``call_tool`` requests to the
+decorated functions the way the Python worker would:
+
+- async functions run on the host's event loop, and sync functions run on a
+  thread pool (``--threads``, or the worker's default size);
+- the trigger argument gets the same JSON context the extension sends;
+- other bindings are emulated with a `BindingStore`. Blob inputs are read
+  from it, with ``{mcptoolargs.<name>}`` paths filled from the call's
+  arguments. Output values are written once the function returns, as the
+  worker does;
+- messages set on a queue output binding are delivered to the app's
+  queue-triggered function for that queue, in the background. A delivery
+  that raises is retried up to ``max_dequeue_count`` times and then moved
+  to ``<queue>-poison``.
+
+Nothing here talks to Azure; point the tools at local stand-ins first (see
+`bench_tools.offline_services`)::
+
+    python scripts/mcp_host.py --offline list
+    python scripts/mcp_host.py --offline call get_snippet \\
+        '{"snippetname": "bench/0001"}'
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Callable
+
+import azure.functions as func
+from azure.functions.decorators.core import BindingDirection
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from bench_tools import is_error, offline_services  # noqa: E402
+
+from functions import abuseipdb_client  # noqa: E402
+
+MCP_TRIGGER = "mcpToolTrigger"
+QUEUE_TRIGGER = "queueTrigger"
+# Binding expressions in blob paths, e.g. "snippets/{mcptoolargs.snippetname}.json".
+_PATH_EXPRESSION = re.compile(r"\{(?:mcptoolargs\.)?(\w+)\}")
+
+
+@dataclass
+class Tool:
+    name: str
+    description: str
+    properties: list[dict[str, str]]
+    function: Callable[..., Any]
+    trigger_arg: str
+    bindings: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.function)
+
+    def input_schema(self) -> dict[str, Any]:
+        """The tool's arguments as the JSON schema MCP clients are shown."""
+        return {
+            "type": "object",
+            "properties": {
+                prop["propertyName"]: {
+                    "type": prop["propertyType"],
+                    "description": prop["description"],
+                }
+                for prop in self.properties
+            },
+        }
+
+
+@dataclass
+class ToolCall:
+    tool: str
+    text: str
+    is_error: bool
+    seconds: float
+
+
+class BindingError(RuntimeError):
+    """A binding could not be resolved for an invocation."""
+
+
+class BindingStore:
+    """Blobs and queue messages read and written through emulated bindings."""
+
+    def __init__(self) -> None:
+        self.blobs: dict[str, str | bytes] = {}
+        self.queues: defaultdict[str, list[str]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def read_blob(self, path: str) -> str | bytes | None:
+        with self._lock:
+            return self.blobs.get(path)
+
+    def write_blob(self, path: str, value: str | bytes) -> None:
+        with self._lock:
+            self.blobs[path] = value
+
+    def enqueue(self, queue: str, message: str) -> None:
+        with self._lock:
+            self.queues[queue].append(message)
+
+
+class _Out(func.Out[Any]):
+    def __init__(self) -> None:
+        self._value: Any = None
+
+    def set(self, val: Any) -> None:
+        self._value = val
+
+    def get(self) -> Any:
+        return self._value
+
+
+def resolve_path(template: str, arguments: dict[str, Any]) -> str:
+    """Fill ``{mcptoolargs.<name>}`` (or ``{<name>}``) from ``arguments``."""
+
+    def value(match: re.Match[str]) -> str:
+        name = match.group(1)
+        if arguments.get(name) in (None, ""):
+            raise BindingError(f"No value for binding expression '{match.group(0)}'")
+        return str(arguments[name])
+
+    return _PATH_EXPRESSION.sub(value, template)
+
+
+def load_app(source: Path = ROOT / "src") -> func.FunctionApp:
+    """Import ``function_app`` from ``source`` and return its app."""
+    sys.path.insert(0, str(source))
+    import function_app
+
+    return function_app.app
+
+
+class McpHost:
+    """Dispatch MCP tool calls to an app's functions in this process.
+
+    Use as an async context manager; leaving it waits for queued deliveries
+    and shuts the thread pool down.
+    """
+
+    def __init__(
+        self,
+        app: func.FunctionApp | None = None,
+        store: BindingStore | None = None,
+        threads: int | None = None,
+        deliver_queues: bool = True,
+        max_dequeue_count: int = 5,
+    ) -> None:
+        self.store = store or BindingStore()
+        self.deliver_queues = deliver_queues
+        self.max_dequeue_count = max_dequeue_count
+        self.tools: dict[str, Tool] = {}
+        self.queue_triggers: dict[str, Callable[..., Any]] = {}
+        self.deliveries = {"delivered": 0, "retried": 0, "poisoned": 0}
+        self._executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="mcp-host"
+        )
+        self._pending: set[asyncio.Task[None]] = set()
+        self._discover(app or load_app())
+
+    def _discover(self, app: func.FunctionApp) -> None:
+        for function in app.get_functions():
+            trigger = function.get_trigger()
+            if trigger is None:
+                continue
+            settings = trigger.get_dict_repr()
+            bindings = [
+                binding.get_dict_repr()
+                for binding in function.get_bindings()
+                if binding is not trigger
+            ]
+            if settings["type"] == MCP_TRIGGER:
+                self.tools[settings["toolName"]] = Tool(
+                    settings["toolName"],
+                    settings.get("description", ""),
+                    json.loads(settings.get("toolProperties") or "[]"),
+                    function.get_user_function(),
+                    settings["name"],
+                    bindings,
+                )
+            elif settings["type"] == QUEUE_TRIGGER:
+                self.queue_triggers[settings["queueName"]] = partial(
+                    _call_queue_trigger, function.get_user_function(), settings["name"]
+                )
+
+    def list_tools(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": tool.name,
+                "description": tool.description,
+                "inputSchema": tool.input_schema(),
+            }
+            for tool in self.tools.values()
+        ]
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> ToolCall:
+        """Invoke tool ``name``; failures come back as ``is_error`` results."""
+        start = time.perf_counter()
+        tool = self.tools.get(name)
+        if tool is None:
+            return ToolCall(name, f"Unknown tool '{name}'", True, 0.0)
+        try:
+            inputs, outputs = self._bind(tool, arguments)
+            context = json.dumps({"name": name, "arguments": arguments})
+            call = partial(tool.function, **{tool.trigger_arg: context}, **inputs)
+            if tool.is_async:
+                result = await call()
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, call)
+            self._flush_outputs(tool, arguments, outputs)
+        except Exception as exc:
+            return ToolCall(
+                name, f"{type(exc).__name__}: {exc}", True, time.perf_counter() - start
+            )
+        text = result if isinstance(result, str) else json.dumps(result)
+        return ToolCall(name, text, is_error(text), time.perf_counter() - start)
+
+    async def handle(self, message: dict[str, Any]) -> dict[str, Any]:
+        """Answer a ``list_tools`` or ``call_tool`` webhook payload."""
+        kind = message.get("messageType")
+        if kind == "list_tools":
+            return {"tools": self.list_tools()}
+        if kind != "call_tool":
+            raise ValueError(f"Unsupported messageType {kind!r}")
+        call = await self.call_tool(
+            str(message.get("toolName")), message.get("arguments") or {}
+        )
+        return {
+            "content": [{"type": "text", "text": call.text}],
+            "isError": call.is_error,
+        }
+
+    def _bind(
+        self, tool: Tool, arguments: dict[str, Any]
+    ) -> tuple[dict[str, Any], dict[str, _Out]]:
+        inputs: dict[str, Any] = {}
+        outputs: dict[str, _Out] = {}
+        for binding in tool.bindings:
+            name = binding["name"]
+            if binding["direction"] == BindingDirection.OUT:
+                outputs[name] = inputs[name] = _Out()
+            elif binding["type"] == "blob":
+                value = self.store.read_blob(resolve_path(binding["path"], arguments))
+                if isinstance(value, str) and binding.get("dataType") == "binary":
+                    value = value.encode()
+                elif isinstance(value, bytes) and binding.get("dataType") != "binary":
+                    value = value.decode()
+                inputs[name] = value
+            else:
+                raise BindingError(
+                    f"Unsupported input binding type {binding['type']!r}"
+                )
+        return inputs, outputs
+
+    def _flush_outputs(
+        self, tool: Tool, arguments: dict[str, Any], outputs: dict[str, _Out]
+    ) -> None:
+        for binding in tool.bindings:
+            out = outputs.get(binding["name"])
+            if out is None or out.get() is None:
+                continue
+            value = out.get()
+            if binding["type"] == "blob":
+                self.store.write_blob(resolve_path(binding["path"], arguments), value)
+            elif binding["type"] == "queue":
+                self._enqueue(binding["queueName"], value)
+            else:
+                raise BindingError(
+                    f"Unsupported output binding type {binding['type']!r}"
+                )
+
+    def _enqueue(self, queue: str, message: str | bytes) -> None:
+        body = message if isinstance(message, str) else message.decode()
+        trigger = self.queue_triggers.get(queue) if self.deliver_queues else None
+        if trigger is None:
+            self.store.enqueue(queue, body)
+            return
+        task = asyncio.get_running_loop().create_task(self._deliver(queue, body))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _deliver(self, queue: str, body: str) -> None:
+        trigger = self.queue_triggers[queue]
+        for attempt in range(1, self.max_dequeue_count + 1):
+            try:
+                await trigger(func.QueueMessage(id=str(uuid.uuid4()), body=body))
+            except Exception:
+                self.deliveries["retried"] += attempt < self.max_dequeue_count
+                continue
+            self.deliveries["delivered"] += 1
+            return
+        self.deliveries["poisoned"] += 1
+        self.store.enqueue(f"{queue}-poison", body)
+
+    async def drain(self) -> None:
+        """Wait for queued deliveries, including ones they enqueue."""
+        while self._pending:
+            await asyncio.gather(*self._pending)
+
+    async def aclose(self) -> None:
+        await self.drain()
+        self._executor.shutdown(wait=True)
+        await abuseipdb_client.aclose()
+
+    async def __aenter__(self) -> McpHost:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+
+async def _call_queue_trigger(
+    function: Callable[..., Any], arg_name: str, message: func.QueueMessage
+) -> None:
+    if inspect.iscoroutinefunction(function):
+        await function(**{arg_name: message})
+    else:
+        await asyncio.to_thread(function, **{arg_name: message})
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Use the benchmark stand-ins for Azure Storage and AbuseIPDB",
+    )
+    parser.add_argument("--threads", type=int, help="Thread pool size for sync tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Print the discovered tools")
+    call = commands.add_parser("call", help="Call one tool and print its reply")
+    call.add_argument("tool")
+    call.add_argument("arguments", nargs="?", default="{}", help="JSON object")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with McpHost(threads=args.threads) as host:
+        if args.command == "list":
+            reply = await host.handle({"messageType": "list_tools"})
+        else:
+            reply = await host.handle(
+                {
+                    "messageType": "call_tool",
+                    "toolName": args.tool,
+                    "arguments": json.loads(args.arguments),
+                }
+            )
+        print(json.dumps(reply, indent=2))
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.offline:
+        asyncio.run(run(args))
+        return
+    with offline_services(
+        latency=0.0, error_rate=0.0, pool_maxsize=10, snippet_bytes=1024
+    ):
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,14 +9,31 @@ import sys
 from pathlib import Path
 from typing import Iterable
 
+from profile_startup import measure_import_time, report
+
 EXPECTED_FUNCTIONS = {
     "hello_mcp",
     "get_snippet",
+    "get_snippets",
     "save_snippet",
+    "save_snippets",
+    "list_snippets",
+    "search_snippets",
+    "snippet_gc",
     "abuseipdb_check_ip",
+    "abuseipdb_check_ips",
+    "abuseipdb_check_block",
     "abuseipdb_report_ip",
+    "abuseipdb_refresh_blacklist",
+    "abuseipdb_report_worker",
+    "abuseipdb_report_status",
 }
 
+# Cold `import function_app` budget. Measured at ~150-200 ms once the HTTP
+# clients became lazy (~400 ms before), so this leaves headroom for noise
+# while still catching a heavy dependency creeping back into import time.
+DEFAULT_IMPORT_BUDGET_MS = 350.0
+
 
 def run(cmd: list[str], cwd: Path) -> subprocess.CompletedProcess[str]:
     """Run a subprocess command in the given directory and return the result."""
@@ -98,6 +115,17 @@ def validate_function_names(source_dir: Path, expected: Iterable[str]) -> set[st
     return names
 
 
+def check_import_budget(source_dir: Path, budget_ms: float, runs: int) -> float:
+    """Fail if a cold import of `function_app` takes longer than ``budget_ms``."""
+    profile = measure_import_time(source_dir, runs)
+    if profile.total_ms > budget_ms:
+        raise RuntimeError(
+            f"function_app import took {profile.total_ms:.1f} ms, over the "
+            f"{budget_ms:.0f} ms budget. Slowest imports:\n{report(profile, 15)}"
+        )
+    return profile.total_ms
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument(
@@ -115,6 +143,18 @@ def parse_args() -> argparse.Namespace:
             "'src.zip' will be written under it."
         ),
     )
+    parser.add_argument(
+        "--import-budget-ms",
+        type=float,
+        default=DEFAULT_IMPORT_BUDGET_MS,
+        help="Fail if a cold `import function_app` takes longer (0 disables)",
+    )
+    parser.add_argument(
+        "--import-runs",
+        type=int,
+        default=3,
+        help="Cold imports to time; the fastest is compared with the budget",
+    )
     return parser.parse_args()
 
 
@@ -123,6 +163,18 @@ def main() -> None:
 
     require_tool("func")
 
+    if args.import_budget_ms > 0:
+        try:
+            import_ms = check_import_budget(
+                args.source, args.import_budget_ms, args.import_runs
+            )
+        except RuntimeError as exc:
+            sys.exit(f"Import-time budget exceeded: {exc}")
+        print(
+            f"function_app import: {import_ms:.1f} ms "
+            f"(budget {args.import_budget_ms:.0f} ms)"
+        )
+
     package = pack_functions(args.source, args.output)
     try:
         names = validate_function_names(args.source, EXPECTED_FUNCTIONS)
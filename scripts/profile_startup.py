@@ -0,0 +1,180 @@
+"""Profiles a cold import of `function_app`: per-module import time and memory.
+
+Each measurement runs in a fresh interpreter, as a cold Functions worker
+would. Import times come from ``python -X importtime``, and the total is the
+best of ``--runs`` runs to damp scheduler noise. Memory is measured in a
+separate run under `tracemalloc`, because tracing slows imports down. It is
+the memory still allocated by each module's code once the import finishes,
+grouped by top-level package (or by module for the app's own ``functions``).
+
+    python scripts/profile_startup.py --source src --top 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Printed as JSON by the memory run, which executes inside the app's source dir.
+_MEMORY_PROBE = """
+import json, os, sys, tracemalloc
+tracemalloc.start()
+import function_app
+snapshot = tracemalloc.take_snapshot()
+_, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+owners = {}
+for name, module in list(sys.modules.items()):
+    path = getattr(module, "__file__", None)
+    if path:
+        owners[os.path.abspath(path)] = name
+sizes = {}
+for stat in snapshot.statistics("filename"):
+    path = os.path.abspath(stat.traceback[0].filename)
+    name = owners.get(path)
+    if name is None:
+        continue
+    head, _, rest = name.partition(".")
+    group = f"{head}.{rest.split('.')[0]}" if head == "functions" and rest else head
+    sizes[group] = sizes.get(group, 0) + stat.size
+print(json.dumps({"peak": peak, "modules": sizes}))
+"""
+
+
+@dataclass
+class ImportTiming:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int = 0
+
+
+@dataclass
+class StartupProfile:
+    total_ms: float
+    runs_ms: list[float]
+    imports: list[ImportTiming]
+    peak_bytes: int = 0
+    memory: dict[str, int] = field(default_factory=dict)
+
+
+def _interpreter(source: Path, args: list[str]) -> subprocess.CompletedProcess[str]:
+    result = subprocess.run(
+        [sys.executable, *args],
+        cwd=source,
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing function_app failed:\n{result.stderr}")
+    return result
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """Parse ``-X importtime`` lines into timings, in the order reported."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings.append(
+            ImportTiming(name.strip(), int(self_us), int(cumulative_us), depth)
+        )
+    return timings
+
+
+def _subtree(timings: list[ImportTiming], root: str) -> list[ImportTiming]:
+    """``root`` and the imports nested under it (children are listed first)."""
+    end = max(i for i, t in enumerate(timings) if t.name == root and t.depth == 0)
+    start = end
+    while start > 0 and timings[start - 1].depth > 0:
+        start -= 1
+    return timings[start : end + 1]
+
+
+def measure_import_time(source: Path, runs: int = 3) -> StartupProfile:
+    """Import `function_app` ``runs`` times in fresh interpreters."""
+    best: list[ImportTiming] = []
+    totals: list[float] = []
+    for _ in range(runs):
+        result = _interpreter(source, ["-X", "importtime", "-c", "import function_app"])
+        imports = _subtree(parse_importtime(result.stderr), "function_app")
+        totals.append(imports[-1].cumulative_us / 1000)
+        if not best or totals[-1] == min(totals):
+            best = imports
+    return StartupProfile(min(totals), totals, best)
+
+
+def measure_startup(source: Path, runs: int = 3) -> StartupProfile:
+    """`measure_import_time` plus a memory run under `tracemalloc`."""
+    profile = measure_import_time(source, runs)
+    memory = json.loads(_interpreter(source, ["-c", _MEMORY_PROBE]).stdout)
+    profile.peak_bytes = memory["peak"]
+    profile.memory = memory["modules"]
+    return profile
+
+
+def report(profile: StartupProfile, top: int) -> str:
+    runs = ", ".join(f"{ms:.0f}" for ms in profile.runs_ms)
+    lines = [f"function_app import: {profile.total_ms:.1f} ms (runs: {runs} ms)"]
+    lines.append("")
+    lines.append(f"{'module':<48} {'self ms':>8} {'cumul ms':>9}")
+    slowest = sorted(profile.imports, key=lambda t: t.cumulative_us, reverse=True)
+    for timing in slowest[:top]:
+        lines.append(
+            f"{timing.name:<48} {timing.self_us / 1000:>8.1f} "
+            f"{timing.cumulative_us / 1000:>9.1f}"
+        )
+    if profile.memory:
+        lines.append("")
+        lines.append(
+            f"tracemalloc peak during import: {profile.peak_bytes / 1024:.0f} KiB"
+        )
+        lines.append(f"{'package':<48} {'retained KiB':>12}")
+        largest = sorted(profile.memory.items(), key=lambda kv: kv[1], reverse=True)
+        for name, size in largest[:top]:
+            lines.append(f"{name:<48} {size / 1024:>12.0f}")
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--source",
+        type=Path,
+        default=Path("src"),
+        help="Path to the Functions app source directory",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Timed cold imports")
+    parser.add_argument("--top", type=int, default=20, help="Modules to list")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    profile = measure_startup(args.source, args.runs)
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "totalMs": profile.total_ms,
+                    "runsMs": profile.runs_ms,
+                    "imports": [vars(t) for t in profile.imports],
+                    "peakBytes": profile.peak_bytes,
+                    "memory": profile.memory,
+                }
+            )
+        )
+    else:
+        print(report(profile, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Rebuilds the snippet index used by `list_snippets` and `search_snippets`.
+
+`save_snippet` keeps the index up to date, so this is only needed to backfill
+snippets saved before the index existed, to repair entries a failed update
+missed, or after changing `SNIPPET_INDEX_SHARDS`. It reads every snippet, so
+run it against the app's storage account from a machine with access, e.g.::
+
+    AzureWebJobsStorage="<connection string>" python scripts/rebuild_snippet_index.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from functions import snippet_index, snippet_store  # noqa: E402
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    # Index snippets of any size, not just ones get_snippet would return whole.
+    os.environ.setdefault("SNIPPET_MAX_RESPONSE_BYTES", str(1 << 40))
+    start = time.perf_counter()
+    indexed = snippet_index.rebuild(snippet_store.iter_snippets())
+    print(
+        f"Indexed {indexed} snippets into {snippet_index.shard_count()} shards "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
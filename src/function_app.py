@@ -10,12 +10,46 @@ app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 # Constants for the Azure Blob Storage container, file, and blob path
 _SNIPPET_NAME_PROPERTY_NAME = "snippetname"
 _SNIPPET_PROPERTY_NAME = "snippet"
-_BLOB_PATH = "snippets/{mcptoolargs." + _SNIPPET_NAME_PROPERTY_NAME + "}.json"
+_SNIPPET_OFFSET_PROPERTY_NAME = "offset"
+_SNIPPET_LENGTH_PROPERTY_NAME = "length"
+# Batch tools: a list of names, and a list of name/content objects
+_SNIPPET_NAMES_PROPERTY_NAME = _SNIPPET_NAME_PROPERTY_NAME + "s"
+_SNIPPETS_PROPERTY_NAME = _SNIPPET_PROPERTY_NAME + "s"
+# list_snippets / search_snippets
+_SNIPPET_PREFIX_PROPERTY_NAME = "prefix"
+_SNIPPET_QUERY_PROPERTY_NAME = "query"
+_SNIPPET_LIMIT_PROPERTY_NAME = "limit"
+_SNIPPET_CURSOR_PROPERTY_NAME = "cursor"
+_SNIPPET_CONTAINER = "snippets"
+# Content-addressed snippet bodies, one blob per SHA-256 of the content.
+_SNIPPET_OBJECT_CONTAINER = "snippet-objects"
+# Sharded name/token index used by list_snippets and search_snippets.
+_SNIPPET_INDEX_CONTAINER = "snippet-index"
+_BLOB_PATH = (
+    _SNIPPET_CONTAINER + "/{mcptoolargs." + _SNIPPET_NAME_PROPERTY_NAME + "}.json"
+)
 
 # AbuseIPDB tool property names
 _ABUSEIPDB_IP_PROPERTY_NAME = "ip"
+_ABUSEIPDB_IPS_PROPERTY_NAME = "ips"
+_ABUSEIPDB_NETWORK_PROPERTY_NAME = "network"
 _ABUSEIPDB_CATEGORIES_PROPERTY_NAME = "categories"
 _ABUSEIPDB_COMMENT_PROPERTY_NAME = "comment"
+_ABUSEIPDB_REPORT_ID_PROPERTY_NAME = "reportId"
+# check_ip / check_ips: response projection and upstream request options
+_ABUSEIPDB_PROFILE_PROPERTY_NAME = "profile"
+_ABUSEIPDB_FIELDS_PROPERTY_NAME = "fields"
+_ABUSEIPDB_MAX_AGE_PROPERTY_NAME = "maxAgeInDays"
+_ABUSEIPDB_VERBOSE_PROPERTY_NAME = "verbose"
+
+# Storage queue feeding the bulk-report worker
+_ABUSEIPDB_REPORT_QUEUE_NAME = "abuseipdb-reports"
+
+# Shared snapshot of the AbuseIPDB blacklist index (container/blob)
+_ABUSEIPDB_BLACKLIST_BLOB_PATH = "abuseipdb/blacklist.idx"
+
+# Operator allowlist of CIDRs answered locally by check_ip (container/blob)
+_ABUSEIPDB_ALLOWLIST_BLOB_PATH = "abuseipdb/allowlist.txt"
 
 
 @dataclass
@@ -39,13 +73,124 @@ tool_properties_save_snippets_object: List[ToolProperty] = [
 ]
 
 tool_properties_get_snippets_object: List[ToolProperty] = [
-    ToolProperty(_SNIPPET_NAME_PROPERTY_NAME, "string", "The name of the snippet.")
+    ToolProperty(_SNIPPET_NAME_PROPERTY_NAME, "string", "The name of the snippet."),
+    ToolProperty(
+        _SNIPPET_OFFSET_PROPERTY_NAME,
+        "integer",
+        "Optional byte offset to start reading from, for paging large snippets.",
+    ),
+    ToolProperty(
+        _SNIPPET_LENGTH_PROPERTY_NAME,
+        "integer",
+        "Optional maximum number of bytes to read from the offset.",
+    ),
+]
+
+tool_properties_save_snippets_batch_object: List[ToolProperty] = [
+    ToolProperty(
+        _SNIPPETS_PROPERTY_NAME,
+        "string",
+        "JSON array of objects with '"
+        + _SNIPPET_NAME_PROPERTY_NAME
+        + "' and '"
+        + _SNIPPET_PROPERTY_NAME
+        + "' keys.",
+    ),
+]
+
+tool_properties_get_snippets_batch_object: List[ToolProperty] = [
+    ToolProperty(
+        _SNIPPET_NAMES_PROPERTY_NAME,
+        "string",
+        "Comma-separated snippet names, or a JSON array of names.",
+    ),
+]
+
+tool_properties_list_snippets_object: List[ToolProperty] = [
+    ToolProperty(
+        _SNIPPET_PREFIX_PROPERTY_NAME,
+        "string",
+        "Optional name prefix to filter by.",
+    ),
+    ToolProperty(
+        _SNIPPET_LIMIT_PROPERTY_NAME, "integer", "Optional page size (default 100)."
+    ),
+    ToolProperty(
+        _SNIPPET_CURSOR_PROPERTY_NAME,
+        "string",
+        "Optional nextCursor from the previous page.",
+    ),
+]
+
+tool_properties_search_snippets_object: List[ToolProperty] = [
+    ToolProperty(
+        _SNIPPET_QUERY_PROPERTY_NAME,
+        "string",
+        "Words that must all appear in the snippet's name or content.",
+    ),
+    ToolProperty(
+        _SNIPPET_LIMIT_PROPERTY_NAME, "integer", "Optional page size (default 20)."
+    ),
+    ToolProperty(
+        _SNIPPET_CURSOR_PROPERTY_NAME,
+        "string",
+        "Optional nextCursor from the previous page.",
+    ),
+]
+
+# Shared by both check tools: which fields of each result to return.
+_abuseipdb_check_projection_properties: List[ToolProperty] = [
+    ToolProperty(
+        _ABUSEIPDB_PROFILE_PROPERTY_NAME,
+        "string",
+        "Optional output profile: full (default), compact (score, country, ISP, "
+        "last reported) or minimal (score only).",
+    ),
+    ToolProperty(
+        _ABUSEIPDB_FIELDS_PROPERTY_NAME,
+        "string",
+        "Optional comma-separated result fields to return; overrides profile.",
+    ),
+    ToolProperty(
+        _ABUSEIPDB_MAX_AGE_PROPERTY_NAME,
+        "integer",
+        "Optional report window in days, 1-365 (default 90).",
+    ),
 ]
 
 tool_properties_abuseipdb_check_ip_object: List[ToolProperty] = [
     ToolProperty(
         _ABUSEIPDB_IP_PROPERTY_NAME, "string", "IPv4 or IPv6 address to check."
     ),
+    *_abuseipdb_check_projection_properties,
+    ToolProperty(
+        _ABUSEIPDB_VERBOSE_PROPERTY_NAME,
+        "boolean",
+        "Optional; include the individual reports (implied by fields=reports).",
+    ),
+]
+
+tool_properties_abuseipdb_check_ips_object: List[ToolProperty] = [
+    ToolProperty(
+        _ABUSEIPDB_IPS_PROPERTY_NAME,
+        "string",
+        "Comma- or whitespace-separated IPv4/IPv6 addresses to check.",
+    ),
+    *_abuseipdb_check_projection_properties,
+]
+
+tool_properties_abuseipdb_check_block_object: List[ToolProperty] = [
+    ToolProperty(
+        _ABUSEIPDB_NETWORK_PROPERTY_NAME,
+        "string",
+        "CIDR block to check, e.g. 192.0.2.0/24 or 2001:db8::/64; a bare "
+        "address checks its /24 (IPv4) or /64 (IPv6).",
+    ),
+    ToolProperty(
+        _ABUSEIPDB_MAX_AGE_PROPERTY_NAME,
+        "integer",
+        "Optional report window in days, 1-365 (default 90).",
+    ),
 ]
 
 tool_properties_abuseipdb_report_ip_object: List[ToolProperty] = [
@@ -62,6 +207,14 @@ tool_properties_abuseipdb_report_ip_object: List[ToolProperty] = [
     ),
 ]
 
+tool_properties_abuseipdb_report_status_object: List[ToolProperty] = [
+    ToolProperty(
+        _ABUSEIPDB_REPORT_ID_PROPERTY_NAME,
+        "string",
+        "Report id returned by abuseipdb_report_ip when reports are queued.",
+    ),
+]
+
 # Convert the tool properties to JSON
 tool_properties_save_snippets_json = json.dumps(
     [prop.to_dict() for prop in tool_properties_save_snippets_object]
@@ -72,25 +225,68 @@ tool_properties_get_snippets_json = json.dumps(
     [prop.to_dict() for prop in tool_properties_get_snippets_object]
 )
 
+tool_properties_save_snippets_batch_json = json.dumps(
+    [prop.to_dict() for prop in tool_properties_save_snippets_batch_object]
+)
+
+tool_properties_get_snippets_batch_json = json.dumps(
+    [prop.to_dict() for prop in tool_properties_get_snippets_batch_object]
+)
+
+tool_properties_list_snippets_json = json.dumps(
+    [prop.to_dict() for prop in tool_properties_list_snippets_object]
+)
+
+tool_properties_search_snippets_json = json.dumps(
+    [prop.to_dict() for prop in tool_properties_search_snippets_object]
+)
+
 tool_properties_abuseipdb_check_ip_json = json.dumps(
     [prop.to_dict() for prop in tool_properties_abuseipdb_check_ip_object]
 )
 
+tool_properties_abuseipdb_check_ips_json = json.dumps(
+    [prop.to_dict() for prop in tool_properties_abuseipdb_check_ips_object]
+)
+
+tool_properties_abuseipdb_check_block_json = json.dumps(
+    [prop.to_dict() for prop in tool_properties_abuseipdb_check_block_object]
+)
+
 tool_properties_abuseipdb_report_ip_json = json.dumps(
     [prop.to_dict() for prop in tool_properties_abuseipdb_report_ip_object]
 )
 
+tool_properties_abuseipdb_report_status_json = json.dumps(
+    [prop.to_dict() for prop in tool_properties_abuseipdb_report_status_object]
+)
+
 
 # Import specific function modules so static analysis / pack tooling can discover decorated functions
 if TYPE_CHECKING:
     from functions import (
         abuseipdb,
         get_snippet,
+        get_snippets,
         hello_mcp,
+        list_snippets,
         save_snippet,
+        save_snippets,
+        search_snippets,
+        snippet_gc,
     )  # pragma: no cover
 else:
-    from functions import abuseipdb, get_snippet, hello_mcp, save_snippet  # noqa: F401
+    from functions import (  # noqa: F401
+        abuseipdb,
+        get_snippet,
+        get_snippets,
+        hello_mcp,
+        list_snippets,
+        save_snippet,
+        save_snippets,
+        search_snippets,
+        snippet_gc,
+    )
 
 # FUNCTION `hello_mcp` moved to `src/functions/hello_mcp.py`
 
@@ -99,3 +295,11 @@ else:
 
 
 # FUNCTION `save_snippet` moved to `src/functions/save_snippet.py`
+
+
+# FUNCTIONS `get_snippets` and `save_snippets` live in `src/functions/get_snippets.py`
+# and `src/functions/save_snippets.py`
+
+
+# FUNCTIONS `list_snippets` and `search_snippets` live in
+# `src/functions/list_snippets.py` and `src/functions/search_snippets.py`
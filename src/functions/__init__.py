@@ -1,13 +1,36 @@
 # Explicit imports to ensure decorators are executed at import-time
 from .hello_mcp import hello_mcp
 from .get_snippet import get_snippet
+from .get_snippets import get_snippets
 from .save_snippet import save_snippet
-from .abuseipdb import abuseipdb_check_ip, abuseipdb_report_ip
+from .save_snippets import save_snippets
+from .list_snippets import list_snippets
+from .search_snippets import search_snippets
+from .snippet_gc import snippet_gc
+from .abuseipdb import (
+    abuseipdb_check_block,
+    abuseipdb_check_ip,
+    abuseipdb_check_ips,
+    abuseipdb_refresh_blacklist,
+    abuseipdb_report_ip,
+    abuseipdb_report_status,
+    abuseipdb_report_worker,
+)
 
 __all__ = [
     "hello_mcp",
     "get_snippet",
+    "get_snippets",
     "save_snippet",
+    "save_snippets",
+    "list_snippets",
+    "search_snippets",
+    "snippet_gc",
     "abuseipdb_check_ip",
+    "abuseipdb_check_ips",
+    "abuseipdb_check_block",
     "abuseipdb_report_ip",
+    "abuseipdb_refresh_blacklist",
+    "abuseipdb_report_worker",
+    "abuseipdb_report_status",
 ]
@@ -1,23 +1,63 @@
-import json
+import asyncio
+import ipaddress
 import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from typing import Any, TYPE_CHECKING, cast
 
-import requests
+import azure.functions as func
 
 from function_app import (
+    _ABUSEIPDB_ALLOWLIST_BLOB_PATH,
+    _ABUSEIPDB_BLACKLIST_BLOB_PATH,
     _ABUSEIPDB_CATEGORIES_PROPERTY_NAME,
     _ABUSEIPDB_COMMENT_PROPERTY_NAME,
+    _ABUSEIPDB_FIELDS_PROPERTY_NAME,
     _ABUSEIPDB_IP_PROPERTY_NAME,
+    _ABUSEIPDB_IPS_PROPERTY_NAME,
+    _ABUSEIPDB_MAX_AGE_PROPERTY_NAME,
+    _ABUSEIPDB_NETWORK_PROPERTY_NAME,
+    _ABUSEIPDB_PROFILE_PROPERTY_NAME,
+    _ABUSEIPDB_REPORT_ID_PROPERTY_NAME,
+    _ABUSEIPDB_VERBOSE_PROPERTY_NAME,
+    _ABUSEIPDB_REPORT_QUEUE_NAME,
     app,
+    tool_properties_abuseipdb_check_block_json,
+    tool_properties_abuseipdb_check_block_object,
     tool_properties_abuseipdb_check_ip_json,
+    tool_properties_abuseipdb_check_ip_object,
+    tool_properties_abuseipdb_check_ips_json,
+    tool_properties_abuseipdb_check_ips_object,
     tool_properties_abuseipdb_report_ip_json,
+    tool_properties_abuseipdb_report_ip_object,
+    tool_properties_abuseipdb_report_status_json,
+    tool_properties_abuseipdb_report_status_object,
+)
+
+from . import (
+    abuseipdb_client,
+    abuseipdb_fields,
+    blacklist_index,
+    block_cache,
+    ip_policy,
+    report_pipeline,
+    reputation_cache,
+    resilience,
+    single_flight,
+    tool_args,
+    tool_metrics,
 )
 
 # Context arrives as a JSON string; annotate as str for worker compatibility
 ContextType = str
 
+# AbuseIPDB accepts a report window of 1-365 days for 'check'.
+DEFAULT_MAX_AGE_IN_DAYS = 90
+MAX_AGE_IN_DAYS_RANGE = range(1, 366)
+
 if TYPE_CHECKING:
-    pass  # pragma: no cover
+    import requests
 
 
 def _require_api_key() -> str:
@@ -29,55 +69,506 @@ def _require_api_key() -> str:
     return api_key
 
 
-def check_ip(ip: str) -> dict[str, Any]:
-    """Query the AbuseIPDB 'check' endpoint for information about an IP address."""
+def canonical_ip(ip: str) -> str:
+    """Return the compressed textual form of ``ip`` (or ``ip`` stripped if invalid).
 
-    api_key = _require_api_key()
-    url = "https://api.abuseipdb.com/api/v2/check"
-    headers = {"Key": api_key, "Accept": "application/json"}
-    params = {"ipAddress": ip, "maxAgeInDays": "90"}
-    response = requests.get(url, headers=headers, params=params, timeout=10)
+    IPv4-mapped IPv6 addresses become IPv4, as in `ip_policy.parse`, so one
+    host always has one cache key.
+    """
+    ip = ip.strip()
+    try:
+        return ip_policy.parse(ip).compressed
+    except ValueError:
+        return ip
+
+
+def _local_result(ip: str, score: int, source: str, **meta: Any) -> dict[str, Any]:
+    """Build a check-shaped response for an answer produced without AbuseIPDB."""
+    version = ipaddress.ip_address(ip).version
+    return {
+        "data": {"ipAddress": ip, "ipVersion": version, "abuseConfidenceScore": score},
+        "meta": {"source": source, **meta},
+    }
+
+
+def _check_local(ip: str) -> dict[str, Any] | None:
+    """Answer reserved and allowlisted addresses locally; ValueError if invalid."""
+    address = ip_policy.parse(ip)
+    reason = ip_policy.reserved_reason(address)
+    if reason is not None:
+        result = _local_result(ip, 0, "local", reason=reason)
+        result["data"]["isPublic"] = False
+        return result
+    if address in ip_policy.get_allowlist(_ABUSEIPDB_ALLOWLIST_BLOB_PATH):
+        result = _local_result(ip, 0, "local", reason="allowlist")
+        result["data"]["isWhitelisted"] = True
+        return result
+    return None
+
+
+def _check_blacklist(ip: str) -> dict[str, Any] | None:
+    index = blacklist_index.get_index(_ABUSEIPDB_BLACKLIST_BLOB_PATH)
+    if index is None:
+        return None
+    score = index.lookup(ip)
+    if score is None:
+        return None
+    snapshot_at = datetime.fromtimestamp(index.created_at, timezone.utc)
+    return _local_result(
+        ip, score, "blacklist-mirror", snapshotAt=snapshot_at.isoformat()
+    )
+
+
+def _check_block_cache(ip: str, max_age_in_days: int) -> dict[str, Any] | None:
+    """Answer ``ip`` from a cached check-block result for a block containing it."""
+    hit = block_cache.get_cache().lookup(ip, max_age_in_days)
+    if hit is None:
+        return None
+    report = hit.report or {}
+    result = _local_result(
+        ip,
+        int(report.get("abuseConfidenceScore") or 0),
+        "check-block",
+        network=str(hit.network),
+        checkedAt=hit.checked_at.isoformat(),
+    )
+    if "countryCode" in report:
+        result["data"]["countryCode"] = report["countryCode"]
+    result["data"]["totalReports"] = int(report.get("numReports") or 0)
+    result["data"]["lastReportedAt"] = report.get("mostRecentReport")
+    return result
+
+
+def _decode(
+    action: str, response: "requests.Response | abuseipdb_client.AsyncResponse"
+) -> dict[str, Any]:
+    """Return the JSON body of a sync or async response, or raise."""
     if not response.ok:
         raise RuntimeError(
-            f"AbuseIPDB check failed: {response.status_code} {response.text}"
+            f"AbuseIPDB {action} failed: {response.status_code} {response.text}"
         )
     return cast(dict[str, Any], response.json())
 
 
-def report_ip(ip: str, categories: str, comment: str) -> dict[str, Any]:
-    """Report an IP address to AbuseIPDB using the 'report' endpoint."""
+def _check_params(ip: str, max_age_in_days: int, verbose: bool) -> dict[str, str]:
+    params = {"ipAddress": ip, "maxAgeInDays": str(max_age_in_days)}
+    if verbose:
+        # A bare flag; AbuseIPDB then adds the individual reports to the reply.
+        params["verbose"] = ""
+    return params
+
+
+def _cache_key(ip: str, max_age_in_days: int, verbose: bool) -> tuple[str, int, bool]:
+    return (ip, max_age_in_days, verbose)
+
+
+def _stale_result(
+    key: tuple[str, int, bool], exc: resilience.Unavailable
+) -> dict[str, Any] | None:
+    """The last cached result for ``key``, marked stale, when upstream is out."""
+    cached = reputation_cache.get_cache().peek(key)
+    if cached is None:
+        return None
+    value, age = cached
+    meta = {
+        **(value.get("meta") or {}),
+        "source": "stale-cache",
+        "reason": exc.reason,
+        "ageSeconds": round(age),
+    }
+    return {**value, "meta": meta}
+
+
+def _fetch_check(
+    api_key: str, ip: str, max_age_in_days: int, verbose: bool
+) -> dict[str, Any]:
+    response = abuseipdb_client.request(
+        "GET",
+        "check",
+        headers={"Key": api_key},
+        params=_check_params(ip, max_age_in_days, verbose),
+    )
+    return _decode("check", response)
+
+
+async def _fetch_check_async(
+    api_key: str, ip: str, max_age_in_days: int, verbose: bool
+) -> dict[str, Any]:
+    response = await abuseipdb_client.request_async(
+        "GET",
+        "check",
+        headers={"Key": api_key},
+        params=_check_params(ip, max_age_in_days, verbose),
+    )
+    return _decode("check", response)
+
+
+def check_ip(
+    ip: str, max_age_in_days: int = DEFAULT_MAX_AGE_IN_DAYS, verbose: bool = False
+) -> dict[str, Any]:
+    """Query the AbuseIPDB 'check' endpoint for information about an IP address.
+
+    Raises ValueError for an invalid address. Reserved (non-global) and
+    operator-allowlisted addresses get a score-0 answer marked
+    ``meta.source == "local"``. Addresses present in the local blacklist
+    mirror, or inside a block recently checked with `check_block` for the
+    same ``max_age_in_days`` (non-verbose lookups only), are also answered
+    without an upstream call. Other results are served from the shared
+    reputation cache, keyed by the canonical IP, ``max_age_in_days`` and
+    ``verbose``; concurrent misses for the same key share one upstream
+    request. While AbuseIPDB is unavailable (breaker open, budget spent or
+    client rate limit reached) the last cached result is returned, however
+    old, with ``meta.source == "stale-cache"``. Only verbose results carry
+    the individual ``reports``.
+    """
+
+    ip = canonical_ip(ip)
+    local = _check_local(ip)
+    if local is None:
+        local = _check_blacklist(ip)
+    if local is None and not verbose:
+        local = _check_block_cache(ip, max_age_in_days)
+    if local is not None:
+        return local
 
     api_key = _require_api_key()
-    url = "https://api.abuseipdb.com/api/v2/report"
-    headers = {"Key": api_key, "Accept": "application/json"}
-    data = {"ip": ip, "categories": categories, "comment": comment}
-    response = requests.post(url, headers=headers, data=data, timeout=10)
+    key = _cache_key(ip, max_age_in_days, verbose)
+    try:
+        return reputation_cache.get_cache().get_or_load(
+            key,
+            lambda: single_flight.get_flight().do(
+                key, lambda: _fetch_check(api_key, ip, max_age_in_days, verbose)
+            ),
+        )
+    except resilience.Unavailable as exc:
+        stale = _stale_result(key, exc)
+        if stale is None:
+            raise
+        return stale
+
+
+async def check_ip_async(
+    ip: str, max_age_in_days: int = DEFAULT_MAX_AGE_IN_DAYS, verbose: bool = False
+) -> dict[str, Any]:
+    """Asyncio counterpart of `check_ip` sharing its mirror and caches."""
+
+    ip = canonical_ip(ip)
+    local = _check_local(ip)
+    if local is None:
+        local = _check_blacklist(ip)
+    if local is None and not verbose:
+        local = _check_block_cache(ip, max_age_in_days)
+    if local is not None:
+        return local
+
+    api_key = _require_api_key()
+    key = _cache_key(ip, max_age_in_days, verbose)
+    try:
+        return await reputation_cache.get_cache().get_or_load_async(
+            key,
+            lambda: single_flight.get_flight().do_async(
+                key, lambda: _fetch_check_async(api_key, ip, max_age_in_days, verbose)
+            ),
+        )
+    except resilience.Unavailable as exc:
+        stale = _stale_result(key, exc)
+        if stale is None:
+            raise
+        return stale
+
+
+def _block_params(network: block_cache.Network, max_age_in_days: int) -> dict[str, str]:
+    return {"network": str(network), "maxAgeInDays": str(max_age_in_days)}
+
+
+def check_block(
+    network: str, max_age_in_days: int = DEFAULT_MAX_AGE_IN_DAYS
+) -> dict[str, Any]:
+    """Query the AbuseIPDB 'check-block' endpoint for a CIDR block.
+
+    A bare address stands for its /24 (IPv4) or /64 (IPv6). Results are kept
+    in the block cache, which also answers later `check_ip` calls for
+    addresses inside the block. Raises ValueError for an invalid network.
+    """
+
+    block = block_cache.parse_network(network)
+    cache = block_cache.get_cache()
+    cached = cache.get(block, max_age_in_days)
+    if cached is not None:
+        return cached
+
+    api_key = _require_api_key()
+
+    def fetch() -> dict[str, Any]:
+        response = abuseipdb_client.request(
+            "GET",
+            "check-block",
+            headers={"Key": api_key},
+            params=_block_params(block, max_age_in_days),
+        )
+        result = _decode("check-block", response)
+        cache.put(block, max_age_in_days, result)
+        return result
+
+    key = ("check-block", str(block), max_age_in_days)
+    return single_flight.get_flight().do(key, fetch)
+
+
+async def check_block_async(
+    network: str, max_age_in_days: int = DEFAULT_MAX_AGE_IN_DAYS
+) -> dict[str, Any]:
+    """Asyncio counterpart of `check_block` sharing its cache."""
+
+    block = block_cache.parse_network(network)
+    cache = block_cache.get_cache()
+    cached = cache.get(block, max_age_in_days)
+    if cached is not None:
+        return cached
+
+    api_key = _require_api_key()
+
+    async def fetch() -> dict[str, Any]:
+        response = await abuseipdb_client.request_async(
+            "GET",
+            "check-block",
+            headers={"Key": api_key},
+            params=_block_params(block, max_age_in_days),
+        )
+        result = _decode("check-block", response)
+        cache.put(block, max_age_in_days, result)
+        return result
+
+    key = ("check-block", str(block), max_age_in_days)
+    return await single_flight.get_flight().do_async(key, fetch)
+
+
+def _parse_ip_list(value: Any) -> list[str]:
+    """Split a comma/whitespace-separated string (or list) into IP strings."""
+    if isinstance(value, str):
+        items: list[Any] = re.split(r"[\s,]+", value)
+    elif isinstance(value, list):
+        items = value
+    else:
+        return []
+    return [str(item).strip() for item in items if str(item).strip()]
+
+
+def check_ips(
+    ips: list[str],
+    max_age_in_days: int = DEFAULT_MAX_AGE_IN_DAYS,
+    concurrency: int | None = None,
+    deadline: float | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Check many IPs concurrently and return one result map keyed by IP.
+
+    Inputs are canonicalized and deduplicated first. Each value is either the
+    `check_ip` result for that IP or ``{"error": "..."}``; one failing lookup
+    never fails the whole batch. Lookups still running when ``deadline``
+    seconds have elapsed are reported as timed out. The API key is only
+    required when some IP has to go upstream.
+    """
+
+    if concurrency is None:
+        concurrency = int(os.getenv("ABUSEIPDB_BATCH_CONCURRENCY") or 8)
+    if deadline is None:
+        deadline = float(os.getenv("ABUSEIPDB_BATCH_DEADLINE") or 25)
+
+    # dict keys double as an ordered, de-duplicated set of canonical IPs.
+    ordered = dict.fromkeys(canonical_ip(raw) for raw in ips)
+    results: dict[str, dict[str, Any]] = {}
+    pending: list[str] = []
+    for ip in ordered:
+        try:
+            local = _check_local(ip)
+        except ValueError:
+            results[ip] = {"error": "Invalid IP address"}
+        else:
+            if local is not None:
+                results[ip] = local
+            else:
+                pending.append(ip)
+
+    if pending:
+        _require_api_key()
+        # One batched read of the shared cache tier instead of one per miss.
+        reputation_cache.get_cache().prefetch(
+            _cache_key(ip, max_age_in_days, False) for ip in pending
+        )
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(concurrency, len(pending))),
+            thread_name_prefix="abuseipdb-batch",
+        )
+        # Lookups run on the pool's threads but count towards this tool's
+        # metrics, and their requests' timeouts come out of the batch deadline.
+        with resilience.budget(deadline):
+            lookup = tool_metrics.run_in_context(check_ip)
+        try:
+            futures: dict[Future[dict[str, Any]], str] = {
+                executor.submit(lookup, ip, max_age_in_days): ip for ip in pending
+            }
+            done, _ = wait(futures, timeout=deadline)
+            for future, ip in futures.items():
+                if future not in done:
+                    results[ip] = {"error": "Deadline exceeded"}
+                elif (exc := future.exception()) is not None:
+                    results[ip] = {"error": str(exc)}
+                else:
+                    results[ip] = future.result()
+        finally:
+            # Do not block on stragglers past the deadline; queued lookups are
+            # cancelled and running ones finish (and populate the cache) alone.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return {ip: results[ip] for ip in ordered}
+
+
+def refresh_blacklist() -> blacklist_index.BlacklistIndex:
+    """Download the AbuseIPDB blacklist, persist it locally and publish it."""
+
+    api_key = _require_api_key()
+    params = {
+        "confidenceMinimum": os.getenv("ABUSEIPDB_BLACKLIST_CONFIDENCE") or "90",
+        "limit": os.getenv("ABUSEIPDB_BLACKLIST_LIMIT") or "10000",
+    }
+    response = abuseipdb_client.request(
+        "GET", "blacklist", headers={"Key": api_key}, params=params
+    )
     if not response.ok:
         raise RuntimeError(
-            f"AbuseIPDB report failed: {response.status_code} {response.text}"
+            f"AbuseIPDB blacklist failed: {response.status_code} {response.text}"
         )
-    return cast(dict[str, Any], response.json())
+    index = blacklist_index.BlacklistIndex.from_entries(
+        blacklist_index.parse_export(response.text)
+    )
+    index.save(blacklist_index.snapshot_path())
+    blacklist_index.swap(index)
+    return index
 
 
-def _parse_context(context: ContextType) -> dict[str, Any] | None:
-    if isinstance(context, str):
-        try:
-            payload = json.loads(context)
-        except json.JSONDecodeError:
-            return None
-    elif isinstance(context, dict):
-        payload = context
-    else:
-        return None
+def report_ip(ip: str, categories: str, comment: str) -> dict[str, Any]:
+    """Report an IP address to AbuseIPDB using the 'report' endpoint."""
 
-    arguments = payload.get("arguments")
-    if not isinstance(arguments, dict):
+    api_key = _require_api_key()
+    headers = {"Key": api_key}
+    data = {"ip": ip, "categories": categories, "comment": comment}
+    response = abuseipdb_client.request("POST", "report", headers=headers, data=data)
+    return _decode("report", response)
+
+
+async def report_ip_async(ip: str, categories: str, comment: str) -> dict[str, Any]:
+    """Asyncio counterpart of `report_ip`."""
+
+    api_key = _require_api_key()
+    headers = {"Key": api_key}
+    data = {"ip": ip, "categories": categories, "comment": comment}
+    response = await abuseipdb_client.request_async(
+        "POST", "report", headers=headers, data=data
+    )
+    return _decode("report", response)
+
+
+async def bulk_report_async(
+    reports: list[report_pipeline.QueuedReport],
+) -> dict[str, report_pipeline.Outcome]:
+    """Submit ``reports`` as one CSV upload to the 'bulk-report' endpoint.
+
+    Raises if the upload as a whole fails; rows AbuseIPDB rejects are
+    returned as ``rejected`` outcomes.
+    """
+
+    import aiohttp  # deferred like abuseipdb_client's, to keep cold starts lean
+
+    api_key = _require_api_key()
+    form = aiohttp.FormData()
+    form.add_field(
+        "csv",
+        report_pipeline.build_csv(reports),
+        filename="reports.csv",
+        content_type="text/csv",
+    )
+    response = await abuseipdb_client.request_async(
+        "POST", "bulk-report", headers={"Key": api_key}, data=form
+    )
+    body = _decode("bulk report", response)
+    invalid = (body.get("data") or {}).get("invalidReports") or []
+    errors = report_pipeline.match_invalid_rows(reports, invalid)
+    return {
+        report.reportId: report_pipeline.Outcome("rejected", errors[report.reportId])
+        if report.reportId in errors
+        else report_pipeline.Outcome("submitted")
+        for report in reports
+    }
+
+
+async def submit_queued_report(
+    report: report_pipeline.QueuedReport, attempt: int = 1
+) -> report_pipeline.Outcome:
+    """Submit a dequeued report through the shared batcher and record the result.
+
+    Raises when the batch could not be delivered so the queue retries it.
+    The failure is recorded as ``retrying``, or as ``failed`` on the last
+    attempt (``attempt`` is the message's dequeue count), after which the
+    host moves the message to the poison queue.
+    """
+
+    store = report_pipeline.get_store()
+    previous = await asyncio.to_thread(store.get, report.reportId)
+    if previous is not None and previous["status"] in ("submitted", "rejected"):
+        # Redelivered after a successful flush; don't file it twice.
+        return report_pipeline.Outcome(previous["status"], previous.get("error"))
+
+    batcher = report_pipeline.get_batcher(bulk_report_async)
+    outcome = await batcher.submit(report)
+    status = outcome.status
+    if status == "failed" and attempt < report_pipeline.max_attempts():
+        status = "retrying"
+    await asyncio.to_thread(
+        report_pipeline.record_status, store, report, status, outcome.error
+    )
+    if outcome.status == "failed":
+        raise RuntimeError(f"Bulk report failed: {outcome.error}")
+    return outcome
+
+
+_CHECK_IP_SCHEMA = tool_args.compile_schema(tool_properties_abuseipdb_check_ip_object)
+_CHECK_IPS_SCHEMA = tool_args.compile_schema(tool_properties_abuseipdb_check_ips_object)
+_CHECK_BLOCK_SCHEMA = tool_args.compile_schema(
+    tool_properties_abuseipdb_check_block_object
+)
+_REPORT_IP_SCHEMA = tool_args.compile_schema(tool_properties_abuseipdb_report_ip_object)
+_REPORT_STATUS_SCHEMA = tool_args.compile_schema(
+    tool_properties_abuseipdb_report_status_object
+)
+
+
+def _parse_context(
+    schema: tool_args.ToolSchema, context: ContextType
+) -> tool_args.ToolArguments | None:
+    try:
+        return schema.parse(context)
+    except tool_args.ArgumentsError:
         return None
-    return arguments
 
 
 def _json_response(data: Any) -> str:
-    return json.dumps(data)
+    return tool_args.dumps(data)
+
+
+def _max_age_in_days(args: tool_args.ToolArguments) -> int:
+    """The requested report window; raises `InvalidArgument` outside 1-365."""
+    value = args.integer(_ABUSEIPDB_MAX_AGE_PROPERTY_NAME)
+    if value is None:
+        return DEFAULT_MAX_AGE_IN_DAYS
+    if value not in MAX_AGE_IN_DAYS_RANGE:
+        raise tool_args.InvalidArgument(_ABUSEIPDB_MAX_AGE_PROPERTY_NAME)
+    return value
+
+
+def _projection(args: tool_args.ToolArguments) -> abuseipdb_fields.Projection:
+    return abuseipdb_fields.resolve(
+        args.string(_ABUSEIPDB_PROFILE_PROPERTY_NAME),
+        args.string(_ABUSEIPDB_FIELDS_PROPERTY_NAME),
+    )
 
 
 @app.generic_trigger(
@@ -87,22 +578,112 @@ def _json_response(data: Any) -> str:
     description="Check an IP reputation via AbuseIPDB.",
     toolProperties=tool_properties_abuseipdb_check_ip_json,
 )
-def abuseipdb_check_ip(context: ContextType) -> str:
-    args = _parse_context(context)
+@tool_metrics.instrument
+async def abuseipdb_check_ip(context: ContextType) -> str:
+    args = _parse_context(_CHECK_IP_SCHEMA, context)
     if args is None:
         return "Invalid arguments"
 
-    ip = args.get(_ABUSEIPDB_IP_PROPERTY_NAME)
+    ip = args.string(_ABUSEIPDB_IP_PROPERTY_NAME)
     if not ip:
         return "No ip provided"
+    try:
+        ip_policy.parse(ip)
+    except ValueError:
+        return f"Invalid ip '{ip}'"
 
     try:
-        result = check_ip(ip)
-        return _json_response(result)
+        projection = _projection(args)
+        max_age_in_days = _max_age_in_days(args)
+        verbose = bool(args.boolean(_ABUSEIPDB_VERBOSE_PROPERTY_NAME))
+    except abuseipdb_fields.ProjectionError as exc:
+        return str(exc)
+    except tool_args.InvalidArgument as exc:
+        return f"Invalid {exc}"
+
+    try:
+        with resilience.budget(resilience.tool_budget()):
+            result = await check_ip_async(
+                ip, max_age_in_days, verbose or projection.wants_reports
+            )
+        return _json_response(projection.apply(result))
+    except resilience.DeadlineExceeded:
+        return "Deadline exceeded checking IP"
     except Exception as exc:  # pragma: no cover - exercised in tests
         return f"Error checking IP: {exc}"
 
 
+@app.generic_trigger(
+    arg_name="context",
+    type="mcpToolTrigger",
+    toolName="abuseipdb_check_ips",
+    description="Check the reputation of many IPs via AbuseIPDB in one call.",
+    toolProperties=tool_properties_abuseipdb_check_ips_json,
+)
+@tool_metrics.instrument
+def abuseipdb_check_ips(context: ContextType) -> str:
+    args = _parse_context(_CHECK_IPS_SCHEMA, context)
+    if args is None:
+        return "Invalid arguments"
+
+    ips = _parse_ip_list(args.get(_ABUSEIPDB_IPS_PROPERTY_NAME))
+    if not ips:
+        return "No ips provided"
+
+    try:
+        projection = _projection(args)
+        max_age_in_days = _max_age_in_days(args)
+    except abuseipdb_fields.ProjectionError as exc:
+        return str(exc)
+    except tool_args.InvalidArgument as exc:
+        return f"Invalid {exc}"
+
+    try:
+        results = check_ips(ips, max_age_in_days)
+        return _json_response(projection.apply_many(results))
+    except Exception as exc:  # pragma: no cover - exercised in tests
+        return f"Error checking IPs: {exc}"
+
+
+@app.generic_trigger(
+    arg_name="context",
+    type="mcpToolTrigger",
+    toolName="abuseipdb_check_block",
+    description=(
+        "Check a CIDR block (IPv4 /24 or IPv6 /64) via AbuseIPDB; later "
+        "abuseipdb_check_ip calls inside it are answered from this result."
+    ),
+    toolProperties=tool_properties_abuseipdb_check_block_json,
+)
+@tool_metrics.instrument
+async def abuseipdb_check_block(context: ContextType) -> str:
+    args = _parse_context(_CHECK_BLOCK_SCHEMA, context)
+    if args is None:
+        return "Invalid arguments"
+
+    network = args.string(_ABUSEIPDB_NETWORK_PROPERTY_NAME)
+    if not network:
+        return "No network provided"
+
+    try:
+        max_age_in_days = _max_age_in_days(args)
+    except tool_args.InvalidArgument as exc:
+        return f"Invalid {exc}"
+    try:
+        block_cache.parse_network(network)
+    except ValueError:
+        return f"Invalid network '{network}'"
+
+    try:
+        with resilience.budget(resilience.tool_budget()):
+            result = await check_block_async(network, max_age_in_days)
+        return _json_response(result)
+    except resilience.DeadlineExceeded:
+        return "Deadline exceeded checking block"
+    except Exception as exc:  # pragma: no cover - exercised in tests
+        return f"Error checking block: {exc}"
+
+
 @app.generic_trigger(
     arg_name="context",
     type="mcpToolTrigger",
@@ -110,14 +691,21 @@ def abuseipdb_check_ip(context: ContextType) -> str:
     description="Report an IP to AbuseIPDB.",
     toolProperties=tool_properties_abuseipdb_report_ip_json,
 )
-def abuseipdb_report_ip(context: ContextType) -> str:
-    args = _parse_context(context)
+@app.generic_output_binding(
+    arg_name="report_queue",
+    type="queue",
+    connection="AzureWebJobsStorage",
+    queueName=_ABUSEIPDB_REPORT_QUEUE_NAME,
+)
+@tool_metrics.instrument
+async def abuseipdb_report_ip(context: ContextType, report_queue: func.Out[str]) -> str:
+    args = _parse_context(_REPORT_IP_SCHEMA, context)
     if args is None:
         return "Invalid arguments"
 
-    ip = args.get(_ABUSEIPDB_IP_PROPERTY_NAME)
-    categories = args.get(_ABUSEIPDB_CATEGORIES_PROPERTY_NAME)
-    comment = args.get(_ABUSEIPDB_COMMENT_PROPERTY_NAME)
+    ip = args.string(_ABUSEIPDB_IP_PROPERTY_NAME)
+    categories = args.string(_ABUSEIPDB_CATEGORIES_PROPERTY_NAME)
+    comment = args.string(_ABUSEIPDB_COMMENT_PROPERTY_NAME)
 
     if not ip:
         return "No ip provided"
@@ -125,9 +713,89 @@ def abuseipdb_report_ip(context: ContextType) -> str:
         return "No categories provided"
     if not comment:
         return "No comment provided"
+    try:
+        ip = ip_policy.parse(ip).compressed
+    except ValueError:
+        return f"Invalid ip '{ip}'"
+    try:
+        categories = report_pipeline.parse_categories(categories)
+    except ValueError as exc:
+        return f"Invalid categories: {exc}"
+
+    if report_pipeline.is_enabled():
+        try:
+            _require_api_key()
+            report = report_pipeline.QueuedReport.create(ip, categories, comment)
+            record = await asyncio.to_thread(
+                report_pipeline.record_status,
+                report_pipeline.get_store(),
+                report,
+                "queued",
+            )
+            report_queue.set(report.to_message())
+            return _json_response(
+                {"reportId": report.reportId, "status": record["status"]}
+            )
+        except Exception as exc:  # pragma: no cover - exercised in tests
+            return f"Error reporting IP: {exc}"
 
     try:
-        result = report_ip(ip, categories, comment)
+        with resilience.budget(resilience.tool_budget()):
+            result = await report_ip_async(ip, categories, comment)
         return _json_response(result)
     except Exception as exc:  # pragma: no cover - exercised in tests
         return f"Error reporting IP: {exc}"
+
+
+@app.queue_trigger(
+    arg_name="message",
+    queue_name=_ABUSEIPDB_REPORT_QUEUE_NAME,
+    connection="AzureWebJobsStorage",
+)
+async def abuseipdb_report_worker(message: func.QueueMessage) -> None:
+    """Deliver a queued report; failures re-raise so the queue retries them."""
+    report = report_pipeline.QueuedReport.from_message(message.get_body().decode())
+    await submit_queued_report(report, message.dequeue_count or 1)
+
+
+@app.generic_trigger(
+    arg_name="context",
+    type="mcpToolTrigger",
+    toolName="abuseipdb_report_status",
+    description="Look up the delivery status of a queued AbuseIPDB report.",
+    toolProperties=tool_properties_abuseipdb_report_status_json,
+)
+@tool_metrics.instrument
+def abuseipdb_report_status(context: ContextType) -> str:
+    args = _parse_context(_REPORT_STATUS_SCHEMA, context)
+    if args is None:
+        return "Invalid arguments"
+
+    report_id = args.string(_ABUSEIPDB_REPORT_ID_PROPERTY_NAME)
+    if not report_id:
+        return "No reportId provided"
+
+    try:
+        record = report_pipeline.get_store().get(str(report_id))
+    except Exception as exc:  # pragma: no cover - exercised in tests
+        return f"Error reading report status: {exc}"
+    if record is None:
+        return f"Report '{report_id}' not found"
+    return _json_response(record)
+
+
+@app.timer_trigger(schedule="0 0 */6 * * *", arg_name="timer", run_on_startup=False)
+@app.generic_output_binding(
+    arg_name="snapshot",
+    type="blob",
+    connection="AzureWebJobsStorage",
+    path=_ABUSEIPDB_BLACKLIST_BLOB_PATH,
+    dataType="binary",
+)
+def abuseipdb_refresh_blacklist(
+    timer: func.TimerRequest, snapshot: func.Out[bytes]
+) -> None:
+    """Refresh the blacklist mirror and share the snapshot with other instances."""
+    if not blacklist_index.is_enabled():
+        return
+    snapshot.set(refresh_blacklist().to_bytes())
@@ -0,0 +1,475 @@
+"""Shared, pooled HTTP clients for outbound AbuseIPDB calls.
+
+Every AbuseIPDB tool on a worker shares one `requests.Session` (threaded
+callers) or one `aiohttp.ClientSession` per event loop (asyncio callers) so
+TCP and TLS connections to api.abuseipdb.com are kept alive and reused across
+invocations instead of being re-established per call.
+
+`requests` and `aiohttp` are imported on first use rather than at module
+import, so instances that never call AbuseIPDB don't pay for loading them
+during a cold start.
+
+Calls go through the `resilience` layer: timeouts shrink to fit the
+caller's remaining budget, a circuit breaker fails calls fast while
+AbuseIPDB is failing, and slow idempotent calls can be hedged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from . import rate_limiter, resilience, tool_metrics
+
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+
+_DEFAULT_BASE_URL = "https://api.abuseipdb.com/api/v2"
+
+# Only idempotent requests are retried; a failed report POST may already have
+# been recorded upstream, so replaying it could file a duplicate report.
+_RETRY_METHODS = frozenset({"GET", "HEAD"})
+_RETRY_STATUSES = (500, 502, 503, 504)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    """Connection, timeout and retry settings for the AbuseIPDB client."""
+
+    base_url: str = _DEFAULT_BASE_URL
+    pool_connections: int = 4
+    pool_maxsize: int = 16
+    connect_timeout: float = 3.05
+    read_timeout: float = 10.0
+    max_retries: int = 2
+    backoff_factor: float = 0.3
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        """The (connect, read) timeout tuple understood by `requests`."""
+        return (self.connect_timeout, self.read_timeout)
+
+    @classmethod
+    def from_env(cls) -> ClientSettings:
+        """Build settings from `ABUSEIPDB_*` environment variables."""
+        return cls(
+            base_url=os.getenv("ABUSEIPDB_BASE_URL", _DEFAULT_BASE_URL).rstrip("/"),
+            pool_connections=_env_int("ABUSEIPDB_POOL_CONNECTIONS", 4),
+            pool_maxsize=_env_int("ABUSEIPDB_POOL_MAXSIZE", 16),
+            connect_timeout=_env_float("ABUSEIPDB_CONNECT_TIMEOUT", 3.05),
+            read_timeout=_env_float("ABUSEIPDB_READ_TIMEOUT", 10.0),
+            max_retries=_env_int("ABUSEIPDB_MAX_RETRIES", 2),
+            backoff_factor=_env_float("ABUSEIPDB_RETRY_BACKOFF", 0.3),
+        )
+
+
+def build_session(settings: ClientSettings) -> requests.Session:
+    """Create a keep-alive session with a sized connection pool and retries."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=settings.max_retries,
+        backoff_factor=settings.backoff_factor,
+        status_forcelist=_RETRY_STATUSES,
+        allowed_methods=_RETRY_METHODS,
+        respect_retry_after_header=True,
+        # Hand the final response back to the caller instead of raising so the
+        # tools can surface AbuseIPDB's own error body.
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.pool_connections,
+        pool_maxsize=settings.pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.headers.update({"Accept": "application/json"})
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def build_async_session(settings: ClientSettings) -> aiohttp.ClientSession:
+    """Create an aiohttp session whose pool mirrors the sync session's sizing.
+
+    Must be called with the target event loop running.
+    """
+    import aiohttp
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=settings.pool_maxsize),
+        headers={"Accept": "application/json"},
+        timeout=aiohttp.ClientTimeout(
+            sock_connect=settings.connect_timeout, sock_read=settings.read_timeout
+        ),
+    )
+
+
+@dataclass
+class AsyncResponse:
+    """A fully read async response exposing the `requests.Response` subset
+    the tools rely on, so both paths can share response handling."""
+
+    status_code: int
+    text: str
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+_lock = threading.Lock()
+_settings: ClientSettings | None = None
+_session: requests.Session | None = None
+# An aiohttp pool is bound to the loop that opened its connections, so keep
+# one session per loop; entries vanish with their loop.
+_async_sessions: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, aiohttp.ClientSession
+] = weakref.WeakKeyDictionary()
+
+
+def get_settings() -> ClientSettings:
+    """Return the process-wide client settings, reading the environment once."""
+    global _settings
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                _settings = ClientSettings.from_env()
+    return _settings
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    if _session is None:
+        settings = get_settings()
+        with _lock:
+            if _session is None:
+                _session = build_session(settings)
+    return _session
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """Return the async session for the running event loop."""
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        settings = get_settings()
+        with _lock:
+            session = _async_sessions.get(loop)
+            if session is None or session.closed:
+                session = build_async_session(settings)
+                _async_sessions[loop] = session
+    return session
+
+
+def _endpoint(path: str) -> str:
+    return path.strip("/").split("/", 1)[0]
+
+
+def _timeout(settings: ClientSettings) -> tuple[float, float]:
+    """The (connect, read) timeout, cut down to the caller's remaining budget."""
+    left = resilience.remaining()
+    if left is None:
+        return settings.timeout
+    if left <= 0:
+        raise resilience.DeadlineExceeded()
+    return (min(settings.connect_timeout, left), min(settings.read_timeout, left))
+
+
+def _hedge_delay(method: str, endpoint: str) -> float | None:
+    if method not in _RETRY_METHODS:
+        return None
+    delay = resilience.get_hedger().delay(endpoint)
+    left = resilience.remaining()
+    if delay is None or (left is not None and delay >= left):
+        return None
+    return delay
+
+
+def request(method: str, path: str, **kwargs: Any) -> requests.Response:
+    """Send a rate-limited request through the shared session.
+
+    The endpoint's token bucket is consulted before sending and corrected
+    from the response's rate-limit headers afterwards. Raises
+    `resilience.CircuitOpenError` while the breaker is open and
+    `resilience.DeadlineExceeded` once the caller's budget is spent.
+    """
+    import requests
+
+    endpoint = _endpoint(path)
+    breaker = resilience.get_breaker()
+    breaker.acquire()
+    # Only AbuseIPDB's own failures count against it; running out of budget
+    # or rate-limit tokens hands the admitted call back instead.
+    outcome: bool | None = None
+    try:
+        rate_limiter.get_limiter().bucket(endpoint).acquire(resilience.remaining())
+        timeout = _timeout(get_settings())
+        try:
+            response = _hedged(method, path, endpoint, timeout, kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            outcome = False
+            raise
+        outcome = response.status_code < 500
+    finally:
+        _settle(breaker, outcome)
+    return response
+
+
+def _settle(breaker: resilience.CircuitBreaker, outcome: bool | None) -> None:
+    if outcome is None:
+        breaker.release()
+    else:
+        breaker.record(outcome)
+
+
+def _hedged(
+    method: str,
+    path: str,
+    endpoint: str,
+    timeout: tuple[float, float],
+    kwargs: dict[str, Any],
+) -> requests.Response:
+    delay = _hedge_delay(method, endpoint)
+    if delay is None:
+        return _attempt(method, path, endpoint, timeout, kwargs)
+
+    attempt = tool_metrics.run_in_context(_attempt)
+    pool = _hedge_pool()
+    first = pool.submit(attempt, method, path, endpoint, timeout, kwargs)
+    done, _ = wait([first], timeout=delay)
+    if done or not _may_hedge(endpoint):
+        return first.result()
+    second = pool.submit(attempt, method, path, endpoint, timeout, kwargs, True)
+    pending: set[Future[requests.Response]] = {first, second}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    resilience.get_hedger().won()
+                return future.result()
+    return first.result()  # both failed; raise the original request's error
+
+
+def _may_hedge(endpoint: str) -> bool:
+    # A hedge is optional: skip it rather than wait for a rate-limit token.
+    return (
+        resilience.get_hedger().take()
+        and rate_limiter.get_limiter().bucket(endpoint).try_acquire()
+    )
+
+
+def _attempt(
+    method: str,
+    path: str,
+    endpoint: str,
+    timeout: tuple[float, float],
+    kwargs: dict[str, Any],
+    hedge: bool = False,
+) -> requests.Response:
+    import requests
+
+    operation = f"{method} {endpoint}" + (" (hedge)" if hedge else "")
+    start = time.perf_counter()
+    with tool_metrics.dependency("abuseipdb", operation) as call:
+        try:
+            response = get_session().request(
+                method, url(path), timeout=timeout, **kwargs
+            )
+        except requests.Timeout as exc:
+            if resilience.expired():
+                raise resilience.DeadlineExceeded() from exc
+            raise
+        call.status(response.status_code)
+    resilience.get_hedger().record(endpoint, time.perf_counter() - start)
+    rate_limiter.get_limiter().bucket(endpoint).update(
+        response.status_code, response.headers
+    )
+    return response
+
+
+async def request_async(method: str, path: str, **kwargs: Any) -> AsyncResponse:
+    """Asyncio counterpart of `request` using the loop's shared session.
+
+    Mirrors the sync retry policy: idempotent methods are retried with
+    exponential backoff on connection errors and retryable statuses, while
+    the caller's budget lasts. A losing hedge is cancelled.
+    """
+    import aiohttp
+
+    endpoint = _endpoint(path)
+    breaker = resilience.get_breaker()
+    breaker.acquire()
+    outcome: bool | None = None
+    try:
+        bucket = rate_limiter.get_limiter().bucket(endpoint)
+        await bucket.acquire_async(resilience.remaining())
+        _timeout(get_settings())  # fail before sending if the budget is spent
+        try:
+            response = await _hedged_async(method, path, endpoint, kwargs)
+        except (aiohttp.ClientConnectionError, TimeoutError):
+            outcome = False
+            raise
+        outcome = response.status_code < 500
+    finally:
+        _settle(breaker, outcome)
+    return response
+
+
+async def _hedged_async(
+    method: str, path: str, endpoint: str, kwargs: dict[str, Any]
+) -> AsyncResponse:
+    delay = _hedge_delay(method, endpoint)
+    if delay is None:
+        return await _attempt_async(method, path, endpoint, kwargs)
+
+    first = asyncio.ensure_future(_attempt_async(method, path, endpoint, kwargs))
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done or not _may_hedge(endpoint):
+        return await first
+    second = asyncio.ensure_future(
+        _attempt_async(method, path, endpoint, kwargs, hedge=True)
+    )
+    pending = {first, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        resilience.get_hedger().won()
+                    return task.result()
+        return first.result()  # both failed; raise the original request's error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _attempt_async(
+    method: str, path: str, endpoint: str, kwargs: dict[str, Any], hedge: bool = False
+) -> AsyncResponse:
+    operation = f"{method} {endpoint}" + (" (hedge)" if hedge else "")
+    start = time.perf_counter()
+    with tool_metrics.dependency("abuseipdb", operation) as call:
+        try:
+            response = await _send_async(method, path, **kwargs)
+        except TimeoutError as exc:
+            if resilience.expired():
+                raise resilience.DeadlineExceeded() from exc
+            raise
+        call.status(response.status_code)
+    resilience.get_hedger().record(endpoint, time.perf_counter() - start)
+    rate_limiter.get_limiter().bucket(endpoint).update(
+        response.status_code, response.headers
+    )
+    return response
+
+
+async def _send_async(method: str, path: str, **kwargs: Any) -> AsyncResponse:
+    import aiohttp
+
+    settings = get_settings()
+    attempts = 1 + (settings.max_retries if method in _RETRY_METHODS else 0)
+    session = get_async_session()
+    for attempt in range(attempts):
+        if attempt:
+            await asyncio.sleep(settings.backoff_factor * (2 ** (attempt - 1)))
+        last = attempt == attempts - 1
+        left = resilience.remaining()
+        if left is not None:
+            if left <= 0:
+                raise resilience.DeadlineExceeded()
+            kwargs["timeout"] = aiohttp.ClientTimeout(
+                total=left,
+                sock_connect=settings.connect_timeout,
+                sock_read=settings.read_timeout,
+            )
+        try:
+            async with session.request(method, url(path), **kwargs) as response:
+                if response.status in _RETRY_STATUSES and not last:
+                    continue
+                return AsyncResponse(
+                    response.status, await response.text(), dict(response.headers)
+                )
+        except aiohttp.ClientConnectionError:
+            if last:
+                raise
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+_hedge_executor: ThreadPoolExecutor | None = None
+
+
+def _hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=2 * get_settings().pool_maxsize,
+                    thread_name_prefix="abuseipdb-hedge",
+                )
+    return _hedge_executor
+
+
+async def aclose() -> None:
+    """Close the running loop's async session (tests and benchmarks)."""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+def configure(
+    settings: ClientSettings | None = None,
+    session: requests.Session | None = None,
+) -> None:
+    """Replace the shared settings and/or session.
+
+    Tests and benchmarks use this to point the tools at a local fake server.
+    Passing no arguments resets the clients so the next call re-reads the
+    environment.
+    """
+    global _settings, _session
+    with _lock:
+        old = _session
+        _settings = settings
+        _session = session
+        # Async sessions can only be closed on their own loop (see `aclose`);
+        # dropping them here stops them being handed out again.
+        _async_sessions.clear()
+    if old is not None and old is not session:
+        old.close()
+
+
+def url(path: str) -> str:
+    """Join an endpoint path such as ``"check"`` onto the configured base URL."""
+    return f"{get_settings().base_url}/{path.lstrip('/')}"
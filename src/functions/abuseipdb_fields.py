@@ -0,0 +1,112 @@
+"""Field projection for the AbuseIPDB check tools.
+
+A full `check` result is mostly fields agents never read, and every byte of
+the tool reply ends up in the model's context. `resolve` turns a tool's
+``profile`` and ``fields`` arguments into a `Projection`, which keeps only
+the selected ``data`` fields of each result. ``meta`` (where the answer came
+from) and per-IP ``{"error": ...}`` entries are always kept as they are.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any
+
+# Every field of a `check` result's ``data``. ``reports`` is only sent by
+# AbuseIPDB for verbose requests.
+CHECK_FIELDS = (
+    "ipAddress",
+    "isPublic",
+    "ipVersion",
+    "isWhitelisted",
+    "abuseConfidenceScore",
+    "countryCode",
+    "countryName",
+    "usageType",
+    "isp",
+    "domain",
+    "hostnames",
+    "isTor",
+    "totalReports",
+    "numDistinctUsers",
+    "lastReportedAt",
+    "reports",
+)
+REPORTS_FIELD = "reports"
+
+FULL = "full"
+PROFILES: dict[str, tuple[str, ...] | None] = {
+    FULL: None,
+    "compact": (
+        "ipAddress",
+        "abuseConfidenceScore",
+        "countryCode",
+        "isp",
+        "lastReportedAt",
+    ),
+    "minimal": ("ipAddress", "abuseConfidenceScore"),
+}
+
+
+class ProjectionError(ValueError):
+    """Unknown profile or field; ``str(exc)`` is the tool's reply."""
+
+
+@dataclass(frozen=True, slots=True)
+class Projection:
+    """The ``data`` fields to keep; None keeps the whole result."""
+
+    fields: tuple[str, ...] | None = None
+
+    @property
+    def wants_reports(self) -> bool:
+        """Whether the upstream request must be verbose to fill the projection."""
+        return self.fields is not None and REPORTS_FIELD in self.fields
+
+    def apply(self, result: dict[str, Any]) -> dict[str, Any]:
+        """Return ``result`` reduced to the selected fields.
+
+        A full projection returns ``result`` itself.
+        """
+        data = result.get("data")
+        if self.fields is None or not isinstance(data, dict):
+            return result
+        projected: dict[str, Any] = {
+            "data": {name: data[name] for name in self.fields if name in data}
+        }
+        if "meta" in result:
+            projected["meta"] = result["meta"]
+        return projected
+
+    def apply_many(self, results: dict[str, dict[str, Any]]) -> dict[str, Any]:
+        """`apply` to every value of a `check_ips` result map."""
+        if self.fields is None:
+            return results
+        return {ip: self.apply(result) for ip, result in results.items()}
+
+
+_FULL_PROJECTION = Projection()
+
+
+def resolve(profile: str | None, fields: str | None) -> Projection:
+    """Build the projection for a tool call.
+
+    ``fields`` is a comma- or whitespace-separated list of `CHECK_FIELDS` and
+    takes precedence over ``profile`` (default ``"full"``). Raises
+    `ProjectionError` for unknown names.
+    """
+    if fields:
+        names = tuple(dict.fromkeys(n for n in re.split(r"[\s,]+", fields) if n))
+        unknown = [name for name in names if name not in CHECK_FIELDS]
+        if unknown:
+            raise ProjectionError(f"Invalid fields: {', '.join(unknown)}")
+        if names:
+            return Projection(names)
+    name = (profile or FULL).strip().lower()
+    if name not in PROFILES:
+        raise ProjectionError(
+            f"Invalid profile '{profile}' (expected one of {', '.join(PROFILES)})"
+        )
+    selected = PROFILES[name]
+    return _FULL_PROJECTION if selected is None else Projection(selected)
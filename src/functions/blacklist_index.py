@@ -0,0 +1,265 @@
+"""Compact, memory-mappable index of the AbuseIPDB blacklist.
+
+Snapshot layout (integers big-endian)::
+
+    header  8s magic, d created_at (unix seconds), I ipv4 count, I ipv6 count
+    ipv4    count x (4s start, 4s end, B score)
+    ipv6    count x (16s start, 16s end, B score)
+
+Ranges within a family are sorted by start and never overlap. Packed
+big-endian addresses compare bytewise in numeric order, so a lookup is a
+binary search over fixed-width records that runs directly against the
+snapshot bytes. That lets a snapshot file be memory-mapped and queried in
+place on startup without parsing it into Python objects first.
+"""
+
+import ipaddress
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from . import blob_backend
+
+_MAGIC = b"ABLIDX01"
+_HEADER = struct.Struct(">8sdII")
+# (address width, record size) per IP version
+_LAYOUT = {4: (4, 9), 6: (16, 33)}
+
+Entry = tuple[str, int]
+_Range = tuple[int, int, int]
+
+
+def parse_export(text: str) -> list[Entry]:
+    """Parse a blacklist export into ``(address or CIDR, score)`` entries.
+
+    Accepts the JSON body of AbuseIPDB's ``/blacklist`` endpoint as well as
+    the plain-text variant (one address or CIDR per line, ``#`` comments),
+    which has no scores and is treated as fully confident.
+    """
+    stripped = text.lstrip()
+    if stripped.startswith("{"):
+        payload: dict[str, Any] = json.loads(stripped)
+        return [
+            (str(item["ipAddress"]), int(item.get("abuseConfidenceScore", 100)))
+            for item in payload.get("data", [])
+        ]
+    entries: list[Entry] = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            entries.append((line, 100))
+    return entries
+
+
+def _merge(ranges: list[_Range]) -> list[_Range]:
+    # Overlapping ranges collapse into one record carrying the highest score.
+    ranges.sort()
+    merged: list[_Range] = []
+    for start, end, score in ranges:
+        if merged and start <= merged[-1][1]:
+            prev_start, prev_end, prev_score = merged[-1]
+            merged[-1] = (prev_start, max(prev_end, end), max(prev_score, score))
+        else:
+            merged.append((start, end, score))
+    return merged
+
+
+class BlacklistIndex:
+    """Sorted IPv4/IPv6 range index backed by a single bytes-like buffer."""
+
+    def __init__(self, buffer: bytes | mmap.mmap) -> None:
+        magic, created_at, v4_count, v6_count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not an AbuseIPDB blacklist snapshot")
+        self._buffer = buffer
+        self.created_at: float = created_at
+        self._counts: dict[int, int] = {4: v4_count, 6: v6_count}
+        self._offsets = {4: _HEADER.size, 6: _HEADER.size + v4_count * _LAYOUT[4][1]}
+
+    def __len__(self) -> int:
+        return self._counts[4] + self._counts[6]
+
+    @classmethod
+    def from_entries(
+        cls, entries: Iterable[Entry], created_at: float | None = None
+    ) -> "BlacklistIndex":
+        """Build an index from addresses/CIDRs; malformed entries are skipped."""
+        ranges: dict[int, list[_Range]] = {4: [], 6: []}
+        for network, score in entries:
+            try:
+                net = ipaddress.ip_network(network.strip(), strict=False)
+            except ValueError:
+                logging.warning("Skipping malformed blacklist entry %r", network)
+                continue
+            ranges[net.version].append(
+                (
+                    int(net.network_address),
+                    int(net.broadcast_address),
+                    max(0, min(score, 100)),
+                )
+            )
+
+        parts: list[bytes] = []
+        counts: dict[int, int] = {}
+        for version in (4, 6):
+            width = _LAYOUT[version][0]
+            merged = _merge(ranges[version])
+            counts[version] = len(merged)
+            parts.extend(
+                start.to_bytes(width, "big") + end.to_bytes(width, "big") + bytes([s])
+                for start, end, s in merged
+            )
+        header = _HEADER.pack(
+            _MAGIC,
+            time.time() if created_at is None else created_at,
+            counts[4],
+            counts[6],
+        )
+        return cls(header + b"".join(parts))
+
+    @classmethod
+    def load(cls, path: str) -> "BlacklistIndex":
+        """Memory-map a snapshot file written by `save`."""
+        with open(path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._buffer)
+
+    def save(self, path: str) -> None:
+        """Write the snapshot atomically so readers never see a partial file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(self._buffer)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def lookup(self, ip: str) -> int | None:
+        """Return the confidence score for a listed address, else ``None``."""
+        try:
+            addr = ipaddress.ip_address(ip.strip())
+        except ValueError:
+            return None
+        if isinstance(addr, ipaddress.IPv6Address) and addr.ipv4_mapped:
+            addr = addr.ipv4_mapped
+        width, size = _LAYOUT[addr.version]
+        base = self._offsets[addr.version]
+        packed = addr.packed
+        buf = self._buffer
+
+        # Find the last range whose start is <= the address.
+        lo, hi = 0, self._counts[addr.version]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = base + mid * size
+            if buf[offset : offset + width] <= packed:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+        offset = base + (lo - 1) * size
+        if packed <= buf[offset + width : offset + 2 * width]:
+            return int(buf[offset + 2 * width])
+        return None
+
+
+def is_enabled() -> bool:
+    return os.getenv("ABUSEIPDB_BLACKLIST_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+def snapshot_path() -> str:
+    return os.getenv("ABUSEIPDB_BLACKLIST_PATH") or os.path.join(
+        tempfile.gettempdir(), "abuseipdb-blacklist.idx"
+    )
+
+
+def max_age() -> float:
+    return float(os.getenv("ABUSEIPDB_BLACKLIST_MAX_AGE") or 86_400)
+
+
+_lock = threading.Lock()
+_index: BlacklistIndex | None = None
+_etag: str | None = None
+_next_sync_at = 0.0
+
+
+def swap(index: BlacklistIndex | None) -> BlacklistIndex | None:
+    """Atomically publish a new index and return the previous one.
+
+    The previous index is deliberately not closed: in-flight lookups may still
+    hold a reference, and its mapping is released once they drop it.
+    """
+    global _index
+    with _lock:
+        previous, _index = _index, index
+    return previous
+
+
+def _sync_from_blob(container: str, blob: str) -> None:
+    global _etag
+    path = snapshot_path()
+    try:
+        download = blob_backend.get_backend().get(container, blob, _etag)
+        if download is None:  # unchanged since the last sync
+            return
+        BlacklistIndex(download.readall()).save(path)
+        swap(BlacklistIndex.load(path))
+    except Exception:
+        logging.warning("Could not sync blacklist snapshot from blob", exc_info=True)
+        return
+    _etag = download.etag
+
+
+def get_index(blob_path: str | None = None) -> BlacklistIndex | None:
+    """Return the current index, loading or re-syncing the snapshot as needed.
+
+    A local snapshot is memory-mapped synchronously on first use. Refreshes of
+    the shared snapshot at ``blob_path`` (``container/name``) are pulled in a
+    background thread so callers never wait on a download, and only when its
+    ETag changed since the last sync.
+    """
+    global _next_sync_at
+    if not is_enabled():
+        return None
+
+    now = time.monotonic()
+    if now >= _next_sync_at:
+        with _lock:
+            start_sync = now >= _next_sync_at
+            if start_sync:
+                interval = float(os.getenv("ABUSEIPDB_BLACKLIST_SYNC_INTERVAL") or 3600)
+                _next_sync_at = now + interval
+        if start_sync:
+            path = snapshot_path()
+            if _index is None and os.path.exists(path):
+                try:
+                    swap(BlacklistIndex.load(path))
+                except (OSError, ValueError):
+                    logging.warning("Ignoring unreadable snapshot %s", path)
+            if blob_path:
+                container, _, blob = blob_path.partition("/")
+                threading.Thread(
+                    target=_sync_from_blob,
+                    args=(container, blob),
+                    name="abuseipdb-blacklist-sync",
+                    daemon=True,
+                ).start()
+
+    index = _index
+    if index is None or time.time() - index.created_at > max_age():
+        return None
+    return index
@@ -0,0 +1,482 @@
+"""Blob storage backends shared by the snippet and AbuseIPDB tools.
+
+Snippets, the snippet index, the shared reputation tier, the allowlist and
+blacklist syncs and report statuses all reach storage only through the small
+`BlobBackend` interface: conditional reads with ranges, conditional writes,
+metadata, listing and deletes. Two backends implement it:
+
+* `AzureBlobBackend` (``BLOB_STORAGE_BACKEND=azure``, the default) uses the
+  shared `storage` client.
+* `LocalBackend` (``BLOB_STORAGE_BACKEND=local``) keeps each blob as a file
+  under ``BLOB_LOCAL_ROOT``, writes it atomically and serves reads from a
+  memory map. It lets the tools run, be benchmarked and be load-tested
+  without Azure or Azurite, and gives a baseline for measuring blob overhead.
+
+The older ``SNIPPET_STORAGE_BACKEND`` and ``SNIPPET_LOCAL_ROOT`` names are
+still read when the new ones are unset.
+
+Backend operations are timed as dependency calls for `tool_metrics`,
+except `list`, whose calls happen lazily while the caller iterates.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import uuid
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Protocol
+
+from . import storage, tool_metrics
+
+AZURE = "azure"
+LOCAL = "local"
+
+# Chunk size for streamed reads, matching the Storage SDK's default.
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class NotFound(LookupError):
+    """The container or blob does not exist."""
+
+
+class PreconditionFailed(Exception):
+    """A conditional write or delete found the blob in a different state."""
+
+
+@dataclass(frozen=True)
+class BlobInfo:
+    name: str
+    size: int
+    etag: str
+    last_modified: datetime
+    metadata: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Download:
+    """A (possibly ranged) read. ``size`` is the whole blob's stored size."""
+
+    etag: str
+    size: int
+    metadata: dict[str, str]
+    chunks: Callable[[], Iterator[bytes | memoryview]]
+
+    def readall(self) -> bytes:
+        return b"".join(self.chunks())
+
+
+class BlobBackend(Protocol):
+    def get(
+        self,
+        container: str,
+        name: str,
+        if_none_match: str | None = None,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> Download | None:
+        """Read ``name``; ``None`` if its ETag still equals ``if_none_match``.
+
+        A range starting past the end yields no chunks. Raises `NotFound`.
+        """
+        ...
+
+    def head(self, container: str, name: str) -> BlobInfo:
+        """Properties and metadata of ``name``. Raises `NotFound`."""
+        ...
+
+    def put(
+        self,
+        container: str,
+        name: str,
+        data: bytes,
+        metadata: dict[str, str] | None = None,
+        if_match: str | None = None,
+        if_none_match: bool = False,
+    ) -> str:
+        """Write ``name`` and return its new ETag, creating the container.
+
+        With ``if_match`` the blob must still have that ETag; with
+        ``if_none_match`` it must not exist yet. Otherwise raises
+        `PreconditionFailed`.
+        """
+        ...
+
+    def set_metadata(self, container: str, name: str, metadata: dict[str, str]) -> str:
+        """Replace the metadata of ``name`` (changing its ETag). Raises `NotFound`."""
+        ...
+
+    def delete(self, container: str, name: str, if_match: str | None = None) -> None:
+        """Delete ``name``. Raises `NotFound` or `PreconditionFailed`."""
+        ...
+
+    def list(self, container: str, prefix: str = "") -> Iterator[BlobInfo]:
+        """Blobs (with metadata) whose names start with ``prefix``."""
+        ...
+
+
+class AzureBlobBackend:
+    """`BlobBackend` over the shared Azure `BlobServiceClient`."""
+
+    def _client(self, container: str, name: str) -> Any:
+        return storage.get_blob_service_client().get_blob_client(container, name)
+
+    @tool_metrics.timed("blob", "get")
+    def get(
+        self,
+        container: str,
+        name: str,
+        if_none_match: str | None = None,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> Download | None:
+        from azure.core import MatchConditions
+        from azure.core.exceptions import (
+            HttpResponseError,
+            ResourceNotFoundError,
+            ResourceNotModifiedError,
+        )
+
+        kwargs: dict[str, Any] = {}
+        if if_none_match is not None:
+            kwargs = {
+                "etag": if_none_match,
+                "match_condition": MatchConditions.IfModified,
+            }
+        if offset or length is not None:
+            kwargs.update(offset=offset, length=length)
+        client = self._client(container, name)
+        try:
+            downloader = client.download_blob(**kwargs)
+        except ResourceNotModifiedError:
+            return None
+        except ResourceNotFoundError:
+            raise NotFound(name) from None
+        except HttpResponseError as exc:
+            if exc.status_code != 416:
+                raise
+            # The range starts past the end of the blob.
+            info = self.head(container, name)
+            return Download(info.etag, info.size, info.metadata, lambda: iter(()))
+
+        properties = downloader.properties
+        size = int(properties.size)
+        content_range = getattr(properties, "content_range", None)
+        if "offset" in kwargs and content_range:
+            # For a ranged download `size` is the range; the blob size is in
+            # "bytes <start>-<end>/<total>".
+            size = int(str(content_range).rsplit("/", 1)[1])
+        return Download(
+            str(properties.etag),
+            size,
+            dict(getattr(properties, "metadata", None) or {}),
+            downloader.chunks,
+        )
+
+    @tool_metrics.timed("blob", "head")
+    def head(self, container: str, name: str) -> BlobInfo:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            properties = self._client(container, name).get_blob_properties()
+        except ResourceNotFoundError:
+            raise NotFound(name) from None
+        return _info(name, properties)
+
+    @tool_metrics.timed("blob", "put")
+    def put(
+        self,
+        container: str,
+        name: str,
+        data: bytes,
+        metadata: dict[str, str] | None = None,
+        if_match: str | None = None,
+        if_none_match: bool = False,
+    ) -> str:
+        from azure.core import MatchConditions
+        from azure.core.exceptions import (
+            ResourceExistsError,
+            ResourceModifiedError,
+            ResourceNotFoundError,
+        )
+
+        kwargs: dict[str, Any] = {"overwrite": not if_none_match, "metadata": metadata}
+        if if_match is not None:
+            kwargs.update(etag=if_match, match_condition=MatchConditions.IfNotModified)
+        client = self._client(container, name)
+        for attempt in range(2):
+            try:
+                return str(client.upload_blob(data, **kwargs)["etag"])
+            except (ResourceExistsError, ResourceModifiedError):
+                raise PreconditionFailed(name) from None
+            except ResourceNotFoundError:
+                if if_match is not None:
+                    raise PreconditionFailed(name) from None
+                if attempt:
+                    raise
+                # The container is created on first use, as the output binding did.
+                try:
+                    storage.get_blob_service_client().create_container(container)
+                except ResourceExistsError:
+                    pass
+        raise AssertionError("unreachable")
+
+    @tool_metrics.timed("blob", "set_metadata")
+    def set_metadata(self, container: str, name: str, metadata: dict[str, str]) -> str:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            result = self._client(container, name).set_blob_metadata(metadata)
+        except ResourceNotFoundError:
+            raise NotFound(name) from None
+        return str((result or {}).get("etag", ""))
+
+    @tool_metrics.timed("blob", "delete")
+    def delete(self, container: str, name: str, if_match: str | None = None) -> None:
+        from azure.core import MatchConditions
+        from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
+
+        kwargs: dict[str, Any] = {}
+        if if_match is not None:
+            kwargs = {
+                "etag": if_match,
+                "match_condition": MatchConditions.IfNotModified,
+            }
+        try:
+            self._client(container, name).delete_blob(**kwargs)
+        except ResourceModifiedError:
+            raise PreconditionFailed(name) from None
+        except ResourceNotFoundError:
+            raise NotFound(name) from None
+
+    def list(self, container: str, prefix: str = "") -> Iterator[BlobInfo]:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        client = storage.get_blob_service_client().get_container_client(container)
+        try:
+            for item in client.list_blobs(
+                name_starts_with=prefix or None, include=["metadata"]
+            ):
+                yield _info(item.name, item)
+        except ResourceNotFoundError:
+            return
+
+
+def _info(name: str, properties: Any) -> BlobInfo:
+    return BlobInfo(
+        name,
+        int(properties.size),
+        str(properties.etag),
+        properties.last_modified,
+        dict(getattr(properties, "metadata", None) or {}),
+    )
+
+
+# Local file layout: 4-byte big-endian header length, a JSON header holding
+# the ETag and metadata, then the blob bytes. Everything lives in one file so
+# a single atomic rename replaces it all.
+_HEADER = struct.Struct(">I")
+
+
+class LocalBackend:
+    """`BlobBackend` over a directory tree, read through ``mmap``.
+
+    ``<root>/<container>/<name>`` holds each blob. Writes go to a temporary
+    file that is renamed into place, so readers (including open memory maps
+    of the previous version) never see a partial write. Conditional
+    operations are serialised by a per-backend lock, which makes them atomic
+    within one worker process.
+    """
+
+    def __init__(self, root: str | os.PathLike[str]) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _path(self, container: str, name: str) -> Path:
+        parts = [container, *name.split("/")]
+        if any(part in ("", ".", "..") for part in parts) or "\\" in name:
+            raise ValueError(f"Invalid blob name '{container}/{name}'")
+        return self.root.joinpath(*parts)
+
+    @staticmethod
+    def _map(path: Path, name: str) -> tuple[mmap.mmap, dict[str, Any], int, float]:
+        """Map ``path``; returns the map, its header, data offset and mtime."""
+        try:
+            with open(path, "rb") as handle:
+                mtime = os.fstat(handle.fileno()).st_mtime
+                view = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            raise NotFound(name) from None
+        (length,) = _HEADER.unpack_from(view, 0)
+        start = _HEADER.size + length
+        return view, json.loads(view[_HEADER.size : start]), start, mtime
+
+    def _info(self, path: Path, name: str) -> BlobInfo:
+        view, header, start, mtime = self._map(path, name)
+        try:
+            return BlobInfo(
+                name,
+                len(view) - start,
+                header["etag"],
+                datetime.fromtimestamp(mtime, timezone.utc),
+                header["metadata"],
+            )
+        finally:
+            view.close()
+
+    @tool_metrics.timed("local", "get")
+    def get(
+        self,
+        container: str,
+        name: str,
+        if_none_match: str | None = None,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> Download | None:
+        view, header, start, _ = self._map(self._path(container, name), name)
+        if header["etag"] == if_none_match:
+            view.close()
+            return None
+        begin = start + min(offset, len(view) - start)
+        end = len(view) if length is None else min(len(view), begin + length)
+
+        def chunks() -> Iterator[bytes | memoryview]:
+            buffer = memoryview(view)
+            try:
+                for position in range(begin, end, CHUNK_SIZE):
+                    yield buffer[position : min(end, position + CHUNK_SIZE)]
+            finally:
+                buffer.release()
+                try:
+                    view.close()
+                except BufferError:
+                    pass  # a consumer still holds a slice; closed when collected
+
+        return Download(header["etag"], len(view) - start, header["metadata"], chunks)
+
+    @tool_metrics.timed("local", "head")
+    def head(self, container: str, name: str) -> BlobInfo:
+        return self._info(self._path(container, name), name)
+
+    def _current_etag(self, path: Path, name: str) -> str | None:
+        try:
+            return self._info(path, name).etag
+        except NotFound:
+            return None
+
+    def _write(self, path: Path, data: bytes, metadata: dict[str, str] | None) -> str:
+        etag = f'"{uuid.uuid4().hex}"'
+        header = json.dumps({"etag": etag, "metadata": metadata or {}}).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_dir = self.root / ".tmp"
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(_HEADER.pack(len(header)))
+                handle.write(header)
+                handle.write(data)
+            os.replace(temp, path)
+        except BaseException:
+            Path(temp).unlink(missing_ok=True)
+            raise
+        return etag
+
+    @tool_metrics.timed("local", "put")
+    def put(
+        self,
+        container: str,
+        name: str,
+        data: bytes,
+        metadata: dict[str, str] | None = None,
+        if_match: str | None = None,
+        if_none_match: bool = False,
+    ) -> str:
+        path = self._path(container, name)
+        with self._lock:
+            if if_none_match or if_match is not None:
+                current = self._current_etag(path, name)
+                if (if_none_match and current is not None) or (
+                    if_match is not None and current != if_match
+                ):
+                    raise PreconditionFailed(name)
+            return self._write(path, data, metadata)
+
+    @tool_metrics.timed("local", "set_metadata")
+    def set_metadata(self, container: str, name: str, metadata: dict[str, str]) -> str:
+        path = self._path(container, name)
+        with self._lock:
+            download = self.get(container, name)
+            assert download is not None
+            return self._write(path, download.readall(), metadata)
+
+    @tool_metrics.timed("local", "delete")
+    def delete(self, container: str, name: str, if_match: str | None = None) -> None:
+        path = self._path(container, name)
+        with self._lock:
+            current = self._current_etag(path, name)
+            if current is None:
+                raise NotFound(name)
+            if if_match is not None and current != if_match:
+                raise PreconditionFailed(name)
+            path.unlink()
+
+    def list(self, container: str, prefix: str = "") -> Iterator[BlobInfo]:
+        base = self.root / container
+        if not base.is_dir():
+            return
+        names = sorted(
+            path.relative_to(base).as_posix()
+            for path in base.rglob("*")
+            if path.is_file()
+        )
+        for name in names:
+            if name.startswith(prefix):
+                try:
+                    yield self.head(container, name)
+                except NotFound:
+                    continue  # deleted since the directory walk
+
+
+_lock = threading.Lock()
+_backend: BlobBackend | None = None
+
+
+def from_env() -> BlobBackend:
+    kind = (
+        os.getenv("BLOB_STORAGE_BACKEND")
+        or os.getenv("SNIPPET_STORAGE_BACKEND")
+        or AZURE
+    ).lower()
+    if kind == AZURE:
+        return AzureBlobBackend()
+    if kind == LOCAL:
+        root = (
+            os.getenv("BLOB_LOCAL_ROOT")
+            or os.getenv("SNIPPET_LOCAL_ROOT")
+            or os.path.join(tempfile.gettempdir(), "mcp-blobs")
+        )
+        return LocalBackend(root)
+    raise ValueError(f"Unknown BLOB_STORAGE_BACKEND '{kind}'")
+
+
+def get_backend() -> BlobBackend:
+    """Return the process-wide backend, choosing it from settings on first use."""
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = from_env()
+    return _backend
+
+
+def configure(backend: BlobBackend | None = None) -> None:
+    """Replace the shared backend; with no argument the next use rebuilds it."""
+    global _backend
+    with _lock:
+        _backend = backend
@@ -0,0 +1,223 @@
+"""Cache of AbuseIPDB ``check-block`` results, looked up by address.
+
+A ``check-block`` result lists every reported address in a network with its
+report count, latest report and confidence score; addresses it does not list
+had no reports in the window. So while a block's result is fresh, a
+`check_ip` for any address inside it can be answered from the cache.
+
+Blocks are stored under ``(version, maxAgeInDays, prefixlen, address >>
+host bits)``. Looking an address up costs one dict probe per distinct prefix
+length cached for its IP version (normally just /24 or /64), most specific
+first, so the cache stays O(1) per lookup however many blocks it holds.
+"""
+
+import ipaddress
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+# The block a bare address stands for: its /24, or its /64 for IPv6.
+DEFAULT_PREFIX = {4: 24, 6: 64}
+
+
+def parse_network(value: str) -> Network:
+    """Parse a CIDR block, or a bare address as its default block.
+
+    Host bits are masked off (``192.0.2.7/24`` is ``192.0.2.0/24``).
+    Raises ValueError.
+    """
+    value = value.strip()
+    if "/" not in value:
+        address = ipaddress.ip_address(value)
+        value = f"{address}/{DEFAULT_PREFIX[address.version]}"
+    return ipaddress.ip_network(value, strict=False)
+
+
+@dataclass
+class BlockStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class BlockHit:
+    """What a cached block says about one address."""
+
+    network: Network
+    checked_at: datetime
+    # The block's ``reportedAddress`` entry for the address; None if unreported.
+    report: dict[str, Any] | None
+
+
+@dataclass
+class _Block:
+    network: Network
+    result: dict[str, Any]
+    reported: dict[str, dict[str, Any]]
+    checked_at: datetime
+    expires_at: float
+
+
+def _key(network: Network, max_age_in_days: int) -> tuple[int, int, int, int]:
+    shift = network.max_prefixlen - network.prefixlen
+    return (
+        network.version,
+        max_age_in_days,
+        network.prefixlen,
+        int(network.network_address) >> shift,
+    )
+
+
+class BlockCache:
+    """A bounded, thread-safe LRU of ``check-block`` results with a TTL."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._blocks: OrderedDict[tuple[int, int, int, int], _Block] = OrderedDict()
+        # How many cached blocks use each (version, prefixlen), for lookups.
+        self._prefixes: Counter[tuple[int, int]] = Counter()
+        self._lock = threading.Lock()
+        self._stats = BlockStats()
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            snapshot = self._stats.to_dict()
+            snapshot["size"] = len(self._blocks)
+        return snapshot
+
+    def put(
+        self, network: Network, max_age_in_days: int, result: dict[str, Any]
+    ) -> None:
+        """Cache the ``check-block`` ``result`` for ``network``."""
+        if self.max_entries <= 0:
+            return
+        data = result.get("data") or {}
+        reported: dict[str, dict[str, Any]] = {}
+        for entry in data.get("reportedAddress") or []:
+            try:
+                reported[ipaddress.ip_address(entry["ipAddress"]).compressed] = entry
+            except (KeyError, TypeError, ValueError):
+                continue
+        block = _Block(
+            network,
+            result,
+            reported,
+            datetime.now(timezone.utc),
+            self._clock() + self.ttl,
+        )
+        key = _key(network, max_age_in_days)
+        with self._lock:
+            if self._blocks.pop(key, None) is None:
+                self._prefixes[(network.version, network.prefixlen)] += 1
+            self._blocks[key] = block
+            self._stats.stores += 1
+            while len(self._blocks) > self.max_entries:
+                _, evicted = self._blocks.popitem(last=False)
+                self._forget_prefix(evicted.network)
+                self._stats.evictions += 1
+
+    def _forget_prefix(self, network: Network) -> None:
+        prefix = (network.version, network.prefixlen)
+        self._prefixes[prefix] -= 1
+        if self._prefixes[prefix] <= 0:
+            del self._prefixes[prefix]
+
+    def _fresh(self, key: tuple[int, int, int, int], now: float) -> _Block | None:
+        # Caller holds the lock.
+        block = self._blocks.get(key)
+        if block is None:
+            return None
+        if now >= block.expires_at:
+            del self._blocks[key]
+            self._forget_prefix(block.network)
+            return None
+        self._blocks.move_to_end(key)
+        return block
+
+    def get(self, network: Network, max_age_in_days: int) -> dict[str, Any] | None:
+        """The fresh cached result for exactly ``network``, or None."""
+        with self._lock:
+            block = self._fresh(_key(network, max_age_in_days), self._clock())
+        return block.result if block is not None else None
+
+    def lookup(self, ip: str, max_age_in_days: int) -> BlockHit | None:
+        """Answer ``ip`` from the most specific fresh block containing it."""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        value = int(address)
+        now = self._clock()
+        with self._lock:
+            prefixes = sorted(
+                (p for v, p in self._prefixes if v == address.version), reverse=True
+            )
+            for prefixlen in prefixes:
+                shift = address.max_prefixlen - prefixlen
+                key = (address.version, max_age_in_days, prefixlen, value >> shift)
+                block = self._fresh(key, now)
+                if block is not None:
+                    self._stats.hits += 1
+                    return BlockHit(
+                        block.network,
+                        block.checked_at,
+                        block.reported.get(address.compressed),
+                    )
+            self._stats.misses += 1
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+            self._prefixes.clear()
+
+
+def from_env() -> BlockCache:
+    """Build a cache from `ABUSEIPDB_BLOCK_CACHE_*` environment variables."""
+    return BlockCache(
+        max_entries=int(os.getenv("ABUSEIPDB_BLOCK_CACHE_MAX_ENTRIES") or 1024),
+        ttl=float(os.getenv("ABUSEIPDB_BLOCK_CACHE_TTL") or 900.0),
+    )
+
+
+_lock = threading.Lock()
+_cache: BlockCache | None = None
+
+
+def get_cache() -> BlockCache:
+    """Return the process-wide block cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = from_env()
+    return _cache
+
+
+def configure(cache: BlockCache | None = None) -> None:
+    """Replace the shared cache; with no argument the next use re-reads env."""
+    global _cache
+    with _lock:
+        _cache = cache
@@ -1,19 +1,45 @@
 # Auto-generated from function_app.py: function `get_snippet`
 # NOTE: move any function-specific imports here if necessary
+from dataclasses import asdict
 from typing import TYPE_CHECKING
+import json
 import logging
-import azure.functions as func
+
+from . import snippet_store, tool_args, tool_metrics
 
 # Context arrives as a JSON string; annotate as str for worker compatibility
 ContextType = str
 
 if TYPE_CHECKING:
-    from function_app import app, _BLOB_PATH, tool_properties_get_snippets_json
+    from function_app import (
+        app,
+        tool_properties_get_snippets_json,
+        tool_properties_get_snippets_object,
+        _SNIPPET_LENGTH_PROPERTY_NAME,
+        _SNIPPET_NAME_PROPERTY_NAME,
+        _SNIPPET_OFFSET_PROPERTY_NAME,
+    )
 else:
     try:
-        from .function_app import app, _BLOB_PATH, tool_properties_get_snippets_json
+        from .function_app import (
+            app,
+            tool_properties_get_snippets_json,
+            tool_properties_get_snippets_object,
+            _SNIPPET_LENGTH_PROPERTY_NAME,
+            _SNIPPET_NAME_PROPERTY_NAME,
+            _SNIPPET_OFFSET_PROPERTY_NAME,
+        )
     except Exception:
-        from function_app import app, _BLOB_PATH, tool_properties_get_snippets_json
+        from function_app import (
+            app,
+            tool_properties_get_snippets_json,
+            tool_properties_get_snippets_object,
+            _SNIPPET_LENGTH_PROPERTY_NAME,
+            _SNIPPET_NAME_PROPERTY_NAME,
+            _SNIPPET_OFFSET_PROPERTY_NAME,
+        )
+
+_SCHEMA = tool_args.compile_schema(tool_properties_get_snippets_object)
 
 
 @app.generic_trigger(
@@ -23,19 +49,49 @@ else:
     description="Retrieve a snippet by name.",
     toolProperties=tool_properties_get_snippets_json,
 )
-@app.generic_input_binding(
-    arg_name="file", type="blob", connection="AzureWebJobsStorage", path=_BLOB_PATH
-)
-def get_snippet(file: func.InputStream, context: ContextType) -> str:
+@tool_metrics.instrument
+def get_snippet(context: ContextType) -> str:
     """Retrieves a snippet by name from Azure Blob Storage.
 
+    Reads go through the shared snippet cache, which revalidates cached
+    copies with conditional requests instead of re-downloading them. When
+    ``offset`` or ``length`` is given, that byte range is returned as JSON
+    with a ``nextOffset`` for paging through large snippets.
+
     Args:
-        file (func.InputStream): The input binding to read the snippet from Azure Blob Storage.
         context: The trigger context containing the input arguments.
 
     Returns:
         str: The content of the snippet or an error message.
     """
-    snippet_content = file.read().decode("utf-8")
-    logging.info(f"Retrieved snippet: {snippet_content}")
+    try:
+        arguments = _SCHEMA.parse(context)
+    except tool_args.ArgumentsError as exc:
+        return str(exc)
+
+    snippet_name_from_args = arguments.string(_SNIPPET_NAME_PROPERTY_NAME)
+    if not snippet_name_from_args:
+        return "No snippet name provided"
+
+    try:
+        offset = arguments.integer(_SNIPPET_OFFSET_PROPERTY_NAME)
+        length = arguments.integer(_SNIPPET_LENGTH_PROPERTY_NAME)
+    except tool_args.InvalidArgument:
+        return "Invalid offset or length"
+
+    try:
+        if offset is None and length is None:
+            snippet_content = snippet_store.read_snippet(snippet_name_from_args)
+        else:
+            page = snippet_store.read_range(snippet_name_from_args, offset or 0, length)
+            snippet_content = json.dumps(asdict(page))
+    except UnicodeDecodeError:
+        raise
+    except (snippet_store.SnippetNotFound, ValueError) as exc:
+        return str(exc)
+    logging.info(
+        "Retrieved snippet '%s' (%d chars)",
+        snippet_name_from_args,
+        len(snippet_content),
+    )
     return snippet_content
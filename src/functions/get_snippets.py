@@ -0,0 +1,86 @@
+import json
+import logging
+import re
+from typing import TYPE_CHECKING, Any
+
+from . import snippet_store, tool_args, tool_metrics
+
+# Context arrives as a JSON string; annotate as str for worker compatibility
+ContextType = str
+
+if TYPE_CHECKING:
+    from function_app import (
+        _SNIPPET_NAMES_PROPERTY_NAME,
+        app,
+        tool_properties_get_snippets_batch_json,
+        tool_properties_get_snippets_batch_object,
+    )
+else:
+    try:
+        from .function_app import (
+            _SNIPPET_NAMES_PROPERTY_NAME,
+            app,
+            tool_properties_get_snippets_batch_json,
+            tool_properties_get_snippets_batch_object,
+        )
+    except Exception:
+        from function_app import (
+            _SNIPPET_NAMES_PROPERTY_NAME,
+            app,
+            tool_properties_get_snippets_batch_json,
+            tool_properties_get_snippets_batch_object,
+        )
+
+_SCHEMA = tool_args.compile_schema(tool_properties_get_snippets_batch_object)
+
+
+def _parse_names(value: Any) -> list[str]:
+    """Accept a list, a JSON array string or a comma-separated string of names."""
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped.startswith("["):
+            try:
+                value = tool_args.loads(stripped)
+            except json.JSONDecodeError:
+                return []
+        else:
+            value = re.split(r"\s*,\s*", stripped)
+    if not isinstance(value, list):
+        return []
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+@app.generic_trigger(
+    arg_name="context",
+    type="mcpToolTrigger",
+    toolName="get_snippets",
+    description="Retrieve many snippets by name in one call.",
+    toolProperties=tool_properties_get_snippets_batch_json,
+)
+@tool_metrics.instrument
+def get_snippets(context: ContextType) -> str:
+    """Retrieve several snippets concurrently.
+
+    Returns a JSON object keyed by snippet name whose values are
+    ``{"snippet": content}`` or ``{"error": message}``, so one missing or
+    oversized snippet does not fail the others.
+    """
+    try:
+        arguments = _SCHEMA.parse(context)
+    except tool_args.ArgumentsError as exc:
+        return str(exc)
+
+    names = _parse_names(arguments.get(_SNIPPET_NAMES_PROPERTY_NAME))
+    if not names:
+        return "No snippet names provided"
+    limit = snippet_store.batch_max_items()
+    if len(names) > limit:
+        return f"Too many snippets requested: {len(names)} (max {limit})"
+
+    results = snippet_store.read_many(names)
+    logging.info(
+        "Retrieved %d of %d snippets",
+        sum("snippet" in result for result in results.values()),
+        len(results),
+    )
+    return tool_args.dumps(results)
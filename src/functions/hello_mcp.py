@@ -2,6 +2,8 @@
 # NOTE: move any function-specific imports here if necessary
 from typing import TYPE_CHECKING
 
+from . import tool_metrics
+
 # For decorated trigger parameter typing, annotate context as a simple string payload
 ContextType = str
 
@@ -22,6 +24,7 @@ else:
     description="Hello world.",
     toolProperties="[]",
 )
+@tool_metrics.instrument
 def hello_mcp(context: ContextType) -> str:
     """A simple function that returns a greeting message.
 
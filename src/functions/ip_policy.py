@@ -0,0 +1,182 @@
+"""Addresses `check_ip` can answer without asking AbuseIPDB.
+
+Before any network call an address is validated and canonicalized with
+`ipaddress`. Two kinds of address then get an immediate local answer:
+
+* reserved space: anything that is not globally routable (RFC 1918 private
+  ranges, loopback, link-local, multicast, documentation and other special
+  purpose blocks). AbuseIPDB has nothing useful to say about these.
+* the operator allowlist: CIDRs such as our own egress ranges, read from
+  ``ABUSEIPDB_ALLOWLIST`` (comma-separated) and, with
+  ``ABUSEIPDB_ALLOWLIST_ENABLED``, from a text blob with one CIDR per line.
+  The blob is re-read in a background thread every
+  ``ABUSEIPDB_ALLOWLIST_SYNC_INTERVAL`` seconds (only when its ETag changed),
+  so lookups never wait on storage.
+
+`AllowList` keeps merged, sorted ranges per IP version and answers a lookup
+with one `bisect`.
+"""
+
+import ipaddress
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections.abc import Iterable
+
+from . import blob_backend
+
+Address = ipaddress.IPv4Address | ipaddress.IPv6Address
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+# Checked in order; the first matching property names the reason.
+_RESERVED_REASONS = (
+    ("loopback", "is_loopback"),
+    ("link-local", "is_link_local"),
+    ("multicast", "is_multicast"),
+    ("unspecified", "is_unspecified"),
+    ("private", "is_private"),
+    ("reserved", "is_reserved"),
+)
+
+
+def parse(ip: str) -> Address:
+    """Validate ``ip``; IPv4-mapped IPv6 addresses become IPv4. Raises ValueError."""
+    address = ipaddress.ip_address(ip.strip())
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+def reserved_reason(address: Address) -> str | None:
+    """Why ``address`` is not worth an upstream lookup, or None if it is."""
+    if address.is_global and not address.is_multicast:
+        return None
+    for reason, attribute in _RESERVED_REASONS:
+        if getattr(address, attribute):
+            return reason
+    return "non-global"
+
+
+class AllowList:
+    """Operator CIDRs as merged, sorted ranges per IP version."""
+
+    def __init__(self, networks: Iterable[Network] = ()) -> None:
+        ranges: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for network in networks:
+            ranges[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+        self._starts: dict[int, list[int]] = {}
+        self._ends: dict[int, list[int]] = {}
+        for version, spans in ranges.items():
+            merged: list[tuple[int, int]] = []
+            for start, end in sorted(spans):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                else:
+                    merged.append((start, end))
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+
+    @classmethod
+    def from_text(cls, text: str) -> "AllowList":
+        """Parse CIDRs or addresses separated by commas, whitespace or lines.
+
+        ``#`` starts a comment; malformed entries are skipped with a warning.
+        """
+        networks: list[Network] = []
+        for line in text.splitlines():
+            for item in re.split(r"[\s,]+", line.partition("#")[0]):
+                if not item:
+                    continue
+                try:
+                    networks.append(ipaddress.ip_network(item, strict=False))
+                except ValueError:
+                    logging.warning("Skipping malformed allowlist entry %r", item)
+        return cls(networks)
+
+    def __len__(self) -> int:
+        return len(self._starts[4]) + len(self._starts[6])
+
+    def __contains__(self, address: Address) -> bool:
+        value = int(address)
+        index = bisect_right(self._starts[address.version], value) - 1
+        return index >= 0 and value <= self._ends[address.version][index]
+
+
+def is_enabled() -> bool:
+    return os.getenv("ABUSEIPDB_ALLOWLIST_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+def _inline_entries() -> str:
+    return os.getenv("ABUSEIPDB_ALLOWLIST") or ""
+
+
+_lock = threading.Lock()
+_allowlist: AllowList | None = None
+_etag: str | None = None
+_next_sync_at = 0.0
+
+
+def _sync_from_blob(blob_path: str) -> None:
+    global _allowlist, _etag
+    container, _, name = blob_path.partition("/")
+    try:
+        download = blob_backend.get_backend().get(container, name, _etag)
+    except blob_backend.NotFound:
+        text, etag = "", None
+    except Exception:
+        logging.warning("Could not sync allowlist from blob", exc_info=True)
+        return
+    else:
+        if download is None:  # unchanged since the last sync
+            return
+        text, etag = download.readall().decode(), download.etag
+    allowlist = AllowList.from_text(_inline_entries() + "\n" + text)
+    with _lock:
+        _allowlist, _etag = allowlist, etag
+
+
+def get_allowlist(blob_path: str | None = None) -> AllowList:
+    """Return the current allowlist, starting a background sync when due.
+
+    ``blob_path`` (``container/name``) is only read when the allowlist is
+    enabled; until the first sync finishes only ``ABUSEIPDB_ALLOWLIST``
+    applies.
+    """
+    global _allowlist, _next_sync_at
+    if blob_path and is_enabled():
+        now = time.monotonic()
+        if now >= _next_sync_at:
+            with _lock:
+                start_sync = now >= _next_sync_at
+                if start_sync:
+                    interval = float(
+                        os.getenv("ABUSEIPDB_ALLOWLIST_SYNC_INTERVAL") or 300
+                    )
+                    _next_sync_at = now + interval
+            if start_sync:
+                threading.Thread(
+                    target=_sync_from_blob,
+                    args=(blob_path,),
+                    name="abuseipdb-allowlist-sync",
+                    daemon=True,
+                ).start()
+
+    allowlist = _allowlist
+    if allowlist is None:
+        with _lock:
+            if _allowlist is None:
+                _allowlist = AllowList.from_text(_inline_entries())
+            allowlist = _allowlist
+    return allowlist
+
+
+def configure(allowlist: AllowList | None = None) -> None:
+    """Replace the allowlist; with no argument the next use re-reads settings."""
+    global _allowlist, _etag, _next_sync_at
+    with _lock:
+        _allowlist, _etag, _next_sync_at = allowlist, None, 0.0
@@ -0,0 +1,92 @@
+import json
+import logging
+from typing import TYPE_CHECKING, Any
+
+from . import snippet_index, tool_args, tool_metrics
+
+# Context arrives as a JSON string; annotate as str for worker compatibility
+ContextType = str
+
+if TYPE_CHECKING:
+    from function_app import (
+        _SNIPPET_CURSOR_PROPERTY_NAME,
+        _SNIPPET_LIMIT_PROPERTY_NAME,
+        _SNIPPET_PREFIX_PROPERTY_NAME,
+        app,
+        tool_properties_list_snippets_json,
+        tool_properties_list_snippets_object,
+    )
+else:
+    try:
+        from .function_app import (
+            _SNIPPET_CURSOR_PROPERTY_NAME,
+            _SNIPPET_LIMIT_PROPERTY_NAME,
+            _SNIPPET_PREFIX_PROPERTY_NAME,
+            app,
+            tool_properties_list_snippets_json,
+            tool_properties_list_snippets_object,
+        )
+    except Exception:
+        from function_app import (
+            _SNIPPET_CURSOR_PROPERTY_NAME,
+            _SNIPPET_LIMIT_PROPERTY_NAME,
+            _SNIPPET_PREFIX_PROPERTY_NAME,
+            app,
+            tool_properties_list_snippets_json,
+            tool_properties_list_snippets_object,
+        )
+
+_MAX_LIMIT = 1000
+# Every argument is optional, so a call may omit `arguments` altogether.
+_SCHEMA = tool_args.compile_schema(
+    tool_properties_list_snippets_object, arguments_required=False
+)
+
+
+def parse_limit(value: Any, default: int) -> int:
+    """A page size between 1 and 1000; raises ValueError when invalid."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        raise ValueError(value)
+    limit = int(value)
+    if limit <= 0:
+        raise ValueError(value)
+    return min(limit, _MAX_LIMIT)
+
+
+@app.generic_trigger(
+    arg_name="context",
+    type="mcpToolTrigger",
+    toolName="list_snippets",
+    description="List saved snippet names, optionally by prefix, a page at a time.",
+    toolProperties=tool_properties_list_snippets_json,
+)
+@tool_metrics.instrument
+def list_snippets(context: ContextType) -> str:
+    """List snippets from the snippet index without reading their content.
+
+    Returns JSON ``{"items": [{"name", "size", "sha256", "modified"}, ...],
+    "nextCursor": ...}``; pass ``nextCursor`` back as ``cursor`` for the next
+    page.
+    """
+    try:
+        arguments = _SCHEMA.parse(context)
+    except tool_args.ArgumentsError as exc:
+        return str(exc)
+
+    try:
+        limit = parse_limit(arguments.integer(_SNIPPET_LIMIT_PROPERTY_NAME), 100)
+    except (TypeError, ValueError):
+        return "Invalid limit"
+
+    try:
+        page = snippet_index.list_names(
+            arguments.string(_SNIPPET_PREFIX_PROPERTY_NAME) or "",
+            limit,
+            arguments.string(_SNIPPET_CURSOR_PROPERTY_NAME),
+        )
+    except Exception as exc:
+        logging.exception("Failed to list snippets")
+        return f"Error listing snippets: {exc}"
+    return json.dumps(page)
@@ -0,0 +1,208 @@
+"""Client-side, header-aware rate limiting for outbound AbuseIPDB calls.
+
+Each AbuseIPDB endpoint has its own quota, so every endpoint gets its own
+token bucket. Buckets pace calls to a configured rate/burst locally and are
+corrected from the `X-RateLimit-Remaining`, `X-RateLimit-Reset` and
+`Retry-After` headers on every response. A caller that would have to wait
+longer than ``max_wait`` is rejected immediately with `RateLimitExceeded`
+rather than being held on a worker. It is a `resilience.Unavailable`, so
+callers that answer from stale cached data while AbuseIPDB is out do the
+same here.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections.abc import Callable, Mapping
+
+from .resilience import Unavailable
+
+
+class RateLimitExceeded(Unavailable):
+    """Raised when a call cannot be scheduled within the allowed wait."""
+
+    reason = "rate-limited"
+
+    def __init__(self, endpoint: str, retry_after: float) -> None:
+        super().__init__(
+            f"AbuseIPDB rate limit reached for '{endpoint}'; "
+            f"retry in {retry_after:.1f}s"
+        )
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """A token bucket whose budget also tracks the server-reported quota."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        rate: float,
+        burst: int,
+        max_wait: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.endpoint = endpoint
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._remaining: int | None = None
+        self._reset_at: float | None = None
+        self.waits = 0
+        self.rejections = 0
+
+    def _reserve(self, max_wait: float | None = None, optional: bool = False) -> float:
+        """Take a token and return how long the caller must wait before using it.
+
+        ``max_wait`` lowers the bucket's own limit for this call. Optional
+        calls (see `try_acquire`) are not counted as rejections.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                float(self.burst), self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+            delay = max(0.0, self._blocked_until - now)
+            if self._remaining is not None and self._remaining <= 0:
+                if self._reset_at is not None and self._reset_at > now:
+                    # Quota exhausted: nothing can go out before the reset.
+                    delay = max(delay, self._reset_at - now)
+                else:
+                    # The window has reset, or we never learned when it does;
+                    # let the next response tell us the real budget.
+                    self._remaining = None
+            self._tokens -= 1
+            if self._tokens < 0:
+                delay = max(delay, -self._tokens / self.rate)
+
+            limit = self.max_wait
+            if max_wait is not None:
+                limit = min(limit, max(0.0, max_wait))
+            if delay > limit:
+                self._tokens += 1
+                if not optional:
+                    self.rejections += 1
+                raise RateLimitExceeded(self.endpoint, delay)
+            if self._remaining is not None:
+                self._remaining -= 1
+            if delay > 0:
+                self.waits += 1
+            return delay
+
+    def acquire(self, max_wait: float | None = None) -> None:
+        """Block the calling thread until a call may be sent."""
+        delay = self._reserve(max_wait)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, max_wait: float | None = None) -> None:
+        """Suspend the calling task until a call may be sent."""
+        delay = self._reserve(max_wait)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def try_acquire(self) -> bool:
+        """Take a token only if a call may be sent right away (e.g. a hedge)."""
+        try:
+            self._reserve(0.0, optional=True)
+        except RateLimitExceeded:
+            return False
+        return True
+
+    def update(self, status: int, headers: Mapping[str, str]) -> None:
+        """Correct the budget from a response's rate-limit headers."""
+        lowered = {k.lower(): v for k, v in headers.items()}
+        with self._lock:
+            now = self._clock()
+            remaining = lowered.get("x-ratelimit-remaining")
+            if remaining is not None and remaining.isdigit():
+                self._remaining = int(remaining)
+            reset = lowered.get("x-ratelimit-reset")
+            if reset is not None and reset.isdigit():
+                self._reset_at = now + max(0.0, int(reset) - time.time())
+            retry_after = lowered.get("retry-after")
+            if retry_after is not None and retry_after.isdigit():
+                self._blocked_until = now + int(retry_after)
+            elif status == 429:
+                self._blocked_until = max(self._blocked_until, now + 1.0)
+
+    def snapshot(self) -> dict[str, float | int | None]:
+        """Return the current budget for metrics."""
+        with self._lock:
+            now = self._clock()
+            tokens = min(
+                float(self.burst), self._tokens + (now - self._updated) * self.rate
+            )
+            return {
+                "tokens": round(tokens, 3),
+                "remaining_quota": self._remaining,
+                "blocked_for": round(max(0.0, self._blocked_until - now), 3),
+                "waits": self.waits,
+                "rejections": self.rejections,
+            }
+
+
+class RateLimiter:
+    """One `TokenBucket` per AbuseIPDB endpoint, created on demand."""
+
+    def __init__(
+        self, rate: float = 10.0, burst: int = 20, max_wait: float = 2.0
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(
+                    endpoint,
+                    TokenBucket(endpoint, self.rate, self.burst, self.max_wait),
+                )
+        return bucket
+
+    def budgets(self) -> dict[str, dict[str, float | int | None]]:
+        """Return the current budget of every endpoint seen so far."""
+        return {name: b.snapshot() for name, b in list(self._buckets.items())}
+
+
+def from_env() -> RateLimiter:
+    """Build a limiter from `ABUSEIPDB_RATE_LIMIT_*` environment variables."""
+    return RateLimiter(
+        rate=float(os.getenv("ABUSEIPDB_RATE_LIMIT_PER_SECOND") or 10.0),
+        burst=int(os.getenv("ABUSEIPDB_RATE_LIMIT_BURST") or 20),
+        max_wait=float(os.getenv("ABUSEIPDB_RATE_LIMIT_MAX_WAIT") or 2.0),
+    )
+
+
+_lock = threading.Lock()
+_limiter: RateLimiter | None = None
+
+
+def get_limiter() -> RateLimiter:
+    """Return the process-wide limiter, creating it on first use."""
+    global _limiter
+    if _limiter is None:
+        with _lock:
+            if _limiter is None:
+                _limiter = from_env()
+    return _limiter
+
+
+def configure(limiter: RateLimiter | None = None) -> None:
+    """Replace the shared limiter; with no argument the next use re-reads env."""
+    global _limiter
+    with _lock:
+        _limiter = limiter
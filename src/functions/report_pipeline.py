@@ -0,0 +1,296 @@
+"""Queued AbuseIPDB reporting flushed through the bulk-report endpoint.
+
+When queueing is enabled, `abuseipdb_report_ip` only validates a report,
+records it as ``queued`` and drops it on a storage queue. The queue-triggered
+worker hands each message to the process-wide `ReportBatcher`, which
+coalesces concurrent invocations into one CSV upload to ``/bulk-report`` once
+``max_size`` reports are pending or the oldest has waited ``max_delay``
+seconds. Each invocation waits for its batch's outcome and raises if the
+upload failed, so the queue's own retry/poison handling keeps reports
+durable until AbuseIPDB has accepted them. A failure on the last delivery
+is recorded as ``failed`` before the message goes to the poison queue.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import threading
+import uuid
+import weakref
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Protocol
+
+_STATUS_CONTAINER = "abuseipdb-reports"
+
+# AbuseIPDB's report category ids (https://www.abuseipdb.com/categories).
+CATEGORY_IDS = range(1, 24)
+
+
+def is_enabled() -> bool:
+    return os.getenv("ABUSEIPDB_REPORT_QUEUE", "").lower() in ("1", "true", "yes")
+
+
+def max_attempts() -> int:
+    """Deliveries of a queued report before the host moves it to the poison
+    queue; keep ``ABUSEIPDB_REPORT_MAX_ATTEMPTS`` in step with
+    ``maxDequeueCount`` in host.json."""
+    return int(os.getenv("ABUSEIPDB_REPORT_MAX_ATTEMPTS") or 5)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def parse_categories(categories: str) -> str:
+    """Normalize a comma-separated list of category ids; ValueError if invalid."""
+    ids: list[int] = []
+    for item in categories.split(","):
+        item = item.strip()
+        if not item.isdigit() or int(item) not in CATEGORY_IDS:
+            raise ValueError(f"unknown category '{item}'")
+        if int(item) not in ids:
+            ids.append(int(item))
+    return ",".join(map(str, ids))
+
+
+@dataclass
+class QueuedReport:
+    """A report waiting to be submitted.
+
+    Build it from an address checked with `ip_policy.parse` and categories
+    normalized with `parse_categories`.
+    """
+
+    reportId: str
+    ip: str
+    categories: str
+    comment: str
+    queuedAt: str
+
+    @classmethod
+    def create(cls, ip: str, categories: str, comment: str) -> "QueuedReport":
+        return cls(uuid.uuid4().hex, ip, categories, comment, _now())
+
+    @classmethod
+    def from_message(cls, body: str) -> "QueuedReport":
+        return cls(**json.loads(body))
+
+    def to_message(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def build_csv(reports: list[QueuedReport]) -> bytes:
+    """Render reports in AbuseIPDB's bulk-report CSV format."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["IP", "Categories", "ReportDate", "Comment"])
+    for report in reports:
+        writer.writerow([report.ip, report.categories, report.queuedAt, report.comment])
+    return buffer.getvalue().encode("utf-8")
+
+
+def match_invalid_rows(
+    reports: list[QueuedReport], invalid: list[dict[str, Any]]
+) -> dict[str, str]:
+    """Map ``invalidReports`` entries back to report ids.
+
+    AbuseIPDB numbers rows from the header line (first report = row 2). The
+    echoed ``input`` is checked against the row's IP, falling back to the
+    first still-unmatched report with that IP.
+    """
+    errors: dict[str, str] = {}
+    for item in invalid:
+        error = str(item.get("error", "Invalid report"))
+        ip = str(item.get("input", ""))
+        row = item.get("rowNumber")
+        index = row - 2 if isinstance(row, int) else -1
+        if 0 <= index < len(reports) and reports[index].ip == ip:
+            errors[reports[index].reportId] = error
+            continue
+        for report in reports:
+            if report.ip == ip and report.reportId not in errors:
+                errors[report.reportId] = error
+                break
+    return errors
+
+
+class StatusStore(Protocol):
+    """Where per-report status records live."""
+
+    def put(self, record: dict[str, Any]) -> None: ...
+
+    def get(self, report_id: str) -> dict[str, Any] | None: ...
+
+
+class MemoryStatusStore:
+    """Process-local stand-in for tests and local development."""
+
+    def __init__(self) -> None:
+        self._records: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, record: dict[str, Any]) -> None:
+        with self._lock:
+            self._records[record["reportId"]] = dict(record)
+
+    def get(self, report_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            record = self._records.get(report_id)
+        return dict(record) if record is not None else None
+
+
+class BlobStatusStore:
+    """One small JSON blob per report in the ``abuseipdb-reports`` container.
+
+    Goes through `blob_backend`, so the container is created on first
+    write and the local backend works too.
+    """
+
+    def __init__(self, container: str = _STATUS_CONTAINER) -> None:
+        self.container = container
+
+    def put(self, record: dict[str, Any]) -> None:
+        from . import blob_backend
+
+        blob_backend.get_backend().put(
+            self.container, f"{record['reportId']}.json", json.dumps(record).encode()
+        )
+
+    def get(self, report_id: str) -> dict[str, Any] | None:
+        from . import blob_backend
+
+        try:
+            download = blob_backend.get_backend().get(
+                self.container, f"{report_id}.json"
+            )
+        except blob_backend.NotFound:
+            return None
+        assert download is not None
+        return dict(json.loads(download.readall()))
+
+
+def record_status(
+    store: StatusStore, report: QueuedReport, status: str, error: str | None = None
+) -> dict[str, Any]:
+    record: dict[str, Any] = {
+        "reportId": report.reportId,
+        "status": status,
+        "ip": report.ip,
+        "categories": report.categories,
+        "queuedAt": report.queuedAt,
+        "updatedAt": _now(),
+    }
+    if error:
+        record["error"] = error
+    store.put(record)
+    return record
+
+
+@dataclass
+class Outcome:
+    """The result of submitting one report as part of a batch."""
+
+    status: str  # "submitted", "rejected" or "failed"
+    error: str | None = None
+
+
+Flush = Callable[[list[QueuedReport]], Awaitable[dict[str, Outcome]]]
+
+
+class ReportBatcher:
+    """Coalesces concurrently submitted reports into size/time-bound batches."""
+
+    def __init__(self, flush: Flush, max_size: int = 100, max_delay: float = 5.0):
+        self._flush = flush
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending: list[tuple[QueuedReport, asyncio.Future[Outcome]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.flushes = 0
+
+    async def submit(self, report: QueuedReport) -> Outcome:
+        """Add ``report`` to the current batch and wait for that batch's outcome."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Outcome] = loop.create_future()
+        self._pending.append((report, future))
+        if len(self._pending) >= self.max_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._start_flush)
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self, batch: list[tuple[QueuedReport, "asyncio.Future[Outcome]"]]
+    ) -> None:
+        self.flushes += 1
+        reports = [report for report, _ in batch]
+        try:
+            outcomes = await self._flush(reports)
+        except Exception as exc:
+            logging.warning("Bulk report flush of %d failed", len(batch), exc_info=True)
+            outcomes = {r.reportId: Outcome("failed", str(exc)) for r in reports}
+        for report, future in batch:
+            if not future.done():
+                future.set_result(
+                    outcomes.get(report.reportId, Outcome("failed", "No outcome"))
+                )
+
+
+def from_env(flush: Flush) -> ReportBatcher:
+    return ReportBatcher(
+        flush,
+        max_size=int(os.getenv("ABUSEIPDB_BULK_REPORT_SIZE") or 100),
+        max_delay=float(os.getenv("ABUSEIPDB_BULK_REPORT_MAX_DELAY") or 5.0),
+    )
+
+
+_lock = threading.Lock()
+_store: StatusStore | None = None
+# Pending futures belong to the loop that created them, so batch per loop.
+_batchers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ReportBatcher] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_store() -> StatusStore:
+    """Return the status store chosen by `ABUSEIPDB_REPORT_STATUS_STORE`."""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                kind = os.getenv("ABUSEIPDB_REPORT_STATUS_STORE", "blob").lower()
+                _store = MemoryStatusStore() if kind == "memory" else BlobStatusStore()
+    return _store
+
+
+def get_batcher(flush: Flush) -> ReportBatcher:
+    """Return the running loop's batcher, creating it with ``flush`` if needed."""
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = from_env(flush)
+    return batcher
+
+
+def configure(store: StatusStore | None = None) -> None:
+    """Replace the shared status store and drop batchers (tests)."""
+    global _store
+    with _lock:
+        _store = store
+        _batchers.clear()
@@ -0,0 +1,429 @@
+"""In-process TTL/LRU cache for AbuseIPDB reputation lookups.
+
+Entries move through three phases:
+
+* fresh: served directly until ``ttl`` elapses;
+* stale: for a further ``stale_ttl`` the old value is still served
+  immediately while a single background refresh replaces it
+  (stale-while-revalidate), so hot IPs never make a caller wait;
+* expired: treated as a miss and loaded synchronously.
+
+Failed loads are cached for the much shorter ``negative_ttl`` so a burst of
+calls for a bad address (or during an upstream outage) does not turn into a
+burst of upstream requests. Entries keep their last value until evicted, so
+`peek` can still offer it, however old, when upstream is unavailable.
+
+With a shared second tier (``l2``, see `reputation_store`), a miss in this
+in-process tier reads the shared tier before calling the loader, and values
+the loader returns are queued for writing to it in the background. Entries
+filled from the shared tier are fresh for at most its remaining lifetime.
+The shared tier is best effort: its errors count as misses.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Protocol
+
+from . import reputation_store
+from .resilience import Unavailable
+
+# How long a prefetch's shared-tier misses are trusted by the lookups after it.
+_PREFETCH_WINDOW = 5.0
+
+Loader = Callable[[], dict[str, Any]]
+AsyncLoader = Callable[[], Awaitable[dict[str, Any]]]
+# A value from the shared tier and the seconds it has left to live.
+SharedRecord = tuple[dict[str, Any], float]
+
+
+class SharedTier(Protocol):
+    """A cache tier shared between instances (`reputation_store.ReputationStore`)."""
+
+    def get(self, key: Hashable) -> SharedRecord | None: ...
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict[Hashable, SharedRecord]: ...
+
+    def put(self, key: Hashable, value: dict[str, Any]) -> None: ...
+
+
+@dataclass
+class CacheStats:
+    """Counters used to size the cache."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    refreshes: int = 0
+    refresh_failures: int = 0
+    l2_hits: int = 0
+    l2_misses: int = 0
+    l2_errors: int = 0
+    peeks: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _Entry:
+    value: dict[str, Any] | None
+    error: Exception | None
+    fresh_until: float
+    stale_until: float
+    # When ``value`` was stored; failed loads keep the previous value.
+    stored_at: float = 0.0
+
+
+class ReputationCache:
+    """A bounded, thread-safe LRU cache with TTLs and background refresh."""
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: float = 900.0,
+        stale_ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        executor: ThreadPoolExecutor | None = None,
+        uncached_errors: tuple[type[Exception], ...] = (),
+        l2: SharedTier | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._executor = executor
+        # Transient, locally raised errors (e.g. client-side rate limiting)
+        # say nothing about the key and must not be negatively cached.
+        self.uncached_errors = uncached_errors
+        self.l2 = l2
+        # Keys a prefetch just found missing from the shared tier, so the
+        # lookups that follow it go straight to the loader.
+        self._l2_absent: dict[Hashable, float] = {}
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._refreshing: set[Hashable] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        """Return a snapshot of the hit/miss/eviction counters."""
+        with self._lock:
+            snapshot = self._stats.to_dict()
+            snapshot["size"] = len(self._entries)
+        return snapshot
+
+    def hit_ratios(self) -> dict[str, float]:
+        """Share of lookups answered by each tier.
+
+        ``l1`` is over all lookups (stale and negative hits included); ``l2``
+        is over the shared-tier reads made for L1 misses and prefetches.
+        """
+        stats = self.stats()
+        l1_hits = stats["hits"] + stats["stale_hits"] + stats["negative_hits"]
+        l2_reads = stats["l2_hits"] + stats["l2_misses"] + stats["l2_errors"]
+        return {
+            "l1": l1_hits / max(1, l1_hits + stats["misses"]),
+            "l2": stats["l2_hits"] / max(1, l2_reads),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _probe(self, key: Hashable) -> tuple[str, dict[str, Any] | None]:
+        """Classify ``key`` as ``"hit"``, ``"stale"`` or ``"miss"`` and count it.
+
+        Negatively cached errors are re-raised here. For a stale entry the key
+        is marked as refreshing; callers then own scheduling that refresh.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                if entry.error is not None:
+                    self._stats.negative_hits += 1
+                    raise entry.error
+                self._stats.hits += 1
+                return "hit", entry.value
+            if (
+                entry is not None
+                and entry.error is None
+                and entry.value is not None
+                and now < entry.stale_until
+            ):
+                self._entries.move_to_end(key)
+                self._stats.stale_hits += 1
+                if key in self._refreshing:
+                    return "hit", entry.value
+                self._refreshing.add(key)
+                return "stale", entry.value
+            self._stats.misses += 1
+            return "miss", None
+
+    def get_or_load(self, key: Hashable, loader: Loader) -> dict[str, Any]:
+        """Return the cached value for ``key``, calling ``loader`` on a miss.
+
+        Errors raised by ``loader`` are cached for ``negative_ttl`` and
+        re-raised to every caller in that window.
+        """
+        if self.max_entries <= 0:
+            return loader()
+
+        status, value = self._probe(key)
+        if status == "stale":
+            self._submit_refresh(key, loader)
+        if value is not None:
+            return value
+
+        try:
+            value, ttl = self._load(key, loader)
+        except Exception as exc:
+            self._store(key, None, exc)
+            raise
+        self._store(key, value, None, ttl)
+        return value
+
+    async def get_or_load_async(
+        self, key: Hashable, loader: AsyncLoader
+    ) -> dict[str, Any]:
+        """Asyncio counterpart of `get_or_load` for coroutine loaders.
+
+        Stale entries are refreshed by a task on the running event loop.
+        """
+        if self.max_entries <= 0:
+            return await loader()
+
+        status, value = self._probe(key)
+        if status == "stale":
+            task = asyncio.get_running_loop().create_task(
+                self._refresh_async(key, loader)
+            )
+            # The loop only keeps weak references to tasks.
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if value is not None:
+            return value
+
+        try:
+            value, ttl = await self._load_async(key, loader)
+        except Exception as exc:
+            self._store(key, None, exc)
+            raise
+        self._store(key, value, None, ttl)
+        return value
+
+    def peek(self, key: Hashable) -> tuple[dict[str, Any], float] | None:
+        """The last value loaded for ``key`` and its age in seconds, if any.
+
+        Expired and negatively cached entries count too: this is the fallback
+        for when upstream cannot be asked at all.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.value is None:
+                return None
+            self._stats.peeks += 1
+            return entry.value, self._clock() - entry.stored_at
+
+    def prefetch(self, keys: Iterable[Hashable]) -> int:
+        """Fill this tier with one batched shared-tier read for uncached ``keys``.
+
+        Lets a batch of lookups (`check_ips`) pay for one parallel read
+        instead of one read per miss. Returns the number of entries filled.
+        """
+        if self.l2 is None or self.max_entries <= 0:
+            return 0
+        now = self._clock()
+        with self._lock:
+            missing = [
+                key
+                for key in dict.fromkeys(keys)
+                if (entry := self._entries.get(key)) is None or now >= entry.stale_until
+            ]
+        if not missing:
+            return 0
+        try:
+            found = self.l2.get_many(missing)
+        except Exception:
+            logging.warning("Shared reputation prefetch failed", exc_info=True)
+            with self._lock:
+                self._stats.l2_errors += len(missing)
+            return 0
+        for key, (value, remaining) in found.items():
+            self._store(key, value, None, min(self.ttl, remaining))
+        with self._lock:
+            self._l2_absent = {
+                key: seen
+                for key, seen in self._l2_absent.items()
+                if now - seen < _PREFETCH_WINDOW
+            }
+            self._l2_absent.update((key, now) for key in missing if key not in found)
+            self._stats.l2_hits += len(found)
+            self._stats.l2_misses += len(missing) - len(found)
+        return len(found)
+
+    def _read_shared(self, key: Hashable) -> SharedRecord | None:
+        assert self.l2 is not None
+        with self._lock:
+            seen = self._l2_absent.pop(key, None)
+        if seen is not None and self._clock() - seen < _PREFETCH_WINDOW:
+            return None
+        try:
+            record = self.l2.get(key)
+        except Exception:
+            logging.warning("Shared reputation read failed for %s", key, exc_info=True)
+            with self._lock:
+                self._stats.l2_errors += 1
+            return None
+        with self._lock:
+            if record is None:
+                self._stats.l2_misses += 1
+            else:
+                self._stats.l2_hits += 1
+        return record
+
+    def _load(self, key: Hashable, loader: Loader) -> tuple[dict[str, Any], float]:
+        """Load ``key`` from the shared tier, else ``loader``; returns value and TTL."""
+        if self.l2 is not None:
+            record = self._read_shared(key)
+            if record is not None:
+                return record[0], min(self.ttl, record[1])
+        value = loader()
+        if self.l2 is not None:
+            self.l2.put(key, value)
+        return value, self.ttl
+
+    async def _load_async(
+        self, key: Hashable, loader: AsyncLoader
+    ) -> tuple[dict[str, Any], float]:
+        if self.l2 is not None:
+            record = await asyncio.to_thread(self._read_shared, key)
+            if record is not None:
+                return record[0], min(self.ttl, record[1])
+        value = await loader()
+        if self.l2 is not None:
+            self.l2.put(key, value)
+        return value, self.ttl
+
+    def _store(
+        self,
+        key: Hashable,
+        value: dict[str, Any] | None,
+        error: Exception | None,
+        ttl: float | None = None,
+    ) -> None:
+        now = self._clock()
+        if isinstance(error, self.uncached_errors):
+            return
+        with self._lock:
+            if error is None:
+                fresh_until = now + (self.ttl if ttl is None else ttl)
+                entry = _Entry(
+                    value, None, fresh_until, fresh_until + self.stale_ttl, now
+                )
+            else:
+                expiry = now + self.negative_ttl
+                previous = self._entries.get(key)
+                if previous is None:
+                    entry = _Entry(None, error, expiry, expiry)
+                else:
+                    entry = _Entry(
+                        previous.value, error, expiry, expiry, previous.stored_at
+                    )
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def _submit_refresh(self, key: Hashable, loader: Loader) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="reputation-refresh"
+            )
+        self._executor.submit(self._refresh, key, loader)
+
+    def _refresh(self, key: Hashable, loader: Loader) -> None:
+        try:
+            value, ttl = self._load(key, loader)
+        except Exception:
+            self._refresh_failed(key)
+        else:
+            self._refreshed(key, value, ttl)
+
+    async def _refresh_async(self, key: Hashable, loader: AsyncLoader) -> None:
+        try:
+            value, ttl = await self._load_async(key, loader)
+        except Exception:
+            self._refresh_failed(key)
+        else:
+            self._refreshed(key, value, ttl)
+
+    def _refreshed(self, key: Hashable, value: dict[str, Any], ttl: float) -> None:
+        self._store(key, value, None, ttl)
+        with self._lock:
+            self._stats.refreshes += 1
+            self._refreshing.discard(key)
+
+    def _refresh_failed(self, key: Hashable) -> None:
+        # Keep serving the stale value; it will expire on its own schedule.
+        logging.warning("Background refresh failed for %s", key, exc_info=True)
+        with self._lock:
+            self._stats.refresh_failures += 1
+            self._refreshing.discard(key)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def from_env() -> ReputationCache:
+    """Build a cache from `ABUSEIPDB_CACHE_*` environment variables.
+
+    The shared tier is attached when `ABUSEIPDB_CACHE_L2_ENABLED` is set.
+    """
+    return ReputationCache(
+        max_entries=int(os.getenv("ABUSEIPDB_CACHE_MAX_ENTRIES") or 10_000),
+        ttl=_env_float("ABUSEIPDB_CACHE_TTL", 900.0),
+        stale_ttl=_env_float("ABUSEIPDB_CACHE_STALE_TTL", 300.0),
+        negative_ttl=_env_float("ABUSEIPDB_CACHE_NEGATIVE_TTL", 30.0),
+        uncached_errors=(Unavailable,),
+        l2=reputation_store.from_env(),
+    )
+
+
+_lock = threading.Lock()
+_cache: ReputationCache | None = None
+
+
+def get_cache() -> ReputationCache:
+    """Return the process-wide reputation cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = from_env()
+    return _cache
+
+
+def configure(cache: ReputationCache | None = None) -> None:
+    """Replace the shared cache; with no argument the next use re-reads env."""
+    global _cache
+    with _lock:
+        _cache = cache
@@ -0,0 +1,211 @@
+"""Shared second-tier (L2) store for AbuseIPDB reputation results.
+
+`reputation_cache` is per instance, so every instance the app scales out to
+misses on the same hot IPs. This store keeps successful `check` results in
+blob storage, where all instances see them: one small JSON record per cache
+key in the ``abuseipdb-reputation`` container, written through the shared
+`blob_backend` (Azure Storage or Azurite, or a local directory).
+
+* Records carry an absolute, wall-clock ``expiresAt``. Expired records read
+  as misses; a lifecycle rule on the container can delete them.
+* `get_many` reads a batch of keys in parallel, for `check_ips`.
+* `put` is write-behind: it only queues the record. A daemon thread writes
+  queued records in parallel batches every ``flush_interval`` seconds, or as
+  soon as ``batch_size`` are pending, so populating the store never delays a
+  tool reply. Repeated puts of a key before a flush are coalesced, and puts
+  beyond ``max_pending`` are dropped (and counted).
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any
+
+from . import blob_backend, tool_metrics
+
+_CONTAINER = "abuseipdb-reputation"
+# Bump when the record layout changes so old records are simply not found.
+_LAYOUT = "v1"
+
+# A stored value and the seconds it has left to live.
+Record = tuple[dict[str, Any], float]
+
+
+def blob_name(key: Hashable) -> str:
+    """The record name for a cache key, e.g. ``v1/192.0.2.1/90/False.json``."""
+    parts = key if isinstance(key, tuple) else (key,)
+    return "/".join([_LAYOUT, *(str(part) for part in parts)]) + ".json"
+
+
+class ReputationStore:
+    """L2 reputation records in blob storage, with write-behind puts."""
+
+    def __init__(
+        self,
+        backend: blob_backend.BlobBackend | None = None,
+        container: str = _CONTAINER,
+        ttl: float = 900.0,
+        flush_interval: float = 0.5,
+        batch_size: int = 50,
+        max_pending: int = 10_000,
+        concurrency: int = 8,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._backend = backend
+        self.container = container
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._clock = clock
+        # Separate pools, so tool-path reads never queue behind a flush.
+        self._readers = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="reputation-read"
+        )
+        self._writers = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="reputation-write"
+        )
+        self._pending: dict[Hashable, tuple[dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+        self._stats = {"writes": 0, "write_errors": 0, "coalesced": 0, "dropped": 0}
+
+    @property
+    def backend(self) -> blob_backend.BlobBackend:
+        return self._backend or blob_backend.get_backend()
+
+    def stats(self) -> dict[str, int]:
+        """Write-behind counters; read hits and misses are counted by the cache."""
+        with self._lock:
+            return {**self._stats, "pending": len(self._pending)}
+
+    def get(self, key: Hashable) -> Record | None:
+        """The unexpired record for ``key``, or None. Storage errors propagate."""
+        try:
+            download = self.backend.get(self.container, blob_name(key))
+        except blob_backend.NotFound:
+            return None
+        if download is None:  # only conditional reads come back empty
+            return None
+        try:
+            record = json.loads(download.readall())
+            remaining = float(record["expiresAt"]) - self._clock()
+            value = record["value"]
+        except (ValueError, KeyError, TypeError):
+            logging.warning("Ignoring malformed reputation record for %s", key)
+            return None
+        if remaining <= 0 or not isinstance(value, dict):
+            return None
+        return value, remaining
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict[Hashable, Record]:
+        """Read ``keys`` in parallel; keys that miss or fail are left out."""
+        keys = list(dict.fromkeys(keys))
+        # Reads count towards the calling tool's dependency metrics.
+        read = tool_metrics.run_in_context(self._get_quietly)
+        found: dict[Hashable, Record] = {}
+        for key, record in zip(keys, self._readers.map(read, keys)):
+            if record is not None:
+                found[key] = record
+        return found
+
+    def _get_quietly(self, key: Hashable) -> Record | None:
+        try:
+            return self.get(key)
+        except Exception:
+            logging.warning("Reading reputation record %s failed", key, exc_info=True)
+            return None
+
+    def put(self, key: Hashable, value: dict[str, Any]) -> None:
+        """Queue ``value`` to be written for ``key``; never blocks on storage."""
+        expires_at = self._clock() + self.ttl
+        with self._lock:
+            if key in self._pending:
+                self._stats["coalesced"] += 1
+            elif len(self._pending) >= self.max_pending:
+                self._stats["dropped"] += 1
+                return
+            self._pending[key] = (value, expires_at)
+            pending = len(self._pending)
+        if self._thread is None:
+            self._start()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(
+                    target=self._run, name="reputation-write-behind", daemon=True
+                )
+                self._thread.start()
+                # Records still queued at interpreter exit are written then.
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write everything queued so far, ``batch_size`` records at a time."""
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = list(islice(self._pending.items(), self.batch_size))
+                    for key, _ in batch:
+                        del self._pending[key]
+                if not batch:
+                    return
+                ok = sum(self._writers.map(self._write, batch))
+                with self._lock:
+                    self._stats["writes"] += ok
+                    self._stats["write_errors"] += len(batch) - ok
+
+    def _write(self, item: tuple[Hashable, tuple[dict[str, Any], float]]) -> bool:
+        key, (value, expires_at) = item
+        record = {"value": value, "expiresAt": expires_at}
+        try:
+            self.backend.put(
+                self.container, blob_name(key), json.dumps(record).encode()
+            )
+        except Exception:
+            logging.warning("Writing reputation record %s failed", key, exc_info=True)
+            return False
+        return True
+
+    def shutdown(self) -> None:
+        """Stop the writer thread after writing what is still queued."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+        self._readers.shutdown(wait=True)
+        self._writers.shutdown(wait=True)
+
+
+def is_enabled() -> bool:
+    return os.getenv("ABUSEIPDB_CACHE_L2_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+def from_env() -> ReputationStore | None:
+    """Build the store from `ABUSEIPDB_CACHE_L2_*` settings; None when disabled."""
+    if not is_enabled():
+        return None
+    return ReputationStore(
+        container=os.getenv("ABUSEIPDB_CACHE_L2_CONTAINER") or _CONTAINER,
+        ttl=float(os.getenv("ABUSEIPDB_CACHE_L2_TTL") or 900.0),
+        flush_interval=float(os.getenv("ABUSEIPDB_CACHE_L2_FLUSH_INTERVAL") or 0.5),
+        max_pending=int(os.getenv("ABUSEIPDB_CACHE_L2_MAX_PENDING") or 10_000),
+    )
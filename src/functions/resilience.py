@@ -0,0 +1,356 @@
+"""Deadlines, circuit breaking and hedging for outbound AbuseIPDB calls.
+
+* Deadlines: `budget` bounds how long the calls made inside it may take in
+  total. The deadline lives in a context variable, so it follows a call into
+  asyncio tasks and onto worker threads started with
+  `tool_metrics.run_in_context`; nested budgets keep the sooner deadline.
+  The client derives each request's timeouts from `remaining` instead of
+  always allowing its full read timeout, and raises `DeadlineExceeded` once
+  nothing is left.
+* Circuit breaker: `CircuitBreaker` tracks the outcomes of the last
+  ``window`` calls. Once at least ``min_calls`` were made and the share of
+  failures (connection errors, timeouts, 5xx) reaches ``failure_ratio`` it
+  opens, and calls fail fast with `CircuitOpenError` for ``open_seconds``.
+  It then lets ``half_open_calls`` trial calls through: a success closes it,
+  a failure reopens it for twice as long, up to ``max_open_seconds``.
+  Calls stopped by the caller's own deadline or rate limit are not counted.
+* Hedging: `Hedger` keeps recent latencies per endpoint. When enabled with a
+  ``percentile``, an idempotent request still running after that percentile
+  of recent latencies gets a second, identical request and the first
+  response wins. Hedges are capped at ``max_ratio`` of requests, so a slow
+  upstream is not sent twice the load.
+
+Both raise `Unavailable` subclasses, as does `rate_limiter.RateLimitExceeded`;
+callers may answer these from stale cached data. Breaker state and hedge
+rate are published as `tool_metrics` gauges.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from . import tool_metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+# Gauge values for each state.
+_STATE_LEVELS = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class Unavailable(RuntimeError):
+    """AbuseIPDB could not be asked in time; cached data may stand in."""
+
+    reason = "unavailable"
+
+
+class DeadlineExceeded(Unavailable):
+    """The caller's budget ran out before AbuseIPDB answered."""
+
+    reason = "deadline-exceeded"
+
+    def __init__(self) -> None:
+        super().__init__("Deadline exceeded calling AbuseIPDB")
+
+
+class CircuitOpenError(Unavailable):
+    """Raised instead of calling AbuseIPDB while the breaker is open."""
+
+    reason = "circuit-open"
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(
+            f"AbuseIPDB is failing; calls are paused for {retry_after:.1f}s"
+        )
+        self.retry_after = retry_after
+
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "abuseipdb_deadline", default=None
+)
+
+
+@contextmanager
+def budget(seconds: float | None) -> Iterator[None]:
+    """Let the calls made inside the block take at most ``seconds`` in total.
+
+    An enclosing budget that ends sooner still applies; None adds no limit.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left in the current budget, or None outside any budget."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired(slack: float = 0.05) -> bool:
+    """Whether the current budget has (all but) run out."""
+    left = remaining()
+    return left is not None and left <= slack
+
+
+def tool_budget() -> float:
+    """The budget of one tool invocation, from ``ABUSEIPDB_DEADLINE``.
+
+    This is a configured constant: the MCP tool trigger context carries no
+    caller deadline or timeout to derive it from. Requests inside it still
+    get their timeouts from `remaining`.
+    """
+    return float(os.getenv("ABUSEIPDB_DEADLINE") or 15.0)
+
+
+class CircuitBreaker:
+    """A count-based circuit breaker with half-open trials and backoff."""
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_ratio: float = 0.5,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0,
+        half_open_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._cooldown = open_seconds
+        self._trials = 0
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def _current(self, now: float) -> str:
+        # Caller holds the lock.
+        if self._state == OPEN and now - self._opened_at >= self._cooldown:
+            self._state, self._trials = HALF_OPEN, 0
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current(self._clock())
+
+    def acquire(self) -> None:
+        """Admit a call or raise `CircuitOpenError`.
+
+        Admitted calls must `record` their outcome or `release` the slot.
+        """
+        with self._lock:
+            now = self._clock()
+            state = self._current(now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self._opened_at + self._cooldown - now)
+        raise CircuitOpenError(retry_after)
+
+    def release(self) -> None:
+        """Hand back an admitted call that got no answer from AbuseIPDB.
+
+        Used when the caller's own budget or rate limit stopped the call; it
+        says nothing about AbuseIPDB, so it frees a half-open trial without
+        counting as a success or a failure.
+        """
+        with self._lock:
+            if self._current(self._clock()) == HALF_OPEN and self._trials:
+                self._trials -= 1
+
+    def record(self, success: bool) -> None:
+        """Record the outcome of an admitted call."""
+        with self._lock:
+            now = self._clock()
+            state = self._current(now)
+            if state == HALF_OPEN:
+                if success:
+                    self._state, self._cooldown = CLOSED, self.open_seconds
+                    self._outcomes.clear()
+                else:
+                    self._open(now, min(self._cooldown * 2, self.max_open_seconds))
+                return
+            if state == OPEN:
+                return  # a call admitted before the breaker opened
+            self._outcomes.append(success)
+            calls = len(self._outcomes)
+            failures = calls - sum(self._outcomes)
+            if calls >= self.min_calls and failures >= self.failure_ratio * calls:
+                self._open(now, self.open_seconds)
+
+    def _open(self, now: float, cooldown: float) -> None:
+        # Caller holds the lock.
+        self._state, self._opened_at, self._cooldown = OPEN, now, cooldown
+        self._outcomes.clear()
+        self.opened += 1
+
+    def stats(self) -> dict[str, int | str]:
+        with self._lock:
+            return {
+                "state": self._current(self._clock()),
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "calls": len(self._outcomes),
+                "failures": len(self._outcomes) - sum(self._outcomes),
+            }
+
+
+class Hedger:
+    """Decides when to hedge a request, from recent latencies per endpoint."""
+
+    def __init__(
+        self,
+        percentile: float = 0.0,
+        min_delay: float = 0.05,
+        max_ratio: float = 0.1,
+        window: int = 200,
+        min_samples: int = 20,
+    ) -> None:
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self.window = window
+        self.min_samples = min_samples
+        self._latencies: dict[str, deque[float]] = {}
+        # Hedge allowance: each request adds ``max_ratio``, each hedge costs 1.
+        self._allowance = 0.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._latencies.get(endpoint)
+            if samples is None:
+                samples = self._latencies[endpoint] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def delay(self, endpoint: str) -> float | None:
+        """Count a request; return how long to wait before hedging it, or None."""
+        with self._lock:
+            self.requests += 1
+            if self.percentile <= 0:
+                return None
+            self._allowance = min(self._allowance + self.max_ratio, 10.0)
+            samples = self._latencies.get(endpoint)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def take(self) -> bool:
+        """Spend the allowance on one hedge; False once it is used up."""
+        with self._lock:
+            if self._allowance < 1:
+                return False
+            self._allowance -= 1
+            self.hedges += 1
+            return True
+
+    def won(self) -> None:
+        """Count a hedge that answered before the request it hedged."""
+        with self._lock:
+            self.wins += 1
+
+    def rate(self) -> float:
+        with self._lock:
+            return self.hedges / max(1, self.requests)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "wins": self.wins,
+                "rate": self.hedges / max(1, self.requests),
+            }
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def breaker_from_env() -> CircuitBreaker:
+    """Build a breaker from `ABUSEIPDB_BREAKER_*` environment variables."""
+    return CircuitBreaker(
+        window=int(os.getenv("ABUSEIPDB_BREAKER_WINDOW") or 20),
+        min_calls=int(os.getenv("ABUSEIPDB_BREAKER_MIN_CALLS") or 10),
+        failure_ratio=_env_float("ABUSEIPDB_BREAKER_FAILURE_RATIO", 0.5),
+        open_seconds=_env_float("ABUSEIPDB_BREAKER_OPEN_SECONDS", 30.0),
+        max_open_seconds=_env_float("ABUSEIPDB_BREAKER_MAX_OPEN_SECONDS", 300.0),
+    )
+
+
+def hedger_from_env() -> Hedger:
+    """Build a hedger from `ABUSEIPDB_HEDGE_*`; hedging is off by default."""
+    return Hedger(
+        percentile=_env_float("ABUSEIPDB_HEDGE_PERCENTILE", 0.0),
+        min_delay=_env_float("ABUSEIPDB_HEDGE_MIN_DELAY", 0.05),
+        max_ratio=_env_float("ABUSEIPDB_HEDGE_MAX_RATIO", 0.1),
+    )
+
+
+_lock = threading.Lock()
+_breaker: CircuitBreaker | None = None
+_hedger: Hedger | None = None
+
+
+def get_breaker() -> CircuitBreaker:
+    """Return the process-wide breaker, creating it on first use."""
+    global _breaker
+    if _breaker is None:
+        with _lock:
+            if _breaker is None:
+                _breaker = breaker_from_env()
+    return _breaker
+
+
+def get_hedger() -> Hedger:
+    """Return the process-wide hedger, creating it on first use."""
+    global _hedger
+    if _hedger is None:
+        with _lock:
+            if _hedger is None:
+                _hedger = hedger_from_env()
+    return _hedger
+
+
+def configure(
+    breaker: CircuitBreaker | None = None, hedger: Hedger | None = None
+) -> None:
+    """Replace the breaker and hedger; with no arguments the next use re-reads env."""
+    global _breaker, _hedger
+    with _lock:
+        _breaker, _hedger = breaker, hedger
+
+
+tool_metrics.gauge(
+    "abuseipdb.circuit.state", lambda: _STATE_LEVELS[get_breaker().state]
+)
+tool_metrics.gauge("abuseipdb.hedge.rate", lambda: get_hedger().rate())
@@ -1,9 +1,9 @@
 # Auto-generated from function_app.py: function `save_snippet`
 # NOTE: move any function-specific imports here if necessary
 from typing import TYPE_CHECKING
-import json
 import logging
-import azure.functions as func
+
+from . import snippet_store, tool_args, tool_metrics
 
 # Context arrives as a JSON string; annotate as str for worker compatibility
 ContextType = str
@@ -11,8 +11,8 @@ ContextType = str
 if TYPE_CHECKING:
     from function_app import (
         app,
-        _BLOB_PATH,
         tool_properties_save_snippets_json,
+        tool_properties_save_snippets_object,
         _SNIPPET_NAME_PROPERTY_NAME,
         _SNIPPET_PROPERTY_NAME,
     )
@@ -20,20 +20,22 @@ else:
     try:
         from .function_app import (
             app,
-            _BLOB_PATH,
             tool_properties_save_snippets_json,
+            tool_properties_save_snippets_object,
             _SNIPPET_NAME_PROPERTY_NAME,
             _SNIPPET_PROPERTY_NAME,
         )
     except Exception:
         from function_app import (
             app,
-            _BLOB_PATH,
             tool_properties_save_snippets_json,
+            tool_properties_save_snippets_object,
             _SNIPPET_NAME_PROPERTY_NAME,
             _SNIPPET_PROPERTY_NAME,
         )
 
+_SCHEMA = tool_args.compile_schema(tool_properties_save_snippets_object)
+
 
 @app.generic_trigger(
     arg_name="context",
@@ -42,36 +44,28 @@ else:
     description="Save a snippet with a name.",
     toolProperties=tool_properties_save_snippets_json,
 )
-@app.generic_output_binding(
-    arg_name="file", type="blob", connection="AzureWebJobsStorage", path=_BLOB_PATH
-)
-def save_snippet(file: func.Out[str], context: ContextType) -> str:
+@tool_metrics.instrument
+def save_snippet(context: ContextType) -> str:
     """Save snippet content into blob storage using the provided arguments in `context`.
 
+    Content is stored once per SHA-256 hash and the name points at it (see
+    `snippet_store`). Content at or above `SNIPPET_COMPRESSION_MIN_BYTES` is
+    stored compressed, with the encoding recorded in blob metadata (see
+    `snippet_codec`).
+
     Args:
-        file: Output blob binding.
         context: Trigger context (expected to be a JSON string or dict with an "arguments" mapping).
 
     Returns:
         A success or error message string.
     """
-    if isinstance(context, str):
-        try:
-            content = json.loads(context)
-        except json.JSONDecodeError:
-            logging.exception("Failed to decode context as JSON")
-            return "Invalid request payload"
-    elif isinstance(context, dict):
-        content = context
-    else:
-        return "Invalid request payload"
-
-    arguments = content.get("arguments")
-    if not isinstance(arguments, dict):
-        return "Invalid arguments"
+    try:
+        arguments = _SCHEMA.parse(context)
+    except tool_args.ArgumentsError as exc:
+        return str(exc)
 
-    snippet_name_from_args = arguments.get(_SNIPPET_NAME_PROPERTY_NAME)
-    snippet_content_from_args = arguments.get(_SNIPPET_PROPERTY_NAME)
+    snippet_name_from_args = arguments.string(_SNIPPET_NAME_PROPERTY_NAME)
+    snippet_content_from_args = arguments.string(_SNIPPET_PROPERTY_NAME)
 
     if not snippet_name_from_args:
         return "No snippet name provided"
@@ -79,6 +73,10 @@ def save_snippet(file: func.Out[str], context: ContextType) -> str:
     if not snippet_content_from_args:
         return "No snippet content provided"
 
-    file.set(snippet_content_from_args)
+    try:
+        snippet_store.write_snippet(snippet_name_from_args, snippet_content_from_args)
+    except Exception as exc:
+        logging.exception("Failed to save snippet '%s'", snippet_name_from_args)
+        return f"Error saving snippet: {exc}"
     logging.info(f"Saved snippet: {snippet_content_from_args}")
     return f"Snippet '{snippet_content_from_args}' saved successfully"
@@ -0,0 +1,100 @@
+import json
+import logging
+from typing import TYPE_CHECKING, Any
+
+from . import snippet_store, tool_args, tool_metrics
+
+# Context arrives as a JSON string; annotate as str for worker compatibility
+ContextType = str
+
+if TYPE_CHECKING:
+    from function_app import (
+        _SNIPPET_NAME_PROPERTY_NAME,
+        _SNIPPET_PROPERTY_NAME,
+        _SNIPPETS_PROPERTY_NAME,
+        app,
+        tool_properties_save_snippets_batch_json,
+        tool_properties_save_snippets_batch_object,
+    )
+else:
+    try:
+        from .function_app import (
+            _SNIPPET_NAME_PROPERTY_NAME,
+            _SNIPPET_PROPERTY_NAME,
+            _SNIPPETS_PROPERTY_NAME,
+            app,
+            tool_properties_save_snippets_batch_json,
+            tool_properties_save_snippets_batch_object,
+        )
+    except Exception:
+        from function_app import (
+            _SNIPPET_NAME_PROPERTY_NAME,
+            _SNIPPET_PROPERTY_NAME,
+            _SNIPPETS_PROPERTY_NAME,
+            app,
+            tool_properties_save_snippets_batch_json,
+            tool_properties_save_snippets_batch_object,
+        )
+
+_SCHEMA = tool_args.compile_schema(tool_properties_save_snippets_batch_object)
+
+
+def _parse_snippets(value: Any) -> list[Any] | None:
+    """Accept a list of name/content objects, or that list as a JSON string."""
+    if isinstance(value, str):
+        try:
+            value = tool_args.loads(value)
+        except json.JSONDecodeError:
+            return None
+    return value if isinstance(value, list) else None
+
+
+@app.generic_trigger(
+    arg_name="context",
+    type="mcpToolTrigger",
+    toolName="save_snippets",
+    description="Save many snippets in one call.",
+    toolProperties=tool_properties_save_snippets_batch_json,
+)
+@tool_metrics.instrument
+def save_snippets(context: ContextType) -> str:
+    """Save several snippets concurrently.
+
+    Returns a JSON object keyed by snippet name whose values are
+    ``{"saved": true}`` or ``{"error": message}``. When a name appears more
+    than once, the last entry wins.
+    """
+    try:
+        arguments = _SCHEMA.parse(context)
+    except tool_args.ArgumentsError as exc:
+        return str(exc)
+
+    items = _parse_snippets(arguments.get(_SNIPPETS_PROPERTY_NAME))
+    if not items:
+        return "No snippets provided"
+    limit = snippet_store.batch_max_items()
+    if len(items) > limit:
+        return f"Too many snippets: {len(items)} (max {limit})"
+
+    snippets: dict[str, str] = {}
+    invalid: dict[str, dict[str, Any]] = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            invalid[f"#{index}"] = {"error": "Invalid snippet entry"}
+            continue
+        name = item.get(_SNIPPET_NAME_PROPERTY_NAME)
+        snippet = item.get(_SNIPPET_PROPERTY_NAME)
+        if not name:
+            invalid[f"#{index}"] = {"error": "No snippet name provided"}
+        elif not snippet or not isinstance(snippet, str):
+            invalid[str(name)] = {"error": "No snippet content provided"}
+        else:
+            snippets[str(name)] = snippet
+
+    results = {**invalid, **snippet_store.write_many(snippets)}
+    logging.info(
+        "Saved %d of %d snippets",
+        sum("saved" in result for result in results.values()),
+        len(items),
+    )
+    return tool_args.dumps(results)
@@ -0,0 +1,79 @@
+import json
+import logging
+from typing import TYPE_CHECKING
+
+from . import snippet_index, tool_args, tool_metrics
+from .list_snippets import parse_limit
+
+# Context arrives as a JSON string; annotate as str for worker compatibility
+ContextType = str
+
+if TYPE_CHECKING:
+    from function_app import (
+        _SNIPPET_CURSOR_PROPERTY_NAME,
+        _SNIPPET_LIMIT_PROPERTY_NAME,
+        _SNIPPET_QUERY_PROPERTY_NAME,
+        app,
+        tool_properties_search_snippets_json,
+        tool_properties_search_snippets_object,
+    )
+else:
+    try:
+        from .function_app import (
+            _SNIPPET_CURSOR_PROPERTY_NAME,
+            _SNIPPET_LIMIT_PROPERTY_NAME,
+            _SNIPPET_QUERY_PROPERTY_NAME,
+            app,
+            tool_properties_search_snippets_json,
+            tool_properties_search_snippets_object,
+        )
+    except Exception:
+        from function_app import (
+            _SNIPPET_CURSOR_PROPERTY_NAME,
+            _SNIPPET_LIMIT_PROPERTY_NAME,
+            _SNIPPET_QUERY_PROPERTY_NAME,
+            app,
+            tool_properties_search_snippets_json,
+            tool_properties_search_snippets_object,
+        )
+
+_SCHEMA = tool_args.compile_schema(tool_properties_search_snippets_object)
+
+
+@app.generic_trigger(
+    arg_name="context",
+    type="mcpToolTrigger",
+    toolName="search_snippets",
+    description="Find snippets whose name or content contains all the given words.",
+    toolProperties=tool_properties_search_snippets_json,
+)
+@tool_metrics.instrument
+def search_snippets(context: ContextType) -> str:
+    """Search the snippet index's inverted token index.
+
+    Matching is on whole lower-cased alphanumeric tokens, and every query
+    token must match. The response has the same shape as `list_snippets`.
+    """
+    try:
+        arguments = _SCHEMA.parse(context)
+    except tool_args.ArgumentsError as exc:
+        return str(exc)
+
+    query = arguments.string(_SNIPPET_QUERY_PROPERTY_NAME)
+    if not query:
+        return "No query provided"
+
+    try:
+        limit = parse_limit(arguments.integer(_SNIPPET_LIMIT_PROPERTY_NAME), 20)
+    except (TypeError, ValueError):
+        return "Invalid limit"
+
+    try:
+        page = snippet_index.search(
+            query, limit, arguments.string(_SNIPPET_CURSOR_PROPERTY_NAME)
+        )
+    except Exception as exc:
+        logging.exception("Failed to search snippets")
+        return f"Error searching snippets: {exc}"
+    logging.info("Search matched %d snippets", len(page["items"]))
+    return json.dumps(page)
@@ -0,0 +1,147 @@
+"""Single-flight coalescing of concurrent identical upstream calls.
+
+When several callers ask for the same key while a call for it is already in
+flight, they wait for that call instead of issuing their own and all receive
+its result or its exception. Every flight is backed by a
+`concurrent.futures.Future`, so threaded and asyncio callers (on any loop)
+can share one another's calls.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import CancelledError, Future
+from dataclasses import asdict, dataclass
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class FlightStats:
+    """How many calls went upstream and how many were collapsed into them."""
+
+    leaders: int = 0
+    coalesced: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _Flight(Generic[T]):
+    future: "Future[T]"
+    # Loop running the leader, if it is a coroutine. A thread blocking on the
+    # same loop would deadlock, so such callers run their own call instead.
+    loop: asyncio.AbstractEventLoop | None
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class SingleFlight(Generic[T]):
+    """Deduplicates concurrent calls by key for threads and coroutines."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _Flight[T]] = {}
+        self._stats = FlightStats()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            snapshot = self._stats.to_dict()
+            snapshot["in_flight"] = len(self._flights)
+        return snapshot
+
+    def _join(
+        self, key: Hashable, loop: asyncio.AbstractEventLoop | None, blocking: bool
+    ) -> tuple[_Flight[T], bool]:
+        """Return the flight to wait on (and whether we lead it)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and not (blocking and loop and flight.loop is loop):
+                self._stats.coalesced += 1
+                return flight, False
+            flight = _Flight(Future(), loop)
+            self._flights.setdefault(key, flight)
+            self._stats.leaders += 1
+            return flight, True
+
+    def _finish(self, key: Hashable, flight: _Flight[T]) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run ``fn`` unless a call for ``key`` is in flight, then share it."""
+        while True:
+            flight, leader = self._join(key, _running_loop(), blocking=True)
+            if leader:
+                break
+            try:
+                return flight.future.result()
+            except CancelledError:
+                continue  # The leader was cancelled; try to lead ourselves.
+
+        try:
+            value = fn()
+        except BaseException as exc:
+            self._finish(key, flight)
+            flight.future.set_exception(exc)
+            raise
+        self._finish(key, flight)
+        flight.future.set_result(value)
+        return value
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Asyncio counterpart of `do` for coroutine functions."""
+        while True:
+            flight, leader = self._join(key, asyncio.get_running_loop(), False)
+            if leader:
+                break
+            try:
+                # Shield so a cancelled follower never cancels the shared call.
+                return await asyncio.shield(asyncio.wrap_future(flight.future))
+            except asyncio.CancelledError:
+                if not flight.future.cancelled():
+                    raise
+                # The leader was cancelled, not us; try to lead ourselves.
+
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            self._finish(key, flight)
+            flight.future.cancel()
+            raise
+        except BaseException as exc:
+            self._finish(key, flight)
+            flight.future.set_exception(exc)
+            raise
+        self._finish(key, flight)
+        flight.future.set_result(value)
+        return value
+
+
+_lock = threading.Lock()
+_flight: SingleFlight[dict[str, Any]] | None = None
+
+
+def get_flight() -> SingleFlight[dict[str, Any]]:
+    """Return the process-wide coalescer for AbuseIPDB lookups."""
+    global _flight
+    if _flight is None:
+        with _lock:
+            if _flight is None:
+                _flight = SingleFlight()
+    return _flight
+
+
+def configure(flight: SingleFlight[dict[str, Any]] | None = None) -> None:
+    """Replace the shared coalescer; with no argument a fresh one is created."""
+    global _flight
+    with _lock:
+        _flight = flight
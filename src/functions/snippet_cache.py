@@ -0,0 +1,190 @@
+"""In-process, byte-bounded read-through cache for snippet content.
+
+Entries are served without touching storage for ``revalidate_after`` seconds.
+After that the next read revalidates with a conditional request carrying the
+cached ETag, so an unchanged snippet costs a ``304 Not Modified`` instead of
+a full download. Missing names are cached for ``negative_ttl`` seconds. Total
+content is capped at ``max_bytes`` with least-recently-used eviction.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+
+
+@dataclass(frozen=True)
+class Fetched:
+    """A snippet as downloaded from storage."""
+
+    etag: str
+    content: str
+    size: int
+
+
+# Called with the cached ETag (or None); returns None when the snippet is
+# unchanged and raises `LookupError` when it does not exist.
+Fetch = Callable[[str | None], Fetched | None]
+
+# Charged against the byte budget for each cached miss so a flood of
+# lookups for unknown names cannot grow the cache without bound.
+_NEGATIVE_ENTRY_SIZE = 64
+
+
+@dataclass
+class CacheStats:
+    """Counters used to size the cache."""
+
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    not_modified: int = 0
+    negative_hits: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _Entry:
+    fetched: Fetched | None
+    error: LookupError | None
+    checked_at: float
+
+
+class SnippetCache:
+    """A thread-safe LRU cache of snippet content bounded by total bytes."""
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        revalidate_after: float = 5.0,
+        negative_ttl: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._stats = CacheStats()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            snapshot = self._stats.to_dict()
+            snapshot["entries"] = len(self._entries)
+            snapshot["bytes"] = self._bytes
+        return snapshot
+
+    def get(self, name: str, fetch: Fetch) -> str:
+        """Return the content of ``name``, fetching or revalidating as needed."""
+        if self.max_bytes <= 0:
+            fetched = fetch(None)
+            assert fetched is not None
+            return fetched.content
+
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+                if entry.error is not None:
+                    if now - entry.checked_at < self.negative_ttl:
+                        self._stats.negative_hits += 1
+                        raise entry.error
+                    entry = None
+                elif now - entry.checked_at < self.revalidate_after:
+                    self._stats.hits += 1
+                    assert entry.fetched is not None
+                    return entry.fetched.content
+            if entry is None:
+                self._stats.misses += 1
+            else:
+                self._stats.revalidations += 1
+
+        cached = entry.fetched if entry is not None else None
+        try:
+            fetched = fetch(cached.etag if cached is not None else None)
+        except LookupError as exc:
+            self._put(name, _Entry(None, exc, now))
+            raise
+
+        if fetched is None:
+            assert cached is not None
+            with self._lock:
+                self._stats.not_modified += 1
+                current = self._entries.get(name)
+                if current is not None and current.fetched is cached:
+                    current.checked_at = now
+            return cached.content
+
+        self._put(name, _Entry(fetched, None, now))
+        return fetched.content
+
+    def invalidate(self, name: str) -> None:
+        """Drop ``name`` so the next read goes to storage."""
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is not None:
+                self._bytes -= self._size(entry)
+                self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @staticmethod
+    def _size(entry: _Entry) -> int:
+        return entry.fetched.size if entry.fetched is not None else _NEGATIVE_ENTRY_SIZE
+
+    def _put(self, name: str, entry: _Entry) -> None:
+        size = self._size(entry)
+        with self._lock:
+            old = self._entries.pop(name, None)
+            if old is not None:
+                self._bytes -= self._size(old)
+            if size > self.max_bytes:
+                return
+            self._entries[name] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._size(evicted)
+                self._stats.evictions += 1
+
+
+def from_env() -> SnippetCache:
+    """Build a cache from `SNIPPET_CACHE_*` environment variables."""
+    return SnippetCache(
+        max_bytes=int(os.getenv("SNIPPET_CACHE_MAX_BYTES") or 32 * 1024 * 1024),
+        revalidate_after=float(os.getenv("SNIPPET_CACHE_REVALIDATE_AFTER") or 5.0),
+        negative_ttl=float(os.getenv("SNIPPET_CACHE_NEGATIVE_TTL") or 10.0),
+    )
+
+
+_lock = threading.Lock()
+_cache: SnippetCache | None = None
+
+
+def get_cache() -> SnippetCache:
+    """Return the process-wide snippet cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = from_env()
+    return _cache
+
+
+def configure(cache: SnippetCache | None = None) -> None:
+    """Replace the shared cache; with no argument the next use re-reads env."""
+    global _cache
+    with _lock:
+        _cache = cache
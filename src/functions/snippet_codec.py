@@ -0,0 +1,102 @@
+"""Transparent compression for stored snippets.
+
+Snippets at or above ``SNIPPET_COMPRESSION_MIN_BYTES`` are compressed with
+zstd (or gzip when the `zstandard` package is unavailable) before upload, and
+the encoding is recorded in the blob's metadata. Blobs without the metadata
+marker are plain UTF-8, so snippets written before compression existed stay
+readable.
+"""
+
+import gzip
+import os
+import zlib
+from collections.abc import Iterable, Iterator, Mapping
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is an optional speed-up
+    zstandard = None  # type: ignore[assignment]
+
+# Blob metadata keys (must be valid C# identifiers).
+ENCODING_KEY = "snippetencoding"
+SIZE_KEY = "snippetsize"
+
+IDENTITY = "identity"
+GZIP = "gzip"
+ZSTD = "zstd"
+
+
+def _preferred() -> str:
+    configured = os.getenv("SNIPPET_COMPRESSION", "").lower()
+    if configured in ("none", IDENTITY):
+        return IDENTITY
+    if configured == GZIP or zstandard is None:
+        return GZIP
+    return ZSTD
+
+
+def min_bytes() -> int:
+    return int(os.getenv("SNIPPET_COMPRESSION_MIN_BYTES") or 4096)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return bytes(zstandard.ZstdCompressor(level=3).compress(data))
+    if encoding == GZIP:
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    return data
+
+
+def encode(data: bytes, encoding: str | None = None) -> tuple[bytes, dict[str, str]]:
+    """Return the payload to store for ``data`` and the blob metadata for it.
+
+    Data below the size threshold, or that does not shrink, is stored as is.
+    """
+    encoding = encoding or _preferred()
+    if encoding == IDENTITY or len(data) < min_bytes():
+        return data, {}
+    payload = compress(data, encoding)
+    if len(payload) >= len(data):
+        return data, {}
+    return payload, {ENCODING_KEY: encoding, SIZE_KEY: str(len(data))}
+
+
+def encoding_of(metadata: Mapping[str, str] | None) -> str:
+    return (metadata or {}).get(ENCODING_KEY, IDENTITY)
+
+
+def decoded_size(metadata: Mapping[str, str] | None, stored_size: int) -> int:
+    """The uncompressed size of a blob, given its metadata and stored size."""
+    size = (metadata or {}).get(SIZE_KEY)
+    return int(size) if size else stored_size
+
+
+def decompress_chunks(
+    chunks: Iterable[bytes | memoryview], encoding: str
+) -> Iterator[bytes | memoryview]:
+    """Stream-decompress ``chunks`` stored with ``encoding``."""
+    if encoding == IDENTITY:
+        yield from chunks
+        return
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("reading zstd snippets requires 'zstandard'")
+        zstd = zstandard.ZstdDecompressor().decompressobj()
+        for chunk in chunks:
+            out = zstd.decompress(chunk)
+            if out:
+                yield out
+        return
+    if encoding == GZIP:
+        inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            out = inflater.decompress(chunk)
+            if out:
+                yield out
+        tail = inflater.flush()
+        if tail:
+            yield tail
+        return
+    raise ValueError(f"Unknown snippet encoding '{encoding}'")
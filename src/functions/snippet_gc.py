@@ -0,0 +1,19 @@
+import logging
+
+import azure.functions as func
+
+from function_app import app
+
+from . import snippet_store
+
+
+@app.timer_trigger(schedule="0 30 3 * * *", arg_name="timer", run_on_startup=False)
+def snippet_gc(timer: func.TimerRequest) -> None:
+    """Delete snippet content objects that no snippet name points at any more."""
+    result = snippet_store.collect_garbage()
+    logging.info(
+        "Snippet GC: %d referenced, %d scanned, %d deleted",
+        result.referenced,
+        result.scanned,
+        result.deleted,
+    )
@@ -0,0 +1,266 @@
+"""Sharded sidecar index of snippet names and tokens.
+
+`list_snippets` and `search_snippets` answer from this index and never read
+snippet bodies. It lives in `_SNIPPET_INDEX_CONTAINER` as
+``SNIPPET_INDEX_SHARDS`` JSON blobs. Each snippet name hashes to one shard,
+and that shard holds the name's sidecar entry (size, content hash, modified
+time, tokens) plus the shard's inverted token index. A save therefore
+rewrites exactly one shard. Updates are optimistic: the shard is re-read and
+the write retried when its ETag changed underneath, so concurrent writers to
+different shards never contend and writers to the same shard never lose
+updates.
+
+Queries read every shard concurrently. Each instance keeps the last copy of
+every shard and revalidates it with a conditional request, so an unchanged
+shard costs a ``304`` rather than a download.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from function_app import _SNIPPET_INDEX_CONTAINER
+
+from . import blob_backend, tool_metrics
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+_MAX_TOKEN_LENGTH = 64
+
+_lock = threading.Lock()
+_cached: dict[int, tuple[str, "Shard"]] = {}
+
+
+def shard_count() -> int:
+    """Number of index shards; changing it requires `rebuild`."""
+    return int(os.getenv("SNIPPET_INDEX_SHARDS") or 16)
+
+
+def max_tokens() -> int:
+    """Most distinct tokens indexed per snippet."""
+    return int(os.getenv("SNIPPET_INDEX_MAX_TOKENS") or 1000)
+
+
+def tokenize(text: str) -> list[str]:
+    """Distinct lower-cased alphanumeric tokens of ``text``, in first-seen order."""
+    tokens = dict.fromkeys(
+        token
+        for token in _TOKEN_RE.findall(text.lower())
+        if 2 <= len(token) <= _MAX_TOKEN_LENGTH
+    )
+    return list(tokens)
+
+
+def shard_of(name: str, shards: int | None = None) -> int:
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % (shards or shard_count())
+
+
+def shard_blob(shard: int) -> str:
+    return f"shards/{shard:03d}.json"
+
+
+@dataclass
+class Shard:
+    """The entries and inverted token index of one shard."""
+
+    entries: dict[str, dict[str, Any]] = field(default_factory=dict)
+    postings: dict[str, set[str]] = field(default_factory=dict)
+
+    def put(
+        self, name: str, size: int, digest: str, modified: str, tokens: list[str]
+    ) -> None:
+        self.remove(name)
+        self.entries[name] = {
+            "size": size,
+            "sha256": digest,
+            "modified": modified,
+            "tokens": tokens,
+        }
+        for token in tokens:
+            self.postings.setdefault(token, set()).add(name)
+
+    def remove(self, name: str) -> None:
+        entry = self.entries.pop(name, None)
+        if entry is None:
+            return
+        for token in entry["tokens"]:
+            names = self.postings.get(token)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.postings[token]
+
+    def to_bytes(self) -> bytes:
+        return json.dumps(
+            {
+                "entries": self.entries,
+                "postings": {t: sorted(n) for t, n in self.postings.items()},
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Shard":
+        raw = json.loads(data)
+        return cls(
+            raw.get("entries", {}),
+            {t: set(names) for t, names in raw.get("postings", {}).items()},
+        )
+
+
+def _download(shard: int) -> tuple[str | None, Shard]:
+    """Return the shard and its ETag (``None`` if it does not exist yet)."""
+    with _lock:
+        cached = _cached.get(shard)
+    try:
+        download = blob_backend.get_backend().get(
+            _SNIPPET_INDEX_CONTAINER,
+            shard_blob(shard),
+            if_none_match=cached[0] if cached else None,
+        )
+    except blob_backend.NotFound:
+        return None, Shard()
+    if download is None:
+        assert cached is not None
+        return cached
+    loaded = Shard.from_bytes(download.readall())
+    with _lock:
+        _cached[shard] = (download.etag, loaded)
+    return download.etag, loaded
+
+
+def load_shards() -> list[Shard]:
+    """Every shard, read concurrently (and revalidated when cached)."""
+    count = shard_count()
+    with ThreadPoolExecutor(
+        max_workers=min(count, 16), thread_name_prefix="snippet-index"
+    ) as executor:
+        download = tool_metrics.run_in_context(_download)
+        return [shard for _, shard in executor.map(download, range(count))]
+
+
+def record(
+    name: str,
+    size: int,
+    digest: str,
+    text: str,
+    modified: datetime | None = None,
+    attempts: int = 8,
+) -> None:
+    """Add or replace the index entry for ``name`` after it was saved."""
+    tokens = tokenize(name + " " + text)[: max_tokens()]
+    stamp = (modified or datetime.now(timezone.utc)).isoformat(timespec="seconds")
+    _update(
+        shard_of(name), lambda s: s.put(name, size, digest, stamp, tokens), attempts
+    )
+
+
+def _update(shard: int, change: Any, attempts: int) -> None:
+    backend = blob_backend.get_backend()
+    for attempt in range(attempts):
+        etag, current = _download(shard)
+        # Never mutate the cached copy: a failed write would leave it ahead
+        # of storage.
+        updated = Shard.from_bytes(current.to_bytes())
+        change(updated)
+        try:
+            new_etag = backend.put(
+                _SNIPPET_INDEX_CONTAINER,
+                shard_blob(shard),
+                updated.to_bytes(),
+                if_match=etag,
+                if_none_match=etag is None,
+            )
+        except blob_backend.PreconditionFailed:
+            # Another writer updated (or deleted) the shard first; back off
+            # and rebase.
+            with _lock:
+                _cached.pop(shard, None)
+            time.sleep(random.uniform(0, 0.01 * 2**attempt))
+            continue
+        with _lock:
+            _cached[shard] = (new_etag, updated)
+        return
+    raise RuntimeError(f"Snippet index shard {shard} is too contended to update")
+
+
+def _page(
+    names: Iterable[str], shards: list[Shard], limit: int, cursor: str | None
+) -> dict[str, Any]:
+    """One page of ``names`` in name order, starting after ``cursor``."""
+    ordered = sorted(n for n in names if cursor is None or n > cursor)
+    page = ordered[:limit]
+    items = []
+    for name in page:
+        entry = shards[shard_of(name, len(shards))].entries[name]
+        items.append(
+            {"name": name, **{k: v for k, v in entry.items() if k != "tokens"}}
+        )
+    more = len(ordered) > limit
+    return {"items": items, "nextCursor": page[-1] if more else None}
+
+
+def list_names(
+    prefix: str = "", limit: int = 100, cursor: str | None = None
+) -> dict[str, Any]:
+    """Snippets whose name starts with ``prefix``, in name order."""
+    shards = load_shards()
+    names = (n for s in shards for n in s.entries if n.startswith(prefix))
+    return _page(names, shards, limit, cursor)
+
+
+def search(query: str, limit: int = 20, cursor: str | None = None) -> dict[str, Any]:
+    """Snippets containing every token of ``query`` (in name or content)."""
+    tokens = tokenize(query)
+    if not tokens:
+        return {"items": [], "nextCursor": None}
+    shards = load_shards()
+    matches: set[str] = set()
+    for shard in shards:
+        found: set[str] | None = None
+        for token in tokens:
+            names = shard.postings.get(token, set())
+            found = set(names) if found is None else found & names
+            if not found:
+                break
+        matches |= found or set()
+    return _page(matches, shards, limit, cursor)
+
+
+def rebuild(snippets: Iterable[tuple[str, int, str, str]]) -> int:
+    """Rewrite the whole index from ``(name, size, sha256, text)`` tuples.
+
+    Used to backfill snippets saved before the index existed (see
+    ``scripts/rebuild_snippet_index.py``). Returns the number indexed.
+    """
+    count = shard_count()
+    shards = [Shard() for _ in range(count)]
+    stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    indexed = 0
+    for name, size, digest, text in snippets:
+        tokens = tokenize(name + " " + text)[: max_tokens()]
+        shards[shard_of(name, count)].put(name, size, digest, stamp, tokens)
+        indexed += 1
+    for number, shard in enumerate(shards):
+        _update(number, lambda s, new=shard: _replace(s, new), attempts=8)
+    return indexed
+
+
+def _replace(target: Shard, source: Shard) -> None:
+    target.entries = source.entries
+    target.postings = source.postings
+
+
+def configure() -> None:
+    """Forget cached shards (tests, or after the shard count changes)."""
+    with _lock:
+        _cached.clear()
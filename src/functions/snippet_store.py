@@ -0,0 +1,469 @@
+"""Snippet reads and writes through `blob_backend` and the shared snippet cache.
+
+`get_snippet` reads here instead of through a blob input binding so that
+repeat reads can be answered from `snippet_cache` and revalidated with
+conditional (``If-None-Match``) requests. Downloads are decompressed (see
+`snippet_codec`) and decoded chunk by chunk, so the raw bytes and the decoded
+text of a large snippet are never held in memory together, and byte ranges
+can be read for paging. `save_snippet` writes through `write_snippet`.
+
+Storage is content-addressed: each snippet body is stored once in
+`_SNIPPET_OBJECT_CONTAINER` under the SHA-256 of its UTF-8 bytes, and
+``snippets/{name}.json`` is a small pointer whose ``snippetref`` metadata
+names that hash. Saving content that is already stored only writes the
+pointer. A name blob without the metadata is a snippet written before this
+layout and holds its content inline. `collect_garbage` deletes objects no
+pointer references.
+"""
+
+import codecs
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, TypeVar, cast
+
+from function_app import _SNIPPET_CONTAINER, _SNIPPET_OBJECT_CONTAINER
+
+from . import (
+    blob_backend,
+    snippet_cache,
+    snippet_codec,
+    snippet_index,
+    tool_metrics,
+)
+
+# Pointer blob metadata key naming the content object (a C# identifier).
+REF_KEY = "snippetref"
+
+T = TypeVar("T")
+
+
+class SnippetNotFound(LookupError):
+    """Raised when no snippet exists under the requested name."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(f"Snippet '{name}' not found")
+        self.name = name
+
+
+class SnippetTooLarge(ValueError):
+    """Raised when a whole-snippet read would exceed the response limit."""
+
+    def __init__(self, name: str, size: int, limit: int) -> None:
+        super().__init__(
+            f"Snippet '{name}' is {size} bytes, over the {limit}-byte response "
+            "limit; read it in pages with offset/length"
+        )
+        self.name = name
+        self.size = size
+        self.limit = limit
+
+
+@dataclass(frozen=True)
+class SnippetRange:
+    """One page of a snippet read by byte range."""
+
+    content: str
+    offset: int
+    nextOffset: int | None
+    totalSize: int
+
+
+@dataclass(frozen=True)
+class GcResult:
+    """What one `collect_garbage` pass found and removed."""
+
+    referenced: int
+    scanned: int
+    deleted: int
+
+
+def max_response_bytes() -> int:
+    """The largest snippet (or page) returned in one call."""
+    return int(os.getenv("SNIPPET_MAX_RESPONSE_BYTES") or 1024 * 1024)
+
+
+def _decode_chunks(
+    chunks: Iterable[bytes | memoryview], final: bool
+) -> tuple[str, int]:
+    """Incrementally decode UTF-8 ``chunks``.
+
+    Returns the text and the number of bytes it covers. With ``final`` unset
+    a trailing partial character is left undecoded (and uncounted) so the
+    next page can start on it.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts: list[str] = []
+    consumed = 0
+    for chunk in chunks:
+        parts.append(decoder.decode(chunk))
+        consumed += len(chunk)
+    parts.append(decoder.decode(b"", final=final))
+    pending, _ = decoder.getstate()
+    return "".join(parts), consumed - len(pending)
+
+
+def blob_name(name: str) -> str:
+    """The blob holding snippet ``name`` (mirrors `_BLOB_PATH`)."""
+    return f"{name}.json"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def object_name(digest: str) -> str:
+    """The blob holding the content with SHA-256 ``digest``."""
+    return f"{digest[:2]}/{digest}"
+
+
+def gc_grace_seconds() -> float:
+    """How old an unreferenced object must be before it is collected."""
+    return float(os.getenv("SNIPPET_GC_GRACE_SECONDS") or 24 * 60 * 60)
+
+
+def _content_blob(name: str, metadata: dict[str, str]) -> tuple[str, str]:
+    """The container and blob holding the content of ``name``, given the
+    metadata of its name blob."""
+    digest = metadata.get(REF_KEY)
+    if digest is None:
+        return _SNIPPET_CONTAINER, blob_name(name)
+    return _SNIPPET_OBJECT_CONTAINER, object_name(digest)
+
+
+def _fetch(name: str, etag: str | None) -> snippet_cache.Fetched | None:
+    backend = blob_backend.get_backend()
+    # The cache entry is validated against the pointer's ETag: objects never
+    # change, so an unchanged pointer means unchanged content.
+    try:
+        download = backend.get(_SNIPPET_CONTAINER, blob_name(name), if_none_match=etag)
+        if download is None:
+            return None
+        pointer_etag = download.etag
+        if REF_KEY in download.metadata:
+            download = backend.get(*_content_blob(name, download.metadata))
+            assert download is not None
+    except blob_backend.NotFound:
+        raise SnippetNotFound(name) from None
+
+    size = snippet_codec.decoded_size(download.metadata, download.size)
+    limit = max_response_bytes()
+    if size > limit:
+        raise SnippetTooLarge(name, size, limit)
+    chunks = snippet_codec.decompress_chunks(
+        download.chunks(), snippet_codec.encoding_of(download.metadata)
+    )
+    content, _ = _decode_chunks(chunks, final=True)
+    return snippet_cache.Fetched(pointer_etag, content, size)
+
+
+def read_snippet(name: str) -> str:
+    """Return the content of snippet ``name`` via the shared cache.
+
+    Raises `SnippetNotFound` when it does not exist.
+    """
+    return snippet_cache.get_cache().get(name, partial(_fetch, name))
+
+
+def read_range(name: str, offset: int, length: int | None = None) -> SnippetRange:
+    """Read up to ``length`` bytes of snippet ``name`` starting at ``offset``.
+
+    Pages are capped at `max_response_bytes` and never split a UTF-8
+    character: a page starting mid-character skips to the next boundary, and
+    a character cut off at the end is left for the page at ``nextOffset``.
+    Ranged reads go straight to storage rather than through the cache.
+    """
+    limit = max_response_bytes()
+    length = limit if length is None else min(length, limit)
+    if offset < 0 or length <= 0:
+        raise ValueError("offset must be >= 0 and length > 0")
+    # A page must be able to hold one whole character to make progress.
+    length = max(length, 4)
+
+    backend = blob_backend.get_backend()
+    try:
+        pointer = backend.head(_SNIPPET_CONTAINER, blob_name(name))
+        container, blob = _content_blob(name, pointer.metadata)
+        info = pointer
+        if container != _SNIPPET_CONTAINER:  # not an inline, pre-dedup blob
+            info = backend.head(container, blob)
+        encoding = snippet_codec.encoding_of(info.metadata)
+        total = snippet_codec.decoded_size(info.metadata, info.size)
+        if offset >= total:
+            raise ValueError(f"offset {offset} is past the end of '{name}'")
+        if encoding == snippet_codec.IDENTITY:
+            download = backend.get(container, blob, offset=offset, length=length)
+        else:
+            # Compressed bytes can't be ranged, so download the whole object
+            # once, decompress from the start and skip to the window.
+            download = backend.get(container, blob)
+    except blob_backend.NotFound:
+        raise SnippetNotFound(name) from None
+    assert download is not None
+
+    chunks: Iterable[bytes | memoryview] = download.chunks()
+    if encoding != snippet_codec.IDENTITY:
+        chunks = _window(
+            snippet_codec.decompress_chunks(chunks, encoding), offset, length
+        )
+    return _page(chunks, offset, length, total)
+
+
+def _window(
+    chunks: Iterable[bytes | memoryview], start: int, length: int
+) -> Iterator[bytes | memoryview]:
+    """Yield bytes ``start`` to ``start + length`` of the stream ``chunks``."""
+    position = 0
+    end = start + length
+    for chunk in chunks:
+        chunk_end = position + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(0, start - position) : end - position]
+        position = chunk_end
+        if position >= end:
+            return
+
+
+def _page(
+    chunks: Iterable[bytes | memoryview], offset: int, length: int, total: int
+) -> SnippetRange:
+    chunks = iter(chunks)
+    first = next(chunks, b"")
+    # Skip UTF-8 continuation bytes (0b10xxxxxx) a mid-character offset lands on.
+    skip = 0
+    while skip < len(first) and skip < 3 and first[skip] & 0xC0 == 0x80:
+        skip += 1
+    end_of_blob = offset + length >= total
+    content, consumed = _decode_chunks(
+        _prepend(first[skip:], chunks), final=end_of_blob
+    )
+    next_offset = offset + skip + consumed
+    return SnippetRange(
+        content, offset + skip, next_offset if next_offset < total else None, total
+    )
+
+
+def _prepend(
+    first: bytes | memoryview, rest: Iterable[bytes | memoryview]
+) -> Iterable[bytes | memoryview]:
+    yield first
+    yield from rest
+
+
+def write_snippet(name: str, content: str) -> None:
+    """Store ``content`` as snippet ``name``.
+
+    The content object is uploaded (compressed when worthwhile) only if no
+    object with the same hash exists; the pointer is always rewritten, and
+    the name's `snippet_index` entry updated. Containers are created on
+    first use, as the output binding used to.
+    """
+    data = content.encode("utf-8")
+    digest = content_hash(data)
+    _store_object(digest, data)
+    pointer = json.dumps({"sha256": digest, "size": len(data)}).encode("utf-8")
+    blob_backend.get_backend().put(
+        _SNIPPET_CONTAINER, blob_name(name), pointer, metadata={REF_KEY: digest}
+    )
+    invalidate(name)
+    try:
+        snippet_index.record(name, len(data), digest, content)
+    except Exception:
+        # The snippet itself is saved; a missed entry is repaired by
+        # scripts/rebuild_snippet_index.py.
+        logging.exception("Failed to index snippet '%s'", name)
+
+
+def _store_object(digest: str, data: bytes) -> bool:
+    """Make sure the object for ``digest`` exists; True if it was uploaded.
+
+    An existing object older than half the GC grace period is touched (its
+    metadata rewritten) so a collection running concurrently with this save
+    neither sees it as old nor deletes it: `collect_garbage` deletes only
+    objects whose ETag is unchanged since it listed them.
+    """
+    backend = blob_backend.get_backend()
+    blob = object_name(digest)
+    try:
+        info = backend.head(_SNIPPET_OBJECT_CONTAINER, blob)
+        age = datetime.now(timezone.utc) - info.last_modified
+        if age.total_seconds() > gc_grace_seconds() / 2:
+            backend.set_metadata(_SNIPPET_OBJECT_CONTAINER, blob, info.metadata)
+        return False
+    except blob_backend.NotFound:
+        pass
+
+    payload, metadata = snippet_codec.encode(data)
+    try:
+        backend.put(
+            _SNIPPET_OBJECT_CONTAINER, blob, payload, metadata, if_none_match=True
+        )
+    except blob_backend.PreconditionFailed:
+        # A concurrent save of the same content got there first.
+        return False
+    return True
+
+
+def collect_garbage(grace: float | None = None) -> GcResult:
+    """Delete content objects that no snippet pointer references.
+
+    Objects modified within ``grace`` seconds (default `gc_grace_seconds`)
+    are kept, so content uploaded by a save whose pointer is not written yet
+    survives. Deletes are conditional on the ETag seen while listing, so an
+    object touched by a concurrent save is kept too.
+    """
+    grace = gc_grace_seconds() if grace is None else grace
+    backend = blob_backend.get_backend()
+    referenced = {
+        digest
+        for pointer in backend.list(_SNIPPET_CONTAINER)
+        if (digest := pointer.metadata.get(REF_KEY))
+    }
+
+    # Listed only after the pointers: anything uploaded later is in grace.
+    now = datetime.now(timezone.utc)
+    scanned = deleted = 0
+    for item in backend.list(_SNIPPET_OBJECT_CONTAINER):
+        scanned += 1
+        digest = item.name.rsplit("/", 1)[-1]
+        if digest in referenced:
+            continue
+        if (now - item.last_modified).total_seconds() < grace:
+            continue
+        try:
+            backend.delete(_SNIPPET_OBJECT_CONTAINER, item.name, if_match=item.etag)
+        except (blob_backend.NotFound, blob_backend.PreconditionFailed):
+            continue
+        deleted += 1
+    return GcResult(len(referenced), scanned, deleted)
+
+
+def iter_snippets() -> Iterator[tuple[str, int, str, str]]:
+    """Yield ``(name, size, sha256, content)`` for every stored snippet.
+
+    Reads every body, so it is for offline jobs such as rebuilding the
+    snippet index, not for serving requests.
+    """
+    for item in blob_backend.get_backend().list(_SNIPPET_CONTAINER):
+        if not item.name.endswith(".json"):
+            continue
+        name = item.name[: -len(".json")]
+        try:
+            content = _fetch(name, None)
+        except SnippetNotFound:
+            continue  # deleted, or a dangling pointer, since the listing
+        assert content is not None
+        data = content.content.encode("utf-8")
+        yield name, len(data), content_hash(data), content.content
+
+
+def batch_max_items() -> int:
+    """The most snippets one `get_snippets`/`save_snippets` call may name."""
+    return int(os.getenv("SNIPPET_BATCH_MAX_ITEMS") or 50)
+
+
+def _run_batch(
+    fn: Callable[[str], T],
+    keys: Iterable[str],
+    concurrency: int | None,
+    deadline: float | None,
+) -> dict[str, T | Exception]:
+    """Call ``fn`` for every key on a thread pool; errors are returned, not raised.
+
+    All calls share the backend (and its pooled client). Calls still running after
+    ``deadline`` seconds are reported as `TimeoutError`.
+    """
+    if concurrency is None:
+        concurrency = int(os.getenv("SNIPPET_BATCH_CONCURRENCY") or 16)
+    if deadline is None:
+        deadline = float(os.getenv("SNIPPET_BATCH_DEADLINE") or 25)
+    keys = list(keys)
+    results: dict[str, T | Exception] = {}
+    if not keys:
+        return results
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(keys))),
+        thread_name_prefix="snippet-batch",
+    )
+    try:
+        # Calls on the pool's threads count towards the invoking tool's metrics.
+        call = tool_metrics.run_in_context(fn)
+        futures: dict[Future[T], str] = {
+            executor.submit(call, key): key for key in keys
+        }
+        done, _ = wait(futures, timeout=deadline)
+        for future, key in futures.items():
+            if future not in done:
+                results[key] = TimeoutError("Deadline exceeded")
+            elif (exc := future.exception()) is not None:
+                results[key] = cast(Exception, exc)
+            else:
+                results[key] = future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return {key: results[key] for key in keys}
+
+
+def read_many(
+    names: Iterable[str],
+    concurrency: int | None = None,
+    deadline: float | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Read many snippets concurrently, keyed by name in request order.
+
+    Each value is ``{"snippet": content}`` or ``{"error": message}``; one
+    failing read never fails the batch. Snippets are included in order until
+    `max_response_bytes` is used up; later ones get an error asking for them
+    separately.
+    """
+    contents = _run_batch(read_snippet, dict.fromkeys(names), concurrency, deadline)
+    budget = max_response_bytes()
+    results: dict[str, dict[str, Any]] = {}
+    for name, content in contents.items():
+        if isinstance(content, Exception):
+            results[name] = {"error": str(content)}
+            continue
+        size = len(content.encode("utf-8"))
+        if size > budget:
+            results[name] = {
+                "error": "Batch response limit reached; read this snippet separately"
+            }
+            continue
+        budget -= size
+        results[name] = {"snippet": content}
+    return results
+
+
+def write_many(
+    snippets: dict[str, str],
+    concurrency: int | None = None,
+    deadline: float | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Write many snippets concurrently, keyed by name.
+
+    Each value is ``{"saved": True}`` or ``{"error": message}``.
+    """
+    outcomes = _run_batch(
+        lambda name: write_snippet(name, snippets[name]),
+        snippets,
+        concurrency,
+        deadline,
+    )
+    return {
+        name: {"error": str(outcome)}
+        if isinstance(outcome, Exception)
+        else {"saved": True}
+        for name, outcome in outcomes.items()
+    }
+
+
+def invalidate(name: str) -> None:
+    """Forget any cached copy of ``name`` after this instance writes it."""
+    snippet_cache.get_cache().invalidate(name)
@@ -0,0 +1,89 @@
+"""Shared Azure Storage clients built from the `AzureWebJobsStorage` settings.
+
+The client is created once per worker and reused so blob operations share a
+connection pool, sized by ``STORAGE_POOL_MAXSIZE`` so that concurrent batch
+reads and writes (`get_snippets`/`save_snippets`) reuse connections instead
+of overflowing the pool. Both connection-string settings (local/Azurite) and the
+identity-based `AzureWebJobsStorage__blobServiceUri` settings used by the
+deployed Flex Consumption app are supported.
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from azure.core.pipeline.transport import RequestsTransport
+    from azure.storage.blob import BlobServiceClient
+
+_lock = threading.Lock()
+_blob_service_client: "BlobServiceClient | None" = None
+
+
+def pool_maxsize() -> int:
+    return int(os.getenv("STORAGE_POOL_MAXSIZE") or 32)
+
+
+def _build_transport() -> "RequestsTransport":
+    import requests
+    from azure.core.pipeline.transport import RequestsTransport
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # Retries stay with the SDK's own retry policy, as in its default adapter.
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_maxsize(),
+        max_retries=Retry(total=False, redirect=False, raise_on_status=False),
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(session=session)
+
+
+def _build_blob_service_client() -> "BlobServiceClient":
+    # Imported lazily: only instances that actually touch storage through the
+    # SDK (rather than bindings) pay for loading it.
+    from azure.storage.blob import BlobServiceClient
+
+    transport = _build_transport()
+    connection_string = os.getenv("AzureWebJobsStorage")
+    if connection_string:
+        return BlobServiceClient.from_connection_string(
+            connection_string, transport=transport
+        )
+
+    account_url = os.getenv("AzureWebJobsStorage__blobServiceUri")
+    if not account_url:
+        raise RuntimeError(
+            "Storage is not configured; set 'AzureWebJobsStorage' or "
+            "'AzureWebJobsStorage__blobServiceUri'."
+        )
+
+    from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
+
+    client_id = os.getenv("AzureWebJobsStorage__clientId")
+    credential = (
+        ManagedIdentityCredential(client_id=client_id)
+        if client_id
+        else DefaultAzureCredential()
+    )
+    return BlobServiceClient(account_url, credential=credential, transport=transport)
+
+
+def get_blob_service_client() -> "BlobServiceClient":
+    """Return the process-wide `BlobServiceClient`, creating it on first use."""
+    global _blob_service_client
+    if _blob_service_client is None:
+        with _lock:
+            if _blob_service_client is None:
+                _blob_service_client = _build_blob_service_client()
+    return _blob_service_client
+
+
+def configure(blob_service_client: "BlobServiceClient | None" = None) -> None:
+    """Replace the shared client; with no argument the next use rebuilds it."""
+    global _blob_service_client
+    with _lock:
+        _blob_service_client = blob_service_client
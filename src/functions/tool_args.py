@@ -0,0 +1,209 @@
+"""Single-pass parsing of MCP tool trigger contexts.
+
+Every tool declares its arguments as a `ToolProperty` list in `function_app`.
+`compile_schema` turns that list into a `ToolSchema` once, at import: a table
+of property name -> type coercer. `ToolSchema.parse` then decodes the context
+with `orjson` when it is installed (stdlib `json` otherwise), pulls out
+``arguments`` and coerces every declared property in one pass. Handlers read
+the result through the typed accessors of `ToolArguments` rather than
+re-checking each field by hand.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None  # type: ignore[assignment]
+
+INVALID_PAYLOAD = "Invalid request payload"
+INVALID_ARGUMENTS = "Invalid arguments"
+
+
+class ArgumentsError(ValueError):
+    """The context has no usable arguments; ``str(exc)`` is the tool's reply."""
+
+
+class InvalidArgument(ValueError):
+    """A declared property was sent but could not be coerced to its type."""
+
+
+class _Property(Protocol):
+    propertyName: str
+    propertyType: str
+
+
+def loads(data: str | bytes) -> Any:
+    """Decode JSON, using orjson when available.
+
+    Documents orjson rejects but the stdlib accepts (lone surrogates, NaN,
+    integers wider than 64 bits) are retried with `json`, so the result never
+    depends on which parser is installed. Raises `json.JSONDecodeError`.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dumps(value: Any) -> str:
+    """Encode ``value`` as compact JSON text, using orjson when available.
+
+    Values orjson cannot encode (non-string keys, integers wider than 64
+    bits) fall back to `json` with the same separators and raw UTF-8.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode()
+        except TypeError:
+            pass
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _string(value: Any) -> Any:
+    # Numbers are sent unquoted by some clients. Arrays and objects are kept as
+    # sent for tools whose string property carries JSON (see `get_snippets`).
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def _integer(value: Any) -> int:
+    if isinstance(value, bool):
+        raise TypeError(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return int(value.strip())
+    raise TypeError(value)
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool):
+        raise TypeError(value)
+    if isinstance(value, (int, float, str)):
+        return float(value)
+    raise TypeError(value)
+
+
+def _boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ValueError(value)
+
+
+_COERCERS: dict[str, Callable[[Any], Any]] = {
+    "string": _string,
+    "integer": _integer,
+    "number": _number,
+    "boolean": _boolean,
+}
+
+
+_NONE_INVALID: frozenset[str] = frozenset()
+
+
+# Not frozen: a frozen dataclass's __init__ costs more than parsing a small
+# context, and handlers only read these.
+@dataclass(slots=True)
+class ToolArguments:
+    """A tool's coerced arguments. Absent and empty values read as None."""
+
+    values: Mapping[str, Any]
+    invalid: frozenset[str] = _NONE_INVALID
+
+    def get(self, name: str) -> Any:
+        """The coerced value of ``name``, or None."""
+        return self.values.get(name)
+
+    def string(self, name: str) -> str | None:
+        """``name`` as text; arrays, objects and booleans read as None."""
+        value = self.values.get(name)
+        return value if isinstance(value, str) else None
+
+    def integer(self, name: str) -> int | None:
+        """``name`` as an int. Raises `InvalidArgument` if it wasn't one."""
+        if name in self.invalid:
+            raise InvalidArgument(name)
+        value = self.values.get(name)
+        return value if isinstance(value, int) else None
+
+    def boolean(self, name: str) -> bool | None:
+        """``name`` as a bool. Raises `InvalidArgument` if it wasn't one."""
+        if name in self.invalid:
+            raise InvalidArgument(name)
+        value = self.values.get(name)
+        return value if isinstance(value, bool) else None
+
+
+@dataclass(frozen=True)
+class ToolSchema:
+    """A compiled `ToolProperty` list; build with `compile_schema`."""
+
+    coercers: Mapping[str, Callable[[Any], Any]]
+    arguments_required: bool = True
+
+    def parse(self, context: Any) -> ToolArguments:
+        """Decode ``context`` and coerce its declared arguments.
+
+        Undeclared arguments are dropped. Raises `ArgumentsError` when the
+        context is not a JSON object (`INVALID_PAYLOAD`) or, for schemas with
+        ``arguments_required``, has no ``arguments`` object
+        (`INVALID_ARGUMENTS`).
+        """
+        if isinstance(context, (str, bytes)):
+            try:
+                payload = loads(context)
+            except json.JSONDecodeError:
+                logging.exception("Failed to decode context as JSON")
+                raise ArgumentsError(INVALID_PAYLOAD) from None
+        else:
+            payload = context
+        if not isinstance(payload, dict):
+            raise ArgumentsError(INVALID_PAYLOAD)
+
+        arguments = payload.get("arguments")
+        if not isinstance(arguments, dict):
+            if self.arguments_required:
+                raise ArgumentsError(INVALID_ARGUMENTS)
+            arguments = {}
+
+        values: dict[str, Any] = {}
+        invalid: list[str] = []
+        for name, coerce in self.coercers.items():
+            value = arguments.get(name)
+            if value is None or value == "":
+                continue
+            try:
+                values[name] = coerce(value)
+            except (TypeError, ValueError):
+                invalid.append(name)
+        return ToolArguments(values, frozenset(invalid) if invalid else _NONE_INVALID)
+
+
+def compile_schema(
+    properties: Iterable[_Property], *, arguments_required: bool = True
+) -> ToolSchema:
+    """Compile a tool's `ToolProperty` list; raises ValueError on unknown types."""
+    coercers: dict[str, Callable[[Any], Any]] = {}
+    for prop in properties:
+        coerce = _COERCERS.get(prop.propertyType)
+        if coerce is None:
+            raise ValueError(
+                f"Unsupported property type {prop.propertyType!r} "
+                f"for {prop.propertyName!r}"
+            )
+        coercers[prop.propertyName] = coerce
+    return ToolSchema(coercers, arguments_required)
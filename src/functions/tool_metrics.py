@@ -0,0 +1,563 @@
+"""Per-tool latency, payload-size and dependency-call metrics.
+
+`instrument` wraps an MCP tool handler, directly under its
+``app.generic_trigger`` (and output binding) decorators. Each invocation
+yields a `ToolSample` with:
+
+- its latency and argument/response sizes in UTF-8 bytes;
+- an outcome classified from the reply (see `classify`);
+- how many dependency calls it made, and how long they took.
+
+Outbound calls are timed with `dependency`. Each one yields a
+`DependencySample` attributed to the invoking tool, even when it runs on
+a worker thread that was started with the invocation's context (see
+`run_in_context`). The calls timed are AbuseIPDB HTTP requests and
+blob backend operations.
+
+Recording is a deque append; nothing touches the exporter on the tool's
+path. A background thread exports the buffered samples in batches. It runs
+every ``TOOL_METRICS_EXPORT_INTERVAL`` seconds, or sooner once
+``TOOL_METRICS_BATCH_SIZE`` samples are waiting. If the exporter falls
+behind, the oldest samples beyond ``TOOL_METRICS_MAX_PENDING`` are
+dropped, so memory stays bounded.
+
+Modules can also publish a current value, such as a circuit breaker's
+state, with `gauge`. Gauges are read when the exporter collects them.
+
+``TOOL_METRICS_EXPORTER`` picks the exporter:
+
+* ``otel`` (the default when ``APPLICATIONINSIGHTS_CONNECTION_STRING`` is
+  set) records OpenTelemetry histograms on the global meter provider (see
+  `OTelExporter`);
+* ``memory`` keeps every sample in a `MemoryExporter`, for tests and
+  benchmarks;
+* ``none`` (the default otherwise) records nothing.
+"""
+
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Protocol, TypeVar, cast
+
+F = TypeVar("F", bound=Callable[..., Any])
+T = TypeVar("T")
+
+OK = "ok"
+INVALID_REQUEST = "invalid_request"
+NOT_FOUND = "not_found"
+DEPENDENCY_ERROR = "dependency_error"
+TIMEOUT = "timeout"
+EXCEPTION = "exception"
+
+# Reply prefixes the handlers use instead of raising (checked in order).
+_OUTCOME_PREFIXES = (
+    ("Error", DEPENDENCY_ERROR),
+    ("Invalid", INVALID_REQUEST),
+    ("No ", INVALID_REQUEST),
+    ("Too many", INVALID_REQUEST),
+    ("Deadline", TIMEOUT),
+)
+
+# Histogram bucket boundaries for the OpenTelemetry exporter.
+LATENCY_BUCKETS_S = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)  # fmt: skip
+SIZE_BUCKETS_BYTES = (
+    64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304
+)  # fmt: skip
+
+
+@dataclass(slots=True)
+class ToolSample:
+    tool: str
+    seconds: float
+    request_bytes: int
+    response_bytes: int
+    outcome: str
+    dependency_calls: int = 0
+    dependency_seconds: float = 0.0
+
+
+@dataclass(slots=True)
+class DependencySample:
+    dependency: str  # "abuseipdb", "blob", "local"
+    operation: str  # e.g. "GET check", "get", "put"
+    seconds: float
+    result: str  # "ok", the HTTP status, or the exception's class name
+    success: bool
+    tool: str | None = None
+
+
+Sample = ToolSample | DependencySample
+
+
+class Exporter(Protocol):
+    def export(self, samples: Sequence[Sample]) -> None: ...
+
+
+class MemoryExporter:
+    """Keeps every exported sample, for tests and benchmarks."""
+
+    def __init__(self) -> None:
+        self.samples: list[Sample] = []
+        self._lock = threading.Lock()
+
+    def export(self, samples: Sequence[Sample]) -> None:
+        with self._lock:
+            self.samples.extend(samples)
+
+    def tools(self, tool: str | None = None) -> list[ToolSample]:
+        with self._lock:
+            return [
+                s
+                for s in self.samples
+                if isinstance(s, ToolSample) and tool in (None, s.tool)
+            ]
+
+    def dependencies(
+        self, dependency: str | None = None, tool: str | None = None
+    ) -> list[DependencySample]:
+        with self._lock:
+            return [
+                s
+                for s in self.samples
+                if isinstance(s, DependencySample)
+                and dependency in (None, s.dependency)
+                and tool in (None, s.tool)
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.samples.clear()
+
+
+class OTelExporter:
+    """Records samples as OpenTelemetry histograms.
+
+    Histograms are created on the global meter provider: whichever the
+    worker or app has configured, such as the Azure Monitor distro, which
+    ships them to Application Insights. Set ``TOOL_METRICS_AZURE_MONITOR=true``
+    to have the distro configured here instead. OpenTelemetry is imported
+    on the first export, on the export thread, so it never adds to cold
+    starts. If it is not installed, one warning is logged and samples are
+    dropped.
+    """
+
+    def __init__(self, meter_name: str = "mcp.tools") -> None:
+        self.meter_name = meter_name
+        self._instruments: dict[str, Any] | None = None
+        self._meter: Any = None
+        self._gauges: set[str] = set()
+        self._disabled = False
+
+    def _create(self) -> dict[str, Any] | None:
+        try:
+            from opentelemetry import metrics
+
+            if os.getenv("TOOL_METRICS_AZURE_MONITOR", "").lower() == "true":
+                from azure.monitor.opentelemetry import configure_azure_monitor
+
+                configure_azure_monitor()
+        except ImportError:
+            logging.warning(
+                "TOOL_METRICS_EXPORTER=otel needs the opentelemetry packages; "
+                "tool metrics are disabled"
+            )
+            self._disabled = True
+            return None
+
+        meter = metrics.get_meter(self.meter_name)
+        self._meter = meter
+
+        def histogram(name: str, unit: str, buckets: Sequence[float]) -> Any:
+            return meter.create_histogram(
+                name, unit=unit, explicit_bucket_boundaries_advisory=buckets
+            )
+
+        return {
+            "duration": histogram("mcp.tool.duration", "s", LATENCY_BUCKETS_S),
+            "request": histogram("mcp.tool.request.size", "By", SIZE_BUCKETS_BYTES),
+            "response": histogram("mcp.tool.response.size", "By", SIZE_BUCKETS_BYTES),
+            "dependency": histogram("mcp.dependency.duration", "s", LATENCY_BUCKETS_S),
+        }
+
+    def export(self, samples: Sequence[Sample]) -> None:
+        if self._disabled:
+            return
+        if self._instruments is None:
+            self._instruments = self._create()
+            if self._instruments is None:
+                return
+        self._observe_gauges()
+        instruments = self._instruments
+        for sample in samples:
+            if isinstance(sample, ToolSample):
+                attributes = {"tool": sample.tool, "outcome": sample.outcome}
+                instruments["duration"].record(sample.seconds, attributes)
+                instruments["request"].record(sample.request_bytes, attributes)
+                instruments["response"].record(sample.response_bytes, attributes)
+            else:
+                instruments["dependency"].record(
+                    sample.seconds,
+                    {
+                        "dependency": sample.dependency,
+                        "operation": sample.operation,
+                        "result": sample.result,
+                        "success": sample.success,
+                        "tool": sample.tool or "",
+                    },
+                )
+
+    def _observe_gauges(self) -> None:
+        # Gauges registered since the last export become observable gauges.
+        from opentelemetry.metrics import Observation
+
+        for name, (unit, read) in gauges().items():
+            if name in self._gauges:
+                continue
+
+            def observe(options: Any, read: Callable[[], float] = read) -> Any:
+                return [Observation(read())]
+
+            self._meter.create_observable_gauge(name, callbacks=[observe], unit=unit)
+            self._gauges.add(name)
+
+
+class Recorder:
+    """Buffers samples and exports them in batches from a background thread."""
+
+    def __init__(
+        self,
+        exporter: Exporter,
+        interval: float = 15.0,
+        batch_size: int = 1000,
+        max_pending: int = 100_000,
+    ) -> None:
+        self.exporter = exporter
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending: deque[Sample] = deque(maxlen=max_pending)
+        self.recorded = 0
+        self.dropped = 0
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._export_lock = threading.Lock()
+
+    def record(self, sample: Sample) -> None:
+        pending = self._pending
+        if len(pending) == pending.maxlen:
+            self.dropped += 1
+        pending.append(sample)
+        self.recorded += 1
+        if self._thread is None:
+            self._start()
+        if len(pending) == self.batch_size:
+            self._wake.set()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(
+                    target=self._run, name="tool-metrics", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Export everything buffered so far."""
+        with self._export_lock:
+            pending = self._pending
+            while pending:
+                batch: list[Sample] = []
+                while pending and len(batch) < self.batch_size:
+                    batch.append(pending.popleft())
+                try:
+                    self.exporter.export(batch)
+                except Exception:
+                    logging.warning(
+                        "Exporting %d tool metric samples failed",
+                        len(batch),
+                        exc_info=True,
+                    )
+
+    def shutdown(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+class _Invocation:
+    __slots__ = ("calls", "lock", "seconds", "tool")
+
+    def __init__(self, tool: str) -> None:
+        self.tool = tool
+        self.calls = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+
+_current: contextvars.ContextVar[_Invocation | None] = contextvars.ContextVar(
+    "tool_metrics_invocation", default=None
+)
+
+
+class DependencyCall:
+    """Handed out by `dependency`; set the call's outcome on it."""
+
+    __slots__ = ("result", "success")
+
+    def __init__(self) -> None:
+        self.result = OK
+        self.success = True
+
+    def status(self, code: int) -> None:
+        """Record an HTTP status; 4xx and 5xx count as failures."""
+        self.result = str(code)
+        self.success = code < 400
+
+
+@contextmanager
+def dependency(name: str, operation: str) -> Iterator[DependencyCall]:
+    """Time an outbound call made inside the ``with`` block.
+
+    An exception marks the call failed, with its class name as the result.
+    """
+    recorder = get_recorder()
+    call = DependencyCall()
+    if recorder is None:
+        yield call
+        return
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException as exc:
+        call.result, call.success = type(exc).__name__, False
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        invocation = _current.get()
+        if invocation is not None:
+            with invocation.lock:
+                invocation.calls += 1
+                invocation.seconds += seconds
+        recorder.record(
+            DependencySample(
+                name,
+                operation,
+                seconds,
+                call.result,
+                call.success,
+                invocation.tool if invocation is not None else None,
+            )
+        )
+
+
+def timed(name: str, operation: str) -> Callable[[F], F]:
+    """Decorator form of `dependency` for a whole (sync) function."""
+
+    def decorate(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with dependency(name, operation):
+                return function(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorate
+
+
+def run_in_context(function: Callable[..., T]) -> Callable[..., T]:
+    """Bind ``function`` to the caller's context, for use on a worker thread.
+
+    Pass the result to ``executor.submit`` / ``executor.map`` so dependency
+    calls made on the worker are attributed to the invoking tool. Each call
+    runs in its own copy of the context, so it is safe to call concurrently.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        return context.copy().run(function, *args, **kwargs)
+
+    return run
+
+
+def _size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value) if value.isascii() else len(value.encode())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if value is None:
+        return 0
+    return len(json.dumps(value, default=str))
+
+
+def classify(result: Any) -> str:
+    """Outcome of a handler reply, from the repo's error-message conventions."""
+    if not isinstance(result, str):
+        return OK
+    for prefix, outcome in _OUTCOME_PREFIXES:
+        if result.startswith(prefix):
+            return outcome
+    if result.endswith("' not found"):
+        return NOT_FOUND
+    return OK
+
+
+def instrument(function: F) -> F:
+    """Record a `ToolSample` for every call of the MCP tool ``function``.
+
+    Apply it directly to the handler, under the ``app`` decorators. The
+    wrapper keeps the handler's name and signature, which is what the
+    Functions worker binds by. The tool is named after the function.
+    """
+    tool = function.__name__
+
+    def finish(
+        invocation: _Invocation, start: float, context: Any, result: Any, outcome: str
+    ) -> None:
+        recorder = get_recorder()
+        if recorder is not None:
+            recorder.record(
+                ToolSample(
+                    tool,
+                    time.perf_counter() - start,
+                    _size(context),
+                    _size(result),
+                    outcome,
+                    invocation.calls,
+                    invocation.seconds,
+                )
+            )
+
+    if inspect.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def async_wrapper(context: Any, *args: Any, **kwargs: Any) -> Any:
+            if get_recorder() is None:
+                return await function(context, *args, **kwargs)
+            invocation = _Invocation(tool)
+            token = _current.set(invocation)
+            start = time.perf_counter()
+            try:
+                result = await function(context, *args, **kwargs)
+            except BaseException:
+                finish(invocation, start, context, None, EXCEPTION)
+                raise
+            finally:
+                _current.reset(token)
+            finish(invocation, start, context, result, classify(result))
+            return result
+
+        return cast(F, async_wrapper)
+
+    @functools.wraps(function)
+    def wrapper(context: Any, *args: Any, **kwargs: Any) -> Any:
+        if get_recorder() is None:
+            return function(context, *args, **kwargs)
+        invocation = _Invocation(tool)
+        token = _current.set(invocation)
+        start = time.perf_counter()
+        try:
+            result = function(context, *args, **kwargs)
+        except BaseException:
+            finish(invocation, start, context, None, EXCEPTION)
+            raise
+        finally:
+            _current.reset(token)
+        finish(invocation, start, context, result, classify(result))
+        return result
+
+    return cast(F, wrapper)
+
+
+_gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+
+
+def gauge(name: str, read: Callable[[], float], unit: str = "1") -> None:
+    """Publish ``read()`` as the gauge ``name``, e.g. a breaker's state."""
+    _gauges[name] = (unit, read)
+
+
+def gauges() -> dict[str, tuple[str, Callable[[], float]]]:
+    """The registered gauges by name, as ``(unit, read)`` pairs."""
+    return dict(_gauges)
+
+
+def from_env() -> Recorder | None:
+    default = "otel" if os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING") else "none"
+    kind = (os.getenv("TOOL_METRICS_EXPORTER") or default).lower()
+    exporter: Exporter
+    if kind == "otel":
+        exporter = OTelExporter()
+    elif kind == "memory":
+        exporter = MemoryExporter()
+    else:
+        return None
+    return Recorder(
+        exporter,
+        interval=float(os.getenv("TOOL_METRICS_EXPORT_INTERVAL") or 15),
+        batch_size=int(os.getenv("TOOL_METRICS_BATCH_SIZE") or 1000),
+        max_pending=int(os.getenv("TOOL_METRICS_MAX_PENDING") or 100_000),
+    )
+
+
+_lock = threading.Lock()
+_recorder: Recorder | None = None
+_configured = False
+
+
+def get_recorder() -> Recorder | None:
+    """Return the process-wide recorder, or None when metrics are off."""
+    global _recorder, _configured
+    if not _configured:
+        with _lock:
+            if not _configured:
+                _recorder = from_env()
+                _configured = True
+    return _recorder
+
+
+def configure(exporter: Exporter | None = None, **settings: Any) -> Recorder | None:
+    """Replace the shared recorder (tests and benchmarks).
+
+    With an ``exporter``, samples go to it, using `Recorder` ``settings``.
+    With no arguments, the next call re-reads the environment. Either way,
+    whatever the old recorder buffered is exported first.
+    """
+    global _recorder, _configured
+    with _lock:
+        old = _recorder
+        _recorder = Recorder(exporter, **settings) if exporter is not None else None
+        _configured = exporter is not None
+    if old is not None:
+        old.shutdown()
+    return _recorder
+
+
+def flush() -> None:
+    """Export everything recorded so far (tests, benchmarks and shutdown)."""
+    recorder = _recorder
+    if recorder is not None:
+        recorder.flush()
+
+
+atexit.register(flush)
@@ -0,0 +1,29 @@
+import os
+import sys
+from collections.abc import Iterator
+from typing import Any, cast
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import blob_backend, snippet_cache, storage
+
+
+@pytest.fixture
+def blob_service() -> Iterator[FakeBlobService]:
+    """An in-memory blob service behind `storage`, with an empty snippet cache.
+
+    Modules that need a different setup override this fixture and request it.
+    """
+    fake = FakeBlobService()
+    storage.configure(cast(Any, fake))
+    blob_backend.configure()
+    snippet_cache.configure()
+    yield fake
+    storage.configure()
+    blob_backend.configure()
+    snippet_cache.configure()
@@ -0,0 +1,238 @@
+"""In-memory stand-in for the parts of `BlobServiceClient` the snippet tools use.
+
+Install it with ``storage.configure(cast(Any, FakeBlobService()))``. It honours
+overwrite/conditional semantics, ranged downloads and metadata closely enough
+for the snippet store's behaviour to be tested without Azurite.
+"""
+
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any
+
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    HttpResponseError,
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+    ResourceNotModifiedError,
+)
+
+
+@dataclass
+class FakeBlob:
+    data: bytes
+    metadata: dict[str, str]
+    etag: str
+    last_modified: datetime
+
+
+@dataclass
+class FakeBlobService:
+    chunk_size: int = 4 * 1024 * 1024
+    now: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    containers: dict[str, dict[str, FakeBlob]] = field(default_factory=dict)
+    calls: list[tuple[str, str]] = field(default_factory=list)
+    _versions: int = 0
+    # Makes each conditional write atomic, as it is in the real service.
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def get_blob_client(self, container: str, blob: str) -> "FakeBlobClient":
+        return FakeBlobClient(self, container, blob)
+
+    def get_container_client(self, container: str) -> "FakeContainerClient":
+        return FakeContainerClient(self, container)
+
+    def create_container(self, container: str) -> None:
+        with self.lock:
+            if container in self.containers:
+                raise ResourceExistsError("ContainerAlreadyExists")
+            self.containers[container] = {}
+
+    def advance(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+
+    def blob(self, path: str) -> FakeBlob:
+        """Return the blob at ``container/name`` (test helper)."""
+        container, name = path.split("/", 1)
+        return self.containers[container][name]
+
+    def put(
+        self, path: str, data: bytes, metadata: dict[str, str] | None = None
+    ) -> None:
+        """Seed a blob at ``container/name`` (test helper)."""
+        container, name = path.split("/", 1)
+        self.containers.setdefault(container, {})
+        self.get_blob_client(container, name).upload_blob(
+            data, overwrite=True, metadata=metadata
+        )
+
+    def _next_etag(self) -> str:
+        self._versions += 1
+        return f'"0x{self._versions:x}"'
+
+
+class FakeBlobClient:
+    def __init__(self, service: FakeBlobService, container: str, name: str) -> None:
+        self._service = service
+        self.container_name = container
+        self.blob_name = name
+
+    def _blobs(self) -> dict[str, FakeBlob]:
+        blobs = self._service.containers.get(self.container_name)
+        if blobs is None:
+            raise ResourceNotFoundError("ContainerNotFound")
+        return blobs
+
+    def _get(self) -> FakeBlob:
+        blob = self._blobs().get(self.blob_name)
+        if blob is None:
+            raise ResourceNotFoundError("BlobNotFound")
+        return blob
+
+    def _log(self, op: str) -> None:
+        self._service.calls.append((op, f"{self.container_name}/{self.blob_name}"))
+
+    def upload_blob(
+        self,
+        data: bytes,
+        overwrite: bool = False,
+        metadata: dict[str, str] | None = None,
+        etag: str | None = None,
+        match_condition: Any = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        self._log("upload")
+        with self._service.lock:
+            return self._upload(data, overwrite, metadata, etag, match_condition)
+
+    def _upload(
+        self,
+        data: bytes,
+        overwrite: bool,
+        metadata: dict[str, str] | None,
+        etag: str | None,
+        match_condition: Any,
+    ) -> dict[str, Any]:
+        blobs = self._blobs()
+        if not overwrite and self.blob_name in blobs:
+            raise ResourceExistsError("BlobAlreadyExists")
+        if match_condition == MatchConditions.IfNotModified:
+            current = blobs.get(self.blob_name)
+            if current is None:
+                raise ResourceNotFoundError("BlobNotFound")
+            if current.etag != etag:
+                raise ResourceModifiedError("ConditionNotMet")
+        blob = FakeBlob(
+            bytes(data),
+            dict(metadata or {}),
+            self._service._next_etag(),
+            self._service.now,
+        )
+        blobs[self.blob_name] = blob
+        return {"etag": blob.etag, "last_modified": blob.last_modified}
+
+    def get_blob_properties(self) -> SimpleNamespace:
+        self._log("head")
+        blob = self._get()
+        return SimpleNamespace(
+            name=self.blob_name,
+            size=len(blob.data),
+            etag=blob.etag,
+            last_modified=blob.last_modified,
+            metadata=dict(blob.metadata),
+        )
+
+    def set_blob_metadata(
+        self, metadata: dict[str, str] | None = None
+    ) -> dict[str, Any]:
+        self._log("set_metadata")
+        blob = self._get()
+        blob.metadata = dict(metadata or {})
+        blob.etag = self._service._next_etag()
+        blob.last_modified = self._service.now
+        return {"etag": blob.etag, "last_modified": blob.last_modified}
+
+    def exists(self) -> bool:
+        return self.blob_name in self._service.containers.get(self.container_name, {})
+
+    def delete_blob(self, etag: str | None = None, match_condition: Any = None) -> None:
+        self._log("delete")
+        blob = self._get()
+        if match_condition == MatchConditions.IfNotModified and etag != blob.etag:
+            raise ResourceModifiedError("ConditionNotMet")
+        del self._blobs()[self.blob_name]
+
+    def download_blob(
+        self,
+        offset: int | None = None,
+        length: int | None = None,
+        etag: str | None = None,
+        match_condition: Any = None,
+        **kwargs: Any,
+    ) -> SimpleNamespace:
+        self._log("download")
+        blob = self._get()
+        if match_condition == MatchConditions.IfModified and etag == blob.etag:
+            raise ResourceNotModifiedError("ConditionNotMet")
+        start = offset or 0
+        if start and start >= len(blob.data):
+            error = HttpResponseError("InvalidRange")
+            error.status_code = 416
+            raise error
+        end = len(blob.data) if length is None else min(len(blob.data), start + length)
+        body = blob.data[start:end]
+        step = self._service.chunk_size
+
+        def chunks() -> Iterator[bytes]:
+            for i in range(0, len(body), step):
+                yield body[i : i + step]
+
+        return SimpleNamespace(
+            chunks=chunks,
+            readall=lambda: body,
+            properties=SimpleNamespace(
+                name=self.blob_name,
+                size=len(body),
+                etag=blob.etag,
+                last_modified=blob.last_modified,
+                metadata=dict(blob.metadata),
+                content_range=f"bytes {start}-{max(start, end - 1)}/{len(blob.data)}",
+            ),
+        )
+
+
+class FakeContainerClient:
+    def __init__(self, service: FakeBlobService, container: str) -> None:
+        self._service = service
+        self.container_name = container
+
+    def get_blob_client(self, blob: str) -> FakeBlobClient:
+        return FakeBlobClient(self._service, self.container_name, blob)
+
+    def list_blobs(
+        self, name_starts_with: str | None = None, include: Any = None
+    ) -> Iterator[SimpleNamespace]:
+        self._service.calls.append(("list", self.container_name))
+        blobs = self._service.containers.get(self.container_name, {})
+        for name in sorted(blobs):
+            if name_starts_with and not name.startswith(name_starts_with):
+                continue
+            blob = blobs[name]
+            yield SimpleNamespace(
+                name=name,
+                size=len(blob.data),
+                etag=blob.etag,
+                last_modified=blob.last_modified,
+                metadata=dict(blob.metadata) if include else None,
+            )
+
+    def delete_blob(
+        self, blob: str, etag: str | None = None, match_condition: Any = None
+    ) -> None:
+        self.get_blob_client(blob).delete_blob(
+            etag=etag, match_condition=match_condition
+        )
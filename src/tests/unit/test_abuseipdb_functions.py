@@ -1,46 +1,315 @@
+import asyncio
 import json
 import os
 import sys
+import threading
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any, TypeVar, cast
 from unittest.mock import Mock
 
 import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from requests.adapters import HTTPAdapter
 
 # Ensure the `src` package directory is importable when tests run from `src/`
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
+from functions import (
+    abuseipdb_client,
+    block_cache,
+    ip_policy,
+    rate_limiter,
+    reputation_cache,
+    resilience,
+    single_flight,
+)
 from functions.abuseipdb import (
+    abuseipdb_check_block,
     abuseipdb_check_ip,
+    abuseipdb_check_ips,
     abuseipdb_report_ip,
     check_ip,
+    check_ip_async,
+    check_ips,
     report_ip,
 )
 
+T = TypeVar("T")
+
+
+class FakeOut:
+    def __init__(self) -> None:
+        self.value: str | None = None
+
+    def set(self, val: str) -> None:
+        self.value = val
+
 
 @pytest.fixture(autouse=True)
 def set_api_key(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setenv("ABUSEIPDB_API_KEY", "test-key")
 
 
-def test_check_ip_wrapper_success(monkeypatch: pytest.MonkeyPatch) -> None:
+@pytest.fixture(autouse=True)
+def fresh_cache() -> Iterator[None]:
+    reputation_cache.configure()
+    block_cache.configure()
+    ip_policy.configure()
+    rate_limiter.configure()
+    resilience.configure()
+    single_flight.configure()
+    yield
+    reputation_cache.configure()
+    block_cache.configure()
+    ip_policy.configure()
+    rate_limiter.configure()
+    resilience.configure()
+    single_flight.configure()
+
+
+def fake_response(
+    body: object = None,
+    status_code: int = 200,
+    text: str = "",
+    headers: dict[str, str] | None = None,
+) -> Mock:
+    """A `requests.Response` stand-in for the mocked shared session."""
+    return Mock(
+        ok=status_code < 400,
+        status_code=status_code,
+        text=text,
+        headers=headers or {},
+        json=Mock(return_value=body),
+    )
+
+
+@pytest.fixture
+def session() -> Iterator[Mock]:
+    fake = Mock()
+    abuseipdb_client.configure(abuseipdb_client.ClientSettings(), fake)
+    yield fake
+    abuseipdb_client.configure()
+
+
+@pytest.fixture(autouse=True)
+def reset_client() -> Iterator[None]:
+    yield
+    abuseipdb_client.configure()
+
+
+class FakeApi:
+    """Local aiohttp server standing in for AbuseIPDB in async tests."""
+
+    def __init__(self, body: object, status: int = 200) -> None:
+        self.body = body
+        self.status = status
+        self.requests: list[dict[str, Any]] = []
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests.append(
+            {
+                "method": request.method,
+                "endpoint": request.match_info["endpoint"],
+                "query": dict(request.query),
+                "form": dict(await request.post()),
+                "key": request.headers.get("Key"),
+            }
+        )
+        return web.json_response(self.body, status=self.status)
+
+    def run(self, coro: Callable[[], Awaitable[T]]) -> T:
+        async def main() -> T:
+            app = web.Application()
+            app.router.add_route("*", "/api/v2/{endpoint}", self._handle)
+            async with TestServer(app) as server:
+                base_url = str(server.make_url("/api/v2"))
+                abuseipdb_client.configure(
+                    abuseipdb_client.ClientSettings(base_url=base_url, max_retries=0)
+                )
+                try:
+                    return await coro()
+                finally:
+                    await abuseipdb_client.aclose()
+
+        return asyncio.run(main())
+
+
+def test_check_ip_wrapper_success() -> None:
     response = {"data": {"ipAddress": "1.2.3.4", "abuseConfidenceScore": 5}}
-    fake = Mock(ok=True, json=Mock(return_value=response))
-    monkeypatch.setattr("functions.abuseipdb.requests.get", Mock(return_value=fake))
+    api = FakeApi(response)
 
     ctx = json.dumps({"arguments": {"ip": "1.2.3.4"}})
-    result = abuseipdb_check_ip(ctx)
+    result = api.run(lambda: abuseipdb_check_ip(ctx))
     assert json.loads(result) == response
+    request = api.requests[0]
+    assert request["query"]["ipAddress"] == "1.2.3.4"
+    assert request["key"] == "test-key"
+
+
+def test_check_ip_wrapper_upstream_error() -> None:
+    api = FakeApi({"errors": []}, status=429)
+    ctx = json.dumps({"arguments": {"ip": "1.2.3.4"}})
+    result = api.run(lambda: abuseipdb_check_ip(ctx))
+    assert result.startswith("Error checking IP: AbuseIPDB check failed: 429")
 
 
 def test_check_ip_wrapper_missing_ip() -> None:
     ctx = json.dumps({"arguments": {}})
-    result = abuseipdb_check_ip(ctx)
+    result = asyncio.run(abuseipdb_check_ip(ctx))
     assert result == "No ip provided"
 
 
-def test_report_ip_wrapper_success(monkeypatch: pytest.MonkeyPatch) -> None:
+FULL_CHECK = {
+    "data": {
+        "ipAddress": "1.2.3.4",
+        "isPublic": True,
+        "abuseConfidenceScore": 5,
+        "countryCode": "US",
+        "usageType": "Data Center/Web Hosting/Transit",
+        "isp": "Example Hosting LLC",
+        "hostnames": [],
+        "totalReports": 2,
+        "lastReportedAt": "2026-10-01T12:00:00+00:00",
+        "reports": [{"reportedAt": "2026-10-01T12:00:00+00:00", "categories": [18]}],
+    }
+}
+
+
+def test_check_ip_compact_profile_returns_only_the_selected_fields() -> None:
+    api = FakeApi(FULL_CHECK)
+    ctx = json.dumps({"arguments": {"ip": "1.2.3.4", "profile": "compact"}})
+    result = api.run(lambda: abuseipdb_check_ip(ctx))
+
+    assert json.loads(result) == {
+        "data": {
+            "ipAddress": "1.2.3.4",
+            "abuseConfidenceScore": 5,
+            "countryCode": "US",
+            "isp": "Example Hosting LLC",
+            "lastReportedAt": "2026-10-01T12:00:00+00:00",
+        }
+    }
+    assert len(result) < len(json.dumps(FULL_CHECK)) / 2
+    assert "verbose" not in api.requests[0]["query"]
+
+
+def test_check_ip_passes_max_age_and_verbose_upstream() -> None:
+    api = FakeApi(FULL_CHECK)
+
+    async def run() -> list[str]:
+        return [
+            await abuseipdb_check_ip(json.dumps({"arguments": arguments}))
+            for arguments in (
+                {"ip": "1.2.3.4", "fields": "reports, totalReports", "maxAgeInDays": 7},
+                {"ip": "1.2.3.4", "verbose": True, "maxAgeInDays": "7"},
+                {"ip": "1.2.3.4", "maxAgeInDays": 7},
+            )
+        ]
+
+    projected, verbose, plain = api.run(run)
+    assert json.loads(projected) == {
+        "data": {"reports": FULL_CHECK["data"]["reports"], "totalReports": 2}
+    }
+    # fields=reports implies verbose, so the second call is a cache hit.
+    assert json.loads(verbose) == FULL_CHECK
+    assert [r["query"] for r in api.requests] == [
+        {"ipAddress": "1.2.3.4", "maxAgeInDays": "7", "verbose": ""},
+        {"ipAddress": "1.2.3.4", "maxAgeInDays": "7"},
+    ]
+    assert json.loads(plain) == FULL_CHECK
+
+
+@pytest.mark.parametrize(
+    ("arguments", "reply"),
+    [
+        ({"profile": "tiny"}, "Invalid profile 'tiny'"),
+        ({"fields": "isp,score"}, "Invalid fields: score"),
+        ({"maxAgeInDays": 366}, "Invalid maxAgeInDays"),
+        ({"verbose": "maybe"}, "Invalid verbose"),
+    ],
+)
+def test_check_ip_rejects_bad_options(arguments: dict[str, Any], reply: str) -> None:
+    ctx = json.dumps({"arguments": {"ip": "1.2.3.4", **arguments}})
+    assert asyncio.run(abuseipdb_check_ip(ctx)).startswith(reply)
+
+
+BLOCK = {
+    "data": {
+        "networkAddress": "185.220.101.0",
+        "netmask": "255.255.255.0",
+        "reportedAddress": [
+            {
+                "ipAddress": "185.220.101.9",
+                "numReports": 4,
+                "mostRecentReport": "2026-10-01T12:00:00+00:00",
+                "abuseConfidenceScore": 80,
+                "countryCode": "NL",
+            }
+        ],
+    }
+}
+
+
+def test_check_block_answers_later_lookups_inside_the_block() -> None:
+    api = FakeApi(BLOCK)
+
+    async def run() -> list[str]:
+        return [
+            await abuseipdb_check_block(
+                json.dumps({"arguments": {"network": "185.220.101.77"}})
+            ),
+            await abuseipdb_check_ip(
+                json.dumps({"arguments": {"ip": "185.220.101.9"}})
+            ),
+            await abuseipdb_check_ip(
+                json.dumps(
+                    {"arguments": {"ip": "185.220.101.10", "profile": "compact"}}
+                )
+            ),
+            await abuseipdb_check_ip(
+                json.dumps({"arguments": {"ip": "185.220.101.9", "maxAgeInDays": 30}})
+            ),
+        ]
+
+    block, reported, clean, other_window = api.run(run)
+    assert json.loads(block) == BLOCK
+    assert api.requests[0]["endpoint"] == "check-block"
+    assert api.requests[0]["query"] == {
+        "network": "185.220.101.0/24",
+        "maxAgeInDays": "90",
+    }
+    assert json.loads(reported)["data"] == {
+        "ipAddress": "185.220.101.9",
+        "ipVersion": 4,
+        "abuseConfidenceScore": 80,
+        "countryCode": "NL",
+        "totalReports": 4,
+        "lastReportedAt": "2026-10-01T12:00:00+00:00",
+    }
+    assert json.loads(reported)["meta"]["source"] == "check-block"
+    assert json.loads(clean)["data"] == {
+        "ipAddress": "185.220.101.10",
+        "abuseConfidenceScore": 0,
+        "lastReportedAt": None,
+    }
+    # A different report window is not covered by the cached block.
+    assert json.loads(other_window) == BLOCK
+    assert [r["endpoint"] for r in api.requests] == ["check-block", "check"]
+
+
+@pytest.mark.parametrize(
+    ("network", "reply"),
+    [("", "No network provided"), ("192.0.2.0/33", "Invalid network '192.0.2.0/33'")],
+)
+def test_check_block_rejects_bad_networks(network: str, reply: str) -> None:
+    ctx = json.dumps({"arguments": {"network": network}})
+    assert asyncio.run(abuseipdb_check_block(ctx)) == reply
+
+
+def test_report_ip_wrapper_success() -> None:
     response = {"data": {"ipAddress": "1.2.3.4", "reported": True}}
-    fake = Mock(ok=True, json=Mock(return_value=response))
-    monkeypatch.setattr("functions.abuseipdb.requests.post", Mock(return_value=fake))
+    api = FakeApi(response)
 
     ctx = json.dumps(
         {
@@ -51,13 +320,17 @@ def test_report_ip_wrapper_success(monkeypatch: pytest.MonkeyPatch) -> None:
             }
         }
     )
-    result = abuseipdb_report_ip(ctx)
+    queue = FakeOut()
+    result = api.run(lambda: abuseipdb_report_ip(ctx, queue))
     assert json.loads(result) == response
+    assert queue.value is None
+    assert api.requests[0]["method"] == "POST"
+    assert api.requests[0]["form"]["categories"] == "14,18"
 
 
 def test_report_ip_wrapper_missing_fields() -> None:
     ctx = json.dumps({"arguments": {"ip": "1.2.3.4", "categories": "14"}})
-    result = abuseipdb_report_ip(ctx)
+    result = asyncio.run(abuseipdb_report_ip(ctx, FakeOut()))
     assert result == "No comment provided"
 
 
@@ -67,8 +340,213 @@ def test_check_ip_missing_api_key(monkeypatch: pytest.MonkeyPatch) -> None:
         check_ip("1.2.3.4")
 
 
-def test_report_ip_failure(monkeypatch: pytest.MonkeyPatch) -> None:
-    fake = Mock(ok=False, status_code=500, text="boom")
-    monkeypatch.setattr("functions.abuseipdb.requests.post", Mock(return_value=fake))
+def test_report_ip_failure(session: Mock) -> None:
+    session.request.return_value = fake_response(status_code=500, text="boom")
     with pytest.raises(RuntimeError):
         report_ip("1.2.3.4", "14", "Bad actor")
+
+
+def test_check_ip_uses_shared_session_and_split_timeouts(session: Mock) -> None:
+    session.request.return_value = fake_response({})
+    check_ip("1.2.3.4")
+    check_ip("5.6.7.8")
+
+    assert session.request.call_count == 2
+    args, kwargs = session.request.call_args
+    assert args == ("GET", "https://api.abuseipdb.com/api/v2/check")
+    assert kwargs["timeout"] == (3.05, 10.0)
+    assert kwargs["headers"] == {"Key": "test-key"}
+
+
+def test_client_settings_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ABUSEIPDB_BASE_URL", "http://127.0.0.1:8080/api/v2/")
+    monkeypatch.setenv("ABUSEIPDB_POOL_MAXSIZE", "32")
+    monkeypatch.setenv("ABUSEIPDB_CONNECT_TIMEOUT", "1.5")
+    monkeypatch.setenv("ABUSEIPDB_READ_TIMEOUT", "4")
+    settings = abuseipdb_client.ClientSettings.from_env()
+    assert settings.base_url == "http://127.0.0.1:8080/api/v2"
+    assert settings.pool_maxsize == 32
+    assert settings.timeout == (1.5, 4.0)
+
+
+def test_build_session_retries_only_idempotent_methods() -> None:
+    settings = abuseipdb_client.ClientSettings(max_retries=3, pool_maxsize=8)
+    built = abuseipdb_client.build_session(settings)
+    adapter = built.get_adapter("https://api.abuseipdb.com")
+    assert isinstance(adapter, HTTPAdapter)
+    retry = adapter.max_retries
+    assert retry.total == 3
+    assert retry.is_retry("GET", 503)
+    assert not retry.is_retry("POST", 503)
+    assert adapter._pool_maxsize == 8  # type: ignore[attr-defined]
+
+
+def test_reserved_and_allowlisted_addresses_never_go_upstream(
+    session: Mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("ABUSEIPDB_ALLOWLIST", "185.220.101.0/24")
+
+    private = json.loads(
+        asyncio.run(abuseipdb_check_ip(json.dumps({"arguments": {"ip": "10.0.0.8"}})))
+    )
+    loopback = check_ip("::ffff:127.0.0.1")
+    allowed = check_ips(["185.220.101.4"])["185.220.101.4"]
+
+    assert private == {
+        "data": {
+            "ipAddress": "10.0.0.8",
+            "ipVersion": 4,
+            "abuseConfidenceScore": 0,
+            "isPublic": False,
+        },
+        "meta": {"source": "local", "reason": "private"},
+    }
+    assert loopback["meta"] == {"source": "local", "reason": "loopback"}
+    assert allowed["data"]["isWhitelisted"] is True
+    assert allowed["meta"] == {"source": "local", "reason": "allowlist"}
+    session.request.assert_not_called()
+
+
+def test_check_ip_rejects_invalid_addresses_before_any_lookup(session: Mock) -> None:
+    ctx = json.dumps({"arguments": {"ip": "10.0.0.300"}})
+    assert asyncio.run(abuseipdb_check_ip(ctx)) == "Invalid ip '10.0.0.300'"
+    with pytest.raises(ValueError):
+        check_ip("example.com")
+    session.request.assert_not_called()
+
+
+def test_check_ip_caches_by_canonical_ip_and_max_age(session: Mock) -> None:
+    session.request.return_value = fake_response({"data": {}})
+    check_ip("2606:4700:4700:0::1111")
+    check_ip("2606:4700:4700::1111")
+    assert session.request.call_count == 1
+    assert (
+        session.request.call_args.kwargs["params"]["ipAddress"]
+        == "2606:4700:4700::1111"
+    )
+
+    check_ip("2606:4700:4700::1111", max_age_in_days=30)
+    assert session.request.call_count == 2
+    assert reputation_cache.get_cache().stats()["hits"] == 1
+
+    # An IPv4-mapped address is the same host as its IPv4 form.
+    check_ip("8.8.8.8")
+    mapped = check_ip("::ffff:8.8.8.8")
+    assert session.request.call_count == 3
+    assert session.request.call_args.kwargs["params"]["ipAddress"] == "8.8.8.8"
+    assert mapped == check_ip("8.8.8.8")
+
+
+def test_check_ips_dedupes_and_reports_per_ip_errors(session: Mock) -> None:
+    def fake_get(method: str, url: str, **kwargs: object) -> Mock:
+        ip = cast(dict[str, str], kwargs["params"])["ipAddress"]
+        if ip == "5.6.7.8":
+            return fake_response(status_code=404, text="Not Found")
+        return fake_response({"data": {"ipAddress": ip}})
+
+    session.request.side_effect = fake_get
+    ctx = json.dumps({"arguments": {"ips": "1.2.3.4, 5.6.7.8 1.2.3.4 not-an-ip"}})
+    result = json.loads(abuseipdb_check_ips(ctx))
+
+    assert list(result) == ["1.2.3.4", "5.6.7.8", "not-an-ip"]
+    assert result["1.2.3.4"] == {"data": {"ipAddress": "1.2.3.4"}}
+    assert "404" in result["5.6.7.8"]["error"]
+    assert result["not-an-ip"] == {"error": "Invalid IP address"}
+    assert session.request.call_count == 2
+
+
+def test_check_ips_projects_results_and_keeps_errors(session: Mock) -> None:
+    session.request.return_value = fake_response(FULL_CHECK)
+    ctx = json.dumps(
+        {"arguments": {"ips": "1.2.3.4 bad", "profile": "minimal", "maxAgeInDays": 30}}
+    )
+    result = json.loads(abuseipdb_check_ips(ctx))
+
+    assert result == {
+        "1.2.3.4": {"data": {"ipAddress": "1.2.3.4", "abuseConfidenceScore": 5}},
+        "bad": {"error": "Invalid IP address"},
+    }
+    assert session.request.call_args.kwargs["params"]["maxAgeInDays"] == "30"
+
+
+def test_check_ips_marks_slow_lookups_past_deadline(session: Mock) -> None:
+    release = threading.Event()
+
+    def slow_get(method: str, url: str, **kwargs: object) -> Mock:
+        release.wait(5)
+        return fake_response({"data": {}})
+
+    session.request.side_effect = slow_get
+    try:
+        result = check_ips(["1.1.1.1", "8.8.8.8"], concurrency=1, deadline=0.05)
+    finally:
+        release.set()
+    assert result["1.1.1.1"] == {"error": "Deadline exceeded"}
+    assert result["8.8.8.8"] == {"error": "Deadline exceeded"}
+
+
+def test_check_ips_answers_local_batches_without_api_key(
+    session: Mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delenv("ABUSEIPDB_API_KEY", raising=False)
+    ctx = json.dumps({"arguments": {"ips": "10.0.0.1, 127.0.0.1"}})
+    result = json.loads(abuseipdb_check_ips(ctx))
+
+    assert result["10.0.0.1"]["meta"] == {"source": "local", "reason": "private"}
+    assert result["127.0.0.1"]["meta"] == {"source": "local", "reason": "loopback"}
+    session.request.assert_not_called()
+    with pytest.raises(RuntimeError):
+        check_ips(["10.0.0.1", "1.2.3.4"])
+
+
+def test_check_ips_wrapper_missing_ips() -> None:
+    ctx = json.dumps({"arguments": {"ips": " , "}})
+    assert abuseipdb_check_ips(ctx) == "No ips provided"
+
+
+def test_async_lookups_share_one_session_per_loop() -> None:
+    api = FakeApi({"data": {}})
+
+    async def run() -> None:
+        await asyncio.gather(*(check_ip_async(f"8.8.4.{i}") for i in range(5)))
+        session = abuseipdb_client.get_async_session()
+        assert session is abuseipdb_client.get_async_session()
+
+    api.run(run)
+    assert len(api.requests) == 5
+
+
+def test_rate_limit_headers_are_tracked_per_endpoint(session: Mock) -> None:
+    session.request.return_value = fake_response(
+        {"data": {}},
+        headers={"X-RateLimit-Limit": "1000", "X-RateLimit-Remaining": "41"},
+    )
+    check_ip("1.2.3.4")
+    budgets = rate_limiter.get_limiter().budgets()
+    assert budgets["check"]["remaining_quota"] == 41
+    assert "report" not in budgets
+
+
+def test_retry_after_rejects_callers_instead_of_calling_upstream(session: Mock) -> None:
+    session.request.return_value = fake_response(
+        status_code=429, text="Too Many Requests", headers={"Retry-After": "3600"}
+    )
+    with pytest.raises(RuntimeError, match="429"):
+        check_ip("1.2.3.4")
+    with pytest.raises(rate_limiter.RateLimitExceeded):
+        check_ip("5.6.7.8")
+    assert session.request.call_count == 1
+
+
+def test_concurrent_async_checks_share_one_request() -> None:
+    response = {"data": {"ipAddress": "1.2.3.4", "abuseConfidenceScore": 5}}
+    api = FakeApi(response)
+
+    async def burst() -> list[dict[str, Any]]:
+        return list(
+            await asyncio.gather(*(check_ip_async("1.2.3.4") for _ in range(5)))
+        )
+
+    assert api.run(burst) == [response] * 5
+    assert len(api.requests) == 1
+    assert single_flight.get_flight().stats()["coalesced"] == 4
@@ -0,0 +1,117 @@
+import os
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import blacklist_index
+from functions.abuseipdb import check_ip
+from functions.blacklist_index import BlacklistIndex, parse_export
+
+FIXTURE = Path(__file__).parent / "fixtures" / "abuseipdb_blacklist.json"
+
+
+@pytest.fixture
+def index() -> BlacklistIndex:
+    return BlacklistIndex.from_entries(parse_export(FIXTURE.read_text()))
+
+
+@pytest.fixture(autouse=True)
+def reset_index() -> Iterator[None]:
+    yield
+    blacklist_index.swap(None)
+
+
+def test_ingest_merges_overlapping_ranges_and_skips_bad_entries(
+    index: BlacklistIndex,
+) -> None:
+    # 198.51.100.2 falls inside 198.51.100.0/30 and the two v6 entries are
+    # distinct, so 6 valid entries collapse to 5 ranges.
+    assert len(index) == 5
+
+
+@pytest.mark.parametrize(
+    ("ip", "expected"),
+    [
+        ("203.0.113.7", 100),
+        ("203.0.113.8", None),
+        ("198.51.100.0", 99),
+        ("198.51.100.3", 99),
+        ("198.51.100.4", None),
+        ("192.0.2.200", 91),
+        ("::ffff:192.0.2.200", 91),
+        ("2001:db8:bad:1234::1", 97),
+        ("2001:db8::dead:beef", 92),
+        ("2001:db8::1", None),
+        ("0.0.0.0", None),
+        ("garbage", None),
+    ],
+)
+def test_lookup(index: BlacklistIndex, ip: str, expected: int | None) -> None:
+    assert index.lookup(ip) == expected
+
+
+def test_snapshot_round_trips_through_memory_map(
+    index: BlacklistIndex, tmp_path: Path
+) -> None:
+    path = str(tmp_path / "blacklist.idx")
+    index.save(path)
+    loaded = BlacklistIndex.load(path)
+    assert len(loaded) == len(index)
+    assert loaded.created_at == index.created_at
+    assert loaded.lookup("2001:db8:bad::5") == 97
+
+
+def test_plain_text_export() -> None:
+    entries = parse_export("# comment\n10.0.0.1\n\n10.1.0.0/16  # range\n")
+    assert entries == [("10.0.0.1", 100), ("10.1.0.0/16", 100)]
+
+
+def test_sync_only_swaps_in_changed_snapshots(
+    blob_service: FakeBlobService, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("ABUSEIPDB_BLACKLIST_ENABLED", "true")
+    monkeypatch.setenv("ABUSEIPDB_BLACKLIST_PATH", str(tmp_path / "blacklist.idx"))
+    monkeypatch.setattr(blacklist_index, "_next_sync_at", float("inf"))
+    monkeypatch.setattr(blacklist_index, "_etag", None)
+    first = BlacklistIndex.from_entries([("185.220.101.7", 100)])
+    blob_service.put("abuseipdb/blacklist.idx", first.to_bytes())
+
+    blacklist_index._sync_from_blob("abuseipdb", "blacklist.idx")
+    synced = blacklist_index.get_index()
+    assert synced is not None and synced.lookup("185.220.101.7") == 100
+
+    # An unchanged snapshot is neither saved nor swapped in again.
+    blacklist_index._sync_from_blob("abuseipdb", "blacklist.idx")
+    assert blacklist_index.get_index() is synced
+
+    second = BlacklistIndex.from_entries([("185.220.101.8", 90)])
+    blob_service.put("abuseipdb/blacklist.idx", second.to_bytes())
+    blacklist_index._sync_from_blob("abuseipdb", "blacklist.idx")
+    updated = blacklist_index.get_index()
+    assert updated is not None and updated.lookup("185.220.101.8") == 90
+    assert updated.lookup("185.220.101.7") is None
+
+
+def test_check_ip_answers_listed_addresses_locally(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # check_ip answers documentation ranges itself, so list a public address.
+    path = tmp_path / "blacklist.idx"
+    BlacklistIndex.from_entries([("185.220.101.7", 100)]).save(str(path))
+    monkeypatch.setenv("ABUSEIPDB_BLACKLIST_ENABLED", "true")
+    monkeypatch.setenv("ABUSEIPDB_BLACKLIST_PATH", str(path))
+    monkeypatch.setattr(blacklist_index, "_next_sync_at", 0.0)
+    monkeypatch.setattr(blacklist_index, "_sync_from_blob", Mock())
+    monkeypatch.delenv("ABUSEIPDB_API_KEY", raising=False)
+
+    result = check_ip("185.220.101.7")
+    assert result["data"]["abuseConfidenceScore"] == 100
+    assert result["meta"]["source"] == "blacklist-mirror"
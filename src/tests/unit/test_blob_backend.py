@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import (
+    blob_backend,
+    snippet_cache,
+    snippet_index,
+    snippet_store,
+    storage,
+)
+from functions.blob_backend import BlobBackend, NotFound, PreconditionFailed
+from functions.get_snippet import get_snippet
+from functions.save_snippet import save_snippet
+
+
+@pytest.fixture(params=["azure", "local"])
+def backend(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[BlobBackend]:
+    storage.configure(cast(Any, FakeBlobService()))
+    chosen: BlobBackend = (
+        blob_backend.AzureBlobBackend()
+        if request.param == "azure"
+        else blob_backend.LocalBackend(tmp_path)
+    )
+    blob_backend.configure(chosen)
+    snippet_cache.configure()
+    snippet_index.configure()
+    yield chosen
+    storage.configure()
+    blob_backend.configure()
+    snippet_cache.configure()
+    snippet_index.configure()
+
+
+def test_conditional_and_ranged_reads(backend: BlobBackend) -> None:
+    etag = backend.put("c", "dir/blob", b"0123456789", {"k": "v"})
+
+    full = backend.get("c", "dir/blob")
+    assert full is not None
+    assert (full.etag, full.size, full.metadata) == (etag, 10, {"k": "v"})
+    assert full.readall() == b"0123456789"
+    assert backend.get("c", "dir/blob", if_none_match=etag) is None
+
+    ranged = backend.get("c", "dir/blob", offset=3, length=4)
+    assert ranged is not None
+    assert (ranged.readall(), ranged.size) == (b"3456", 10)
+    past_end = backend.get("c", "dir/blob", offset=50, length=4)
+    assert past_end is not None and past_end.readall() == b""
+
+    with pytest.raises(NotFound):
+        backend.get("c", "missing")
+    with pytest.raises(NotFound):
+        backend.head("nope", "missing")
+
+
+def test_conditional_writes_and_deletes(backend: BlobBackend) -> None:
+    first = backend.put("c", "b", b"one", if_none_match=True)
+    with pytest.raises(PreconditionFailed):
+        backend.put("c", "b", b"two", if_none_match=True)
+
+    second = backend.put("c", "b", b"two", if_match=first)
+    assert second != first
+    with pytest.raises(PreconditionFailed):
+        backend.put("c", "b", b"three", if_match=first)
+
+    third = backend.set_metadata("c", "b", {"touched": "1"})
+    assert third != second
+    assert backend.head("c", "b").metadata == {"touched": "1"}
+
+    with pytest.raises(PreconditionFailed):
+        backend.delete("c", "b", if_match=second)
+    backend.delete("c", "b", if_match=third)
+    with pytest.raises(NotFound):
+        backend.delete("c", "b")
+
+
+def test_list_by_prefix_includes_metadata(backend: BlobBackend) -> None:
+    backend.put("c", "a/1", b"x", {"m": "1"})
+    backend.put("c", "a/2", b"yy")
+    backend.put("c", "b/1", b"z")
+
+    listed = list(backend.list("c", "a/"))
+    assert [(i.name, i.size, i.metadata) for i in listed] == [
+        ("a/1", 1, {"m": "1"}),
+        ("a/2", 2, {}),
+    ]
+    assert list(backend.list("empty")) == []
+
+
+def test_snippet_tools_run_on_either_backend(backend: BlobBackend) -> None:
+    text = "héllo " * 2000  # compressed by default, multi-byte characters
+    assert save_snippet({"arguments": {"snippetname": "s", "snippet": text}}) == (
+        f"Snippet '{text}' saved successfully"
+    )
+    assert get_snippet(json.dumps({"arguments": {"snippetname": "s"}})) == text
+    page = snippet_store.read_range("s", 1, 4)
+    assert (page.offset, page.content) == (1, "éll")
+    assert [i["name"] for i in snippet_index.search("hello")["items"]] == []
+    assert [i["name"] for i in snippet_index.search("llo")["items"]] == ["s"]
+    assert snippet_store.collect_garbage(grace=0).deleted == 0
+
+
+def test_local_reads_are_served_from_a_memory_map(tmp_path: Path) -> None:
+    local = blob_backend.LocalBackend(tmp_path)
+    local.put("c", "b", b"mapped")
+    download = local.get("c", "b")
+    assert download is not None
+    chunk = next(download.chunks())
+    assert isinstance(chunk, memoryview)
+    assert bytes(chunk) == b"mapped"
+
+
+def test_local_rejects_paths_outside_the_root(tmp_path: Path) -> None:
+    local = blob_backend.LocalBackend(tmp_path)
+    for name in ("../escape", "a//b", "/abs", "a\\b"):
+        with pytest.raises(ValueError):
+            local.put("c", name, b"x")
+
+
+def test_backend_is_chosen_by_configuration(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setenv("BLOB_STORAGE_BACKEND", "local")
+    monkeypatch.setenv("BLOB_LOCAL_ROOT", str(tmp_path))
+    chosen = blob_backend.from_env()
+    assert isinstance(chosen, blob_backend.LocalBackend)
+    assert chosen.root == tmp_path
+
+    monkeypatch.delenv("BLOB_STORAGE_BACKEND")
+    assert isinstance(blob_backend.from_env(), blob_backend.AzureBlobBackend)
+    monkeypatch.setenv("BLOB_STORAGE_BACKEND", "ftp")
+    with pytest.raises(ValueError):
+        blob_backend.from_env()
+
+
+def test_backend_falls_back_to_the_snippet_settings(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.delenv("BLOB_STORAGE_BACKEND", raising=False)
+    monkeypatch.delenv("BLOB_LOCAL_ROOT", raising=False)
+    monkeypatch.setenv("SNIPPET_STORAGE_BACKEND", "local")
+    monkeypatch.setenv("SNIPPET_LOCAL_ROOT", str(tmp_path))
+    chosen = blob_backend.from_env()
+    assert isinstance(chosen, blob_backend.LocalBackend)
+    assert chosen.root == tmp_path
@@ -0,0 +1,88 @@
+import ipaddress
+import os
+import sys
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from functions.block_cache import BlockCache, parse_network
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _block(*reported: str) -> dict[str, object]:
+    return {
+        "data": {
+            "reportedAddress": [
+                {"ipAddress": ip, "numReports": 1, "abuseConfidenceScore": 50}
+                for ip in reported
+            ]
+        }
+    }
+
+
+@pytest.mark.parametrize(
+    ("value", "network"),
+    [
+        ("192.0.2.77", "192.0.2.0/24"),
+        (" 192.0.2.77/28 ", "192.0.2.64/28"),
+        ("2001:db8:0:1:abcd::5", "2001:db8:0:1::/64"),
+        ("2001:db8::/48", "2001:db8::/48"),
+    ],
+)
+def test_parse_network_masks_host_bits_and_defaults_bare_addresses(
+    value: str, network: str
+) -> None:
+    assert parse_network(value) == ipaddress.ip_network(network)
+
+
+def test_lookup_finds_the_containing_block_for_both_families() -> None:
+    cache = BlockCache(clock=FakeClock())
+    cache.put(parse_network("192.0.2.0/24"), 90, _block("192.0.2.9"))
+    cache.put(parse_network("2001:db8::/64"), 90, _block("2001:db8::0009"))
+
+    hit = cache.lookup("192.0.2.9", 90)
+    assert hit is not None and hit.report is not None
+    assert str(hit.network) == "192.0.2.0/24"
+    assert hit.report["abuseConfidenceScore"] == 50
+    clean = cache.lookup("192.0.2.200", 90)
+    assert clean is not None and clean.report is None
+    v6 = cache.lookup("2001:db8::9", 90)
+    assert v6 is not None and v6.report is not None
+
+    for miss in ("192.0.3.1", "2001:db8:0:1::9", "not-an-ip"):
+        assert cache.lookup(miss, 90) is None
+    assert cache.lookup("192.0.2.9", 30) is None  # other report window
+
+
+def test_most_specific_block_wins() -> None:
+    cache = BlockCache(clock=FakeClock())
+    cache.put(parse_network("10.0.0.0/16"), 90, _block())
+    cache.put(parse_network("10.0.5.0/24"), 90, _block("10.0.5.1"))
+
+    hit = cache.lookup("10.0.5.1", 90)
+    assert hit is not None and str(hit.network) == "10.0.5.0/24"
+    hit = cache.lookup("10.0.6.1", 90)
+    assert hit is not None and str(hit.network) == "10.0.0.0/16"
+
+
+def test_blocks_expire_and_are_evicted_lru() -> None:
+    clock = FakeClock()
+    cache = BlockCache(max_entries=2, ttl=10, clock=clock)
+    for third in (1, 2, 3):
+        cache.put(parse_network(f"192.0.{third}.0/24"), 90, _block())
+    assert cache.lookup("192.0.1.1", 90) is None
+    assert cache.stats()["evictions"] == 1
+
+    clock.now = 10
+    assert cache.lookup("192.0.2.1", 90) is None
+    assert cache.get(parse_network("192.0.3.0/24"), 90) is None
+    assert len(cache) == 0
@@ -1,59 +1,53 @@
+import json
 import os
 import sys
-import json
 
 # Ensure the `src` package directory is importable when tests run from `src/`
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-from functions.hello_mcp import hello_mcp
+from fake_blob_storage import FakeBlobService
+
 from functions.get_snippet import get_snippet
+from functions.hello_mcp import hello_mcp
 from functions.save_snippet import save_snippet
+from functions.snippet_store import REF_KEY, content_hash, object_name
 
 
-class FakeInputStream:
-    def __init__(self, data: bytes) -> None:
-        self._data: bytes = data
-
-    def read(self) -> bytes:
-        return self._data
-
-
-class FakeOut:
-    def __init__(self) -> None:
-        self.value: str | None = None
-
-    def set(self, val: str) -> None:
-        self.value = val
+def _assert_stored(service: FakeBlobService, name: str, content: bytes) -> None:
+    digest = content_hash(content)
+    assert service.blob(f"snippets/{name}.json").metadata == {REF_KEY: digest}
+    assert service.blob(f"snippet-objects/{object_name(digest)}").data == content
 
 
 def test_hello_mcp_returns_greeting() -> None:
     assert hello_mcp(None) == "Hello I am MCPTool!"
 
 
-def test_get_snippet_returns_blob_content() -> None:
-    fake = FakeInputStream(b'{"foo": "bar"}')
-    res = get_snippet(fake, None)
+def test_get_snippet_returns_blob_content(blob_service: FakeBlobService) -> None:
+    blob_service.put("snippets/name.json", b'{"foo": "bar"}')
+    res = get_snippet(json.dumps({"arguments": {"snippetname": "name"}}))
     assert res == '{"foo": "bar"}'
 
 
-def test_save_snippet_with_string_context_sets_blob_and_returns_success() -> None:
-    fake_out = FakeOut()
+def test_save_snippet_with_string_context_sets_blob_and_returns_success(
+    blob_service: FakeBlobService,
+) -> None:
     ctx = json.dumps({"arguments": {"snippetname": "name", "snippet": "content"}})
-    res = save_snippet(fake_out, ctx)
+    res = save_snippet(ctx)
     assert res == "Snippet 'content' saved successfully"
-    assert fake_out.value == "content"
+    _assert_stored(blob_service, "name", b"content")
 
 
-def test_save_snippet_with_dict_context_sets_blob_and_returns_success() -> None:
-    fake_out = FakeOut()
+def test_save_snippet_with_dict_context_sets_blob_and_returns_success(
+    blob_service: FakeBlobService,
+) -> None:
     ctx = {"arguments": {"snippetname": "name", "snippet": "content"}}
-    res = save_snippet(fake_out, ctx)
+    res = save_snippet(ctx)
     assert res == "Snippet 'content' saved successfully"
-    assert fake_out.value == "content"
+    _assert_stored(blob_service, "name", b"content")
 
 
 def test_save_snippet_missing_name_returns_error() -> None:
-    fake_out = FakeOut()
     ctx = json.dumps({"arguments": {"snippet": "content"}})
-    res = save_snippet(fake_out, ctx)
+    res = save_snippet(ctx)
     assert res == "No snippet name provided"
@@ -0,0 +1,91 @@
+import ipaddress
+import os
+import sys
+from collections.abc import Iterator
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import ip_policy
+from functions.ip_policy import AllowList, parse, reserved_reason
+
+BLOB_PATH = "abuseipdb/allowlist.txt"
+
+
+@pytest.fixture(autouse=True)
+def reset_allowlist() -> Iterator[None]:
+    ip_policy.configure()
+    yield
+    ip_policy.configure()
+
+
+@pytest.mark.parametrize(
+    ("ip", "reason"),
+    [
+        ("127.0.0.1", "loopback"),
+        ("::1", "loopback"),
+        ("169.254.169.254", "link-local"),
+        ("fe80::1", "link-local"),
+        ("224.0.0.251", "multicast"),
+        ("ff02::1", "multicast"),
+        ("0.0.0.0", "unspecified"),
+        ("10.1.2.3", "private"),
+        ("192.168.0.1", "private"),
+        ("fd00::1", "private"),
+        ("192.0.2.1", "private"),  # documentation ranges count as private
+        ("100.64.0.1", "non-global"),  # carrier-grade NAT
+        ("8.8.8.8", None),
+        ("2606:4700:4700::1111", None),
+    ],
+)
+def test_reserved_reason(ip: str, reason: str | None) -> None:
+    assert reserved_reason(parse(ip)) == reason
+
+
+def test_parse_unwraps_ipv4_mapped_addresses_and_rejects_garbage() -> None:
+    assert parse(" ::ffff:10.0.0.1 ") == ipaddress.ip_address("10.0.0.1")
+    with pytest.raises(ValueError):
+        parse("10.0.0.256")
+
+
+def test_allowlist_merges_ranges_and_skips_bad_entries() -> None:
+    allowlist = AllowList.from_text(
+        "# egress\n"
+        "203.0.113.0/25, 203.0.113.128/25  # adjacent, merged\n"
+        "198.51.100.7 not-a-cidr\n"
+        "2001:db8:e9::/48\n"
+    )
+
+    assert len(allowlist) == 3
+    assert parse("203.0.113.200") in allowlist
+    assert parse("198.51.100.7") in allowlist
+    assert parse("198.51.100.8") not in allowlist
+    assert parse("2001:db8:e9:1::5") in allowlist
+    assert parse("2001:db8:ea::1") not in allowlist
+    assert parse("1.1.1.1") not in AllowList()
+
+
+def test_allowlist_syncs_from_blob(
+    blob_service: FakeBlobService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("ABUSEIPDB_ALLOWLIST", "198.51.100.0/24")
+    # Only the inline entries apply until the blob has been read.
+    assert parse("203.0.113.9") not in ip_policy.get_allowlist()
+
+    blob_service.put(BLOB_PATH, b"203.0.113.0/24\n")
+    ip_policy._sync_from_blob(BLOB_PATH)
+    synced = ip_policy.get_allowlist()
+    assert parse("203.0.113.9") in synced
+    assert parse("198.51.100.9") in synced
+
+    # An unchanged blob keeps the current allowlist.
+    ip_policy._sync_from_blob(BLOB_PATH)
+    assert ip_policy.get_allowlist() is synced
+
+    del blob_service.containers["abuseipdb"]["allowlist.txt"]
+    ip_policy._sync_from_blob(BLOB_PATH)
+    assert parse("203.0.113.9") not in ip_policy.get_allowlist()
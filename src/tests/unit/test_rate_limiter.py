@@ -0,0 +1,67 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from functions.rate_limiter import RateLimitExceeded, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_is_free_then_calls_are_paced() -> None:
+    bucket = TokenBucket("check", rate=10, burst=2, max_wait=1, clock=FakeClock())
+    assert bucket._reserve() == 0
+    assert bucket._reserve() == 0
+    assert bucket._reserve() == pytest.approx(0.1)
+    assert bucket._reserve() == pytest.approx(0.2)
+    assert bucket.snapshot()["waits"] == 2
+
+
+def test_callers_past_max_wait_are_rejected_without_spending_tokens() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket("check", rate=1, burst=1, max_wait=0.5, clock=clock)
+    bucket._reserve()
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        bucket._reserve()
+    assert excinfo.value.retry_after == pytest.approx(1.0)
+    clock.now = 1.0
+    assert bucket._reserve() == 0
+
+
+def test_retry_after_blocks_until_elapsed() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket("report", rate=100, burst=10, max_wait=5, clock=clock)
+    bucket.update(429, {"Retry-After": "3"})
+    assert bucket._reserve() == pytest.approx(3.0)
+    clock.now = 3.0
+    assert bucket._reserve() == 0
+
+
+def test_exhausted_quota_waits_for_reset() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket("check", rate=100, burst=10, max_wait=1, clock=clock)
+    bucket.update(200, {"X-RateLimit-Remaining": "1"})
+    bucket._reserve()
+    assert bucket.snapshot()["remaining_quota"] == 0
+    # Reset time unknown: let one call through so the server reports the budget.
+    assert bucket._reserve() == 0
+
+
+def test_acquire_async_sleeps_instead_of_blocking() -> None:
+    bucket = TokenBucket("check", rate=100, burst=1, max_wait=1)
+
+    async def run() -> None:
+        await asyncio.gather(bucket.acquire_async(), bucket.acquire_async())
+
+    asyncio.run(run())
+    assert bucket.waits == 1
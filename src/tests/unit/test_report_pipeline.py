@@ -0,0 +1,277 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import abuseipdb_client, rate_limiter, report_pipeline
+from functions.abuseipdb import (
+    abuseipdb_report_ip,
+    abuseipdb_report_status,
+    submit_queued_report,
+)
+from functions.report_pipeline import Outcome, QueuedReport, ReportBatcher
+
+
+class FakeOut:
+    def __init__(self) -> None:
+        self.value: str | None = None
+
+    def set(self, val: str) -> None:
+        self.value = val
+
+
+@pytest.fixture(autouse=True)
+def memory_store(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv("ABUSEIPDB_API_KEY", "test-key")
+    monkeypatch.setenv("ABUSEIPDB_REPORT_QUEUE", "true")
+    report_pipeline.configure(report_pipeline.MemoryStatusStore())
+    rate_limiter.configure()
+    yield
+    report_pipeline.configure()
+    rate_limiter.configure()
+    abuseipdb_client.configure()
+
+
+def _report(ip: str) -> QueuedReport:
+    return QueuedReport.create(ip, "18,22", f"ssh brute force from {ip}")
+
+
+def test_build_csv_has_header_and_quotes_comments() -> None:
+    report = QueuedReport("id", "1.2.3.4", "18,22", 'said "hi", twice', "2026-10-18")
+    rows = list(csv.reader(io.StringIO(report_pipeline.build_csv([report]).decode())))
+    assert rows == [
+        ["IP", "Categories", "ReportDate", "Comment"],
+        ["1.2.3.4", "18,22", "2026-10-18", 'said "hi", twice'],
+    ]
+
+
+def test_match_invalid_rows_uses_row_number_then_ip() -> None:
+    reports = [_report("1.2.3.4"), _report("5.6.7.8"), _report("5.6.7.8")]
+    errors = report_pipeline.match_invalid_rows(
+        reports,
+        [
+            {"input": "1.2.3.4", "error": "Duplicate IP", "rowNumber": 2},
+            {"input": "5.6.7.8", "error": "Bad category", "rowNumber": 99},
+        ],
+    )
+    assert errors == {
+        reports[0].reportId: "Duplicate IP",
+        reports[1].reportId: "Bad category",
+    }
+
+
+def test_batcher_flushes_when_full() -> None:
+    batches: list[list[str]] = []
+
+    async def flush(reports: list[QueuedReport]) -> dict[str, Outcome]:
+        batches.append([r.ip for r in reports])
+        return {r.reportId: Outcome("submitted") for r in reports}
+
+    async def main() -> list[Outcome]:
+        batcher = ReportBatcher(flush, max_size=3, max_delay=60)
+        return await asyncio.gather(
+            *(batcher.submit(_report(f"10.0.0.{i}")) for i in range(3))
+        )
+
+    outcomes = asyncio.run(main())
+    assert batches == [["10.0.0.0", "10.0.0.1", "10.0.0.2"]]
+    assert {o.status for o in outcomes} == {"submitted"}
+
+
+def test_batcher_flushes_partial_batch_after_delay() -> None:
+    batches: list[int] = []
+
+    async def flush(reports: list[QueuedReport]) -> dict[str, Outcome]:
+        batches.append(len(reports))
+        return {r.reportId: Outcome("submitted") for r in reports}
+
+    async def main() -> Outcome:
+        batcher = ReportBatcher(flush, max_size=100, max_delay=0.01)
+        return await batcher.submit(_report("10.0.0.1"))
+
+    assert asyncio.run(main()).status == "submitted"
+    assert batches == [1]
+
+
+def test_batcher_fails_whole_batch_when_flush_raises() -> None:
+    async def flush(reports: list[QueuedReport]) -> dict[str, Outcome]:
+        raise RuntimeError("upstream down")
+
+    async def main() -> list[Outcome]:
+        batcher = ReportBatcher(flush, max_size=2, max_delay=60)
+        return list(
+            await asyncio.gather(
+                batcher.submit(_report("10.0.0.1")), batcher.submit(_report("10.0.0.2"))
+            )
+        )
+
+    outcomes = asyncio.run(main())
+    assert [o.status for o in outcomes] == ["failed", "failed"]
+    assert outcomes[0].error == "upstream down"
+
+
+@pytest.mark.parametrize(
+    ("arguments", "reply"),
+    [
+        ({"ip": "not-an-ip", "categories": "18"}, "Invalid ip 'not-an-ip'"),
+        (
+            {"ip": "1.2.3.4", "categories": "banana,18"},
+            "Invalid categories: unknown category 'banana'",
+        ),
+        (
+            {"ip": "1.2.3.4", "categories": "18,99999"},
+            "Invalid categories: unknown category '99999'",
+        ),
+    ],
+)
+def test_report_ip_rejects_invalid_input_before_queueing(
+    arguments: dict[str, str], reply: str
+) -> None:
+    queue = FakeOut()
+    ctx = json.dumps({"arguments": {**arguments, "comment": "scan"}})
+    assert asyncio.run(abuseipdb_report_ip(ctx, queue)) == reply
+    assert queue.value is None
+
+
+def test_parse_categories_normalizes_ids() -> None:
+    assert report_pipeline.parse_categories(" 18, 22,18 ") == "18,22"
+    with pytest.raises(ValueError):
+        report_pipeline.parse_categories("18,")
+
+
+def test_report_ip_enqueues_when_queue_enabled() -> None:
+    queue = FakeOut()
+    ctx = json.dumps(
+        {"arguments": {"ip": "1.2.3.4", "categories": "18", "comment": "scan"}}
+    )
+    result = json.loads(asyncio.run(abuseipdb_report_ip(ctx, queue)))
+    assert result["status"] == "queued"
+
+    assert queue.value is not None
+    message = json.loads(queue.value)
+    assert message["reportId"] == result["reportId"]
+    assert message["ip"] == "1.2.3.4"
+
+    status = json.loads(
+        abuseipdb_report_status(
+            json.dumps({"arguments": {"reportId": message["reportId"]}})
+        )
+    )
+    assert status["status"] == "queued"
+
+
+def test_report_status_unknown_id() -> None:
+    ctx = json.dumps({"arguments": {"reportId": "missing"}})
+    assert abuseipdb_report_status(ctx) == "Report 'missing' not found"
+
+
+class FakeBulkApi:
+    def __init__(self, body: object, status: int = 200) -> None:
+        self.body = body
+        self.status = status
+        self.uploads: list[str] = []
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        upload: Any = form["csv"]
+        self.uploads.append(upload.file.read().decode())
+        return web.json_response(self.body, status=self.status)
+
+    def run(
+        self, reports: list[QueuedReport], attempt: int = 1
+    ) -> list[Outcome | BaseException]:
+        async def main() -> list[Outcome | BaseException]:
+            app = web.Application()
+            app.router.add_post("/api/v2/bulk-report", self._handle)
+            async with TestServer(app) as server:
+                abuseipdb_client.configure(
+                    abuseipdb_client.ClientSettings(
+                        base_url=str(server.make_url("/api/v2")), max_retries=0
+                    )
+                )
+                try:
+                    return await asyncio.gather(
+                        *(submit_queued_report(r, attempt) for r in reports),
+                        return_exceptions=True,
+                    )
+                finally:
+                    await abuseipdb_client.aclose()
+
+        return asyncio.run(main())
+
+
+def test_worker_submits_batch_and_records_rejections(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("ABUSEIPDB_BULK_REPORT_SIZE", "2")
+    reports = [_report("1.2.3.4"), _report("5.6.7.8")]
+    api = FakeBulkApi(
+        {
+            "data": {
+                "savedReports": 1,
+                "invalidReports": [
+                    {"error": "Duplicate IP", "input": "5.6.7.8", "rowNumber": 3}
+                ],
+            }
+        }
+    )
+
+    outcomes = api.run(reports)
+
+    assert len(api.uploads) == 1
+    assert api.uploads[0].splitlines()[1].startswith("1.2.3.4,")
+    assert outcomes == [Outcome("submitted"), Outcome("rejected", "Duplicate IP")]
+    store = report_pipeline.get_store()
+    assert store.get(reports[0].reportId)["status"] == "submitted"  # type: ignore[index]
+    assert store.get(reports[1].reportId)["error"] == "Duplicate IP"  # type: ignore[index]
+
+    # A redelivered message is not uploaded again.
+    assert api.run([reports[0]]) == [Outcome("submitted")]
+    assert len(api.uploads) == 1
+
+
+def test_worker_raises_so_queue_retries_failed_batch(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("ABUSEIPDB_BULK_REPORT_MAX_DELAY", "0.01")
+    report = _report("1.2.3.4")
+    outcomes = FakeBulkApi({"errors": [{"detail": "down"}]}, status=503).run([report])
+
+    assert isinstance(outcomes[0], RuntimeError)
+    record = report_pipeline.get_store().get(report.reportId)
+    assert record is not None and record["status"] == "retrying"
+
+
+def test_last_failed_delivery_records_failed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ABUSEIPDB_BULK_REPORT_MAX_DELAY", "0.01")
+    monkeypatch.setenv("ABUSEIPDB_REPORT_MAX_ATTEMPTS", "3")
+    report = _report("1.2.3.4")
+    api = FakeBulkApi({"errors": [{"detail": "down"}]}, status=503)
+
+    assert isinstance(api.run([report], attempt=3)[0], RuntimeError)
+    record = report_pipeline.get_store().get(report.reportId)
+    assert record is not None and record["status"] == "failed"
+    assert "503" in record["error"]
+
+
+def test_blob_status_store_creates_its_container(
+    blob_service: FakeBlobService,
+) -> None:
+    store = report_pipeline.BlobStatusStore()
+    assert store.get("missing") is None
+    store.put({"reportId": "r1", "status": "queued"})
+    assert store.get("r1") == {"reportId": "r1", "status": "queued"}
+    assert "r1.json" in blob_service.containers["abuseipdb-reports"]
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from functions.reputation_cache import ReputationCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_fresh_entries_are_served_from_cache() -> None:
+    cache = ReputationCache(ttl=10, clock=FakeClock())
+    loader = Mock(return_value={"score": 1})
+    assert cache.get_or_load("a", loader) == {"score": 1}
+    assert cache.get_or_load("a", loader) == {"score": 1}
+    assert loader.call_count == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_lru_eviction_drops_least_recently_used() -> None:
+    cache = ReputationCache(max_entries=2, clock=FakeClock())
+    cache.get_or_load("a", lambda: {"k": "a"})
+    cache.get_or_load("b", lambda: {"k": "b"})
+    cache.get_or_load("a", lambda: {"k": "a"})  # touch "a"
+    cache.get_or_load("c", lambda: {"k": "c"})
+
+    loader = Mock(return_value={"k": "b2"})
+    cache.get_or_load("b", loader)
+    loader.assert_called_once()
+    assert cache.stats()["evictions"] == 2
+
+
+def test_errors_are_negatively_cached_until_negative_ttl() -> None:
+    clock = FakeClock()
+    cache = ReputationCache(negative_ttl=5, clock=clock)
+    loader = Mock(side_effect=RuntimeError("boom"))
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            cache.get_or_load("a", loader)
+    assert loader.call_count == 1
+    assert cache.stats()["negative_hits"] == 2
+
+    clock.now = 6
+    loader.side_effect = None
+    loader.return_value = {"ok": True}
+    assert cache.get_or_load("a", loader) == {"ok": True}
+
+
+def test_stale_entries_are_served_while_refreshing_in_background() -> None:
+    clock = FakeClock()
+    executor = ThreadPoolExecutor(max_workers=1)
+    cache = ReputationCache(ttl=10, stale_ttl=10, clock=clock, executor=executor)
+    cache.get_or_load("a", lambda: {"v": 1})
+
+    clock.now = 15
+    assert cache.get_or_load("a", lambda: {"v": 2}) == {"v": 1}
+    executor.shutdown(wait=True)
+    assert cache.get_or_load("a", lambda: {"v": 3}) == {"v": 2}
+    stats = cache.stats()
+    assert (stats["stale_hits"], stats["refreshes"]) == (1, 1)
+
+
+def test_expired_entries_past_stale_window_load_synchronously() -> None:
+    clock = FakeClock()
+    cache = ReputationCache(ttl=10, stale_ttl=10, clock=clock)
+    cache.get_or_load("a", lambda: {"v": 1})
+    clock.now = 25
+    assert cache.get_or_load("a", lambda: {"v": 2}) == {"v": 2}
+
+
+def test_async_stale_entries_refresh_on_the_running_loop() -> None:
+    clock = FakeClock()
+    cache = ReputationCache(ttl=10, stale_ttl=10, clock=clock)
+
+    async def load(value: int) -> dict[str, int]:
+        return {"v": value}
+
+    async def run() -> None:
+        await cache.get_or_load_async("a", lambda: load(1))
+        clock.now = 15
+        assert await cache.get_or_load_async("a", lambda: load(2)) == {"v": 1}
+        await asyncio.sleep(0)  # let the refresh task run
+        assert await cache.get_or_load_async("a", lambda: load(3)) == {"v": 2}
+
+    asyncio.run(run())
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import sys
+from collections.abc import Iterator
+from typing import Any, cast
+from unittest.mock import Mock
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import abuseipdb_client, reputation_cache, single_flight
+from functions.abuseipdb import check_ips
+from functions.blob_backend import AzureBlobBackend
+from functions.reputation_cache import ReputationCache
+from functions.reputation_store import ReputationStore, blob_name
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def store(blob_service: FakeBlobService, clock: FakeClock) -> Iterator[ReputationStore]:
+    shared = ReputationStore(
+        AzureBlobBackend(), ttl=60, flush_interval=3600, clock=clock
+    )
+    yield shared
+    shared.shutdown()
+
+
+def test_records_round_trip_until_they_expire(
+    store: ReputationStore, blob_service: FakeBlobService, clock: FakeClock
+) -> None:
+    key = ("2001:db8::1", 90, False)
+    store.put(key, {"data": {"abuseConfidenceScore": 7}})
+    assert store.get(key) is None  # queued, not written yet
+    store.flush()
+
+    record = json.loads(
+        blob_service.blob(f"abuseipdb-reputation/{blob_name(key)}").data
+    )
+    assert record["expiresAt"] == clock.now + 60
+    assert store.get(key) == ({"data": {"abuseConfidenceScore": 7}}, 60)
+    clock.now += 60
+    assert store.get(key) is None
+
+
+def test_write_behind_coalesces_and_bounds_its_queue(
+    blob_service: FakeBlobService,
+) -> None:
+    store = ReputationStore(AzureBlobBackend(), flush_interval=3600, max_pending=2)
+    store._thread = Mock()  # keep the writer thread out of the test
+    store.put("a", {"v": 1})
+    store.put("a", {"v": 2})
+    store.put("b", {"v": 1})
+    store.put("c", {"v": 1})
+    store.flush()
+
+    assert store.stats() == {
+        "writes": 2,
+        "write_errors": 0,
+        "coalesced": 1,
+        "dropped": 1,
+        "pending": 0,
+    }
+    record = store.get("a")
+    assert record is not None and record[0] == {"v": 2}
+    assert store.get("c") is None
+
+
+def test_instances_share_results_through_the_second_tier(
+    store: ReputationStore, clock: FakeClock
+) -> None:
+    first = ReputationCache(ttl=300, clock=clock, l2=store)
+    second = ReputationCache(ttl=300, clock=clock, l2=store)
+    loader = Mock(return_value={"data": {"abuseConfidenceScore": 42}})
+
+    assert first.get_or_load("a", loader) == loader.return_value
+    store.flush()
+    assert second.get_or_load("a", loader) == loader.return_value
+    assert second.get_or_load("a", loader) == loader.return_value
+    assert loader.call_count == 1
+
+    stats = second.stats()
+    assert (stats["hits"], stats["misses"], stats["l2_hits"]) == (1, 1, 1)
+    assert second.hit_ratios() == {"l1": 0.5, "l2": 1.0}
+    assert first.hit_ratios() == {"l1": 0.0, "l2": 0.0}
+
+    # Entries filled from L2 are only fresh for the record's remaining life.
+    clock.now += 61
+    assert asyncio.run(second.get_or_load_async("a", _async(loader))) is not None
+    assert second.stats()["stale_hits"] == 1
+
+
+def _async(loader: Mock) -> Any:
+    async def load() -> dict[str, Any]:
+        return cast(dict[str, Any], loader())
+
+    return load
+
+
+def test_shared_tier_errors_fall_back_to_the_loader(clock: FakeClock) -> None:
+    broken = Mock()
+    broken.get.side_effect = OSError("storage down")
+    cache = ReputationCache(clock=clock, l2=broken)
+
+    assert cache.get_or_load("a", lambda: {"ok": True}) == {"ok": True}
+    assert cache.stats()["l2_errors"] == 1
+    broken.put.assert_called_once_with("a", {"ok": True})
+
+
+def test_check_ips_prefetches_the_batch_in_one_read(
+    store: ReputationStore, clock: FakeClock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("ABUSEIPDB_API_KEY", "test-key")
+    for ip in ("185.220.101.1", "185.220.101.2"):
+        store.put((ip, 90, False), {"data": {"ipAddress": ip}})
+    store.flush()
+    session = Mock()
+    session.request.return_value = Mock(
+        ok=True, status_code=200, headers={}, json=Mock(return_value={"data": {}})
+    )
+    abuseipdb_client.configure(abuseipdb_client.ClientSettings(), session)
+    reputation_cache.configure(ReputationCache(clock=clock, l2=store))
+    single_flight.configure()
+    try:
+        results = check_ips(["185.220.101.1", "185.220.101.2", "185.220.101.3"])
+        stats = reputation_cache.get_cache().stats()
+    finally:
+        abuseipdb_client.configure()
+        reputation_cache.configure()
+        single_flight.configure()
+
+    assert results["185.220.101.1"] == {"data": {"ipAddress": "185.220.101.1"}}
+    assert session.request.call_count == 1
+    # The third IP's lookup trusts the prefetch's miss instead of re-reading.
+    assert (stats["l2_hits"], stats["l2_misses"]) == (2, 1)
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from functions import (
+    abuseipdb_client,
+    rate_limiter,
+    reputation_cache,
+    resilience,
+    single_flight,
+    tool_metrics,
+)
+from functions.abuseipdb import abuseipdb_check_ip, check_ip
+from functions.reputation_cache import ReputationCache
+from functions.resilience import CircuitBreaker, CircuitOpenError, Hedger
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def fake_response(body: object = None, status_code: int = 200) -> Mock:
+    return Mock(
+        ok=status_code < 400,
+        status_code=status_code,
+        text="",
+        headers={},
+        json=Mock(return_value=body),
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset() -> Iterator[None]:
+    resilience.configure()
+    rate_limiter.configure()
+    reputation_cache.configure()
+    single_flight.configure()
+    yield
+    abuseipdb_client.configure()
+    resilience.configure()
+    rate_limiter.configure()
+    reputation_cache.configure()
+    single_flight.configure()
+
+
+@pytest.fixture
+def session(monkeypatch: pytest.MonkeyPatch) -> Mock:
+    monkeypatch.setenv("ABUSEIPDB_API_KEY", "test-key")
+    fake = Mock()
+    abuseipdb_client.configure(abuseipdb_client.ClientSettings(), fake)
+    return fake
+
+
+def test_breaker_opens_fails_fast_and_backs_off() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        window=4, min_calls=4, failure_ratio=0.5, open_seconds=10, clock=clock
+    )
+    for success in (True, False, True, False):
+        breaker.acquire()
+        breaker.record(success)
+    assert breaker.state == resilience.OPEN
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.acquire()
+    assert excinfo.value.retry_after == 10
+
+    # One trial after the cooldown; its failure doubles the next one.
+    clock.now = 10
+    breaker.acquire()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.record(False)
+    clock.now = 29
+    assert breaker.state == resilience.OPEN
+    clock.now = 30
+    breaker.acquire()
+    breaker.record(True)
+    assert breaker.stats() == {
+        "state": resilience.CLOSED,
+        "opened": 2,
+        "rejected": 2,
+        "calls": 0,
+        "failures": 0,
+    }
+
+
+def test_budgets_nest_and_keep_the_sooner_deadline() -> None:
+    assert resilience.remaining() is None
+    with resilience.budget(10):
+        with resilience.budget(60):
+            left = resilience.remaining()
+            assert left is not None and 9 < left <= 10
+        with resilience.budget(0):
+            assert resilience.expired()
+    assert resilience.remaining() is None
+
+
+def test_hedger_waits_for_samples_and_caps_the_hedge_rate() -> None:
+    hedger = Hedger(percentile=90, min_delay=0.01, max_ratio=0.5, min_samples=10)
+    assert hedger.delay("check") is None
+    for i in range(10):
+        hedger.record("check", (i + 1) / 100)
+    assert hedger.delay("check") == pytest.approx(0.10)
+    assert hedger.take()  # two requests have earned one hedge
+    assert not hedger.take()
+    assert hedger.stats()["rate"] == 0.5
+
+
+def test_request_timeouts_come_out_of_the_callers_budget(session: Mock) -> None:
+    session.request.return_value = fake_response({"data": {}})
+    with resilience.budget(2):
+        abuseipdb_client.request("GET", "check")
+    connect, read = session.request.call_args.kwargs["timeout"]
+    assert connect <= 2 and read <= 2
+
+    with resilience.budget(0), pytest.raises(resilience.DeadlineExceeded):
+        abuseipdb_client.request("GET", "check")
+    assert session.request.call_count == 1
+
+
+def test_breaker_counts_only_upstream_failures(session: Mock) -> None:
+    import requests
+
+    limiter = rate_limiter.RateLimiter(rate=0.001, burst=10)
+    rate_limiter.configure(limiter)
+    breaker = CircuitBreaker(window=2, min_calls=2)
+    resilience.configure(breaker=breaker)
+
+    # Running out of budget is the caller's problem, not AbuseIPDB's.
+    session.request.side_effect = requests.ReadTimeout("budget spent")
+    for _ in range(3):
+        with resilience.budget(0.01), pytest.raises(resilience.DeadlineExceeded):
+            abuseipdb_client.request("GET", "check")
+    assert breaker.stats()["calls"] == 0
+
+    session.request.side_effect = [
+        fake_response(status_code=503),
+        requests.ConnectionError("reset"),
+    ]
+    abuseipdb_client.request("GET", "check")
+    with pytest.raises(requests.ConnectionError):
+        abuseipdb_client.request("GET", "check")
+    assert breaker.state == resilience.OPEN
+
+    # Failing fast spends no rate-limit tokens.
+    tokens = limiter.bucket("check").snapshot()["tokens"]
+    with pytest.raises(CircuitOpenError):
+        abuseipdb_client.request("GET", "check")
+    assert limiter.bucket("check").snapshot()["tokens"] == tokens
+
+
+def test_slow_requests_are_hedged_and_the_first_answer_wins(session: Mock) -> None:
+    release = threading.Event()
+    slow, fast = fake_response({"slow": True}), fake_response({"fast": True})
+
+    def respond(method: str, url: str, **kwargs: Any) -> Mock:
+        if session.request.call_count == 1:
+            release.wait(5)
+            return slow
+        return fast
+
+    session.request.side_effect = respond
+    hedger = Hedger(percentile=50, min_delay=0.01, max_ratio=1.0, min_samples=1)
+    hedger.record("check", 0.01)
+    resilience.configure(hedger=hedger)
+    exporter = tool_metrics.MemoryExporter()
+    tool_metrics.configure(exporter)
+    try:
+        response = abuseipdb_client.request("GET", "check")
+        tool_metrics.flush()
+    finally:
+        release.set()
+        tool_metrics.configure()
+
+    assert response is fast
+    assert hedger.stats() == {"requests": 1, "hedges": 1, "wins": 1, "rate": 1.0}
+    operations = {sample.operation for sample in exporter.dependencies("abuseipdb")}
+    assert "GET check (hedge)" in operations
+    assert tool_metrics.gauges()["abuseipdb.hedge.rate"][1]() == 1.0
+
+
+def test_open_breaker_serves_stale_results(session: Mock) -> None:
+    clock = FakeClock()
+    reputation_cache.configure(ReputationCache(ttl=60, stale_ttl=0, clock=clock))
+    resilience.configure(breaker=CircuitBreaker(window=2, min_calls=2))
+    session.request.return_value = fake_response({"data": {"ipAddress": "8.8.8.8"}})
+    check_ip("8.8.8.8")
+
+    clock.now = 3600  # long expired
+    session.request.return_value = fake_response(status_code=503)
+    with pytest.raises(RuntimeError):
+        check_ip("1.1.1.1")  # one failure in two calls opens the breaker
+    stale = check_ip("8.8.8.8")
+    assert stale["data"] == {"ipAddress": "8.8.8.8"}
+    assert stale["meta"] == {
+        "source": "stale-cache",
+        "reason": "circuit-open",
+        "ageSeconds": 3600,
+    }
+    calls = session.request.call_count
+    assert check_ip("8.8.8.8")["meta"]["source"] == "stale-cache"
+    with pytest.raises(CircuitOpenError):
+        check_ip("1.0.0.1")
+    assert session.request.call_count == calls  # failing fast
+    assert tool_metrics.gauges()["abuseipdb.circuit.state"][1]() == 2
+
+
+def test_client_rate_limit_serves_stale_results(session: Mock) -> None:
+    clock = FakeClock()
+    reputation_cache.configure(ReputationCache(ttl=60, stale_ttl=0, clock=clock))
+    session.request.return_value = fake_response({"data": {"ipAddress": "8.8.8.8"}})
+    check_ip("8.8.8.8")
+
+    clock.now = 3600
+    rate_limiter.configure(rate_limiter.RateLimiter(rate=0.001, burst=0, max_wait=0))
+    stale = check_ip("8.8.8.8")
+    assert stale["meta"]["source"] == "stale-cache"
+    assert stale["meta"]["reason"] == "rate-limited"
+    with pytest.raises(rate_limiter.RateLimitExceeded):
+        check_ip("1.1.1.1")  # nothing cached to fall back on
+    assert session.request.call_count == 1
+
+
+def test_check_ip_replies_when_the_deadline_passes(
+    session: Mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("ABUSEIPDB_DEADLINE", "0")
+    ctx = json.dumps({"arguments": {"ip": "8.8.8.8"}})
+    assert asyncio.run(abuseipdb_check_ip(ctx)) == "Deadline exceeded checking IP"
+    session.request.assert_not_called()
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from functions.single_flight import SingleFlight
+
+
+def test_threaded_callers_share_one_call() -> None:
+    flight: SingleFlight[dict[str, Any]] = SingleFlight()
+    release = threading.Event()
+    calls = 0
+
+    def load() -> dict[str, Any]:
+        nonlocal calls
+        calls += 1
+        release.wait(5)
+        return {"score": 7}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.do, "1.2.3.4", load) for _ in range(5)]
+        while flight.stats()["coalesced"] < 4:
+            threading.Event().wait(0.001)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert calls == 1
+    assert results == [{"score": 7}] * 5
+    assert flight.stats() == {"leaders": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_threaded_followers_receive_the_error() -> None:
+    flight: SingleFlight[dict[str, Any]] = SingleFlight()
+    release = threading.Event()
+
+    def load() -> dict[str, Any]:
+        release.wait(5)
+        raise RuntimeError("AbuseIPDB check failed: 500")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, "k", load) for _ in range(3)]
+        while flight.stats()["coalesced"] < 2:
+            threading.Event().wait(0.001)
+        release.set()
+        errors = [f.exception() for f in futures]
+
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+
+def test_async_callers_share_one_call_and_key_isolation() -> None:
+    flight: SingleFlight[dict[str, Any]] = SingleFlight()
+    calls: list[str] = []
+
+    async def main() -> list[dict[str, Any]]:
+        def load(key: str) -> Any:
+            async def run() -> dict[str, Any]:
+                calls.append(key)
+                await asyncio.sleep(0.01)
+                return {"ip": key}
+
+            return run
+
+        return list(
+            await asyncio.gather(
+                *(flight.do_async("a", load("a")) for _ in range(3)),
+                flight.do_async("b", load("b")),
+            )
+        )
+
+    results = asyncio.run(main())
+    assert sorted(calls) == ["a", "b"]
+    assert results == [{"ip": "a"}] * 3 + [{"ip": "b"}]
+    assert flight.stats()["coalesced"] == 2
+
+
+def test_async_follower_cancellation_does_not_cancel_leader() -> None:
+    flight: SingleFlight[dict[str, Any]] = SingleFlight()
+
+    async def load() -> dict[str, Any]:
+        await asyncio.sleep(0.02)
+        return {"ok": True}
+
+    async def main() -> dict[str, Any]:
+        leader = asyncio.create_task(flight.do_async("k", load))
+        follower = asyncio.create_task(flight.do_async("k", load))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == {"ok": True}
+
+
+def test_async_follower_takes_over_when_leader_cancelled() -> None:
+    flight: SingleFlight[dict[str, Any]] = SingleFlight()
+    calls = 0
+
+    async def load() -> dict[str, Any]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return {"call": calls}
+
+    async def main() -> dict[str, Any]:
+        leader = asyncio.create_task(flight.do_async("k", load))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do_async("k", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == {"call": 2}
+
+
+def test_thread_joins_call_led_by_coroutine_on_another_loop() -> None:
+    flight: SingleFlight[dict[str, Any]] = SingleFlight()
+    started = threading.Event()
+
+    async def load() -> dict[str, Any]:
+        started.set()
+        await asyncio.sleep(0.05)
+        return {"from": "loop"}
+
+    def threaded() -> dict[str, Any]:
+        started.wait(5)
+        return flight.do("k", lambda: {"from": "thread"})
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(threaded)
+        assert asyncio.run(flight.do_async("k", load)) == {"from": "loop"}
+        assert future.result() == {"from": "loop"}
@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+import threading
+from typing import Any, cast
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobClient, FakeBlobService
+
+from functions import snippet_cache, snippet_store, storage
+from functions.get_snippets import get_snippets
+from functions.save_snippets import save_snippets
+
+
+class BarrierBlobService(FakeBlobService):
+    """Blocks downloads until ``parties`` of them are in flight at once."""
+
+    def __init__(self, parties: int) -> None:
+        super().__init__()
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def get_blob_client(self, container: str, blob: str) -> FakeBlobClient:
+        client = super().get_blob_client(container, blob)
+        download = client.download_blob
+
+        def blocking_download(*args: Any, **kwargs: Any) -> Any:
+            if container == "snippets":
+                self.barrier.wait()
+            return download(*args, **kwargs)
+
+        client.download_blob = blocking_download  # type: ignore[method-assign]
+        return client
+
+
+def _call(tool: Any, **arguments: Any) -> Any:
+    result = tool(json.dumps({"arguments": arguments}))
+    try:
+        return json.loads(result)
+    except json.JSONDecodeError:
+        return result
+
+
+def test_save_then_get_many_with_per_item_errors(
+    blob_service: FakeBlobService,
+) -> None:
+    saved = _call(
+        save_snippets,
+        snippets=[
+            {"snippetname": "a", "snippet": "print('a')"},
+            {"snippetname": "b", "snippet": "print('b')"},
+            {"snippetname": "c", "snippet": ""},
+            {"snippet": "orphan"},
+        ],
+    )
+    assert saved == {
+        "a": {"saved": True},
+        "b": {"saved": True},
+        "c": {"error": "No snippet content provided"},
+        "#3": {"error": "No snippet name provided"},
+    }
+
+    got = _call(get_snippets, snippetnames="b, missing, a")
+    assert list(got) == ["b", "missing", "a"]
+    assert got["a"] == {"snippet": "print('a')"}
+    assert got["b"] == {"snippet": "print('b')"}
+    assert got["missing"] == {"error": "Snippet 'missing' not found"}
+
+
+def test_arguments_may_be_json_encoded_strings(blob_service: FakeBlobService) -> None:
+    items = [{"snippetname": "x", "snippet": "1"}, {"snippetname": "x", "snippet": "2"}]
+    assert _call(save_snippets, snippets=json.dumps(items)) == {"x": {"saved": True}}
+    assert _call(get_snippets, snippetnames='["x", "x"]') == {"x": {"snippet": "2"}}
+    # Responses use the same compact encoding as the other tools.
+    raw = get_snippets(json.dumps({"arguments": {"snippetnames": "x"}}))
+    assert raw == '{"x":{"snippet":"2"}}'
+
+
+def test_invalid_and_oversized_requests(
+    blob_service: FakeBlobService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    assert _call(get_snippets, snippetnames="") == "No snippet names provided"
+    assert _call(save_snippets, snippets="not json") == "No snippets provided"
+
+    monkeypatch.setenv("SNIPPET_BATCH_MAX_ITEMS", "2")
+    assert _call(get_snippets, snippetnames="a,b,c") == (
+        "Too many snippets requested: 3 (max 2)"
+    )
+
+
+def test_batch_response_is_capped(
+    blob_service: FakeBlobService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    snippet_store.write_many({"a": "x" * 6, "b": "y" * 6})
+    monkeypatch.setenv("SNIPPET_MAX_RESPONSE_BYTES", "10")
+
+    got = snippet_store.read_many(["a", "b"])
+    assert got["a"] == {"snippet": "x" * 6}
+    assert "read this snippet separately" in got["b"]["error"]
+
+
+def test_reads_run_concurrently_over_the_shared_client() -> None:
+    fake = BarrierBlobService(parties=3)
+    storage.configure(cast(Any, fake))
+    snippet_cache.configure()
+    try:
+        for name in ("a", "b", "c"):
+            fake.put(f"snippets/{name}.json", name.encode())
+        # Each download waits for the other two, so this only completes when
+        # all three are in flight together.
+        got = snippet_store.read_many(["a", "b", "c"], concurrency=3)
+        assert got == {n: {"snippet": n} for n in ("a", "b", "c")}
+    finally:
+        storage.configure()
+        snippet_cache.configure()
+
+
+def test_stragglers_past_the_deadline_are_reported() -> None:
+    fake = BarrierBlobService(parties=2)
+    storage.configure(cast(Any, fake))
+    snippet_cache.configure()
+    try:
+        fake.put("snippets/slow.json", b"slow")
+        got = snippet_store.read_many(["slow"], deadline=0.05)
+        assert got == {"slow": {"error": "Deadline exceeded"}}
+    finally:
+        fake.barrier.abort()
+        storage.configure()
+        snippet_cache.configure()
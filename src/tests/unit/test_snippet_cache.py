@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+from typing import cast
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import snippet_cache
+from functions.get_snippet import get_snippet
+from functions.save_snippet import save_snippet
+from functions.snippet_cache import Fetched, SnippetCache
+from functions.snippet_store import SnippetNotFound
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Origin:
+    """A fetch callable over a single mutable snippet."""
+
+    def __init__(self, content: str | None) -> None:
+        self.content = content
+        self.version = 1
+        self.calls: list[str | None] = []
+
+    def __call__(self, etag: str | None) -> Fetched | None:
+        self.calls.append(etag)
+        if self.content is None:
+            raise SnippetNotFound("name")
+        current = f'"v{self.version}"'
+        if etag == current:
+            return None
+        return Fetched(current, self.content, len(self.content.encode()))
+
+
+def test_fresh_entries_skip_storage() -> None:
+    clock = FakeClock()
+    cache = SnippetCache(revalidate_after=5, clock=clock)
+    origin = Origin("print(1)")
+
+    assert cache.get("name", origin) == "print(1)"
+    clock.now += 4
+    assert cache.get("name", origin) == "print(1)"
+    assert origin.calls == [None]
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entries_revalidate_with_etag() -> None:
+    clock = FakeClock()
+    cache = SnippetCache(revalidate_after=5, clock=clock)
+    origin = Origin("print(1)")
+    cache.get("name", origin)
+
+    clock.now += 6
+    assert cache.get("name", origin) == "print(1)"
+    assert origin.calls == [None, '"v1"']
+    assert cache.stats()["not_modified"] == 1
+
+    # Revalidation restarted the freshness window.
+    clock.now += 4
+    cache.get("name", origin)
+    assert len(origin.calls) == 2
+
+    origin.content, origin.version = "print(2)", 2
+    clock.now += 6
+    assert cache.get("name", origin) == "print(2)"
+
+
+def test_missing_names_are_negatively_cached() -> None:
+    clock = FakeClock()
+    cache = SnippetCache(negative_ttl=10, clock=clock)
+    origin = Origin(None)
+
+    for _ in range(3):
+        with pytest.raises(SnippetNotFound):
+            cache.get("name", origin)
+    assert len(origin.calls) == 1
+
+    clock.now += 11
+    origin.content = "now it exists"
+    assert cache.get("name", origin) == "now it exists"
+
+
+def test_byte_budget_evicts_least_recently_used() -> None:
+    cache = SnippetCache(max_bytes=10)
+    cache.get("a", Origin("aaaa"))
+    cache.get("b", Origin("bbbb"))
+    cache.get("a", Origin("unused"))  # refresh recency of "a"
+    cache.get("c", Origin("cccc"))
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 8
+    assert cache.get("a", Origin("unused")) == "aaaa"
+
+    cache.get("huge", Origin("x" * 11))
+    assert cache.stats()["entries"] == 2
+
+
+@pytest.fixture
+def blob_service(blob_service: FakeBlobService) -> FakeBlobService:
+    snippet_cache.configure(SnippetCache(revalidate_after=0))
+    return blob_service
+
+
+def _get(name: str) -> str:
+    return cast(str, get_snippet(json.dumps({"arguments": {"snippetname": name}})))
+
+
+def test_get_snippet_revalidates_instead_of_downloading(
+    blob_service: FakeBlobService,
+) -> None:
+    blob_service.put("snippets/name.json", b"print(1)")
+    blob_service.calls.clear()
+
+    assert _get("name") == "print(1)"
+    assert _get("name") == "print(1)"
+    assert blob_service.calls == [
+        ("download", "snippets/name.json"),
+        ("download", "snippets/name.json"),
+    ]
+    assert snippet_cache.get_cache().stats()["not_modified"] == 1
+
+
+def test_get_snippet_missing_name(blob_service: FakeBlobService) -> None:
+    assert _get("nope") == "Snippet 'nope' not found"
+
+
+def test_save_snippet_invalidates_cached_copy(blob_service: FakeBlobService) -> None:
+    snippet_cache.configure(SnippetCache(revalidate_after=60))
+    blob_service.put("snippets/name.json", b"old")
+    assert _get("name") == "old"
+
+    ctx = json.dumps({"arguments": {"snippetname": "name", "snippet": "new"}})
+    save_snippet(ctx)
+
+    assert _get("name") == "new"
+    assert snippet_cache.get_cache().stats()["invalidations"] == 1
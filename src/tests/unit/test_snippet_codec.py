@@ -0,0 +1,104 @@
+import json
+import os
+import sys
+from typing import Any, cast
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlob, FakeBlobService
+
+from functions import snippet_codec, snippet_store
+from functions.get_snippet import get_snippet
+from functions.save_snippet import save_snippet
+
+CODE = "def handler(event):\n    return {'status': 200, 'body': event}\n" * 200
+
+
+@pytest.mark.parametrize("encoding", [snippet_codec.ZSTD, snippet_codec.GZIP])
+def test_encode_round_trips_through_streaming_decompression(encoding: str) -> None:
+    payload, metadata = snippet_codec.encode(CODE.encode(), encoding)
+    assert metadata == {
+        snippet_codec.ENCODING_KEY: encoding,
+        snippet_codec.SIZE_KEY: str(len(CODE)),
+    }
+    assert len(payload) * 5 < len(CODE)
+
+    chunks = [payload[i : i + 7] for i in range(0, len(payload), 7)]
+    assert b"".join(snippet_codec.decompress_chunks(chunks, encoding)) == CODE.encode()
+
+
+def test_small_or_incompressible_data_is_stored_raw() -> None:
+    assert snippet_codec.encode(b"tiny", snippet_codec.ZSTD) == (b"tiny", {})
+    noise = os.urandom(8192)
+    assert snippet_codec.encode(noise, snippet_codec.ZSTD) == (noise, {})
+
+
+def test_compression_can_be_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SNIPPET_COMPRESSION", "none")
+    assert snippet_codec.encode(CODE.encode()) == (CODE.encode(), {})
+
+
+@pytest.fixture
+def blob_service(blob_service: FakeBlobService) -> FakeBlobService:
+    blob_service.chunk_size = 512
+    return blob_service
+
+
+def _object(service: FakeBlobService, content: str) -> FakeBlob:
+    digest = snippet_store.content_hash(content.encode())
+    return service.blob(f"snippet-objects/{snippet_store.object_name(digest)}")
+
+
+def _save(name: str, content: str) -> str:
+    ctx = {"arguments": {"snippetname": name, "snippet": content}}
+    return cast(str, save_snippet(ctx))
+
+
+def _get(**arguments: Any) -> str:
+    return cast(str, get_snippet(json.dumps({"arguments": arguments})))
+
+
+def test_save_compresses_and_get_decompresses(blob_service: FakeBlobService) -> None:
+    _save("code", CODE)
+
+    stored = _object(blob_service, CODE)
+    metadata = stored.metadata
+    assert metadata[snippet_codec.ENCODING_KEY] in (
+        snippet_codec.ZSTD,
+        snippet_codec.GZIP,
+    )
+    assert len(stored.data) < len(CODE) // 5
+    assert _get(snippetname="code") == CODE
+
+
+def test_uncompressed_legacy_blobs_stay_readable(
+    blob_service: FakeBlobService,
+) -> None:
+    blob_service.put("snippets/old.json", CODE.encode())
+    assert _get(snippetname="old") == CODE
+
+
+def test_ranges_of_compressed_snippets_use_decoded_offsets(
+    blob_service: FakeBlobService,
+) -> None:
+    _save("code", CODE)
+    stored = _object(blob_service, CODE).data
+
+    offset = len(stored) + 100  # past the stored bytes, inside the text
+    blob_service.calls.clear()
+    page = snippet_store.read_range("code", offset, 40)
+    assert [op for op, _ in blob_service.calls] == ["head", "head", "download"]
+    assert page.totalSize == len(CODE)
+    assert page.content == CODE[offset : offset + 40]
+    assert page.nextOffset == offset + 40
+
+
+def test_size_limit_applies_to_decoded_size(
+    blob_service: FakeBlobService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _save("code", CODE)
+    monkeypatch.setenv("SNIPPET_MAX_RESPONSE_BYTES", str(len(CODE) - 1))
+    assert _get(snippetname="code").startswith("Snippet 'code' is ")
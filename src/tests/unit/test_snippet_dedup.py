@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceModifiedError
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import snippet_cache, snippet_store
+from functions.snippet_cache import SnippetCache
+
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def blob_service(blob_service: FakeBlobService) -> FakeBlobService:
+    blob_service.create_container("snippets")
+    blob_service.create_container("snippet-objects")
+    snippet_cache.configure(SnippetCache(revalidate_after=0))
+    return blob_service
+
+
+def _objects(service: FakeBlobService) -> list[str]:
+    return sorted(service.containers.get("snippet-objects", {}))
+
+
+def _uploads(service: FakeBlobService, container: str) -> int:
+    return sum(
+        1 for op, path in service.calls if op == "upload" and path.startswith(container)
+    )
+
+
+def test_identical_content_is_stored_once(blob_service: FakeBlobService) -> None:
+    snippet_store.write_snippet("a", "print('hi')")
+    snippet_store.write_snippet("b", "print('hi')")
+    snippet_store.write_snippet("a", "print('hi')")
+
+    digest = snippet_store.content_hash(b"print('hi')")
+    assert _objects(blob_service) == [snippet_store.object_name(digest)]
+    assert _uploads(blob_service, "snippet-objects/") == 1
+    pointer = blob_service.blob("snippets/b.json")
+    assert pointer.metadata == {snippet_store.REF_KEY: digest}
+    assert json.loads(pointer.data) == {"sha256": digest, "size": 11}
+
+    assert snippet_store.read_snippet("a") == "print('hi')"
+    assert snippet_store.read_snippet("b") == "print('hi')"
+
+
+def test_unchanged_pointer_revalidates_without_reading_content(
+    blob_service: FakeBlobService,
+) -> None:
+    snippet_store.write_snippet("a", "print(1)")
+    assert snippet_store.read_snippet("a") == "print(1)"
+    blob_service.calls.clear()
+
+    assert snippet_store.read_snippet("a") == "print(1)"
+    assert blob_service.calls == [("download", "snippets/a.json")]
+
+    # Another instance repoints the name; the next revalidation follows it.
+    other = snippet_store.content_hash(b"print(2)")
+    blob_service.put(f"snippet-objects/{snippet_store.object_name(other)}", b"print(2)")
+    blob_service.put("snippets/a.json", b"{}", {snippet_store.REF_KEY: other})
+    assert snippet_store.read_snippet("a") == "print(2)"
+
+
+def test_ranges_resolve_the_pointer(blob_service: FakeBlobService) -> None:
+    snippet_store.write_snippet("a", "0123456789")
+    page = snippet_store.read_range("a", 4, 4)
+    assert (page.content, page.nextOffset, page.totalSize) == ("4567", 8, 10)
+
+
+def test_legacy_inline_snippets_stay_readable(blob_service: FakeBlobService) -> None:
+    blob_service.put("snippets/old.json", b"legacy")
+    assert snippet_store.read_snippet("old") == "legacy"
+    assert snippet_store.read_range("old", 0, 4).content == "lega"
+
+
+def test_gc_deletes_only_old_unreferenced_objects(
+    blob_service: FakeBlobService,
+) -> None:
+    blob_service.advance(-2 * DAY)
+    snippet_store.write_snippet("kept", "referenced")
+    snippet_store.write_snippet("gone", "orphaned")
+    snippet_store.write_snippet("gone", "replacement")
+    blob_service.advance(2 * DAY)
+    blob_service.put("snippet-objects/ab/abcd", b"fresh upload, pointer pending")
+
+    result = snippet_store.collect_garbage(grace=DAY)
+
+    assert result == snippet_store.GcResult(referenced=2, scanned=4, deleted=1)
+    orphan = snippet_store.object_name(snippet_store.content_hash(b"orphaned"))
+    assert orphan not in _objects(blob_service)
+    assert snippet_store.read_snippet("kept") == "referenced"
+    assert snippet_store.read_snippet("gone") == "replacement"
+
+
+def test_resaving_old_content_protects_it_from_gc(
+    blob_service: FakeBlobService,
+) -> None:
+    blob_service.advance(-2 * DAY)
+    snippet_store.write_snippet("a", "shared")
+    snippet_store.write_snippet("a", "something else")
+    blob_service.advance(2 * DAY)
+
+    # The object for "shared" is old and unreferenced until "b" points at it;
+    # the save touches it, so a collection that already listed the pointers
+    # (before "b" existed) cannot delete it.
+    objects = blob_service.get_container_client("snippet-objects")
+    digest = snippet_store.content_hash(b"shared")
+    listed = next(i for i in objects.list_blobs() if i.name.endswith(digest))
+    snippet_store.write_snippet("b", "shared")
+
+    assert _uploads(blob_service, "snippet-objects/") == 2
+    with pytest.raises(ResourceModifiedError):
+        objects.delete_blob(
+            listed.name,
+            etag=listed.etag,
+            match_condition=MatchConditions.IfNotModified,
+        )
+    assert snippet_store.collect_garbage(grace=DAY).deleted == 0
+    assert snippet_store.read_snippet("b") == "shared"
@@ -0,0 +1,128 @@
+import json
+import os
+import sys
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import snippet_index, snippet_store
+from functions.list_snippets import list_snippets
+from functions.search_snippets import search_snippets
+
+
+@pytest.fixture
+def blob_service(blob_service: FakeBlobService) -> Iterator[FakeBlobService]:
+    snippet_index.configure()
+    yield blob_service
+    snippet_index.configure()
+
+
+def _call(tool: Any, **arguments: Any) -> Any:
+    result = tool(json.dumps({"arguments": arguments}))
+    try:
+        return json.loads(result)
+    except json.JSONDecodeError:
+        return result
+
+
+def _names(page: dict[str, Any]) -> list[str]:
+    return [item["name"] for item in page["items"]]
+
+
+def test_tokenize_splits_identifiers_and_drops_noise() -> None:
+    assert snippet_index.tokenize("def parse_HTTP(x): return x+1") == [
+        "def",
+        "parse",
+        "http",
+        "return",
+    ]
+
+
+def test_list_by_prefix_with_paging(blob_service: FakeBlobService) -> None:
+    for name in ("web/b", "web/a", "db/x", "web/c"):
+        snippet_store.write_snippet(name, f"content of {name}")
+
+    first = _call(list_snippets, prefix="web/", limit=2)
+    assert _names(first) == ["web/a", "web/b"]
+    assert first["items"][0] == {
+        "name": "web/a",
+        "size": len("content of web/a"),
+        "sha256": snippet_store.content_hash(b"content of web/a"),
+        "modified": first["items"][0]["modified"],
+    }
+    second = _call(list_snippets, prefix="web/", limit=2, cursor=first["nextCursor"])
+    assert _names(second) == ["web/c"]
+    assert second["nextCursor"] is None
+    assert _names(_call(list_snippets)) == ["db/x", "web/a", "web/b", "web/c"]
+    assert _call(list_snippets, limit=0) == "Invalid limit"
+
+
+def test_search_requires_every_token(blob_service: FakeBlobService) -> None:
+    snippet_store.write_snippet("retry", "def retry_request(session): ...")
+    snippet_store.write_snippet("cache", "def cached_request(session): ...")
+    snippet_store.write_snippet("notes", "Session handling notes")
+
+    assert _names(_call(search_snippets, query="session")) == [
+        "cache",
+        "notes",
+        "retry",
+    ]
+    assert _names(_call(search_snippets, query="REQUEST retry")) == ["retry"]
+    assert _names(_call(search_snippets, query="notes")) == ["notes"]  # name token
+    assert _call(search_snippets, query="nothing matches") == {
+        "items": [],
+        "nextCursor": None,
+    }
+    assert _call(search_snippets, query="") == "No query provided"
+
+
+def test_resaving_replaces_old_tokens(blob_service: FakeBlobService) -> None:
+    snippet_store.write_snippet("a", "alpha")
+    snippet_store.write_snippet("a", "beta")
+
+    assert _names(snippet_index.search("alpha")) == []
+    assert _names(snippet_index.search("beta")) == ["a"]
+    assert len(_names(snippet_index.list_names())) == 1
+
+
+def test_queries_never_read_snippet_bodies(blob_service: FakeBlobService) -> None:
+    snippet_store.write_snippet("a", "alpha")
+    blob_service.calls.clear()
+
+    snippet_index.list_names()
+    snippet_index.search("alpha")
+
+    assert blob_service.calls
+    assert all(path.startswith("snippet-index/") for _, path in blob_service.calls)
+
+
+def test_concurrent_writers_to_one_shard_lose_no_updates(
+    blob_service: FakeBlobService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("SNIPPET_INDEX_SHARDS", "1")
+    names = [f"n{i:02d}" for i in range(24)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(
+            pool.map(
+                lambda n: snippet_index.record(n, 1, "0" * 64, n, attempts=50), names
+            )
+        )
+
+    snippet_index.configure()  # read back from storage, not this instance
+    assert _names(snippet_index.list_names(limit=100)) == names
+
+
+def test_rebuild_backfills_legacy_snippets(blob_service: FakeBlobService) -> None:
+    blob_service.put("snippets/old.json", b"legacy text")
+    snippet_store.write_snippet("new", "fresh text")
+    assert _names(snippet_index.search("text")) == ["new"]
+
+    assert snippet_index.rebuild(snippet_store.iter_snippets()) == 2
+    assert _names(snippet_index.search("text")) == ["new", "old"]
@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import sys
+from typing import Any, cast
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from functions import snippet_store
+from functions.get_snippet import get_snippet
+
+TEXT = "héllo wörld ✓ " * 20  # mixes 1-, 2- and 3-byte UTF-8 characters
+
+
+@pytest.fixture
+def blob_service(blob_service: FakeBlobService) -> FakeBlobService:
+    blob_service.chunk_size = 3  # splits characters across chunks
+    blob_service.put("snippets/big.json", TEXT.encode())
+    return blob_service
+
+
+def _get(**arguments: Any) -> str:
+    return cast(str, get_snippet(json.dumps({"arguments": arguments})))
+
+
+def test_full_read_decodes_characters_split_across_chunks(
+    blob_service: FakeBlobService,
+) -> None:
+    assert _get(snippetname="big") == TEXT
+
+
+def test_full_read_over_limit_asks_for_paging(
+    blob_service: FakeBlobService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("SNIPPET_MAX_RESPONSE_BYTES", "64")
+    result = _get(snippetname="big")
+    assert result.startswith("Snippet 'big' is ")
+    assert "offset/length" in result
+
+
+def test_paging_by_byte_range_reassembles_the_text(
+    blob_service: FakeBlobService,
+) -> None:
+    parts: list[str] = []
+    offset: int | None = 0
+    while offset is not None:
+        page = json.loads(_get(snippetname="big", offset=offset, length=10))
+        assert page["offset"] == offset
+        assert page["totalSize"] == len(TEXT.encode())
+        parts.append(page["content"])
+        offset = page["nextOffset"]
+    assert "".join(parts) == TEXT
+
+
+def test_range_starting_mid_character_skips_to_boundary(
+    blob_service: FakeBlobService,
+) -> None:
+    page = snippet_store.read_range("big", 2, 4)  # byte 2 is inside "é"
+    assert page.offset == 3
+    assert page.content == "llo"
+
+
+def test_page_length_is_capped(
+    blob_service: FakeBlobService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("SNIPPET_MAX_RESPONSE_BYTES", "8")
+    page = snippet_store.read_range("big", 0, 1000)
+    assert page.nextOffset is not None and page.nextOffset <= 8
+
+
+def test_invalid_range_arguments(blob_service: FakeBlobService) -> None:
+    assert _get(snippetname="big", offset="x") == "Invalid offset or length"
+    assert _get(snippetname="big", offset=-1) == "offset must be >= 0 and length > 0"
+    assert _get(snippetname="nope", offset=0) == "Snippet 'nope' not found"
+
+
+def test_content_is_not_logged(
+    blob_service: FakeBlobService, caplog: pytest.LogCaptureFixture
+) -> None:
+    with caplog.at_level(logging.INFO):
+        _get(snippetname="big")
+    assert "wörld" not in caplog.text
+    assert "big" in caplog.text
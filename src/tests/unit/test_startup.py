@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, SRC)
+
+# Loaded on first use by the tools that need them, never by `import function_app`.
+LAZY_MODULES = ("aiohttp", "requests", "azure.storage.blob", "azure.identity")
+
+
+def _cold_import(code: str) -> object:
+    # A fresh interpreter: this test process has imported everything already.
+    result = subprocess.run(
+        [sys.executable, "-c", "import function_app, json, sys\n" + code],
+        cwd=SRC,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_importing_the_app_does_not_load_http_or_storage_clients() -> None:
+    loaded = _cold_import(
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+    assert loaded == []
+
+
+def test_lazy_imports_keep_every_function_discoverable() -> None:
+    names = _cold_import(
+        "print(json.dumps(sorted(f.get_function_name() "
+        "for f in function_app.app.get_functions())))"
+    )
+    assert isinstance(names, list)
+    assert {"hello_mcp", "get_snippet", "abuseipdb_check_ip", "snippet_gc"} <= set(
+        names
+    )
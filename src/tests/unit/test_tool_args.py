@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+from typing import Any
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from function_app import ToolProperty, tool_properties_get_snippets_object
+from functions import tool_args
+from functions.get_snippet import get_snippet
+from functions.list_snippets import list_snippets
+from functions.save_snippet import save_snippet
+
+SCHEMA = tool_args.compile_schema(
+    [
+        ToolProperty("name", "string", ""),
+        ToolProperty("count", "integer", ""),
+        ToolProperty("ratio", "number", ""),
+        ToolProperty("dry", "boolean", ""),
+    ]
+)
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def parser(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "stdlib":
+        monkeypatch.setattr(tool_args, "orjson", None)
+    else:
+        pytest.importorskip("orjson")
+    return str(request.param)
+
+
+def test_parse_coerces_declared_arguments_in_one_pass(parser: str) -> None:
+    context = {"name": 7, "count": " 12 ", "ratio": "0.5", "dry": "TRUE", "x": 1}
+    args = SCHEMA.parse(json.dumps({"arguments": context}))
+
+    assert args.values == {"name": "7", "count": 12, "ratio": 0.5, "dry": True}
+    assert args.invalid == frozenset()
+    assert (args.string("name"), args.integer("count")) == ("7", 12)
+    assert args.get("x") is None  # undeclared arguments are dropped
+
+
+@pytest.mark.parametrize(
+    ("count", "expected"),
+    [(3.0, 3), (None, None), ("", None)],
+)
+def test_integer_accepts_whole_numbers_and_absence(count: Any, expected: Any) -> None:
+    assert SCHEMA.parse({"arguments": {"count": count}}).integer("count") == expected
+
+
+@pytest.mark.parametrize("count", [True, 1.5, "ten", [1]])
+def test_integer_reports_invalid_values(count: Any) -> None:
+    args = SCHEMA.parse({"arguments": {"count": count}})
+    assert args.invalid == {"count"}
+    with pytest.raises(tool_args.InvalidArgument):
+        args.integer("count")
+
+
+def test_string_accessor_ignores_structured_values() -> None:
+    args = SCHEMA.parse({"arguments": {"name": ["a", "b"]}})
+    assert args.string("name") is None
+    assert args.get("name") == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    ("context", "message"),
+    [
+        ("not json", tool_args.INVALID_PAYLOAD),
+        ("[1, 2]", tool_args.INVALID_PAYLOAD),
+        (12345, tool_args.INVALID_PAYLOAD),
+        ('{"arguments": "x"}', tool_args.INVALID_ARGUMENTS),
+        ("{}", tool_args.INVALID_ARGUMENTS),
+    ],
+)
+def test_unusable_contexts_raise(parser: str, context: Any, message: str) -> None:
+    with pytest.raises(tool_args.ArgumentsError, match=message):
+        SCHEMA.parse(context)
+
+
+def test_optional_arguments_schema_tolerates_missing_arguments() -> None:
+    schema = tool_args.compile_schema(
+        tool_properties_get_snippets_object, arguments_required=False
+    )
+    assert schema.parse("{}").values == {}
+
+
+def test_loads_falls_back_to_stdlib_for_what_orjson_rejects(parser: str) -> None:
+    assert tool_args.loads('"\\ud800"') == "\ud800"
+    assert tool_args.loads("NaN") != tool_args.loads("NaN")
+    assert tool_args.loads(str(1 << 70)) == 1 << 70
+    with pytest.raises(json.JSONDecodeError):
+        tool_args.loads("{")
+
+
+def test_dumps_is_compact_whichever_encoder_is_installed(parser: str) -> None:
+    assert tool_args.dumps({"a": [1, "é"], "b": None}) == '{"a":[1,"é"],"b":null}'
+    assert tool_args.dumps({1: 1 << 70}) == '{"1":%d}' % (1 << 70)
+
+
+def test_boolean_accessor_reports_invalid_values() -> None:
+    assert SCHEMA.parse({"arguments": {"dry": "false"}}).boolean("dry") is False
+    assert SCHEMA.parse({"arguments": {}}).boolean("dry") is None
+    with pytest.raises(tool_args.InvalidArgument):
+        SCHEMA.parse({"arguments": {"dry": "yes"}}).boolean("dry")
+
+
+def test_compile_rejects_unknown_property_types() -> None:
+    with pytest.raises(ValueError, match="'blob'"):
+        tool_args.compile_schema([ToolProperty("x", "blob", "")])
+
+
+def test_tools_report_coercion_failures_with_their_own_messages() -> None:
+    assert get_snippet({"arguments": {"snippetname": "a", "offset": "x"}}) == (
+        "Invalid offset or length"
+    )
+    assert list_snippets({"arguments": {"limit": True}}) == "Invalid limit"
+    assert save_snippet('{"arguments": [1]}') == "Invalid arguments"
+    assert save_snippet("[]") == "Invalid request payload"
@@ -0,0 +1,223 @@
+import asyncio
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+from collections.abc import Iterator, Sequence
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+# Ensure the `src` package directory is importable when tests run from `src/`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fake_blob_storage import FakeBlobService
+
+from function_app import app
+from functions import (
+    abuseipdb_client,
+    rate_limiter,
+    snippet_cache,
+    tool_metrics,
+)
+from functions.get_snippet import get_snippet
+from functions.get_snippets import get_snippets
+from functions.save_snippets import save_snippets
+
+
+@pytest.fixture
+def metrics() -> Iterator[tool_metrics.MemoryExporter]:
+    exporter = tool_metrics.MemoryExporter()
+    tool_metrics.configure(exporter, interval=3600)
+    yield exporter
+    tool_metrics.configure()
+
+
+def _ctx(**arguments: Any) -> str:
+    return json.dumps({"arguments": arguments})
+
+
+def test_tool_samples_carry_latency_sizes_and_outcome(
+    metrics: tool_metrics.MemoryExporter, blob_service: FakeBlobService
+) -> None:
+    save_snippets(_ctx(snippets=json.dumps([{"snippetname": "a", "snippet": "é!"}])))
+    context = _ctx(snippetname="a")
+    reply = get_snippet(context)
+    get_snippet(_ctx(snippetname="missing"))
+    get_snippet(_ctx(snippetname="a", offset="x"))
+    tool_metrics.flush()
+
+    found, missing, invalid = metrics.tools("get_snippet")
+    assert reply == "é!"
+    assert (found.request_bytes, found.response_bytes) == (len(context), 3)
+    assert found.outcome == tool_metrics.OK and found.seconds > 0
+    assert found.dependency_calls >= 1
+    assert 0 < found.dependency_seconds <= found.seconds
+    assert (missing.outcome, invalid.outcome) == (
+        tool_metrics.NOT_FOUND,
+        tool_metrics.INVALID_REQUEST,
+    )
+
+
+def test_dependency_calls_on_batch_threads_count_towards_the_tool(
+    metrics: tool_metrics.MemoryExporter, blob_service: FakeBlobService
+) -> None:
+    names = [f"s{i}" for i in range(6)]
+    save_snippets(
+        _ctx(snippets=json.dumps([{"snippetname": n, "snippet": n} for n in names]))
+    )
+    snippet_cache.configure()
+    tool_metrics.flush()
+    metrics.clear()
+
+    get_snippets(_ctx(snippetnames=",".join(names)))
+    tool_metrics.flush()
+
+    (sample,) = metrics.tools("get_snippets")
+    calls = metrics.dependencies("blob", tool="get_snippets")
+    assert len(calls) == sample.dependency_calls >= len(names)
+    assert {call.operation for call in calls} >= {"get"}
+    assert metrics.dependencies() == calls
+
+
+@pytest.mark.parametrize(
+    ("reply", "outcome"),
+    [
+        ("Snippet 'x' saved successfully", tool_metrics.OK),
+        ('{"error": "x"}', tool_metrics.OK),
+        ("Error checking IP: boom", tool_metrics.DEPENDENCY_ERROR),
+        ("Invalid arguments", tool_metrics.INVALID_REQUEST),
+        ("No ip provided", tool_metrics.INVALID_REQUEST),
+        ("Too many snippets: 101 (max 100)", tool_metrics.INVALID_REQUEST),
+        ("Report 'abc' not found", tool_metrics.NOT_FOUND),
+    ],
+)
+def test_classify_follows_the_reply_conventions(reply: str, outcome: str) -> None:
+    assert tool_metrics.classify(reply) == outcome
+
+
+def test_exceptions_are_recorded_and_reraised(
+    metrics: tool_metrics.MemoryExporter,
+) -> None:
+    @tool_metrics.instrument
+    def broken(context: str) -> str:
+        raise RuntimeError("boom")
+
+    @tool_metrics.instrument
+    async def slow(context: str) -> str:
+        with tool_metrics.dependency("abuseipdb", "GET check") as call:
+            await asyncio.sleep(0.01)
+            call.status(503)
+        return "Error checking IP: 503"
+
+    with pytest.raises(RuntimeError):
+        broken("{}")
+    assert asyncio.run(slow("{}")) == "Error checking IP: 503"
+    tool_metrics.flush()
+
+    assert metrics.tools("broken")[0].outcome == tool_metrics.EXCEPTION
+    (sample,) = metrics.tools("slow")
+    (call,) = metrics.dependencies("abuseipdb")
+    assert sample.outcome == tool_metrics.DEPENDENCY_ERROR
+    assert (call.tool, call.result, call.success) == ("slow", "503", False)
+    assert sample.dependency_seconds == call.seconds >= 0.01
+
+
+def test_abuseipdb_requests_are_timed_per_endpoint(
+    metrics: tool_metrics.MemoryExporter,
+) -> None:
+    session = Mock()
+    session.request.return_value = Mock(status_code=429, headers={})
+    abuseipdb_client.configure(abuseipdb_client.ClientSettings(), session)
+    rate_limiter.configure()
+    try:
+        abuseipdb_client.request("GET", "check", params={"ipAddress": "192.0.2.1"})
+    finally:
+        abuseipdb_client.configure()
+        rate_limiter.configure()
+    tool_metrics.flush()
+
+    (call,) = metrics.dependencies("abuseipdb")
+    assert (call.operation, call.result, call.success, call.tool) == (
+        "GET check",
+        "429",
+        False,
+        None,
+    )
+
+
+def test_instrumented_handlers_keep_their_binding_signature() -> None:
+    # What the worker inspects to bind the trigger and output arguments.
+    (function,) = [
+        f for f in app.get_functions() if f.get_function_name() == "abuseipdb_report_ip"
+    ]
+    handler = function.get_user_function()
+    assert list(inspect.signature(handler).parameters) == ["context", "report_queue"]
+    assert inspect.iscoroutinefunction(handler)
+    assert handler.__name__ == "abuseipdb_report_ip"
+
+
+def test_nothing_is_recorded_when_metrics_are_off(
+    monkeypatch: pytest.MonkeyPatch, blob_service: FakeBlobService
+) -> None:
+    monkeypatch.delenv("TOOL_METRICS_EXPORTER", raising=False)
+    monkeypatch.delenv("APPLICATIONINSIGHTS_CONNECTION_STRING", raising=False)
+    tool_metrics.configure()
+
+    assert get_snippet(_ctx(snippetname="missing")) == "Snippet 'missing' not found"
+    assert tool_metrics.get_recorder() is None
+
+
+class _BatchLog:
+    def __init__(self) -> None:
+        self.batches: list[int] = []
+
+    def export(self, samples: Sequence[tool_metrics.Sample]) -> None:
+        self.batches.append(len(samples))
+
+
+def _sample(i: int) -> tool_metrics.ToolSample:
+    return tool_metrics.ToolSample(f"t{i}", 0.001, 1, 1, tool_metrics.OK)
+
+
+def test_recorder_exports_in_batches_and_bounds_its_buffer() -> None:
+    log = _BatchLog()
+    recorder = tool_metrics.Recorder(log, interval=3600, batch_size=2, max_pending=3)
+    recorder._thread = Mock()  # keep the export thread out of the test
+    for i in range(5):
+        recorder.record(_sample(i))
+    recorder.flush()
+
+    assert log.batches == [2, 1]
+    assert (recorder.recorded, recorder.dropped) == (5, 2)
+
+
+def test_background_thread_exports_once_a_batch_is_pending() -> None:
+    exporter = tool_metrics.MemoryExporter()
+    recorder = tool_metrics.Recorder(exporter, interval=3600, batch_size=3)
+    for i in range(3):
+        recorder.record(_sample(i))
+    deadline = time.monotonic() + 5
+    while len(exporter.samples) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    exported = len(exporter.samples)
+    recorder.shutdown()
+    assert exported == 3
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("opentelemetry") is not None,
+    reason="opentelemetry is installed",
+)
+def test_otel_exporter_without_opentelemetry_warns_once(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    exporter = tool_metrics.OTelExporter()
+    with caplog.at_level(logging.WARNING):
+        exporter.export([_sample(0)])
+        exporter.export([_sample(1)])
+    assert len([r for r in caplog.records if "opentelemetry" in r.message]) == 1